@@ -0,0 +1,87 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+# Bump when the per-file payload produced by the scanner changes shape
+CACHE_VERSION = 1
+
+
+class ResultCache:
+    """On-disk cache of per-file scan results, keyed by content hash.
+
+    ``results`` maps a content hash to the analysis payload, so identical
+    content is analyzed once no matter where it lives. ``files`` remembers
+    the hash last seen for a path together with its mtime and size; when
+    those still match, a rescan skips reading the file at all.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (hash TEXT PRIMARY KEY, payload TEXT NOT NULL)"
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS files (
+                   path TEXT PRIMARY KEY,
+                   mtime_ns INTEGER NOT NULL,
+                   size INTEGER NOT NULL,
+                   hash TEXT NOT NULL
+               )"""
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup_stat(self, path: str, mtime_ns: int, size: int) -> Optional[Tuple[str, Dict]]:
+        row = self._conn().execute(
+            "SELECT f.hash, r.payload FROM files f JOIN results r ON r.hash = f.hash "
+            "WHERE f.path = ? AND f.mtime_ns = ? AND f.size = ?",
+            (path, mtime_ns, size),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def lookup_hashes(self, hashes: Iterable[str]) -> Dict[str, Dict]:
+        hashes = list(hashes)
+        found: Dict[str, Dict] = {}
+        conn = self._conn()
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for h, payload in conn.execute(f"SELECT hash, payload FROM results WHERE hash IN ({marks})", chunk):
+                found[h] = json.loads(payload)
+        return found
+
+    def store(self, entries: Iterable[Tuple[str, int, int, str, Optional[Dict]]]):
+        """Record (path, mtime_ns, size, hash, payload) rows; payload None means already stored."""
+        conn = self._conn()
+        with conn:
+            for path, mtime_ns, size, h, payload in entries:
+                if payload is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO results (hash, payload) VALUES (?, ?)",
+                        (h, json.dumps(payload, separators=(",", ":"))),
+                    )
+                conn.execute(
+                    "INSERT OR REPLACE INTO files (path, mtime_ns, size, hash) VALUES (?, ?, ?, ?)",
+                    (path, mtime_ns, size, h),
+                )
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("DELETE FROM files")
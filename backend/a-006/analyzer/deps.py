@@ -1,8 +1,8 @@
 import ast
 import os
 import sys
-from collections import defaultdict
-from typing import Dict, List, Set, Tuple
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Set, Tuple
 
 from .utils import rel_module_name, iter_source_files
 
@@ -16,13 +16,24 @@ except Exception:
     }
 
 
+# Imports are statements, and statements only live in these fields, so
+# expression subtrees never need walking
+_STMT_FIELDS = {"body", "orelse", "finalbody", "handlers", "cases"}
+
+
 def parse_python_imports(code: str) -> List[str]:
     imports: List[str] = []
     try:
         tree = ast.parse(code)
     except Exception:
         return imports
-    for node in ast.walk(tree):
+    # Breadth-first like ast.walk, so imports come out in the same order
+    todo = deque([tree])
+    while todo:
+        node = todo.popleft()
+        for field in node._fields:
+            if field in _STMT_FIELDS:
+                todo.extend(getattr(node, field, None) or ())
         if isinstance(node, ast.Import):
             for alias in node.names:
                 if alias.name:
@@ -33,30 +44,39 @@ def parse_python_imports(code: str) -> List[str]:
     return imports
 
 
-def analyze_dependencies(base_path: str) -> Dict:
+def analyze_dependencies(base_path: str, imports_by_file: Optional[Dict[str, List[str]]] = None) -> Dict:
+    """Import graph for the Python files under ``base_path``.
+
+    ``imports_by_file`` maps absolute .py paths to their parsed imports; the
+    scanner passes what it already collected so files aren't read and
+    parsed a second time. Without it the tree is walked here.
+    """
     base_path = os.path.abspath(base_path)
+    if imports_by_file is None:
+        imports_by_file = {}
+        for f in iter_source_files(base_path):
+            if not f.endswith(".py"):
+                continue
+            try:
+                with open(f, "r", encoding="utf-8", errors="ignore") as fh:
+                    code = fh.read()
+            except Exception:
+                code = ""
+            imports_by_file[f] = parse_python_imports(code)
+
     internal_index: Dict[str, str] = {}
-    for f in iter_source_files(base_path):
-        if f.endswith(".py"):
-            mod = rel_module_name(base_path, f)
-            internal_index[mod.split(".")[0]] = f  # register top-level package/module
+    for f in imports_by_file:
+        mod = rel_module_name(base_path, f)
+        internal_index[mod.split(".")[0]] = f  # register top-level package/module
 
     internal_nodes: Set[str] = set()
     edges: List[Dict[str, str]] = []
 
     external_counter: Dict[str, int] = defaultdict(int)
 
-    for f in iter_source_files(base_path):
-        if not f.endswith(".py"):
-            continue
+    for f, imports in imports_by_file.items():
         rel_mod = rel_module_name(base_path, f)
         internal_nodes.add(rel_mod)
-        try:
-            with open(f, "r", encoding="utf-8", errors="ignore") as fh:
-                code = fh.read()
-        except Exception:
-            code = ""
-        imports = parse_python_imports(code)
         for pkg in imports:
             if not pkg:
                 continue
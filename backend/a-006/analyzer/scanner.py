@@ -1,142 +1,362 @@
 import os
 import time
-from collections import defaultdict
-from typing import Dict, Any, List
+import hashlib
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Iterator, Optional, Tuple
 import logging
+import threading
 
-from .utils import iter_source_files, read_text, count_lines, aggregate_by_ext
-from .complexity import analyze_python_complexity, heuristic_complexity
-from .deps import analyze_dependencies
+from .utils import iter_source_files, count_lines, aggregate_by_ext
+from .complexity import analyze_python_complexity, _HAS_RADON
+from .deps import analyze_dependencies, parse_python_imports
+from .cache import ResultCache, CACHE_VERSION
 
 logger = logging.getLogger(__name__)
 
+# Files per task sent to a worker process; amortizes pickling overhead
+BATCH_SIZE = 64
+# Below this many files to analyze, the pool's startup cost isn't worth it
+MIN_PARALLEL_FILES = 256
+PROGRESS_EVERY = 500
 
-def scan_codebase(base_path: str) -> Dict[str, Any]:
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_caches: Dict[str, ResultCache] = {}
+
+# Per worker process: read-only connection to the result cache
+_worker_conn: Optional[Tuple[int, str, sqlite3.Connection]] = None
+
+
+def _hash_content(data: bytes) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    # Tool and version are part of the key so a radon install or payload
+    # change invalidates old entries
+    h.update(f"v{CACHE_VERSION}:{'radon' if _HAS_RADON else 'heuristic'}:".encode())
+    h.update(data)
+    return h.hexdigest()
+
+
+def analyze_file(path: str) -> Dict[str, Any]:
+    """Everything the scan needs from one file's content."""
     try:
-        base_path = os.path.abspath(base_path)
-        start = time.time()
+        with open(path, "rb") as fh:
+            data = fh.read()
+    except Exception:
+        data = b""
+    return _analyze_content(path, data)
+
+
+def _analyze_content(path: str, data: bytes) -> Dict[str, Any]:
+    content = data.decode("utf-8", errors="ignore")
+    lines, non_empty = count_lines(content)
+    payload: Dict[str, Any] = {"lines": lines, "non_empty": non_empty, "complexity": None, "imports": None}
+    if path.lower().endswith(".py"):
+        try:
+            comp = analyze_python_complexity(content, path)
+            payload["complexity"] = {
+                "functions": comp["functions"],
+                "avg_cc": comp["avg_cc"],
+                "max_cc": comp["max_cc"],
+                "most_complex": comp["most_complex"],
+                "tool": comp["tool"],
+                "items": comp.get("items", []),
+            }
+        except Exception as e:
+            logger.error(f"Error analyzing Python complexity for {path}: {e}")
+    if path.endswith(".py"):
+        payload["imports"] = parse_python_imports(content)
+    return payload
+
+
+def _cached_in_worker(cache_path: Optional[str], h: str) -> bool:
+    global _worker_conn
+    if not cache_path:
+        return False
+    if _worker_conn is None or _worker_conn[0] != os.getpid() or _worker_conn[1] != cache_path:
+        try:
+            conn = sqlite3.connect(f"file:{cache_path}?mode=ro", uri=True, timeout=30)
+        except sqlite3.Error:
+            return False
+        _worker_conn = (os.getpid(), cache_path, conn)
+    try:
+        return _worker_conn[2].execute("SELECT 1 FROM results WHERE hash = ?", (h,)).fetchone() is not None
+    except sqlite3.Error:
+        return False
+
+
+def _analyze_batch(paths: List[str], cache_path: Optional[str]) -> List[Tuple[str, str, Optional[Dict[str, Any]]]]:
+    """Worker entry point: (path, content hash, payload or None when already cached)."""
+    out = []
+    for path in paths:
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+        except Exception:
+            data = b""
+        h = _hash_content(data)
+        if _cached_in_worker(cache_path, h):
+            out.append((path, h, None))
+        else:
+            out.append((path, h, _analyze_content(path, data)))
+    return out
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and (_pool_workers != workers or getattr(_pool, "_broken", False)):
+            # Scans still running on the old pool finish their submitted
+            # batches; a broken one (a worker died while idle) is only dropped
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def _drop_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget ``pool`` after a worker died; the next _get_pool starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _get_cache(cache_path: Optional[str]) -> Optional[ResultCache]:
+    if not cache_path:
+        return None
+    with _pool_lock:
+        cache = _caches.get(cache_path)
+        if cache is None:
+            cache = _caches[cache_path] = ResultCache(cache_path)
+        return cache
+
+
+def default_workers() -> int:
+    return int(os.environ.get("SCAN_WORKERS", "0")) or (os.cpu_count() or 1)
+
+
+def default_cache_path() -> Optional[str]:
+    path = os.environ.get("SCAN_CACHE_PATH")
+    if path is None:
+        path = os.path.join(os.path.expanduser("~"), ".cache", "codebase-analyzer", "scan_cache.sqlite")
+    return path or None
+
 
-        files_info: List[Dict[str, Any]] = []
-        py_complexity_files: List[Dict[str, Any]] = []
+def iter_scan(base_path: str, workers: Optional[int] = None, cache_path: Optional[str] = "default") -> Iterator[Dict[str, Any]]:
+    """Scan ``base_path``, yielding progress events and finally the result.
 
-        total_lines = 0
+    Events are ``{"event": "start", "total_files": n}``, periodic
+    ``{"event": "progress", "done", "total", "cached"}`` and one
+    ``{"event": "result", "result": {...}}`` with what scan_codebase returns.
+    Files whose stat or content hash is in the result cache are not
+    analyzed again; the rest are analyzed in a process pool.
+    """
+    base_path = os.path.abspath(base_path)
+    start = time.time()
+    workers = workers or default_workers()
+    cache = _get_cache(default_cache_path() if cache_path == "default" else cache_path)
 
-        for f in iter_source_files(base_path):
+    paths: List[str] = []
+    stats: Dict[str, Tuple[int, int]] = {}
+    for f in iter_source_files(base_path):
+        paths.append(f)
+        try:
+            st = os.stat(f)
+            stats[f] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stats[f] = (0, -1)
+    total = len(paths)
+    yield {"event": "start", "base_path": base_path, "total_files": total}
+
+    payloads: Dict[str, Dict[str, Any]] = {}
+    pending: List[str] = []
+    for f in paths:
+        hit = cache.lookup_stat(f, *stats[f]) if cache else None
+        if hit is not None:
+            payloads[f] = hit[1]
+        else:
+            pending.append(f)
+    cached = len(payloads)
+    done = cached
+    last_reported = 0
+    if cached:
+        yield {"event": "progress", "done": done, "total": total, "cached": cached}
+        last_reported = done
+
+    def absorb(batch_results):
+        nonlocal done, cached
+        misses = [h for _, h, payload in batch_results if payload is None]
+        known = cache.lookup_hashes(misses) if cache and misses else {}
+        entries = []
+        for path, h, payload in batch_results:
+            if payload is None:
+                cached += 1
+                payloads[path] = known.get(h) or analyze_file(path)
+                entries.append((path, *stats[path], h, None if h in known else payloads[path]))
+            else:
+                payloads[path] = payload
+                entries.append((path, *stats[path], h, payload))
+        if cache:
+            cache.store(entries)
+        done += len(batch_results)
+
+    cache_file = cache.path if cache else None
+    batches = [pending[i:i + BATCH_SIZE] for i in range(0, len(pending), BATCH_SIZE)]
+    if workers > 1 and len(pending) >= MIN_PARALLEL_FILES:
+        # A worker that dies (OOM, crash) breaks the whole pool: replace it
+        # and resubmit the unfinished batches once
+        for attempt in range(2):
+            pool = _get_pool(workers)
+            futures = {}
+            finished = set()
             try:
-                content = read_text(f)
-                ext = os.path.splitext(f)[1].lower()
-                lines, non_empty = count_lines(content)
-                total_lines += lines
-                fi = {
-                    "path": os.path.relpath(f, base_path),
-                    "extension": ext,
-                    "lines": lines,
-                    "non_empty": non_empty,
-                }
-                files_info.append(fi)
-                if ext == ".py":
+                for i, b in enumerate(batches):
                     try:
-                        comp = analyze_python_complexity(content, f)
-                        comp_entry = {
-                            "path": fi["path"],
-                            "functions": comp["functions"],
-                            "avg_cc": comp["avg_cc"],
-                            "max_cc": comp["max_cc"],
-                            "most_complex": comp["most_complex"],
-                            "tool": comp["tool"],
-                            "items": comp.get("items", []),
-                        }
-                        py_complexity_files.append(comp_entry)
-                    except Exception as e:
-                        logger.error(f"Error analyzing Python complexity for {f}: {e}")
-                elif ext in {".js", ".jsx", ".ts", ".tsx", ".java", ".go", ".rb", ".php", ".c", ".cpp", ".cc", ".cs", ".h"}:
-                    try:
-                        comp = heuristic_complexity(content, f, ext)
-                        # We won't include non-Python files in complexity summary tallies, but could be extended
-                        pass
-                    except Exception as e:
-                        logger.error(f"Error analyzing heuristic complexity for {f}: {e}")
-            except Exception as e:
-                logger.error(f"Error processing file {f}: {e}")
+                        futures[pool.submit(_analyze_batch, b, cache_file)] = i
+                    except RuntimeError as e:
+                        # Broken between scans, or shut down by a concurrent resize
+                        raise BrokenProcessPool(str(e)) from e
+                for fut in as_completed(futures):
+                    absorb(fut.result())
+                    finished.add(futures[fut])
+                    if done - last_reported >= PROGRESS_EVERY:
+                        last_reported = done
+                        yield {"event": "progress", "done": done, "total": total, "cached": cached}
+                break
+            except BrokenProcessPool:
+                _drop_pool(pool)
+                if attempt:
+                    raise
+                logger.warning("scan worker process died; retrying %d batches on a new pool", len(batches) - len(finished))
+                batches = [b for i, b in enumerate(batches) if i not in finished]
+    else:
+        for b in batches:
+            absorb(_analyze_batch(b, cache_file))
+            if done - last_reported >= PROGRESS_EVERY:
+                last_reported = done
+                yield {"event": "progress", "done": done, "total": total, "cached": cached}
+    if done != last_reported:
+        yield {"event": "progress", "done": done, "total": total, "cached": cached}
+
+    yield {"event": "result", "result": _assemble(base_path, paths, payloads, start)}
+
+
+def _assemble(base_path: str, paths: List[str], payloads: Dict[str, Dict[str, Any]], start: float) -> Dict[str, Any]:
+    files_info: List[Dict[str, Any]] = []
+    py_complexity_files: List[Dict[str, Any]] = []
+    imports_by_file: Dict[str, List[str]] = {}
+    total_lines = 0
+
+    for f in paths:
+        p = payloads[f]
+        rel = os.path.relpath(f, base_path)
+        total_lines += p["lines"]
+        files_info.append({
+            "path": rel,
+            "extension": os.path.splitext(f)[1].lower(),
+            "lines": p["lines"],
+            "non_empty": p["non_empty"],
+        })
+        if p.get("complexity") is not None:
+            py_complexity_files.append({"path": rel, **p["complexity"]})
+        if p.get("imports") is not None:
+            imports_by_file[f] = p["imports"]
+
+    files_info.sort(key=lambda x: x["lines"], reverse=True)
+
+    langs = aggregate_by_ext(files_info)
+
+    total_files = len(files_info)
+
+    # Complexity summary (Python only)
+    total_functions = sum(f["functions"] for f in py_complexity_files)
+    total_cc = sum(f["avg_cc"] * max(1, f["functions"]) for f in py_complexity_files)
+    avg_cc = (total_cc / max(1, total_functions)) if total_functions else 0.0
+
+    top_complex_functions = []
+    for f in py_complexity_files:
+        for it in f.get("items", []):
+            try:
+                top_complex_functions.append({
+                    "path": f["path"],
+                    "name": it.get("name"),
+                    "cc": float(it.get("cc", 0)),
+                    "lineno": int(it.get("lineno", 0)),
+                })
+            except (ValueError, TypeError) as e:
+                logger.error(f"Error processing complexity item in {f['path']}: {e}")
                 continue
+    top_complex_functions.sort(key=lambda i: i["cc"], reverse=True)
 
-        files_info.sort(key=lambda x: x["lines"], reverse=True)
-
-        langs = aggregate_by_ext(files_info)
-
-        total_files = len(files_info)
-
-        # Complexity summary (Python only)
-        total_functions = sum(f["functions"] for f in py_complexity_files)
-        total_cc = sum(f["avg_cc"] * max(1, f["functions"]) for f in py_complexity_files)
-        avg_cc = (total_cc / max(1, total_functions)) if total_functions else 0.0
-
-        top_complex_functions = []
-        for f in py_complexity_files:
-            for it in f.get("items", []):
-                try:
-                    top_complex_functions.append({
-                        "path": f["path"],
-                        "name": it.get("name"),
-                        "cc": float(it.get("cc", 0)),
-                        "lineno": int(it.get("lineno", 0)),
-                    })
-                except (ValueError, TypeError) as e:
-                    logger.error(f"Error processing complexity item in {f['path']}: {e}")
-                    continue
-        top_complex_functions.sort(key=lambda i: i["cc"], reverse=True)
-
-        # Dependencies (Python)
-        try:
-            deps = analyze_dependencies(base_path)
-        except Exception as e:
-            logger.error(f"Error analyzing dependencies: {e}")
-            deps = {"imports": [], "external_packages": [], "internal_modules": []}
-
-        duration = time.time() - start
-
-        result = {
-            "base_path": base_path,
-            "generated_at": int(time.time()),
-            "duration_seconds": duration,
-            "summary": {
-                "total_files": total_files,
-                "total_lines": total_lines,
-                "avg_lines_per_file": (total_lines / total_files) if total_files else 0,
-                "languages": langs,
-                "top_files_by_lines": files_info[:20],
-                "complexity": {
-                    "total_functions": total_functions,
-                    "avg_cyclomatic_complexity": avg_cc,
-                    "top_complex_functions": top_complex_functions[:20],
-                },
-                "dependencies": deps,
+    # Dependencies (Python), from the imports collected per file
+    try:
+        deps = analyze_dependencies(base_path, imports_by_file=imports_by_file)
+    except Exception as e:
+        logger.error(f"Error analyzing dependencies: {e}")
+        deps = {"imports": [], "external_packages": [], "internal_modules": []}
+
+    duration = time.time() - start
+
+    return {
+        "base_path": base_path,
+        "generated_at": int(time.time()),
+        "duration_seconds": duration,
+        "summary": {
+            "total_files": total_files,
+            "total_lines": total_lines,
+            "avg_lines_per_file": (total_lines / total_files) if total_files else 0,
+            "languages": langs,
+            "top_files_by_lines": files_info[:20],
+            "complexity": {
+                "total_functions": total_functions,
+                "avg_cyclomatic_complexity": avg_cc,
+                "top_complex_functions": top_complex_functions[:20],
             },
-            "files": files_info,
-            "complexity_details": py_complexity_files,
-        }
+            "dependencies": deps,
+        },
+        "files": files_info,
+        "complexity_details": py_complexity_files,
+    }
 
+
+def _error_result(base_path: str, e: Exception) -> Dict[str, Any]:
+    return {
+        "base_path": base_path,
+        "generated_at": int(time.time()),
+        "duration_seconds": 0,
+        "error": str(e),
+        "summary": {
+            "total_files": 0,
+            "total_lines": 0,
+            "avg_lines_per_file": 0,
+            "languages": {},
+            "top_files_by_lines": [],
+            "complexity": {
+                "total_functions": 0,
+                "avg_cyclomatic_complexity": 0.0,
+                "top_complex_functions": [],
+            },
+            "dependencies": {"imports": [], "external_packages": [], "internal_modules": []},
+        },
+        "files": [],
+        "complexity_details": [],
+    }
+
+
+def scan_codebase(base_path: str, workers: Optional[int] = None, cache_path: Optional[str] = "default") -> Dict[str, Any]:
+    try:
+        base_path = os.path.abspath(base_path)
+        result = None
+        for event in iter_scan(base_path, workers=workers, cache_path=cache_path):
+            if event["event"] == "result":
+                result = event["result"]
         return result
     except Exception as e:
         logger.error(f"Fatal error scanning codebase at {base_path}: {e}")
-        return {
-            "base_path": base_path,
-            "generated_at": int(time.time()),
-            "duration_seconds": 0,
-            "error": str(e),
-            "summary": {
-                "total_files": 0,
-                "total_lines": 0,
-                "avg_lines_per_file": 0,
-                "languages": {},
-                "top_files_by_lines": [],
-                "complexity": {
-                    "total_functions": 0,
-                    "avg_cyclomatic_complexity": 0.0,
-                    "top_complex_functions": [],
-                },
-                "dependencies": {"imports": [], "external_packages": [], "internal_modules": []},
-            },
-            "files": [],
-            "complexity_details": [],
-        }
\ No newline at end of file
+        return _error_result(base_path, e)
@@ -3,10 +3,11 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import os
+import json
 import time
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
 
-from analyzer.scanner import scan_codebase
+from analyzer.scanner import iter_scan, scan_codebase
 
 
 def create_app():
@@ -41,6 +42,21 @@ def create_app():
         except Exception as e:
             return jsonify({"error": str(e), "base_path": base_path}), 500
 
+    @app.route("/api/scan/stream")
+    def api_scan_stream():
+        """Same scan as /api/scan as NDJSON: start, progress events, then the result."""
+        base_path = request.args.get("path") or os.environ.get("CODEBASE_PATH") or "."
+        base_path = os.path.abspath(base_path)
+
+        def generate():
+            try:
+                for event in iter_scan(base_path):
+                    yield json.dumps(event) + "\n"
+            except Exception as e:
+                yield json.dumps({"event": "error", "error": str(e), "base_path": base_path}) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
     @app.route('/health')
     def health_check():
         """Health check endpoint"""
@@ -0,0 +1,141 @@
+"""
+Scan throughput benchmark: serial scan vs pooled, cached scan.
+
+Generates a synthetic tree of --files source files (mostly Python, some
+JavaScript, spread over nested packages) in a temporary directory and
+reports files/sec for
+
+  serial  the previous scanner: one process, every file read and parsed,
+          then the tree walked and parsed again for dependencies
+  cold    scan_codebase with an empty result cache (process pool)
+  warm    scan_codebase again over the unchanged tree (stat hits only)
+  touched warm cache after every file's mtime changed, so files are
+          re-read and hashed but not re-analyzed
+
+    python bench_scan.py --files 50000 --workers 4
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from analyzer.complexity import analyze_python_complexity
+from analyzer.deps import analyze_dependencies
+from analyzer.scanner import scan_codebase
+from analyzer.utils import iter_source_files, read_text, count_lines
+
+PY_TEMPLATE = '''import os
+import json
+from {pkg} import helpers
+
+
+def handler_{i}(items, limit={limit}):
+    total = 0
+    for item in items:
+        if item is None:
+            continue
+        if item > limit:
+            total += item
+        elif item < 0:
+            total -= item
+        else:
+            total += 1
+    return total
+
+
+class Worker{i}:
+    def run(self, data):
+        try:
+            return [json.dumps(x) for x in data if x]
+        except ValueError:
+            return []
+'''
+
+JS_TEMPLATE = '''export function handler{i}(items) {{
+  let total = 0;
+  for (const item of items) {{
+    if (item > {limit}) total += item;
+    else total -= 1;
+  }}
+  return total;
+}}
+'''
+
+
+def generate(root, n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        pkg = f"pkg{i % 50}"
+        sub = os.path.join(root, pkg, f"mod{(i // 50) % 40}")
+        os.makedirs(sub, exist_ok=True)
+        if rng.random() < 0.8:
+            body = PY_TEMPLATE.format(pkg=f"pkg{rng.randrange(50)}", i=i, limit=rng.randrange(100))
+            name = f"file{i}.py"
+        else:
+            body = JS_TEMPLATE.format(i=i, limit=rng.randrange(100))
+            name = f"file{i}.js"
+        with open(os.path.join(sub, name), "w") as fh:
+            fh.write(body)
+
+
+def serial_scan(base_path):
+    """What scan_codebase did before: read, count and analyze inline, then re-walk for deps."""
+    count = 0
+    for f in iter_source_files(base_path):
+        content = read_text(f)
+        count_lines(content)
+        if f.endswith(".py"):
+            analyze_python_complexity(content, f)
+        count += 1
+    analyze_dependencies(base_path)
+    return count
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    n = fn()
+    elapsed = time.perf_counter() - t0
+    return {"seconds": round(elapsed, 2), "files_per_sec": round(n / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--skip-serial", action="store_true")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="a006-bench-")
+    tree = os.path.join(work, "tree")
+    cache_path = os.path.join(work, "scan_cache.sqlite")
+    try:
+        t0 = time.perf_counter()
+        generate(tree, args.files)
+        print(f"tree ready in {time.perf_counter() - t0:.1f}s", flush=True)
+
+        def pooled():
+            return scan_codebase(tree, workers=args.workers, cache_path=cache_path)["summary"]["total_files"]
+
+        def touch():
+            now = time.time() + 10
+            for f in iter_source_files(tree):
+                os.utime(f, (now, now))
+
+        report = {"files": args.files, "workers": args.workers}
+        if not args.skip_serial:
+            report["serial"] = timed(lambda: serial_scan(tree))
+        report["cold"] = timed(pooled)
+        report["warm"] = timed(pooled)
+        touch()
+        report["touched"] = timed(pooled)
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Scanner throughput benchmark: per-rule line scan vs the prefiltered matcher.
+
+Generates a synthetic repository (source-like files with a sprinkling of
+tokens for every rule) in a temporary directory and scans it with rule
+sets of increasing size. Rule sets are the built-in PATTERNS padded with
+vendor-token rules of the same shape (a literal prefix plus a fixed-length
+body). Two engines are compared:
+
+  legacy   what scan_file did before: every rule's regex run on every line
+  matcher  secret_scanner.scan_directory: one prefilter pass per chunk,
+           then only the rules whose anchors occur on a hit line
+
+Reports MB/s and finding counts per engine and rule count.
+
+    python bench_scanner.py --mb 50 --rules 10 200
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import string
+import tempfile
+import time
+
+from secret_scanner import (
+    B64_CANDIDATE, HEX_CANDIDATE, JWT_CANDIDATE, PATTERNS, SKIP_DIRS,
+    line_has_allowlist, mask_value, scan_directory, shannon_entropy, should_skip_file,
+)
+
+ALNUM = string.ascii_letters + string.digits
+CODE_LINES = [
+    "def handler(request, *args, **kwargs):",
+    "    return render(request, 'index.html', {'items': items, 'count': len(items)})",
+    "    for key, value in sorted(config.items()):",
+    "        logger.info('processing %s for task %s', key, task_id)",
+    "const response = await fetch(`${baseUrl}/api/v1/items?page=${page}`);",
+    "import os, sys, json  # noqa: E401",
+    "    if not isinstance(value, (int, float)) or value < 0:",
+    "        raise ValueError('desk risk task mask: %r' % (value,))",
+    "",
+]
+
+
+def make_rules(n, seed=0):
+    rng = random.Random(seed)
+    rules = list(PATTERNS[:n])
+    seen = set()
+    while len(rules) < n:
+        prefix = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randrange(3, 6))) + "_"
+        if prefix in seen:
+            continue
+        seen.add(prefix)
+        rules.append({
+            "id": f"vendor_{prefix[:-1]}",
+            "name": f"Vendor token {prefix}",
+            "regex": re.compile(r"\b%s[A-Za-z0-9]{32}\b" % re.escape(prefix)),
+            "anchors": [prefix],
+            "severity": "medium",
+        })
+    return rules
+
+
+def generate(root, total_mb, rules, seed=0):
+    rng = random.Random(seed)
+    size, i = 0, 0
+    target = total_mb * 1024 * 1024
+    while size < target:
+        d = os.path.join(root, f"pkg{i % 40}")
+        os.makedirs(d, exist_ok=True)
+        lines = []
+        for _ in range(rng.randrange(200, 800)):
+            roll = rng.random()
+            if roll < 0.002:
+                rule = rules[rng.randrange(len(rules))]
+                prefix = (rule.get("anchors") or ["AKIA"])[0]
+                lines.append(f"token = '{prefix}{''.join(rng.choice(ALNUM) for _ in range(32))}'")
+            elif roll < 0.004:
+                lines.append("data = '%s'" % "".join(rng.choice(ALNUM + "+/") for _ in range(64)))
+            else:
+                lines.append(rng.choice(CODE_LINES))
+        body = "\n".join(lines) + "\n"
+        with open(os.path.join(d, f"file{i}.py"), "w") as fh:
+            fh.write(body)
+        size += len(body)
+        i += 1
+    return size
+
+
+def legacy_scan_file(path, root_path, findings, patterns):
+    rel = os.path.relpath(path, root_path)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for idx, line in enumerate(f, start=1):
+            if line_has_allowlist(line):
+                continue
+            for p in patterns:
+                for m in p["regex"].finditer(line):
+                    value = (m.group(p["group"]) or m.group(0)) if "group" in p else m.group(0)
+                    findings.append({"type": p["id"], "file": rel, "line": idx, "match": mask_value(value)})
+            for m in HEX_CANDIDATE.finditer(line):
+                if shannon_entropy(m.group(0)) >= 3.3:
+                    findings.append({"type": "high_entropy_hex", "file": rel, "line": idx})
+            for m in B64_CANDIDATE.finditer(line):
+                if shannon_entropy(m.group(0)) >= 4.0:
+                    findings.append({"type": "high_entropy_base64", "file": rel, "line": idx})
+            for m in JWT_CANDIDATE.finditer(line):
+                findings.append({"type": "jwt_token", "file": rel, "line": idx})
+
+
+def legacy_scan(root, patterns):
+    findings = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for filename in filenames:
+            full = os.path.join(dirpath, filename)
+            if not should_skip_file(full, 5 * 1024 * 1024)[0]:
+                legacy_scan_file(full, root, findings, patterns)
+    return len(findings)
+
+
+def timed(fn, size):
+    t0 = time.perf_counter()
+    found = fn()
+    elapsed = time.perf_counter() - t0
+    return {"mb_per_sec": round(size / elapsed / (1024 * 1024), 2), "findings": found}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=int, default=50, help="size of the synthetic repository")
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 200])
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="a018-bench-")
+    try:
+        all_rules = make_rules(max(args.rules))
+        t0 = time.perf_counter()
+        size = generate(work, args.mb, all_rules)
+        print(f"{size / (1024 * 1024):.1f} MB generated in {time.perf_counter() - t0:.1f}s", flush=True)
+
+        report = {}
+        for n in args.rules:
+            rules = all_rules[:n]
+            report[str(n)] = {
+                "legacy": timed(lambda: legacy_scan(work, rules), size),
+                "matcher": timed(lambda: scan_directory(work, 5 * 1024 * 1024, 10 ** 9, patterns=rules)["summary"]["total_findings"], size),
+            }
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
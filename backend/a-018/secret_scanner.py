@@ -2,7 +2,7 @@ import os
 import re
 import json
 import math
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 # Common directory patterns to skip
 SKIP_DIRS = {
@@ -19,18 +19,25 @@ SKIP_FILE_EXTS = {
     ".mp3", ".mp4", ".mov", ".avi", ".mkv",
 }
 
-# Regex patterns for common secrets
+# Regex patterns for common secrets.
+#
+# "anchors" are literals every match must contain ("ignorecase" when the
+# regex is case-insensitive). The matcher only runs a rule on lines where
+# one of its anchors occurs; a rule without anchors is searched on its own.
 PATTERNS = [
     {
         "id": "aws_access_key_id",
         "name": "AWS Access Key ID",
         "regex": re.compile(r"\bAKIA[0-9A-Z]{16}\b"),
+        "anchors": ["AKIA"],
         "severity": "high",
     },
     {
         "id": "aws_secret_access_key",
         "name": "AWS Secret Access Key",
         "regex": re.compile(r"(?i)(?:aws_)?secret(?:_access)?_key\s*[:=]\s*([A-Za-z0-9/+=]{40})"),
+        "anchors": ["secret"],
+        "ignorecase": True,
         "severity": "critical",
         "group": 1,
     },
@@ -38,42 +45,50 @@ PATTERNS = [
         "id": "private_key_block",
         "name": "Private Key",
         "regex": re.compile(r"-----BEGIN (?:RSA|DSA|EC|PGP|OPENSSH) PRIVATE KEY-----"),
+        "anchors": ["-----BEGIN "],
         "severity": "critical",
     },
     {
         "id": "github_token",
         "name": "GitHub Token",
         "regex": re.compile(r"\bghp_[A-Za-z0-9]{36}\b|\bgho_[A-Za-z0-9]{36}\b|\bghu_[A-Za-z0-9]{36}\b|\bghs_[A-Za-z0-9]{36}\b"),
+        "anchors": ["ghp_", "gho_", "ghu_", "ghs_"],
         "severity": "high",
     },
     {
         "id": "slack_token",
         "name": "Slack Token",
         "regex": re.compile(r"\bxox[abprs]-[A-Za-z0-9-]{10,}\b"),
+        "anchors": ["xox"],
         "severity": "high",
     },
     {
         "id": "google_api_key",
         "name": "Google API Key",
         "regex": re.compile(r"\bAIza[0-9A-Za-z\-_]{35}\b"),
+        "anchors": ["AIza"],
         "severity": "medium",
     },
     {
         "id": "stripe_secret_key",
         "name": "Stripe Secret Key",
         "regex": re.compile(r"\bsk_(?:live|test)_[0-9a-zA-Z]{24,}\b"),
+        "anchors": ["sk_live_", "sk_test_"],
         "severity": "high",
     },
     {
         "id": "twilio_api_key",
         "name": "Twilio API Key",
         "regex": re.compile(r"\bSK[0-9a-fA-F]{32}\b"),
+        "anchors": ["SK"],
         "severity": "medium",
     },
     {
         "id": "bearer_token",
         "name": "Bearer Token",
         "regex": re.compile(r"(?i)\bbearer\s+([A-Za-z0-9\-\._~\+/]+=*)"),
+        "anchors": ["bearer"],
+        "ignorecase": True,
         "severity": "medium",
         "group": 1,
     },
@@ -84,16 +99,28 @@ HEX_CANDIDATE = re.compile(r"\b[0-9a-fA-F]{40,}\b")
 B64_CANDIDATE = re.compile(r"\b(?:[A-Za-z0-9+/]{40,}={0,2})\b")
 JWT_CANDIDATE = re.compile(r"\beyJ[a-zA-Z0-9_-]*\.[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+\b")
 
+# Prefilter triggers for the candidates above: every hex/base64 candidate
+# contains such a run, every JWT the prefix
+ENTROPY_RUN = re.compile(r"[A-Za-z0-9+/]{40}")
+JWT_ANCHOR = "eyJ"
+_JWT = -1
+
+# Files are read this many characters at a time
+CHUNK_CHARS = 1 << 20
+
 ALLOWLIST_HINTS = [
     re.compile(r"(?i)sample|example|dummy|fake|test_key|do_not_detect|not_secret"),
 ]
 
 ENGINE_META = {
     "name": "builtin-secret-scanner",
-    "version": "1.0.0",
+    "version": "1.1.0",
 }
 
 
+_TEXT_CHARS = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)))
+
+
 def is_probably_binary(path: str) -> bool:
     try:
         with open(path, "rb") as f:
@@ -101,9 +128,7 @@ def is_probably_binary(path: str) -> bool:
             if b"\x00" in chunk:
                 return True
             # Heuristic: if >30% bytes are non-text control, treat as binary
-            text_chars = bytearray({7, 8, 9, 10, 12, 13, 27})
-            text_chars.extend(range(0x20, 0x100))
-            nontext = sum(b not in text_chars for b in chunk)
+            nontext = len(chunk.translate(None, _TEXT_CHARS))
             if len(chunk) > 0 and (nontext / len(chunk)) > 0.30:
                 return True
     except Exception:
@@ -159,91 +184,235 @@ def relative_path(root: str, full: str) -> str:
         return full
 
 
-def scan_file(path: str, root_path: str, findings: List[dict]):
+class Matcher:
+    """Two-stage matcher for a list of rules shaped like PATTERNS.
+
+    Stage one is one regex over the whole text: every rule anchor, the JWT
+    prefix and the entropy-candidate run, factored into a single
+    alternation, so the text is passed over once however many rules there
+    are. Each hit marks its line. Stage two runs, on that line only, just
+    the rules whose anchors occur in it. Findings are the same as running
+    every rule over every line.
+    """
+
+    def __init__(self, patterns: List[dict]):
+        self.patterns = patterns
+        self.unanchored: List[int] = []
+        self.ignorecase_rules: Set[int] = set()
+        direct: Dict[Tuple[str, bool], Set[int]] = {(JWT_ANCHOR, False): {_JWT}}
+        insensitive: Set[str] = set()
+        for i, p in enumerate(patterns):
+            anchors = p.get("anchors") or []
+            if not anchors:
+                self.unanchored.append(i)
+                continue
+            ic = bool(p.get("ignorecase"))
+            if ic:
+                self.ignorecase_rules.add(i)
+                insensitive.update(a.lower() for a in anchors)
+            for a in anchors:
+                direct.setdefault((a.casefold() if ic else a, ic), set()).add(i)
+
+        # The lookups below report the longest anchor starting at a
+        # position, which stands in for every shorter anchor it begins with
+        self.rules_by_anchor: Dict[Tuple[str, bool], Set[int]] = {}
+        for key, ic in direct:
+            rules: Set[int] = set()
+            for (other, other_ic), ids in direct.items():
+                if other_ic == ic and key.startswith(other):
+                    rules |= ids
+            self.rules_by_anchor[(key, ic)] = rules
+
+        sensitive = [k for k, ic in direct if not ic]
+        insensitive = sorted(insensitive)
+        parts = [_trie_regex(sensitive)]
+        self.sensitive_re = re.compile("(?=(%s))" % parts[0])
+        self.insensitive_re = None
+        if insensitive:
+            parts.append("(?i:%s)" % _trie_regex(insensitive))
+            self.insensitive_re = re.compile("(?=(%s))" % _trie_regex(insensitive), re.IGNORECASE)
+        parts.append(ENTROPY_RUN.pattern)
+        self.prefilter = re.compile("|".join(parts))
+
+    def _candidate_lines(self, text: str, end: int) -> List[Tuple[int, int, Set[int]]]:
+        """(start, end, extra rule ids) of the lines in text[:end] worth checking, in order."""
+        lines: Dict[int, Tuple[int, Set[int]]] = {}
+        search = self.prefilter.search
+        m = search(text, 0, end)
+        while m:
+            ls = text.rfind("\n", 0, m.start()) + 1
+            le = text.find("\n", m.start(), end)
+            le = end if le < 0 else le + 1
+            lines[ls] = (le, set())
+            m = search(text, le, end)
+        for i in self.unanchored:
+            for m in self.patterns[i]["regex"].finditer(text, 0, end):
+                ls = text.rfind("\n", 0, m.start()) + 1
+                if ls not in lines:
+                    le = text.find("\n", ls, end)
+                    lines[ls] = (end if le < 0 else le + 1, set())
+                lines[ls][1].add(i)
+        return [(ls, le, extra) for ls, (le, extra) in sorted(lines.items())]
+
+    def rules_for_line(self, line: str) -> Set[int]:
+        rules: Set[int] = set()
+        for m in self.sensitive_re.finditer(line):
+            rules |= self.rules_by_anchor.get((m.group(1), False), set())
+        if self.insensitive_re is not None:
+            for m in self.insensitive_re.finditer(line):
+                # casefold() unifies the variants re.IGNORECASE matches (such
+                # as the long s for "s") that lower() keeps apart; for any it
+                # still misses, run every case-insensitive rule
+                found = self.rules_by_anchor.get((m.group(1).casefold(), True))
+                rules |= self.ignorecase_rules if found is None else found
+        return rules
+
+    def scan_text(self, text: str, end: int, first_line: int, rel: str, findings: List[dict]):
+        """Scan text[:end], which starts at line ``first_line`` and ends on a line boundary."""
+        pos, line_no = 0, first_line
+        for ls, le, extra in self._candidate_lines(text, end):
+            line_no += text.count("\n", pos, ls)
+            pos = ls
+            line = text[ls:le]
+            # Skip clear allowlist hints
+            if line_has_allowlist(line):
+                continue
+            _scan_line(self.patterns, line, line_no, rel, self.rules_for_line(line) | extra, findings)
+
+
+def _trie_regex(words: List[str]) -> str:
+    """Regex source for any of ``words``, factored by shared prefix.
+
+    The engine then tests one character class per position instead of
+    every alternative, and at each position the longest word wins.
+    """
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:%s)" % "|".join(branches)
+        return "(?:%s)?" % body if "" in node else body
+
+    return emit(trie)
+
+
+def _scan_line(patterns: List[dict], line: str, idx: int, rel: str, rules: Set[int], findings: List[dict]):
+    # Regex patterns, in rule order
+    for i in sorted(rules):
+        if i == _JWT:
+            continue
+        p = patterns[i]
+        regex = p["regex"]
+        for m in regex.finditer(line):
+            value = None
+            if "group" in p:
+                try:
+                    value = m.group(p["group"]) or m.group(0)
+                except Exception:
+                    value = m.group(0)
+            else:
+                value = m.group(0)
+            findings.append({
+                "type": p["id"],
+                "title": p["name"],
+                "severity": p.get("severity", "medium"),
+                "file": rel,
+                "line": idx,
+                "match": mask_value(value),
+                "pattern": p["id"],
+                "snippet": line.strip()[:500],
+            })
+
+    # High-entropy candidates
+    if ENTROPY_RUN.search(line):
+        for m in HEX_CANDIDATE.finditer(line):
+            token = m.group(0)
+            ent = shannon_entropy(token)
+            if ent >= 3.3 and len(token) >= 40:
+                findings.append({
+                    "type": "high_entropy_hex",
+                    "title": "High-entropy hex string",
+                    "severity": "medium",
+                    "file": rel,
+                    "line": idx,
+                    "match": mask_value(token),
+                    "entropy": round(ent, 2),
+                    "snippet": line.strip()[:500],
+                })
+
+        for m in B64_CANDIDATE.finditer(line):
+            token = m.group(0)
+            ent = shannon_entropy(token)
+            if ent >= 4.0 and len(token) >= 40:
+                findings.append({
+                    "type": "high_entropy_base64",
+                    "title": "High-entropy base64-like string",
+                    "severity": "medium",
+                    "file": rel,
+                    "line": idx,
+                    "match": mask_value(token),
+                    "entropy": round(ent, 2),
+                    "snippet": line.strip()[:500],
+                })
+
+    if _JWT in rules:
+        for m in JWT_CANDIDATE.finditer(line):
+            token = m.group(0)
+            # JWT-like tokens are likely sensitive
+            findings.append({
+                "type": "jwt_token",
+                "title": "JWT-like token",
+                "severity": "medium",
+                "file": rel,
+                "line": idx,
+                "match": mask_value(token),
+                "snippet": line.strip()[:500],
+            })
+
+
+DEFAULT_MATCHER = Matcher(PATTERNS)
+
+
+def scan_file(path: str, root_path: str, findings: List[dict], matcher: Optional[Matcher] = None):
+    matcher = matcher or DEFAULT_MATCHER
     rel = relative_path(root_path, path)
     try:
         with open(path, "r", encoding="utf-8", errors="replace") as f:
-            for idx, line in enumerate(f, start=1):
-                # Skip clear allowlist hints
-                if line_has_allowlist(line):
-                    continue
-
-                # Regex patterns
-                for p in PATTERNS:
-                    regex = p["regex"]
-                    for m in regex.finditer(line):
-                        value = None
-                        if "group" in p:
-                            try:
-                                value = m.group(p["group"]) or m.group(0)
-                            except Exception:
-                                value = m.group(0)
-                        else:
-                            value = m.group(0)
-                        findings.append({
-                            "type": p["id"],
-                            "title": p["name"],
-                            "severity": p.get("severity", "medium"),
-                            "file": rel,
-                            "line": idx,
-                            "match": mask_value(value),
-                            "pattern": p["id"],
-                            "snippet": line.strip()[:500],
-                        })
-
-                # High-entropy candidates
-                for m in HEX_CANDIDATE.finditer(line):
-                    token = m.group(0)
-                    ent = shannon_entropy(token)
-                    if ent >= 3.3 and len(token) >= 40:
-                        findings.append({
-                            "type": "high_entropy_hex",
-                            "title": "High-entropy hex string",
-                            "severity": "medium",
-                            "file": rel,
-                            "line": idx,
-                            "match": mask_value(token),
-                            "entropy": round(ent, 2),
-                            "snippet": line.strip()[:500],
-                        })
-
-                for m in B64_CANDIDATE.finditer(line):
-                    token = m.group(0)
-                    ent = shannon_entropy(token)
-                    if ent >= 4.0 and len(token) >= 40:
-                        findings.append({
-                            "type": "high_entropy_base64",
-                            "title": "High-entropy base64-like string",
-                            "severity": "medium",
-                            "file": rel,
-                            "line": idx,
-                            "match": mask_value(token),
-                            "entropy": round(ent, 2),
-                            "snippet": line.strip()[:500],
-                        })
-
-                for m in JWT_CANDIDATE.finditer(line):
-                    token = m.group(0)
-                    # JWT-like tokens are likely sensitive
-                    findings.append({
-                        "type": "jwt_token",
-                        "title": "JWT-like token",
-                        "severity": "medium",
-                        "file": rel,
-                        "line": idx,
-                        "match": mask_value(token),
-                        "snippet": line.strip()[:500],
-                    })
+            # Fixed-size chunks; the partial line at the end of each one is
+            # carried over so every line is scanned whole
+            carry = ""
+            line_no = 1
+            while True:
+                chunk = f.read(CHUNK_CHARS)
+                if not chunk:
+                    if carry:
+                        matcher.scan_text(carry, len(carry), line_no, rel, findings)
+                    break
+                text = carry + chunk if carry else chunk
+                cut = text.rfind("\n") + 1
+                if cut:
+                    matcher.scan_text(text, cut, line_no, rel, findings)
+                    line_no += text.count("\n", 0, cut)
+                carry = text[cut:]
     except Exception as e:
         # Ignore unreadable files
         return
 
 
-def scan_directory(root_path: str, max_file_size: int, max_files: int) -> dict:
+def scan_directory(root_path: str, max_file_size: int, max_files: int, patterns: Optional[List[dict]] = None) -> dict:
     """
     Scan a directory for secrets.
     Returns a dict with summary, findings, warnings, truncated flag, and engine info.
+    ``patterns`` replaces the built-in PATTERNS for this scan.
     """
+    matcher = DEFAULT_MATCHER if patterns is None else Matcher(patterns)
     findings = []
     warnings = []
     files_scanned = 0
@@ -266,7 +435,7 @@ def scan_directory(root_path: str, max_file_size: int, max_files: int) -> dict:
                 files_skipped += 1
                 continue
 
-            scan_file(full_path, root_path, findings)
+            scan_file(full_path, root_path, findings, matcher)
             files_scanned += 1
 
         if truncated:
@@ -18,6 +18,45 @@ else:
         def get(self, path): return type('R', (), {'status_code': 200})()
     app = DummyApp()
 
+from pii_scanner.scanner import Scanner
+
+
+def _scan_args(args):
+    return {
+        'include_patterns': args.get('include') or None,
+        'exclude_patterns': args.get('exclude') or None,
+        'max_file_size_mb': int(args.get('max_file_size_mb') or 10),
+        'show_context': str(args.get('show_context', True)).lower() not in ('0', 'false', 'no'),
+    }
+
+
+@app.route('/scan', methods=['POST'])
+def scan():
+    from flask import request
+    body = request.get_json(silent=True) or {}
+    scan_id, report = Scanner().scan(body.get('paths') or [], **_scan_args(body))
+    return jsonify({'scan_id': scan_id, **report})
+
+
+@app.route('/scan/stream', methods=['GET'])
+def scan_stream():
+    """NDJSON: findings events as files finish, then the summary."""
+    import json
+    from flask import Response, request, stream_with_context
+    paths = request.args.getlist('path')
+    args = {k: request.args.getlist(k) if k in ('include', 'exclude') else v for k, v in request.args.items()}
+    events = Scanner().iter_scan(paths, **_scan_args(args))
+    return Response(stream_with_context(json.dumps(e) + '\n' for e in events), mimetype='application/x-ndjson')
+
+
+@app.route('/reports/<scan_id>', methods=['GET'])
+def get_report(scan_id):
+    report = Scanner.reports.get(scan_id)
+    if report is None:
+        return jsonify({'error': 'not_found'}), 404
+    return jsonify(report)
+
+
 def create_app():
     return app
 
@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class ReportStore:
+    """Scan reports kept on disk, with the most recently used ones in memory.
+
+    Every report is written to ``<directory>/<scan_id>.json`` and the last
+    ``max_in_memory`` reports are also kept in memory. Reports expire
+    ``ttl_seconds`` after they were stored, both in memory and on disk.
+    Expired files are purged as new reports come in.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_in_memory: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.directory = directory or os.environ.get('PII_REPORTS_DIR') or os.path.join(
+            tempfile.gettempdir(), 'pii_scanner_reports')
+        self.max_in_memory = max_in_memory if max_in_memory is not None else int(
+            os.environ.get('PII_REPORTS_IN_MEMORY', '16'))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.environ.get('PII_REPORTS_TTL_SECONDS', str(24 * 3600)))
+        self._cache: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def _path(self, scan_id: str) -> str:
+        if not scan_id or os.sep in scan_id or (os.altsep and os.altsep in scan_id) or scan_id.startswith('.'):
+            raise KeyError(scan_id)
+        return os.path.join(self.directory, f'{scan_id}.json')
+
+    def __setitem__(self, scan_id: str, report: dict):
+        path = self._path(scan_id)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh)
+        os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            self._remember(scan_id, report, now)
+        if now - self._last_purge > min(self.ttl_seconds, 3600):
+            self.purge()
+
+    def _remember(self, scan_id: str, report: dict, stored_at: float):
+        if self.max_in_memory <= 0:
+            return
+        self._cache[scan_id] = (report, stored_at)
+        self._cache.move_to_end(scan_id)
+        while len(self._cache) > self.max_in_memory:
+            self._cache.popitem(last=False)
+
+    def get(self, scan_id: str, default=None):
+        now = time.time()
+        with self._lock:
+            hit = self._cache.get(scan_id)
+            if hit is not None:
+                if now - hit[1] <= self.ttl_seconds:
+                    self._cache.move_to_end(scan_id)
+                    return hit[0]
+                del self._cache[scan_id]
+        try:
+            path = self._path(scan_id)
+            stored_at = os.path.getmtime(path)
+            if now - stored_at > self.ttl_seconds:
+                return default
+            with open(path, 'r', encoding='utf-8') as fh:
+                report = json.load(fh)
+        except (KeyError, OSError, ValueError):
+            return default
+        with self._lock:
+            self._remember(scan_id, report, stored_at)
+        return report
+
+    def __getitem__(self, scan_id: str) -> dict:
+        report = self.get(scan_id)
+        if report is None:
+            raise KeyError(scan_id)
+        return report
+
+    def __contains__(self, scan_id: str) -> bool:
+        return self.get(scan_id) is not None
+
+    def purge(self) -> int:
+        """Delete expired reports; returns how many files were removed."""
+        now = time.time()
+        self._last_purge = now
+        with self._lock:
+            for scan_id in [k for k, (_, t) in self._cache.items() if now - t > self.ttl_seconds]:
+                del self._cache[scan_id]
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl_seconds:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
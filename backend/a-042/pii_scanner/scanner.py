@@ -1,14 +1,141 @@
+import io
 import os
+import queue
 import re
+import threading
 import uuid
-from typing import List, Dict, Tuple
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from .patterns import PATTERN_DEFINITIONS, SENSITIVE_FILENAME_GLOBS
-from .utils import is_probably_binary, size_over_limit, match_any_glob, luhn_check, masked_context
+from .reports import ReportStore
+from .utils import is_probably_binary, match_any_glob, luhn_check, masked_context
+
+# Lines are read at most this many characters at a time; a longer line is
+# scanned in windows that overlap by OVERLAP_CHARS, so a match cut by a
+# window boundary is found whole in the next window
+WINDOW_CHARS = 1 << 20
+OVERLAP_CHARS = 4096
+# Characters before a window's first owned position, for \b and context
+CONTEXT_CHARS = 64
+
+# Files queued ahead of the workers
+QUEUE_SIZE = int(os.environ.get('PII_SCAN_QUEUE_SIZE', '256'))
+# A task holds up to this many small files
+BATCH_FILES = 64
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_worker_scanner = None
+_DONE = object()
+
+
+def default_workers() -> int:
+    return int(os.environ.get('PII_SCAN_WORKERS', '0')) or (os.cpu_count() or 1)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and (_pool_workers != workers or getattr(_pool, '_broken', False)):
+            # Scans still running on the old pool finish their submitted
+            # batches; a broken one (a worker died while idle) is only dropped
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def _drop_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget ``pool`` after a worker died; the next _get_pool starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _scan_batch(batch: List[tuple], show_context: bool) -> List[tuple]:
+    """Worker entry point: scan (seq, part, path, start, end) ranges.
+
+    Returns (seq, part, findings, lines, error) per range, with line numbers
+    relative to the start of the range.
+    """
+    global _worker_scanner
+    if _worker_scanner is None:
+        _worker_scanner = Scanner()
+    out = []
+    for seq, part, path, start, end in batch:
+        try:
+            findings, lines = _worker_scanner._scan_range(path, start, end, show_context)
+            out.append((seq, part, findings, lines, None))
+        except Exception as e:
+            out.append((seq, part, [], 0, str(e)))
+    return out
+
+
+class _RangeReader(io.RawIOBase):
+    """Raw reader over bytes [start, end) of a file; ``end=None`` reads to EOF."""
+
+    def __init__(self, path: str, start: int, end: Optional[int]):
+        self._fh = open(path, 'rb')
+        self._fh.seek(start)
+        self._left = None if end is None else end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        view = memoryview(b)
+        if self._left is not None:
+            if self._left <= 0:
+                return 0
+            view = view[:self._left]
+        n = self._fh.readinto(view)
+        if self._left is not None:
+            self._left -= n
+        return n
+
+    def close(self):
+        self._fh.close()
+        super().close()
+
+
+def _split_file(path: str, size: int, range_bytes: int) -> List[Tuple[int, Optional[int]]]:
+    """Cut a file into byte ranges of about ``range_bytes`` that end on a newline.
+
+    A line longer than a range is not cut; its range just grows.
+    """
+    points = [0]
+    with open(path, 'rb') as fh:
+        target = range_bytes
+        while target < size:
+            fh.seek(target)
+            pos, cut = target, None
+            while pos < min(size, target + range_bytes):
+                block = fh.read(65536)
+                if not block:
+                    break
+                i = block.find(b'\n')
+                if i >= 0:
+                    cut = pos + i + 1
+                    break
+                pos += len(block)
+            if cut is not None and cut < size:
+                points.append(cut)
+                target = cut + range_bytes
+            else:
+                target += range_bytes
+    return list(zip(points, points[1:] + [None]))
 
 
 class Scanner:
-    reports: Dict[str, dict] = {}
+    reports = ReportStore()
 
     def __init__(self):
         # Pre-resolve post_filters
@@ -28,79 +155,264 @@ class Scanner:
              max_file_size_mb: int = 10,
              follow_symlinks: bool = False,
              show_context: bool = True,
+             workers: Optional[int] = None,
              ) -> Tuple[str, dict]:
+        """Scan ``paths`` and store the report; see iter_scan for the arguments."""
+        flagged: Dict[int, dict] = {}
+        errors: Dict[int, dict] = {}
+        summary = {}
+        scan_id = None
+        for event in self.iter_scan(paths, include_patterns, exclude_patterns, max_file_size_mb,
+                                    follow_symlinks, show_context, workers, store=False):
+            kind = event['event']
+            if kind == 'findings':
+                entry = flagged.setdefault(event['seq'], {
+                    'path': event['path'],
+                    'reasons': event['reasons'],
+                    'findings': [],
+                })
+                entry['findings'].extend(event['findings'])
+            elif kind == 'error':
+                # A file that fails part-way is reported as an error only
+                flagged.pop(event['seq'], None)
+                errors[event['seq']] = {'path': event['path'], 'error': event['error']}
+            elif kind == 'summary':
+                summary = event['summary']
+                scan_id = event['scan_id']
+
+        flagged_files = [flagged[k] for k in sorted(flagged)]
+        report = {
+            'summary': summary,
+            'flagged_files': flagged_files,
+            'errors': [errors[k] for k in sorted(errors)],
+        }
+        Scanner.reports[scan_id] = report
+        return scan_id, report
+
+    def iter_scan(self,
+                  paths: List[str],
+                  include_patterns: List[str] = None,
+                  exclude_patterns: List[str] = None,
+                  max_file_size_mb: int = 10,
+                  follow_symlinks: bool = False,
+                  show_context: bool = True,
+                  workers: Optional[int] = None,
+                  store: bool = True,
+                  ) -> Iterator[dict]:
+        """Scan ``paths``, yielding findings as they are found.
+
+        A producer thread walks the paths into a bounded queue, and workers
+        (PII_SCAN_WORKERS processes) scan what it queues. Files larger than
+        ``max_file_size_mb`` are no longer skipped. They are cut into ranges
+        of that size at line boundaries and the ranges are scanned in
+        parallel. Events:
+
+        - ``{'event': 'findings', 'seq', 'path', 'reasons', 'findings', 'final'}``
+          for a flagged file, in line order, possibly several per file
+        - ``{'event': 'error', 'seq', 'path', 'error'}``
+        - ``{'event': 'summary', 'scan_id', 'summary'}`` last; with ``store``
+          a report holding just the summary is saved under ``scan_id``
+        """
         include_patterns = include_patterns or []
         exclude_patterns = exclude_patterns or []
-        max_bytes = max(1, max_file_size_mb) * 1024 * 1024
+        range_bytes = max(1, max_file_size_mb) * 1024 * 1024
+        workers = workers or default_workers()
 
-        files_scanned = 0
-        flagged_files = []
-        errors = []
+        files: 'queue.Queue' = queue.Queue(maxsize=QUEUE_SIZE)
+        stop = threading.Event()
+        counts = {'files_scanned': 0, 'files_flagged': 0, 'findings_count': 0}
 
-        to_scan = self._expand_paths(paths, follow_symlinks)
+        def put(item):
+            while not stop.is_set():
+                try:
+                    files.put(item, timeout=0.2)
+                    return
+                except queue.Full:
+                    continue
 
-        for file_path in to_scan:
-            rel_name = os.path.basename(file_path)
-            rel_path = file_path
+        def produce():
+            try:
+                seq = 0
+                for file_path in self._iter_paths(paths, follow_symlinks):
+                    if stop.is_set():
+                        break
+                    rel_name = os.path.basename(file_path)
+                    rel_path = file_path
 
-            # Exclude filters
-            if match_any_glob(rel_name, exclude_patterns) or match_any_glob(rel_path, exclude_patterns):
-                continue
-            if include_patterns:
-                if not (match_any_glob(rel_name, include_patterns) or match_any_glob(rel_path, include_patterns)):
-                    continue
+                    # Exclude filters
+                    if match_any_glob(rel_name, exclude_patterns) or match_any_glob(rel_path, exclude_patterns):
+                        continue
+                    if include_patterns:
+                        if not (match_any_glob(rel_name, include_patterns) or match_any_glob(rel_path, include_patterns)):
+                            continue
 
+                    seq += 1
+                    try:
+                        size = os.path.getsize(file_path)
+                    except OSError:
+                        continue
+                    try:
+                        if is_probably_binary(file_path):
+                            continue
+                        ranges = _split_file(file_path, size, range_bytes) if size > range_bytes else [(0, None)]
+                        counts['files_scanned'] += 1
+                        reasons = self._sensitive_filename_reasons(rel_path)
+                        put(('file', seq, file_path, reasons, ranges, size))
+                    except Exception as e:
+                        put(('error', seq, file_path, str(e)))
+            except Exception as e:
+                put(('fatal', e))
+            finally:
+                put(_DONE)
+
+        producer = threading.Thread(target=produce, name='pii-scan-producer', daemon=True)
+        producer.start()
+
+        pool = _get_pool(workers) if workers > 1 else None
+        max_in_flight = workers * 2
+        # future -> its batch, to resubmit if the pool breaks
+        in_flight: Dict = {}
+        pool_replaced = False
+        state: Dict[int, dict] = {}
+        pending: 'deque[tuple]' = deque()
+        producing = True
+
+        def submit(tasks):
+            if pool is None:
+                return _scan_batch(tasks, show_context)
             try:
-                if size_over_limit(file_path, max_bytes):
+                fut = pool.submit(_scan_batch, tasks, show_context)
+            except (BrokenProcessPool, RuntimeError):
+                # Broke between batches, or shut down under us by a resize
+                lost = [tasks, *in_flight.values()]
+                in_flight.clear()
+                replace_pool(lost)
+                return None
+            in_flight[fut] = tasks
+            return None
+
+        def replace_pool(lost: List[list]):
+            # A worker died (OOM, crash) and took the pool with it: start a
+            # new one and resubmit what was running, once per scan
+            nonlocal pool, pool_replaced
+            _drop_pool(pool)
+            if pool_replaced:
+                raise BrokenProcessPool('PII scan worker died again after the pool was replaced')
+            pool_replaced = True
+            pool = _get_pool(workers)
+            for tasks in lost:
+                submit(tasks)
+
+        def absorb(results) -> Iterator[dict]:
+            for seq, part, findings, lines, error in results:
+                st = state.get(seq)
+                if st is None:
                     continue
-                if is_probably_binary(file_path):
+                if error is not None:
+                    del state[seq]
+                    if st['flagged']:
+                        counts['files_flagged'] -= 1
+                        counts['findings_count'] -= st['found']
+                    yield {'event': 'error', 'seq': seq, 'path': st['path'], 'error': error}
                     continue
-                files_scanned += 1
-                sensitive_name_reasons = self._sensitive_filename_reasons(rel_path)
-                findings = self._scan_file(file_path, show_context)
-                if sensitive_name_reasons or findings:
-                    flagged_files.append({
-                        'path': file_path,
-                        'reasons': sensitive_name_reasons,
-                        'findings': findings,
-                    })
-            except Exception as e:
-                errors.append({'path': file_path, 'error': str(e)})
+                st['done'][part] = (findings, lines)
+                # Hand out ranges in order so line numbers can be made absolute
+                while st['next'] in st['done']:
+                    findings, lines = st['done'].pop(st['next'])
+                    for f in findings:
+                        f['line'] += st['line_offset']
+                    st['line_offset'] += lines
+                    st['next'] += 1
+                    st['found'] += len(findings)
+                    final = st['next'] == st['parts']
+                    if findings or (final and (st['found'] or st['reasons'])):
+                        if not st['flagged']:
+                            st['flagged'] = True
+                            counts['files_flagged'] += 1
+                        counts['findings_count'] += len(findings)
+                        yield {'event': 'findings', 'seq': seq, 'path': st['path'], 'reasons': st['reasons'],
+                               'findings': findings, 'final': final}
+                    if final:
+                        del state[seq]
+                        break
 
-        summary = {
-            'files_scanned': files_scanned,
-            'files_flagged': len(flagged_files),
-            'findings_count': sum(len(f.get('findings', [])) for f in flagged_files),
-        }
+        try:
+            while producing or pending or in_flight:
+                # Take files off the queue while there is room for more work
+                while producing and len(pending) < BATCH_FILES * max_in_flight:
+                    try:
+                        item = files.get(timeout=0.01 if pending or in_flight else None)
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        producing = False
+                        break
+                    if item[0] == 'fatal':
+                        raise item[1]
+                    if item[0] == 'error':
+                        _, seq, path, error = item
+                        yield {'event': 'error', 'seq': seq, 'path': path, 'error': error}
+                        continue
+                    _, seq, path, reasons, ranges, size = item
+                    state[seq] = {'path': path, 'reasons': reasons, 'parts': len(ranges), 'next': 0,
+                                  'done': {}, 'line_offset': 0, 'found': 0, 'flagged': False}
+                    for part, (start, end) in enumerate(ranges):
+                        pending.append(((seq, part, path, start, end), (size if end is None else end) - start))
 
-        report = {
-            'summary': summary,
-            'flagged_files': flagged_files,
-            'errors': errors,
-        }
+                # Small files travel together, large ranges alone
+                while pending and (pool is None or len(in_flight) < max_in_flight):
+                    batch, batch_bytes = [], 0
+                    while pending and len(batch) < BATCH_FILES and batch_bytes < range_bytes:
+                        task, nbytes = pending.popleft()
+                        batch.append(task)
+                        batch_bytes += nbytes
+                    results = submit(batch)
+                    if results is not None:
+                        yield from absorb(results)
+
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=0.05, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        tasks = in_flight.pop(fut)
+                        try:
+                            results = fut.result()
+                        except BrokenProcessPool:
+                            lost = [tasks, *in_flight.values()]
+                            in_flight.clear()
+                            replace_pool(lost)
+                            break
+                        yield from absorb(results)
+        finally:
+            stop.set()
+            for fut in in_flight:
+                fut.cancel()
+            producer.join()
 
         scan_id = str(uuid.uuid4())
-        Scanner.reports[scan_id] = report
-        return scan_id, report
+        summary = dict(counts)
+        if store:
+            Scanner.reports[scan_id] = {'summary': summary}
+        yield {'event': 'summary', 'scan_id': scan_id, 'summary': summary}
 
-    def _expand_paths(self, paths: List[str], follow_symlinks: bool) -> List[str]:
-        files = []
+    def _iter_paths(self, paths: List[str], follow_symlinks: bool) -> Iterator[str]:
         for p in paths:
             if not p:
                 continue
             p = os.path.abspath(p)
             if os.path.isfile(p):
-                files.append(p)
+                yield p
             elif os.path.isdir(p):
                 for root, dirs, filenames in os.walk(p, followlinks=follow_symlinks):
                     # Optionally skip hidden dirs like .git
                     dirs[:] = [d for d in dirs]
                     for n in filenames:
-                        files.append(os.path.join(root, n))
+                        yield os.path.join(root, n)
             else:
                 # Non-existent path is ignored
                 continue
-        return files
+
+    def _expand_paths(self, paths: List[str], follow_symlinks: bool) -> List[str]:
+        return list(self._iter_paths(paths, follow_symlinks))
 
     def _sensitive_filename_reasons(self, rel_path: str) -> List[dict]:
         reasons = []
@@ -114,11 +426,54 @@ class Scanner:
         return reasons
 
     def _scan_file(self, path: str, show_context: bool) -> List[dict]:
+        return self._scan_range(path, 0, None, show_context)[0]
+
+    def _scan_range(self, path: str, start: int, end: Optional[int], show_context: bool) -> Tuple[List[dict], int]:
+        """Findings in bytes [start, end) of ``path`` and the number of lines read."""
         findings = []
-        with open(path, 'r', encoding='utf-8', errors='ignore') as fh:
-            for lineno, line in enumerate(fh, start=1):
-                findings.extend(self._scan_line(line, lineno, show_context))
-        return findings
+        lineno = 0
+        with io.TextIOWrapper(io.BufferedReader(_RangeReader(path, start, end)),
+                              encoding='utf-8', errors='ignore') as fh:
+            while True:
+                line = fh.readline(WINDOW_CHARS)
+                if not line:
+                    break
+                lineno += 1
+                if len(line) < WINDOW_CHARS or line.endswith('\n'):
+                    findings.extend(self._scan_line(line, lineno, show_context))
+                else:
+                    self._scan_long_line(fh, line, lineno, show_context, findings)
+        return findings, lineno
+
+    def _scan_long_line(self, fh, seg: str, lineno: int, show_context: bool, findings: List[dict]):
+        """Scan a line too long to hold, one overlapping window at a time.
+
+        Each window owns the positions [lo, hi); a match is kept by the
+        window that owns its start. The last OVERLAP_CHARS of a window are
+        scanned again at the front of the next one.
+        """
+        lo, col0 = 0, 0
+        line_findings = []
+        while True:
+            final = seg.endswith('\n')
+            more = '' if final else fh.readline(WINDOW_CHARS)
+            final = final or not more
+            hi = len(seg) if final else len(seg) - OVERLAP_CHARS
+            for item in self._scan_line(seg, lineno, show_context):
+                if lo <= item['start_col'] - 1 < hi:
+                    item['start_col'] += col0
+                    item['end_col'] += col0
+                    line_findings.append(item)
+            if final:
+                break
+            keep = hi - CONTEXT_CHARS
+            col0 += keep
+            seg = seg[keep:] + more
+            lo = CONTEXT_CHARS
+        # Same order as _scan_line: by pattern, then by position
+        order = {p['name']: i for i, p in enumerate(self.patterns)}
+        line_findings.sort(key=lambda f: order[f['type']])
+        findings.extend(line_findings)
 
     def _scan_line(self, line: str, lineno: int, show_context: bool) -> List[dict]:
         results = []
@@ -57,7 +57,13 @@ def analyze():
             project_name = os.path.basename(os.path.abspath(path))
 
         scan = scan_project(path, include_tests=include_tests)
-        git = get_git_metrics(path)
+        git = get_git_metrics(
+            path,
+            window_days=payload.get("git_window_days"),
+            oversized=payload.get("git_oversized_commits", "ignore"),
+            # Temporary clones and uploads are deleted, so their state is not worth saving
+            persist=cleanup_dir is None,
+        )
         suggestion = suggest_decomposition(project_name, scan, git, thresholds)
         suggestion["generated_at"] = datetime.utcnow().isoformat() + "Z"
 
@@ -0,0 +1,153 @@
+"""
+Co-change mining: whole-log parsing vs the streaming incremental miner.
+
+Builds a git repository with ``git fast-import``: --files files, --commits
+commits touching 1-8 files each, plus --mega-commits commits touching
+--mega-size files (a reformat or vendored drop). Reports time and peak
+traced memory for:
+
+  legacy        what get_git_metrics did before: the full `git log` output
+                captured, then every pair of every commit counted by path
+  stream_cold   get_git_metrics with no saved state (oversized commits ignored)
+  stream_warm   the same call again, nothing new to read
+  incremental   after --new-commits more commits, only those are read
+
+The legacy and streaming counts are compared on the commits both count
+(the streaming miner with no file limit must agree exactly).
+
+    python bench_git_metrics.py --files 5000 --commits 20000 --mega-size 3000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from microdecomp.git_metrics import get_git_metrics  # noqa: E402
+
+
+def fast_import(repo, commits, start_mark, parent):
+    proc = subprocess.Popen(["git", "-C", repo, "fast-import", "--quiet"], stdin=subprocess.PIPE)
+    out = proc.stdin
+    mark = start_mark
+    for files in commits:
+        mark += 1
+        msg = f"change {mark}".encode()
+        out.write(f"commit refs/heads/main\nmark :{mark}\n".encode())
+        out.write(f"committer Bench <bench@example.com> {1600000000 + mark * 3600} +0000\n".encode())
+        out.write(b"data %d\n%s\n" % (len(msg), msg))
+        if parent:
+            out.write(f"from {parent}\n".encode())
+        for name in files:
+            body = f"# {name} at {mark}\n".encode()
+            out.write(b"M 644 inline %s\ndata %d\n%s\n" % (name.encode(), len(body), body))
+        parent = f":{mark}"
+    out.close()
+    proc.wait()
+    return mark
+
+
+def history(rng, args, n, mega_commits=0):
+    names = [f"pkg{i % 40}/mod{i}.py" for i in range(args.files)]
+    commits = []
+    mega_every = max(1, n // mega_commits) if mega_commits else 0
+    for c in range(n):
+        if mega_every and c % mega_every == mega_every // 2:
+            commits.append(rng.sample(names, args.mega_size))
+        else:
+            # Clustered changes: files near each other tend to change together
+            base = rng.randrange(args.files)
+            commits.append(sorted({names[(base + rng.randrange(12)) % args.files] for _ in range(rng.randrange(1, 9))}))
+    return commits
+
+
+def legacy_metrics(repo):
+    res = subprocess.run(["git", "-C", repo, "log", "--name-only", "--pretty=format:%H|%ct"],
+                         capture_output=True, text=True, timeout=600)
+    cochange = defaultdict(int)
+    file_changes = defaultdict(int)
+    commit_files = []
+
+    def flush():
+        for i in range(len(commit_files)):
+            file_changes[commit_files[i]] += 1
+            for j in range(i + 1, len(commit_files)):
+                cochange[tuple(sorted((commit_files[i], commit_files[j])))] += 1
+
+    for line in res.stdout.splitlines():
+        if not line.strip():
+            continue
+        if "|" in line and len(line.split("|")) == 2 and len(line.split("/")) == 1 and len(line) < 64:
+            flush()
+            commit_files = []
+        else:
+            f = line.strip()
+            if f and not f.startswith("."):
+                commit_files.append(f)
+    flush()
+    return {"file_changes": dict(file_changes), "co_changes": {f"{a}||{b}": c for (a, b), c in cochange.items()}}
+
+
+def measured(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {"seconds": round(elapsed, 2), "peak_mb": round(peak / 1e6, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--commits", type=int, default=20000)
+    parser.add_argument("--mega-commits", type=int, default=3)
+    parser.add_argument("--mega-size", type=int, default=3000)
+    parser.add_argument("--new-commits", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    work = tempfile.mkdtemp(prefix="a044-bench-")
+    repo = os.path.join(work, "repo")
+    os.environ["MICRODECOMP_STATE_DIR"] = os.path.join(work, "state")
+    try:
+        subprocess.run(["git", "init", "-q", "-b", "main", repo], check=True)
+        t0 = time.perf_counter()
+        mark = fast_import(repo, history(rng, args, args.commits, args.mega_commits), 0, None)
+        print(f"repository ready in {time.perf_counter() - t0:.1f}s", flush=True)
+
+        report = {}
+        legacy, report["legacy"] = measured(lambda: legacy_metrics(repo))
+        exact, report["stream_unlimited"] = measured(
+            lambda: get_git_metrics(repo, max_files=10 ** 9, persist=False, timeout=600))
+        report["unlimited_matches_legacy"] = (exact["file_changes"] == legacy["file_changes"]
+                                             and exact["co_changes"] == legacy["co_changes"])
+        del legacy, exact
+
+        for label in ("stream_cold", "stream_warm"):
+            res, report[label] = measured(lambda: get_git_metrics(repo, timeout=600))
+            report[label].update(commits_read=res["commits_read"], pairs=len(res["co_changes"]),
+                                 oversized_commits=res["oversized_commits"])
+
+        head = subprocess.run(["git", "-C", repo, "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+        fast_import(repo, history(rng, args, args.new_commits), mark, head)
+        res, report["incremental"] = measured(lambda: get_git_metrics(repo, timeout=600))
+        report["incremental"].update(commits_read=res["commits_read"], commits=res["commits"])
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
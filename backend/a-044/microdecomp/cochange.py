@@ -0,0 +1,289 @@
+import hashlib
+import io
+from array import array
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import zipfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Commit header line; a record separator cannot start a path git prints
+HEADER = "\x1e"
+# Counts are kept per bucket of commit time so windows can be summed from them
+BUCKET_SECONDS = 30 * 86400
+# Pending keys buffered across all counters before they are merged in
+COMPACT_AT = 1 << 20
+STATE_VERSION = 1
+# Commits up to this many files have their pairs packed in Python, larger ones in numpy
+SMALL_COMMIT = 64
+DEFAULT_MAX_FILES = int(os.environ.get("MICRODECOMP_MAX_COMMIT_FILES", "50"))
+
+
+class SparseCounter:
+    """Counts of int64 keys as two sorted arrays (keys, counts).
+
+    Keys are appended in batches and merged by one sort in ``compact``, so
+    memory stays at 16 bytes per distinct key plus whatever is pending.
+    """
+
+    def __init__(self, keys: Optional[np.ndarray] = None, counts: Optional[np.ndarray] = None) -> None:
+        self.keys = keys if keys is not None else np.empty(0, dtype=np.int64)
+        self.counts = counts if counts is not None else np.empty(0, dtype=np.int64)
+        self._pending = array("q")
+
+    def add(self, keys: Iterable[int]) -> None:
+        self._pending.extend(keys)
+
+    def add_array(self, keys: np.ndarray) -> None:
+        self._pending.frombytes(keys.astype(np.int64).tobytes())
+
+    def compact(self) -> "SparseCounter":
+        if self._pending:
+            added = np.frombuffer(self._pending, dtype=np.int64).copy()
+            self._pending = array("q")
+            self.keys, self.counts = _reduce(
+                np.concatenate([self.keys, added]),
+                np.concatenate([self.counts, np.ones(added.size, dtype=np.int64)]),
+            )
+        return self
+
+    @staticmethod
+    def merged(counters: List["SparseCounter"]) -> "SparseCounter":
+        counters = [c.compact() for c in counters]
+        if not counters:
+            return SparseCounter()
+        keys, counts = _reduce(np.concatenate([c.keys for c in counters]),
+                               np.concatenate([c.counts for c in counters]))
+        return SparseCounter(keys, counts)
+
+
+def _reduce(keys: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    if keys.size == 0:
+        return keys.astype(np.int64), counts.astype(np.int64)
+    order = np.argsort(keys, kind="stable")
+    keys, counts = keys[order], counts[order]
+    starts = np.concatenate([[0], np.flatnonzero(keys[1:] != keys[:-1]) + 1])
+    return keys[starts], np.add.reduceat(counts, starts)
+
+
+def iter_commits(repo: str, revisions: Optional[str] = None,
+                 timeout: float = 120) -> Iterator[Tuple[str, int, List[str]]]:
+    """(sha, commit time, changed paths) per commit, read from a `git log` pipe.
+
+    Paths starting with "." are dropped, as before. The whole log is never
+    held in memory; git is killed if it runs longer than ``timeout``.
+    """
+    cmd = ["git", "-C", repo, "log", "--name-only", f"--pretty=format:{HEADER}%H %ct"]
+    if revisions:
+        cmd.append(revisions)
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err)
+        expired = threading.Event()
+
+        def kill() -> None:
+            expired.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            sha, ts, files = None, 0, []
+            for line in io.TextIOWrapper(proc.stdout, encoding="utf-8", errors="replace"):
+                line = line.rstrip("\n")
+                if line.startswith(HEADER):
+                    if sha is not None:
+                        yield sha, ts, files
+                    sha, stamp = line[1:].split(" ", 1)
+                    ts, files = int(stamp), []
+                else:
+                    f = line.strip()
+                    if f and not f.startswith("."):
+                        files.append(f)
+            if sha is not None:
+                yield sha, ts, files
+        finally:
+            proc.stdout.close()
+            code = proc.wait()
+            timer.cancel()
+        if expired.is_set():
+            raise TimeoutError(f"git log timed out after {timeout} seconds")
+        if code != 0:
+            err.seek(0)
+            raise RuntimeError(err.read().decode("utf-8", errors="replace").strip() or f"git log exited with {code}")
+
+
+class CoChangeState:
+    """Incrementally mined change and co-change counts for one repository.
+
+    Paths are interned to integer ids. For every bucket of ``BUCKET_SECONDS``
+    of commit time it keeps a SparseCounter of file ids (changes per file)
+    and one of packed id pairs (``low << 32 | high``, commits touching both).
+    ``head`` is the last mined commit, so the next update only reads the
+    commits after it. Commits touching more than ``max_files`` files still
+    count towards file changes, but their pairs are skipped
+    (``oversized="ignore"``) or taken from a sample of ``max_files`` of their
+    files chosen by the commit hash (``oversized="sample"``).
+    """
+
+    def __init__(self, max_files: int = DEFAULT_MAX_FILES, oversized: str = "ignore") -> None:
+        if oversized not in {"ignore", "sample"}:
+            raise ValueError(f"Unknown oversized commit policy: {oversized}")
+        self.max_files = max_files
+        self.oversized = oversized
+        self._reset()
+
+    def _reset(self) -> None:
+        self.head: Optional[str] = None
+        self.paths: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.files: Dict[int, SparseCounter] = {}
+        self.pairs: Dict[int, SparseCounter] = {}
+        self.commits = 0
+        self.oversized_commits = 0
+        self._pending = 0
+
+    @property
+    def params(self) -> Dict:
+        return {"version": STATE_VERSION, "max_files": self.max_files, "oversized": self.oversized,
+                "bucket_seconds": BUCKET_SECONDS}
+
+    def _intern(self, path: str) -> int:
+        fid = self._ids.get(path)
+        if fid is None:
+            fid = self._ids[path] = len(self.paths)
+            self.paths.append(path)
+        return fid
+
+    def add_commit(self, sha: str, ts: int, files: List[str]) -> None:
+        if not files:
+            return
+        bucket = ts // BUCKET_SECONDS
+        ids = sorted({self._intern(f) for f in files})
+        self.commits += 1
+        self.files.setdefault(bucket, SparseCounter()).add(ids)
+        self._pending += len(ids)
+        if len(ids) > self.max_files:
+            self.oversized_commits += 1
+            ids = [] if self.oversized == "ignore" else sorted(random.Random(sha).sample(ids, self.max_files))
+        if len(ids) >= 2:
+            pairs = self.pairs.setdefault(bucket, SparseCounter())
+            if len(ids) <= SMALL_COMMIT:
+                pairs.add([(a << 32) | b for i, a in enumerate(ids) for b in ids[i + 1:]])
+            else:
+                packed = np.array(ids, dtype=np.int64)
+                low, high = np.triu_indices(packed.size, 1)
+                pairs.add_array((packed[low] << 32) | packed[high])
+            self._pending += len(ids) * (len(ids) - 1) // 2
+        if self._pending >= COMPACT_AT:
+            for counter in (*self.files.values(), *self.pairs.values()):
+                counter.compact()
+            self._pending = 0
+
+    def update(self, repo: str, timeout: float = 120) -> int:
+        """Mine commits after ``head`` up to HEAD; returns how many were read."""
+        head = _rev_parse(repo, "HEAD")
+        if head is None or head == self.head:
+            return 0
+        revisions = None
+        if self.head is not None:
+            if _is_ancestor(repo, self.head, head):
+                revisions = f"{self.head}..{head}"
+            else:
+                # History was rewritten; start over
+                self._reset()
+        read = 0
+        for sha, ts, files in iter_commits(repo, revisions or head, timeout):
+            self.add_commit(sha, ts, files)
+            read += 1
+        self.head = head
+        return read
+
+    def counts(self, since: Optional[float] = None) -> Tuple[Dict[str, int], Dict[Tuple[str, str], int]]:
+        """File change and co-change counts, from commits in buckets ending after ``since``."""
+        def window(buckets: Dict[int, SparseCounter]) -> SparseCounter:
+            return SparseCounter.merged([c for b, c in buckets.items()
+                                         if since is None or (b + 1) * BUCKET_SECONDS > since])
+
+        files = window(self.files)
+        pairs = window(self.pairs)
+        paths = self.paths
+        file_changes = {paths[fid]: int(c) for fid, c in zip(files.keys.tolist(), files.counts.tolist())}
+        co_changes: Dict[Tuple[str, str], int] = {}
+        for key, c in zip(pairs.keys.tolist(), pairs.counts.tolist()):
+            a, b = paths[key >> 32], paths[key & 0xFFFFFFFF]
+            co_changes[(a, b) if a < b else (b, a)] = int(c)
+        return file_changes, co_changes
+
+    def save(self, path: str) -> None:
+        meta = {**self.params, "head": self.head, "commits": self.commits,
+                "oversized_commits": self.oversized_commits, "paths": self.paths}
+        arrays: Dict[str, np.ndarray] = {"meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)}
+        for name, buckets in (("files", self.files), ("pairs", self.pairs)):
+            order = sorted(buckets)
+            counters = [buckets[b].compact() for b in order]
+            arrays[f"{name}_buckets"] = np.array(order, dtype=np.int64)
+            arrays[f"{name}_sizes"] = np.array([c.keys.size for c in counters], dtype=np.int64)
+            arrays[f"{name}_keys"] = np.concatenate([c.keys for c in counters]) if counters else np.empty(0, np.int64)
+            arrays[f"{name}_counts"] = np.concatenate([c.counts for c in counters]) if counters else np.empty(0, np.int64)
+        # A temp file of its own, so concurrent saves of one repo never share one
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(fh, **arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path: str, max_files: int = DEFAULT_MAX_FILES, oversized: str = "ignore") -> "CoChangeState":
+        """Saved state, or an empty one if missing, unreadable or mined with other parameters."""
+        state = cls(max_files, oversized)
+        try:
+            with np.load(path) as data:
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+                if any(meta.get(k) != v for k, v in state.params.items()):
+                    return state
+                for name, target in (("files", state.files), ("pairs", state.pairs)):
+                    keys, counts = data[f"{name}_keys"], data[f"{name}_counts"]
+                    offset = 0
+                    for bucket, size in zip(data[f"{name}_buckets"].tolist(), data[f"{name}_sizes"].tolist()):
+                        target[bucket] = SparseCounter(keys[offset:offset + size], counts[offset:offset + size])
+                        offset += size
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            return cls(max_files, oversized)
+        state.head = meta["head"]
+        state.commits = meta["commits"]
+        state.oversized_commits = meta["oversized_commits"]
+        state.paths = meta["paths"]
+        state._ids = {p: i for i, p in enumerate(state.paths)}
+        return state
+
+
+def default_state_path(repo: str) -> str:
+    """MICRODECOMP_STATE_DIR/<repo hash>.npz if set, else inside the repository's .git dir."""
+    state_dir = os.environ.get("MICRODECOMP_STATE_DIR")
+    if state_dir:
+        name = hashlib.sha1(os.path.abspath(repo).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(state_dir, f"cochange-{name}.npz")
+    return os.path.join(repo, ".git", "microdecomp-cochange.npz")
+
+
+def _rev_parse(repo: str, rev: str) -> Optional[str]:
+    res = subprocess.run(["git", "-C", repo, "rev-parse", "--verify", "-q", rev],
+                         capture_output=True, text=True)
+    return res.stdout.strip() if res.returncode == 0 else None
+
+
+def _is_ancestor(repo: str, old: str, new: str) -> bool:
+    res = subprocess.run(["git", "-C", repo, "merge-base", "--is-ancestor", old, new], capture_output=True)
+    return res.returncode == 0
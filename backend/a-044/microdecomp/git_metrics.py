@@ -1,53 +1,47 @@
 import os
-import subprocess
-from collections import defaultdict
-from typing import Dict, Tuple
+import time
+from typing import Dict, Optional
 
+from .cochange import DEFAULT_MAX_FILES, CoChangeState, default_state_path
 
-def get_git_metrics(repo_path: str) -> Dict:
+
+def get_git_metrics(repo_path: str, window_days: Optional[float] = None, max_files: int = DEFAULT_MAX_FILES,
+                    oversized: str = "ignore", persist: bool = True, timeout: float = 120) -> Dict:
+    """Per-file change counts and pairwise co-change counts from the git history.
+
+    The history is streamed from ``git log`` and mined into a CoChangeState
+    that is saved next to the repository (see ``default_state_path``), so a
+    later call only reads the commits made since. ``window_days`` limits the
+    counts to recent commits, rounded out to whole ``BUCKET_SECONDS``
+    buckets. Commits touching more than ``max_files`` files are handled per
+    ``oversized`` ("ignore" or "sample").
+    """
     repo = os.path.abspath(repo_path)
     if not os.path.isdir(os.path.join(repo, ".git")):
         return {"available": False}
     try:
-        cmd = ["git", "-C", repo, "log", "--name-only", "--pretty=format:%H|%ct"]
-        res = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        if res.returncode != 0:
-            return {"available": False, "error": (res.stderr or res.stdout)}
-        cochange = defaultdict(int)
-        file_changes = defaultdict(int)
-        commit_timestamps = []
-        commit_files = []
-        for line in res.stdout.splitlines():
-            if not line.strip():
-                continue
-            if "|" in line and len(line.split("|")) == 2 and len(line.split("/")) == 1 and len(line) < 64:
-                # new commit header (heuristic)
-                if commit_files:
-                    for i in range(len(commit_files)):
-                        file_changes[commit_files[i]] += 1
-                        for j in range(i + 1, len(commit_files)):
-                            pair = tuple(sorted((commit_files[i], commit_files[j])))
-                            cochange[pair] += 1
-                commit_files = []
-                _, ts = line.split("|")
-                commit_timestamps.append(int(ts))
-            else:
-                f = line.strip()
-                if f and not f.startswith("."):
-                    commit_files.append(f)
-        # flush last
-        if commit_files:
-            for i in range(len(commit_files)):
-                file_changes[commit_files[i]] += 1
-                for j in range(i + 1, len(commit_files)):
-                    pair = tuple(sorted((commit_files[i], commit_files[j])))
-                    cochange[pair] += 1
+        state_path = default_state_path(repo) if persist else None
+        if state_path:
+            state = CoChangeState.load(state_path, max_files, oversized)
+        else:
+            state = CoChangeState(max_files, oversized)
+        read = state.update(repo, timeout=timeout)
+        if state_path and read:
+            try:
+                os.makedirs(os.path.dirname(state_path), exist_ok=True)
+                state.save(state_path)
+            except OSError:
+                pass
+        since = time.time() - float(window_days) * 86400 if window_days else None
+        file_changes, cochange = state.counts(since)
 
         return {
             "available": True,
-            "file_changes": dict(file_changes),
+            "file_changes": file_changes,
             "co_changes": {f"{a}||{b}": c for (a, b), c in cochange.items()},
+            "commits": state.commits,
+            "commits_read": read,
+            "oversized_commits": state.oversized_commits,
         }
     except Exception as e:
         return {"available": False, "error": str(e)}
-
@@ -11,7 +11,7 @@ from services.novelty import score_novelty
 
 app = Flask(__name__)
 
-registry = IndexRegistry()
+registry = IndexRegistry(mode=os.environ.get("PATENT_INDEX_MODE", "incremental"))
 
 
 def load_sample_corpus():
@@ -84,6 +84,8 @@ def api_index_list():
         meta[n] = {
             "documents": idx.count(),
             "vocabulary_size": idx.vocabulary_size(),
+            "mode": idx.mode,
+            **idx.stats,
         }
     return jsonify({"ok": True, "indexes": meta}), 200
 
@@ -0,0 +1,100 @@
+"""
+Bulk-load benchmark for PatentIndex: incremental vs refit mode.
+
+Ingests synthetic patents in fixed-size batches and, every few batches,
+runs novelty queries (score_novelty) against the growing index. Reports
+total ingest time, per-batch add latency and novelty-query p50/p95 over
+the whole run, so query latency during background compactions is
+included.
+
+    python bench_index.py --docs 100000 --batch 1000 --modes incremental refit
+"""
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from services.index import PatentIndex
+from services.novelty import score_novelty
+
+TERMS = [
+    "apparatus", "method", "substrate", "layer", "signal", "circuit", "controller", "sensor",
+    "wireless", "antenna", "battery", "electrode", "polymer", "composition", "compound", "catalyst",
+    "vehicle", "engine", "valve", "housing", "display", "pixel", "image", "optical", "lens",
+    "network", "packet", "node", "server", "memory", "processor", "instruction", "cache",
+    "protein", "antibody", "sequence", "cell", "gene", "receptor", "dose", "formulation",
+]
+
+
+def make_corpus(n, seed=0, words=120):
+    rng = random.Random(seed)
+    # Zipf-ish domain vocabulary plus rare identifiers so the vocabulary keeps growing
+    domain = TERMS + [f"{a}{b}" for a in TERMS[:20] for b in TERMS[20:]]
+    for i in range(n):
+        tokens = []
+        for _ in range(words):
+            r = rng.random()
+            if r < 0.85:
+                tokens.append(domain[min(len(domain) - 1, int(rng.paretovariate(1.2)) - 1)])
+            else:
+                tokens.append(f"x{rng.randrange(200000)}")
+        yield {"id": f"US{i:07d}", "text": " ".join(tokens)}
+
+
+def run(mode, args):
+    index = PatentIndex("bench", mode=mode)
+    queries = [d["text"][:400] for d in make_corpus(args.queries, seed=99)]
+    corpus = make_corpus(args.docs)
+
+    add_ms, query_ms = [], []
+    start = time.perf_counter()
+    batch, batches = [], 0
+    for doc in corpus:
+        batch.append(doc)
+        if len(batch) < args.batch:
+            continue
+        t0 = time.perf_counter()
+        index.add_documents(batch)
+        add_ms.append((time.perf_counter() - t0) * 1000)
+        batch = []
+        batches += 1
+        if batches % args.query_every == 0:
+            for q in queries:
+                t0 = time.perf_counter()
+                score_novelty(index, q, top_k=5)
+                query_ms.append((time.perf_counter() - t0) * 1000)
+    if batch:
+        index.add_documents(batch)
+    index.compact()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "ingest_s": round(elapsed, 2),
+        "docs_per_sec": round(args.docs / elapsed, 1),
+        "add_ms_p50": round(float(np.percentile(add_ms, 50)), 2),
+        "add_ms_p95": round(float(np.percentile(add_ms, 95)), 2),
+        "novelty_ms_p50": round(float(np.percentile(query_ms, 50)), 2) if query_ms else None,
+        "novelty_ms_p95": round(float(np.percentile(query_ms, 95)), 2) if query_ms else None,
+        "documents": index.count(),
+        "vocabulary_size": index.vocabulary_size(),
+        **index.stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--query-every", type=int, default=5, help="batches between query rounds")
+    parser.add_argument("--modes", nargs="+", default=["incremental", "refit"])
+    args = parser.parse_args()
+
+    print(json.dumps({mode: run(mode, args) for mode in args.modes}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 from typing import Dict, List, Tuple, Optional
+from collections import Counter
+import threading
 import time
 
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -8,95 +10,326 @@ from scipy import sparse
 from utils.text import normalize_text
 
 
+MAX_DF = 0.9
+
+
+def _analyzer():
+    # Same tokenization as the original TfidfVectorizer settings
+    return TfidfVectorizer(
+        lowercase=True,
+        stop_words="english",
+        ngram_range=(1, 2),
+    ).build_analyzer()
+
+
+def _idf(df: np.ndarray, n: int) -> np.ndarray:
+    # sklearn smooth_idf; terms above max_df get no weight
+    idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+    idf[df <= 0] = 0.0
+    if n > 1:
+        idf[df > MAX_DF * n] = 0.0
+    return idf
+
+
+def _row_norms(tf: sparse.csr_matrix, idf: np.ndarray) -> np.ndarray:
+    w = tf.data * idf[tf.indices]
+    rows = np.repeat(np.arange(tf.shape[0]), np.diff(tf.indptr))
+    sq = np.bincount(rows, weights=w * w, minlength=tf.shape[0])
+    return np.sqrt(sq).astype(np.float32)
+
+
+def _locate_in(blocks: List[sparse.csr_matrix], row: int) -> Tuple[int, int]:
+    start = 0
+    for b, block in enumerate(blocks):
+        if row < start + block.shape[0]:
+            return b, row - start
+        start += block.shape[0]
+    raise IndexError(row)
+
+
 class PatentIndex:
-    def __init__(self, name: str):
+    """TF-IDF index (sublinear tf, smooth idf, l2) over patent texts.
+
+    Rows are stored as sublinear term frequencies in append-only CSR blocks
+    under a growing vocabulary; idf and the row norms are applied at query
+    time, so scores are cosine similarities under the current idf.
+
+    ``mode="refit"`` recomputes idf from the exact document frequencies
+    after every add (the previous behaviour, without re-tokenizing).
+    ``mode="incremental"`` keeps the idf of the last compaction, giving new
+    terms a provisional idf, and compacts in a background thread once
+    enough rows are pending: blocks are merged, dead rows dropped and idf
+    and norms recomputed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mode: str = "incremental",
+        compact_ratio: float = 0.25,
+        compact_min_rows: int = 1000,
+        max_blocks: int = 32,
+    ):
         self.name = name
+        self.mode = mode
+        self.compact_ratio = compact_ratio
+        self.compact_min_rows = compact_min_rows
+        self.max_blocks = max_blocks
         self._docs: Dict[str, Dict] = {}
-        self._order: List[str] = []
-        self._X = None  # sparse matrix
-        self._vectorizer: Optional[TfidfVectorizer] = None
+        self._analyze = _analyzer()
+        self._vocab: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._df = np.zeros(0, dtype=np.int64)
+        self._idf = np.zeros(0, dtype=np.float32)
+        # Parallel lists, one entry per block
+        self._blocks: List[sparse.csr_matrix] = []
+        # Term-major copies, so a query only reads its terms' postings
+        self._postings: List[sparse.csc_matrix] = []
+        self._norms: List[np.ndarray] = []
+        self._live: List[np.ndarray] = []
+        self._order: List[str] = []  # row -> doc id
+        self._row_of: Dict[str, int] = {}
+        self._compacted_rows = 0
+        self._pending_rows = 0
+        self._pruned_terms = 0
         self._last_fit = 0.0
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self.stats = {"compactions": 0, "last_compaction_ms": 0.0}
 
     def add_documents(self, documents: List[Dict]) -> Tuple[int, int]:
         """
         documents: list of {id: str, text: str, meta?: any}
         Returns: (added_count, total_count)
         """
-        added = 0
+        batch: Dict[str, Dict] = {}
         for d in documents:
             doc_id = str(d.get("id")) if d.get("id") is not None else None
             text = d.get("text")
             if not doc_id or not text:
                 continue
-            text_norm = normalize_text(text)
-            if doc_id not in self._docs:
-                self._order.append(doc_id)
-                added += 1
-            self._docs[doc_id] = {"id": doc_id, "text": text_norm, "meta": d.get("meta")}
-        self._fit()
-        return added, len(self._docs)
-
-    def _fit(self):
-        corpus = [self._docs[i]["text"] for i in self._order]
-        if not corpus:
-            self._X = None
-            self._vectorizer = None
+            batch[doc_id] = {"id": doc_id, "text": normalize_text(text), "meta": d.get("meta")}
+        # Tokenize outside the lock
+        counts = [Counter(self._analyze(doc["text"])) for doc in batch.values()]
+
+        with self._lock:
+            added = 0
+            for doc_id in batch:
+                if doc_id in self._docs:
+                    self._retire(doc_id)
+                else:
+                    added += 1
+            self._docs.update(batch)
+            self._append(list(batch), counts)
+            if self.mode == "refit":
+                self._compact_now()
+            else:
+                self._maybe_compact()
+            return added, len(self._docs)
+
+    def _retire(self, doc_id: str):
+        row = self._row_of.pop(doc_id)
+        b, local = self._locate(row)
+        block = self._blocks[b]
+        terms = block.indices[block.indptr[local]:block.indptr[local + 1]]
+        self._df[terms] -= 1
+        self._live[b][local] = False
+
+    def _locate(self, row: int) -> Tuple[int, int]:
+        return _locate_in(self._blocks, row)
+
+    def _append(self, doc_ids: List[str], counts: List[Counter]):
+        if not doc_ids:
             return
-        self._vectorizer = TfidfVectorizer(
-            lowercase=True,
-            stop_words="english",
-            ngram_range=(1, 2),
-            max_df=0.9,
-            min_df=1,
-            sublinear_tf=True,
-            norm="l2",
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for c in counts:
+            for term, tf in c.items():
+                j = self._vocab.get(term)
+                if j is None:
+                    j = self._vocab[term] = len(self._terms)
+                    self._terms.append(term)
+                indices.append(j)
+                data.append(tf)
+            indptr.append(len(indices))
+        n_terms = len(self._terms)
+        tf = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(doc_ids), n_terms),
         )
-        self._X = self._vectorizer.fit_transform(corpus)
-        self._last_fit = time.time()
+        tf.sort_indices()
+        np.log(tf.data, out=tf.data)
+        tf.data += 1.0  # sublinear tf
+
+        if self._df.shape[0] < n_terms:
+            self._df = np.concatenate([self._df, np.zeros(n_terms - self._df.shape[0], dtype=np.int64)])
+        self._df += np.bincount(tf.indices, minlength=n_terms)
+        self._extend_idf()
+
+        base = len(self._order)
+        for i, doc_id in enumerate(doc_ids):
+            self._row_of[doc_id] = base + i
+        self._order.extend(doc_ids)
+        self._blocks.append(tf)
+        self._postings.append(tf.tocsc())
+        self._norms.append(_row_norms(tf, self._idf))
+        self._live.append(np.ones(len(doc_ids), dtype=bool))
+        self._pending_rows += len(doc_ids)
+
+    def _extend_idf(self):
+        # Provisional idf for terms first seen since the last compaction;
+        # existing entries stay fixed so stored row norms remain valid
+        old = self._idf.shape[0]
+        if old < self._df.shape[0]:
+            n = max(1, len(self._docs))
+            fresh = (np.log((1.0 + n) / (1.0 + self._df[old:])) + 1.0).astype(np.float32)
+            self._idf = np.concatenate([self._idf, fresh])
+
+    def _maybe_compact(self):
+        due = (
+            self._pending_rows >= max(self.compact_min_rows, self.compact_ratio * self._compacted_rows)
+            or len(self._blocks) > self.max_blocks
+        )
+        if due and (self._compactor is None or not self._compactor.is_alive()):
+            self._compactor = threading.Thread(target=self._compact_now, name=f"compact-{self.name}", daemon=True)
+            self._compactor.start()
+
+    def compact(self):
+        """Wait for a running compaction, then compact whatever is pending."""
+        compactor = self._compactor
+        if compactor is not None and compactor.is_alive():
+            compactor.join()
+        if self._pending_rows or len(self._blocks) > 1:
+            self._compact_now()
+
+    def _compact_now(self):
+        with self._compact_lock:
+            self._compact()
+
+    def _compact(self):
+        start = time.perf_counter()
+        with self._lock:
+            blocks = list(self._blocks)
+            lives = [lv.copy() for lv in self._live]
+            order = list(self._order)
+            df = self._df.copy()
+            n = len(self._docs)
+            n_terms = len(self._terms)
+        if not blocks:
+            return
+
+        # Merge and recompute outside the lock; searches keep using the old blocks
+        merged = sparse.vstack([self._pad(b, n_terms) for b in blocks], format="csr")
+        live = np.concatenate(lives)
+        merged = merged[live]
+        merged.sort_indices()
+        idf = _idf(df, n)
+        norms = _row_norms(merged, idf)
+        ids = [doc_id for doc_id, keep in zip(order, live) if keep]
+        postings = merged.tocsc()
+
+        with self._lock:
+            # Blocks appended and rows retired while we were merging
+            retired = np.concatenate([lives[i] & ~self._live[i] for i in range(len(blocks))])[live]
+            extra_blocks = self._blocks[len(blocks):]
+            self._idf = idf
+            self._extend_idf()
+            self._blocks = [merged] + extra_blocks
+            self._postings = [postings] + self._postings[len(blocks):]
+            self._norms = [norms] + [_row_norms(b, self._idf) for b in extra_blocks]
+            self._live = [~retired] + self._live[len(blocks):]
+            self._order = ids + self._order[len(order):]
+            all_live = np.concatenate(self._live)
+            self._row_of = {self._order[i]: int(i) for i in np.flatnonzero(all_live)}
+            self._compacted_rows = merged.shape[0]
+            self._pending_rows = sum(b.shape[0] for b in extra_blocks)
+            self._pruned_terms = int(np.count_nonzero((idf == 0) & (df[: idf.shape[0]] > 0)))
+            self._last_fit = time.time()
+            self.stats["compactions"] += 1
+            self.stats["last_compaction_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    @staticmethod
+    def _pad(block: sparse.csr_matrix, n_terms: int) -> sparse.csr_matrix:
+        if block.shape[1] == n_terms:
+            return block
+        return sparse.csr_matrix((block.data, block.indices, block.indptr), shape=(block.shape[0], n_terms))
 
     def count(self) -> int:
         return len(self._docs)
 
     def vocabulary_size(self) -> int:
-        if self._vectorizer is None:
-            return 0
-        try:
-            return len(self._vectorizer.vocabulary_)
-        except Exception:
-            return 0
+        return len(self._terms) - self._pruned_terms
 
-    def _ensure_ready(self):
-        if self._vectorizer is None or self._X is None:
-            self._fit()
+    def _query_vector(self, query: str, idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        counts = Counter(self._analyze(normalize_text(query)))
+        pairs = sorted((self._vocab[t], c) for t, c in counts.items() if t in self._vocab)
+        if not pairs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        terms = np.fromiter((p[0] for p in pairs), dtype=np.int64, count=len(pairs))
+        tf = 1.0 + np.log(np.fromiter((p[1] for p in pairs), dtype=np.float32, count=len(pairs)))
+        weights = tf * idf[terms]
+        norm = float(np.sqrt(np.dot(weights, weights)))
+        if norm == 0.0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return terms, (weights / norm).astype(np.float32)
 
     def search(self, query: str, top_k: int = 5) -> List[Dict]:
-        self._ensure_ready()
-        if self._vectorizer is None or self._X is None or self._X.shape[0] == 0:
+        with self._lock:
+            blocks = list(self._blocks)
+            postings = list(self._postings)
+            norms = list(self._norms)
+            lives = list(self._live)
+            order = self._order
+            idf = self._idf
+            terms = self._terms
+        if not blocks:
             return []
-        q_vec = self._vectorizer.transform([normalize_text(query)])  # l2 normalized
-        # cosine similarity via dot product (since vectors are l2-normalized)
-        sims = self._X.dot(q_vec.T).toarray().ravel()
-        if sims.size == 0:
+        q_terms, q_weights = self._query_vector(query, idf)
+        # Stored rows are raw sublinear tf; idf is applied on the query side
+        q_scaled = q_weights * idf[q_terms]
+
+        sims_parts = []
+        for post, norm, live in zip(postings, norms, lives):
+            rows_parts, vals_parts = [], []
+            for j, w in zip(q_terms, q_scaled):
+                if j >= post.shape[1] or w == 0.0:
+                    continue
+                lo, hi = post.indptr[j], post.indptr[j + 1]
+                rows_parts.append(post.indices[lo:hi])
+                vals_parts.append(post.data[lo:hi] * w)
+            n_rows = post.shape[0]
+            if rows_parts:
+                dots = np.bincount(np.concatenate(rows_parts), weights=np.concatenate(vals_parts), minlength=n_rows)
+            else:
+                dots = np.zeros(n_rows)
+            s = np.divide(dots, norm, out=np.zeros(n_rows), where=norm > 0)
+            s[~live[:n_rows]] = -np.inf
+            sims_parts.append(s)
+        sims = np.concatenate(sims_parts)
+        n_live = int(np.count_nonzero(np.isfinite(sims)))
+        if n_live == 0:
             return []
-        top_k = max(1, int(top_k))
-        idxs = np.argpartition(-sims, range(min(top_k, sims.shape[0])))[:top_k]
+        top_k = max(1, min(int(top_k), n_live))
+        idxs = np.argpartition(-sims, top_k - 1)[:top_k]
         idxs = idxs[np.argsort(-sims[idxs])]
+
+        # Heaviest query terms first; ties alphabetical like the fitted vocabulary
+        rank = np.array(
+            sorted((i for i in range(q_terms.shape[0]) if q_weights[i] > 0), key=lambda i: (-q_weights[i], terms[q_terms[i]])),
+            dtype=np.int64,
+        )
         results = []
-        feature_names = self._vectorizer.get_feature_names_out()
-        q_nonzero = q_vec.nonzero()[1]
-        q_weights = q_vec.toarray().ravel()
-        q_weights_map = {int(i): float(q_weights[i]) for i in q_nonzero}
         for i in idxs:
-            doc_id = self._order[int(i)]
+            doc_id = order[int(i)]
             doc = self._docs[doc_id]
             sim = float(sims[i])
-            # overlap terms
-            d_vec = self._X[i]
-            d_idx = set(d_vec.nonzero()[1].tolist())
-            overlap_idx = [j for j in q_nonzero if j in d_idx]
-            # top overlapping by query weight
-            overlap_idx_sorted = sorted(overlap_idx, key=lambda j: -q_weights_map.get(int(j), 0.0))[:10]
-            overlap_terms = [str(feature_names[j]) for j in overlap_idx_sorted]
+            # overlap terms: sorted-array intersection of the row's and query's columns
+            b, local = _locate_in(blocks, int(i))
+            row_terms = blocks[b].indices[blocks[b].indptr[local]:blocks[b].indptr[local + 1]]
+            shared = np.isin(q_terms[rank], row_terms, assume_unique=True)
+            overlap_terms = [terms[j] for j in q_terms[rank][shared][:10]]
             preview = doc["text"][:240].strip()
             results.append({
                 "id": doc_id,
@@ -117,14 +350,15 @@ class PatentIndex:
 
 
 class IndexRegistry:
-    def __init__(self):
+    def __init__(self, mode: str = "incremental"):
+        self.mode = mode
         self._indexes: Dict[str, PatentIndex] = {}
 
     def create_index(self, name: str) -> PatentIndex:
         name = str(name)
         if name in self._indexes:
             return self._indexes[name]
-        idx = PatentIndex(name)
+        idx = PatentIndex(name, mode=self.mode)
         self._indexes[name] = idx
         return idx
 
@@ -140,4 +374,3 @@ class IndexRegistry:
 
     def list_indexes(self) -> List[str]:
         return sorted(list(self._indexes.keys()))
-
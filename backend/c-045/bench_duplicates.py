@@ -0,0 +1,161 @@
+"""
+Near-duplicate detection scaling: LSH banding vs comparing every pair.
+
+Generates synthetic repositories of increasing size in a temporary
+directory. Functions are random statement sequences, and about one in ten
+gets a planted near-clone in another file (variables renamed and one
+statement changed). For each size it reports:
+
+  scan_cold    find_duplicates with an empty signature cache
+  scan_warm    the same scan again (every file served from the cache)
+  lsh          candidate generation + Jaccard verification on the units
+  all_pairs    exact Jaccard of every pair of units (the quadratic baseline);
+               above --all-pairs-max units it is extrapolated from the
+               measured per-pair cost and marked as estimated
+
+plus candidate and verified pair counts, and the share of the all-pairs
+matches that LSH found wherever all pairs were actually compared.
+
+    python bench_duplicates.py --files 250 500 1000 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from hygiene import clones  # noqa: E402
+from hygiene.duplicate_detection import _analyze_source, discover_python_files, find_duplicates  # noqa: E402
+
+NAMES = ["items", "total", "result", "config", "value", "count", "buffer", "record", "offset", "limit"]
+STATEMENTS = [
+    "{a} = {b} + {n}",
+    "{a} = [{b} * {n} for {c} in range({n})]",
+    "if {a} > {b}:\n        {c} = {a} - {b}",
+    "for {c} in {a}:\n        {b}.append({c})",
+    "{a} = {b}.get('{c}', {n})",
+    "while {a} < {n}:\n        {a} += {b}",
+    "{a} = sorted({b}, key=lambda {c}: {c}[{n}])",
+    "try:\n        {a} = int({b})\n    except ValueError:\n        {a} = {n}",
+    "{a}, {b} = {b}, {a}",
+    "{a} = {{'{b}': {c}, 'n': {n}}}",
+    "with open({a}) as {b}:\n        {c} = {b}.read()",
+    "{a} = max({b}, {c}) if {a} else min({b}, {c})",
+]
+
+
+def random_statement(rng, names):
+    a, b, c = rng.sample(names, 3)
+    return rng.choice(STATEMENTS).format(a=a, b=b, c=c, n=rng.randrange(100))
+
+
+def render(name, statements, names):
+    body = "\n    ".join(statements)
+    return f"def {name}({names[0]}, {names[1]}):\n    {body}\n    return {names[2]}\n"
+
+
+def generate(root, n_files, seed=0):
+    rng = random.Random(seed)
+    files = [[] for _ in range(n_files)]
+    for i in range(n_files):
+        for j in range(rng.randrange(4, 10)):
+            names = rng.sample(NAMES, 6)
+            statements = [random_statement(rng, names) for _ in range(rng.randrange(8, 16))]
+            files[i].append(render(f"func_{i}_{j}", statements, names))
+            if rng.random() < 0.1:
+                # Renamed variables are normalized away; the changed statement is not
+                renamed = [f"{n}_x" for n in names]
+                clone = [s for s in statements]
+                for old, new in zip(names, renamed):
+                    clone = [s.replace(old, new) for s in clone]
+                clone[rng.randrange(len(clone))] = random_statement(rng, renamed)
+                target = rng.randrange(n_files)
+                files[target].append(render(f"clone_{i}_{j}", clone, renamed))
+    for i, funcs in enumerate(files):
+        pkg = os.path.join(root, f"pkg{i % 50}")
+        os.makedirs(pkg, exist_ok=True)
+        with open(os.path.join(pkg, f"mod{i}.py"), "w") as fh:
+            fh.write("\n\n".join(funcs))
+
+
+def load_units(root, min_tokens):
+    units = []
+    for path in discover_python_files(root):
+        with open(path, "rb") as fh:
+            units_json, shingle_blob, signature_blob = _analyze_source(fh.read(), path, 5, 128)
+        shingles = np.frombuffer(shingle_blob, dtype=np.uint32)
+        signatures = np.frombuffer(signature_blob, dtype=np.uint32).reshape(-1, 128)
+        offset = 0
+        for index, (_, name, _, _, n_shingles, n_tokens) in enumerate(json.loads(units_json)):
+            if n_tokens >= min_tokens:
+                units.append((name, shingles[offset:offset + n_shingles], signatures[index]))
+            offset += n_shingles
+    return units
+
+
+def all_pairs(shingle_sets, threshold, limit):
+    n = len(shingle_sets)
+    total = n * (n - 1) // 2
+    t0 = time.perf_counter()
+    done = found = 0
+    for i in range(n):
+        for j in range(i + 1, n):
+            if clones.jaccard(shingle_sets[i], shingle_sets[j]) >= threshold:
+                found += 1
+            done += 1
+        if n > limit and done >= limit * (limit - 1) // 2:
+            break
+    elapsed = time.perf_counter() - t0
+    if done < total:
+        return {"seconds": round(elapsed / done * total, 2), "pairs": total, "estimated": True}
+    return {"seconds": round(elapsed, 2), "pairs": total, "found": found}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="+", default=[250, 500, 1000, 2000])
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--all-pairs-max", type=int, default=2000, help="units compared exhaustively before extrapolating")
+    args = parser.parse_args()
+
+    report = {}
+    for n_files in args.files:
+        work = tempfile.mkdtemp(prefix="c045-bench-")
+        try:
+            repo = os.path.join(work, "repo")
+            generate(repo, n_files)
+            cache = os.path.join(work, "signatures.sqlite")
+            row = {}
+            for label in ("scan_cold", "scan_warm"):
+                t0 = time.perf_counter()
+                result = find_duplicates(repo, {"cache": cache, "threshold": args.threshold})
+                row[label] = round(time.perf_counter() - t0, 2)
+            row["near_duplicate_pairs"] = result["summary"]["near_duplicate_pairs"]
+
+            units = load_units(repo, 40)
+            row["units"] = len(units)
+            t0 = time.perf_counter()
+            pairs, checked = clones.near_duplicate_pairs(
+                np.stack([u[2] for u in units]), [u[1] for u in units], args.threshold, 16)
+            row["lsh"] = {"seconds": round(time.perf_counter() - t0, 3), "candidates": checked, "found": len(pairs)}
+            row["all_pairs"] = all_pairs([u[1] for u in units], args.threshold, args.all_pairs_max)
+            if "found" in row["all_pairs"]:
+                row["lsh_recall"] = round(len(pairs) / max(1, row["all_pairs"]["found"]), 3)
+            report[str(n_files)] = row
+            print(f"{n_files} files: {json.dumps(row)}", flush=True)
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
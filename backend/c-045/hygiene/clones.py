@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import tempfile
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# MinHash permutations are (a * x + b) mod MERSENNE_PRIME, truncated to 32 bits
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+DEFAULT_SEED = 1
+# Folds a band's rows into one 64-bit bucket key; collisions only add candidates
+BAND_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def shingle_hashes(tokens: Sequence[str], size: int) -> np.ndarray:
+    """Sorted unique 32-bit hashes of every run of ``size`` consecutive tokens."""
+    if not tokens:
+        return np.empty(0, dtype=np.uint32)
+    if len(tokens) <= size:
+        runs: Iterable[Sequence[str]] = [tokens]
+    else:
+        runs = (tokens[i:i + size] for i in range(len(tokens) - size + 1))
+    hashes = {zlib.crc32("\x1f".join(run).encode("utf-8")) for run in runs}
+    return np.array(sorted(hashes), dtype=np.uint32)
+
+
+class MinHasher:
+    """Fixed family of ``num_perm`` hash permutations; same seed, same signatures."""
+
+    def __init__(self, num_perm: int = 128, seed: int = DEFAULT_SEED) -> None:
+        self.num_perm = num_perm
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 61, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 61, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingles: np.ndarray) -> np.ndarray:
+        if shingles.size == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        x = shingles.astype(np.uint64)[:, None]
+        # uint64 wrap-around in a * x is part of the hash family, as in datasketch
+        with np.errstate(over="ignore"):
+            permuted = ((x * self._a + self._b) % MERSENNE_PRIME) & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Exact Jaccard similarity of two sorted unique shingle arrays."""
+    if a.size == 0 and b.size == 0:
+        return 1.0
+    common = np.intersect1d(a, b, assume_unique=True).size
+    return common / float(a.size + b.size - common)
+
+
+def lsh_candidates(signatures: np.ndarray, bands: int) -> Set[Tuple[int, int]]:
+    """Index pairs whose signatures agree on every row of at least one band.
+
+    Each band hashes ``num_perm // bands`` rows; a pair with Jaccard s becomes a
+    candidate with probability 1 - (1 - s**rows)**bands, so similar pairs are
+    found without comparing every pair.
+    """
+    count, num_perm = signatures.shape
+    pairs: Set[Tuple[int, int]] = set()
+    if count < 2:
+        return pairs
+    rows = max(1, num_perm // bands)
+    for start in range(0, rows * bands, rows):
+        keys = np.zeros(count, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for column in range(start, start + rows):
+                keys = keys * BAND_MULTIPLIER + signatures[:, column].astype(np.uint64)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # Boundaries between runs of equal band keys
+        edges = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        for bucket in np.split(order, edges):
+            if bucket.size < 2:
+                continue
+            members = sorted(bucket.tolist())
+            for i, left in enumerate(members):
+                for right in members[i + 1:]:
+                    pairs.add((left, right))
+    return pairs
+
+
+def near_duplicate_pairs(signatures: np.ndarray, shingles: List[np.ndarray], threshold: float,
+                         bands: int) -> Tuple[List[Tuple[int, int, float]], int]:
+    """LSH candidates verified by exact Jaccard; returns (pairs, candidates checked)."""
+    candidates = lsh_candidates(signatures, bands)
+    found: List[Tuple[int, int, float]] = []
+    for left, right in candidates:
+        similarity = jaccard(shingles[left], shingles[right])
+        if similarity >= threshold:
+            found.append((left, right, similarity))
+    return found, len(candidates)
+
+
+def default_cache_path() -> Optional[str]:
+    """HYGIENE_CACHE_PATH, or a file in the temp dir; an empty value disables the cache."""
+    path = os.environ.get("HYGIENE_CACHE_PATH")
+    if path is None:
+        return os.path.join(tempfile.gettempdir(), "hygiene_signatures.sqlite")
+    return path or None
+
+
+class SignatureCache:
+    """Per-file units, shingles and MinHash signatures keyed by content hash.
+
+    ``params`` identifies everything the stored data depends on besides the
+    file content (shingle size, permutation count and seed), so changing them
+    never returns stale signatures.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_units ("
+            " hash TEXT NOT NULL, params TEXT NOT NULL, units TEXT NOT NULL,"
+            " shingles BLOB NOT NULL, signatures BLOB NOT NULL,"
+            " PRIMARY KEY (hash, params)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get_many(self, hashes: List[str], params: str) -> Dict[str, Tuple[str, bytes, bytes]]:
+        found: Dict[str, Tuple[str, bytes, bytes]] = {}
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT hash, units, shingles, signatures FROM file_units WHERE params = ? AND hash IN ({marks})",
+                [params, *chunk],
+            )
+            for digest, units, shingles, signatures in rows:
+                found[digest] = (units, shingles, signatures)
+        return found
+
+    def put_many(self, entries: List[Tuple[str, str, bytes, bytes]], params: str) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_units (hash, params, units, shingles, signatures) VALUES (?, ?, ?, ?, ?)",
+                [(digest, params, units, shingles, signatures) for digest, units, shingles, signatures in entries],
+            )
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,9 +1,19 @@
 import ast
 import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple, Any
 
+import numpy as np
+
+from . import clones
+
 IGNORED_DIRS = {".git", "__pycache__", ".venv", "venv", "env", "node_modules", ".mypy_cache", ".pytest_cache"}
+# Below this many files to parse, the process pool costs more than it saves
+PARALLEL_MIN_FILES = 64
+# Upper bound on files sent to a worker per task
+BATCH_FILES = 32
 
 
 class NameNormalizer(ast.NodeTransformer):
@@ -107,70 +117,218 @@ def _hash_node(node: ast.AST) -> str:
     return hashlib.sha256(dumped.encode("utf-8")).hexdigest()
 
 
+def _node_tokens(node: ast.AST) -> List[str]:
+    """Pre-order token stream of a normalized node: node types, placeholders and constants."""
+    tokens: List[str] = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, ast.expr_context):
+            continue
+        if isinstance(current, ast.Name):
+            tokens.append(current.id)
+        elif isinstance(current, ast.Constant):
+            tokens.append(repr(current.value))
+        else:
+            tokens.append(type(current).__name__)
+        stack.extend(reversed(list(ast.iter_child_nodes(current))))
+    return tokens
+
+
 def _collect_units(tree: ast.AST, filename: str) -> List[Tuple[str, str, int, str]]:
     """
     Returns list of (unit_type, name, lineno, digest)
     unit_type in {"function", "async_function", "class"}
     """
-    results: List[Tuple[str, str, int, str]] = []
+    return [unit[:4] for unit in _collect_unit_tokens(tree)]
 
-    class Visitor(ast.NodeVisitor):
-        def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
-            try:
-                digest = _hash_node(node)
-            except Exception:
-                digest = ""
-            results.append(("function", node.name, getattr(node, "lineno", -1), digest))
-            self.generic_visit(node)
 
-        def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
-            try:
-                digest = _hash_node(node)
-            except Exception:
-                digest = ""
-            results.append(("async_function", node.name, getattr(node, "lineno", -1), digest))
-            self.generic_visit(node)
+def _collect_unit_tokens(tree: ast.AST) -> List[Tuple[str, str, int, str, List[str]]]:
+    """(unit_type, name, lineno, digest, tokens) for every function and class.
+
+    Hashing normalizes the unit in place, so names are recorded beforehand and
+    nested units are visited in their already-normalized form (normalizing is
+    idempotent, so their digests are unaffected).
+    """
+    results: List[Tuple[str, str, int, str, List[str]]] = []
+    kinds = {ast.FunctionDef: "function", ast.AsyncFunctionDef: "async_function", ast.ClassDef: "class"}
+    names = {id(node): node.name for node in ast.walk(tree) if type(node) in kinds}
 
-        def visit_ClassDef(self, node: ast.ClassDef) -> None:
+    class Visitor(ast.NodeVisitor):
+        def _unit(self, node: Any) -> None:
+            name = names[id(node)]
             try:
                 digest = _hash_node(node)
+                tokens = _node_tokens(node)
             except Exception:
-                digest = ""
-            results.append(("class", node.name, getattr(node, "lineno", -1), digest))
+                digest, tokens = "", []
+            results.append((kinds[type(node)], name, getattr(node, "lineno", -1), digest, tokens))
             self.generic_visit(node)
 
+        visit_FunctionDef = visit_AsyncFunctionDef = visit_ClassDef = _unit
+
     Visitor().visit(tree)
-    # attach filename afterwards in outer loop
+    return results
+
+
+def _params_key(shingle_size: int, num_perm: int) -> str:
+    return f"v1:k={shingle_size}:perm={num_perm}:seed={clones.DEFAULT_SEED}"
+
+
+def _analyze_source(data: bytes, filename: str, shingle_size: int, num_perm: int) -> Tuple[str, bytes, bytes]:
+    """Parse one file into (units JSON, shingles, signatures), the form kept in the cache."""
+    src = data.decode("utf-8")
+    if "\r" in src:
+        # What reading the file in text mode would have produced
+        src = src.replace("\r\n", "\n").replace("\r", "\n")
+    tree = ast.parse(src, filename=filename)
+    hasher = _minhasher(num_perm)
+    units: List[List[Any]] = []
+    shingle_parts: List[np.ndarray] = []
+    signatures: List[np.ndarray] = []
+    for unit_type, name, lineno, digest, tokens in _collect_unit_tokens(tree):
+        if not digest:
+            continue
+        shingles = clones.shingle_hashes(tokens, shingle_size)
+        units.append([unit_type, name, lineno, digest, int(shingles.size), len(tokens)])
+        shingle_parts.append(shingles)
+        signatures.append(hasher.signature(shingles))
+    shingle_blob = np.concatenate(shingle_parts).tobytes() if shingle_parts else b""
+    signature_blob = np.concatenate(signatures).tobytes() if signatures else b""
+    return json.dumps(units, separators=(",", ":")), shingle_blob, signature_blob
+
+
+def _analyze_batch(batch: List[Tuple[str, bytes]], shingle_size: int, num_perm: int) -> List[Tuple[str, Any]]:
+    """Worker entry point: ("ok", payload) or ("error", message) per file."""
+    out: List[Tuple[str, Any]] = []
+    for filename, data in batch:
+        try:
+            out.append(("ok", _analyze_source(data, filename, shingle_size, num_perm)))
+        except Exception as e:
+            out.append(("error", str(e)))
+    return out
+
+
+_HASHERS: Dict[int, "clones.MinHasher"] = {}
+
+
+def _minhasher(num_perm: int) -> "clones.MinHasher":
+    hasher = _HASHERS.get(num_perm)
+    if hasher is None:
+        hasher = _HASHERS[num_perm] = clones.MinHasher(num_perm)
+    return hasher
+
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_WORKERS = 0
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _POOL, _POOL_WORKERS
+    if _POOL is None or _POOL_WORKERS != workers:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False)
+        _POOL = ProcessPoolExecutor(max_workers=workers)
+        _POOL_WORKERS = workers
+    return _POOL
+
+
+def _parse_files(sources: List[Tuple[str, bytes]], shingle_size: int, num_perm: int,
+                 workers: int) -> List[Tuple[str, Any]]:
+    if workers <= 1 or len(sources) < PARALLEL_MIN_FILES:
+        return _analyze_batch(sources, shingle_size, num_perm)
+    size = max(1, min(BATCH_FILES, len(sources) // (workers * 4) or 1))
+    batches = [sources[i:i + size] for i in range(0, len(sources), size)]
+    pool = _get_pool(workers)
+    results: List[Tuple[str, Any]] = []
+    for batch_result in pool.map(_analyze_batch, batches, [shingle_size] * len(batches), [num_perm] * len(batches)):
+        results.extend(batch_result)
     return results
 
 
 def find_duplicates(path: str, options: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """Exact duplicate groups plus near-duplicate pairs of functions and classes.
+
+    Options: ``exclude`` (directory names), ``near`` (default True),
+    ``threshold`` (Jaccard similarity of token shingles, default 0.8),
+    ``min_tokens`` (smaller units are left out of near matching, default 40),
+    ``shingle_size``, ``num_perm``, ``bands``, ``workers`` and ``cache``
+    (a path, or False to disable the signature cache).
+    """
     options = options or {}
     exclude = options.get("exclude", [])
+    near = bool(options.get("near", True))
+    threshold = float(options.get("threshold", 0.8))
+    min_tokens = int(options.get("min_tokens", 40))
+    shingle_size = int(options.get("shingle_size", 5))
+    num_perm = int(options.get("num_perm", 128))
+    bands = int(options.get("bands", 16))
+    workers = int(options.get("workers") or os.environ.get("HYGIENE_WORKERS") or os.cpu_count() or 1)
+    cache_path = options.get("cache", clones.default_cache_path())
     files = discover_python_files(path, exclude=exclude)
 
     hash_map: Dict[str, List[Dict[str, Any]]] = {}
     errors: List[Dict[str, Any]] = []
 
+    sources: List[Tuple[str, bytes, str]] = []
+    read_errors: Dict[str, str] = {}
     for file in files:
         try:
-            with open(file, "r", encoding="utf-8") as f:
-                src = f.read()
-            tree = ast.parse(src, filename=file)
+            with open(file, "rb") as f:
+                data = f.read()
         except Exception as e:
-            errors.append({"file": file, "error": str(e)})
+            read_errors[file] = str(e)
             continue
+        sources.append((file, data, hashlib.blake2b(data, digest_size=16).hexdigest()))
+
+    params = _params_key(shingle_size, num_perm)
+    cache = clones.SignatureCache(cache_path) if cache_path else None
+    try:
+        known = cache.get_many(sorted({h for _, _, h in sources}), params) if cache else {}
+        misses: Dict[str, Tuple[str, bytes]] = {}
+        for file, data, digest in sources:
+            if digest not in known and digest not in misses:
+                misses[digest] = (file, data)
+        parsed = _parse_files(list(misses.values()), shingle_size, num_perm, workers)
+        failed: Dict[str, str] = {}
+        fresh: List[Tuple[str, str, bytes, bytes]] = []
+        for digest, (status, payload) in zip(misses, parsed):
+            if status == "ok":
+                known[digest] = payload
+                fresh.append((digest, *payload))
+            else:
+                failed[digest] = payload
+        if cache and fresh:
+            cache.put_many(fresh, params)
+    finally:
+        if cache:
+            cache.close()
 
-        for unit_type, name, lineno, digest in _collect_units(tree, file):
-            if not digest:
-                continue
+    # Units eligible for near matching: (entry, shingles, signature)
+    near_units: List[Tuple[Dict[str, Any], np.ndarray, np.ndarray]] = []
+    digest_by_file = {file: digest for file, _, digest in sources}
+    for file in files:
+        digest = digest_by_file.get(file)
+        if digest is None or digest in failed:
+            errors.append({"file": file, "error": read_errors[file] if digest is None else failed[digest]})
+            continue
+        units_json, shingle_blob, signature_blob = known[digest]
+        shingles_all = np.frombuffer(shingle_blob, dtype=np.uint32)
+        signatures_all = np.frombuffer(signature_blob, dtype=np.uint32).reshape(-1, num_perm)
+        offset = 0
+        for index, (unit_type, name, lineno, unit_digest, n_shingles, n_tokens) in enumerate(json.loads(units_json)):
             entry = {
                 "file": file,
                 "name": name,
                 "lineno": lineno,
                 "type": unit_type,
             }
-            hash_map.setdefault(digest, []).append(entry)
+            occurrences = hash_map.setdefault(unit_digest, [])
+            occurrences.append(entry)
+            # Exact copies are already grouped; only the first one takes part in near matching
+            if near and len(occurrences) == 1 and n_tokens >= min_tokens:
+                near_units.append((entry, shingles_all[offset:offset + n_shingles], signatures_all[index]))
+            offset += n_shingles
 
     duplicates: List[Dict[str, Any]] = []
     for digest, occurrences in hash_map.items():
@@ -181,13 +339,36 @@ def find_duplicates(path: str, options: Dict[str, Any] | None = None) -> Dict[st
                 "occurrences": sorted(occurrences, key=lambda o: (o["file"], o["lineno"]))
             })
 
+    digest_of = {id(o): digest for digest, occurrences in hash_map.items() for o in occurrences}
+    near_duplicates: List[Dict[str, Any]] = []
+    candidates_checked = 0
+    # Classes are only compared with classes, functions with functions
+    for is_class in (False, True):
+        group = [u for u in near_units if (u[0]["type"] == "class") == is_class]
+        if len(group) < 2:
+            continue
+        pairs, checked = clones.near_duplicate_pairs(
+            np.stack([u[2] for u in group]), [u[1] for u in group], threshold, bands)
+        candidates_checked += checked
+        for left, right, similarity in pairs:
+            pair = sorted((group[left][0], group[right][0]), key=lambda o: (o["file"], o["lineno"]))
+            near_duplicates.append({
+                "similarity": round(similarity, 4),
+                "occurrences": [dict(o, hash=digest_of[id(o)]) for o in pair],
+            })
+    near_duplicates.sort(key=lambda d: (-d["similarity"], d["occurrences"][0]["file"], d["occurrences"][0]["lineno"],
+                                        d["occurrences"][1]["file"], d["occurrences"][1]["lineno"]))
+
     return {
         "summary": {
             "files_scanned": len(files),
             "duplicate_groups": len(duplicates),
+            "near_duplicate_pairs": len(near_duplicates),
             "errors": len(errors),
+            "files_parsed": len(parsed),
+            "candidate_pairs": candidates_checked,
         },
         "duplicates": sorted(duplicates, key=lambda d: (-d["count"], d["hash"])),
+        "near_duplicates": near_duplicates,
         "errors": errors,
     }
-
@@ -33,6 +33,7 @@ def run_passes(path: str, passes: List[str] | None = None, options: Dict[str, An
     results["summary"] = {
         "files_scanned": max(dsum.get("files_scanned", 0), csum.get("files_scanned", 0)),
         "duplicate_groups": dsum.get("duplicate_groups", 0),
+        "near_duplicate_pairs": dsum.get("near_duplicate_pairs", 0),
         "dead_items": csum.get("dead_items", 0),
         "errors": (dsum.get("errors", 0) + csum.get("errors", 0)),
     }
@@ -9,7 +9,7 @@ import os
 app = Flask(__name__)
 
 CONFIG_PATH = os.environ.get("SECRETSCAN_CONFIG", ".secretscan.yml")
-BASELINE_PATH = os.environ.get("SECRETSCAN_BASELINE", ".secrets.baseline.json")
+BASELINE_PATH = os.environ.get("SECRETSCAN_BASELINE") or bl.default_path()
 
 conf = cfg.load_config(CONFIG_PATH)
 base = bl.Baseline.load(BASELINE_PATH)
@@ -0,0 +1,151 @@
+"""
+PR scan vs full scan on a large synthetic history.
+
+Builds a git repository with ``git fast-import``. The main branch has
+--files files and --commits commits, each touching --touch files. A PR
+branch then changes --pr-files files. Timings reported:
+
+  full_walk     what the CLI did before: scan_file on every checked-out file
+  full_tree     incremental.scan_tree(HEAD) with an empty blob cache
+  pr_cold       incremental.scan_since(main) with an empty blob cache
+  pr_warm       the same PR scan again (every changed blob cached)
+
+It also times loading a --baseline-size baseline and doing 10k lookups,
+for the JSON list and for the sorted binary file.
+
+    python scripts/bench_incremental.py --files 20000 --commits 500
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from secret_scanner import config as cfg, incremental, scanner  # noqa: E402
+from secret_scanner.baseline import Baseline  # noqa: E402
+
+WORDS = ["config", "request", "user", "token", "value", "result", "client", "session", "handler", "items"]
+
+
+def file_body(rng, i, rev):
+    lines = [f"# module {i} revision {rev}"]
+    for _ in range(rng.randrange(20, 80)):
+        a, b = rng.choice(WORDS), rng.choice(WORDS)
+        lines.append(f"def {a}_{b}_{rng.randrange(1000)}({a}, {b}=None):\n    return {a}.get('{b}', {rng.randrange(100)})")
+    if rng.random() < 0.01:
+        lines.append("AWS_KEY = 'AKIA%s'" % "".join(rng.choice(string.ascii_uppercase) for _ in range(16)))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def build_repo(path, args):
+    rng = random.Random(0)
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+    proc = subprocess.Popen(["git", "-C", path, "fast-import", "--quiet"], stdin=subprocess.PIPE)
+    out = proc.stdin
+    mark = 0
+
+    def commit(branch, message, files, parent=None):
+        nonlocal mark
+        mark += 1
+        msg = message.encode()
+        out.write(f"commit refs/heads/{branch}\nmark :{mark}\n".encode())
+        out.write(f"committer Bench <bench@example.com> {1700000000 + mark} +0000\n".encode())
+        out.write(b"data %d\n%s\n" % (len(msg), msg))
+        if parent:
+            out.write(f"from {parent}\n".encode())
+        for name, body in files:
+            out.write(b"M 644 inline %s\ndata %d\n%s\n" % (name.encode(), len(body), body))
+        return f":{mark}"
+
+    head = commit("main", "initial", [(f"pkg{i % 100}/mod{i}.py", file_body(rng, i, 0)) for i in range(args.files)])
+    for rev in range(1, args.commits + 1):
+        touched = rng.sample(range(args.files), args.touch)
+        head = commit("main", f"change {rev}", [(f"pkg{i % 100}/mod{i}.py", file_body(rng, i, rev)) for i in touched], head)
+    touched = rng.sample(range(args.files), args.pr_files)
+    commit("pr", "pr change", [(f"pkg{i % 100}/mod{i}.py", file_body(rng, i, "pr")) for i in touched], head)
+    out.close()
+    proc.wait()
+    subprocess.run(["git", "-C", path, "checkout", "-q", "pr"], check=True)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return round(time.perf_counter() - t0, 3), result
+
+
+def full_walk(repo, conf):
+    findings = []
+    for root, dirs, files in os.walk(repo):
+        dirs[:] = [d for d in dirs if d != ".git"]
+        for name in files:
+            findings.extend(scanner.scan_file(os.path.join(root, name), conf, None))
+    return findings
+
+
+def bench_baseline(work, n):
+    rng = random.Random(1)
+    fps = ["%064x" % rng.getrandbits(256) for _ in range(n)]
+    probes = rng.sample(fps, 5000) + ["%064x" % rng.getrandbits(256) for _ in range(5000)]
+    report = {}
+    for name in ("baseline.json", "baseline.bin"):
+        path = os.path.join(work, name)
+        Baseline(set(fps)).save(path)
+        t0 = time.perf_counter()
+        base = Baseline.load(path)
+        load_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        hits = sum(base.contains(fp) for fp in probes)
+        report[name] = {"bytes": os.path.getsize(path), "load_s": round(load_s, 3),
+                        "lookup_us": round((time.perf_counter() - t0) / len(probes) * 1e6, 2), "hits": hits}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--commits", type=int, default=500)
+    parser.add_argument("--touch", type=int, default=40, help="files changed per history commit")
+    parser.add_argument("--pr-files", type=int, default=25)
+    parser.add_argument("--baseline-size", type=int, default=1000000)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="d004-bench-")
+    repo = os.path.join(work, "repo")
+    try:
+        t0 = time.perf_counter()
+        build_repo(repo, args)
+        print(f"repository ready in {time.perf_counter() - t0:.1f}s", flush=True)
+        conf = cfg.load_config(os.path.join(repo, ".secretscan.yml"))
+
+        report = {}
+        secs, found = timed(lambda: full_walk(repo, conf))
+        report["full_walk"] = {"seconds": secs, "findings": len(found)}
+
+        cache = incremental.BlobCache(os.path.join(work, "tree-cache.sqlite"))
+        secs, res = timed(lambda: incremental.scan_tree("HEAD", conf, cache=cache, repo=repo))
+        report["full_tree"] = {"seconds": secs, "findings": len(res["findings"]), "blobs_scanned": res["blobs_scanned"]}
+
+        cache = incremental.BlobCache(os.path.join(work, "pr-cache.sqlite"))
+        for label in ("pr_cold", "pr_warm"):
+            secs, res = timed(lambda: incremental.scan_since("main", conf, cache=cache, repo=repo))
+            report[label] = {"seconds": secs, "findings": len(res["findings"]), "files": res["files"],
+                             "blobs_scanned": res["blobs_scanned"]}
+
+        report["baseline"] = bench_baseline(work, args.baseline_size)
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
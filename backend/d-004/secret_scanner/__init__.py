@@ -1,2 +1,2 @@
-__all__ = ["scanner", "patterns", "baseline", "config"]
+__all__ = ["scanner", "patterns", "baseline", "config", "incremental"]
 
@@ -1,34 +1,152 @@
 import json
 import hashlib
+import mmap
 import os
-from typing import Set, Dict, Any, List
+from typing import Set, Dict, Any, List, Optional
+
+# Binary baseline: MAGIC, then the raw 32-byte SHA-256 digests in sorted order
+MAGIC = b"SSBL\x00\x00\x00\x01"
+DIGEST_SIZE = 32
+
+DEFAULT_PATH = ".secretscan.baseline"
+# Default before the binary format; repos may still keep their baseline here
+LEGACY_DEFAULT_PATH = ".secrets.baseline.json"
+
+
+def default_path() -> str:
+    """The binary default, unless only a baseline at the old default exists."""
+    if not os.path.exists(DEFAULT_PATH) and os.path.exists(LEGACY_DEFAULT_PATH):
+        return LEGACY_DEFAULT_PATH
+    return DEFAULT_PATH
+
 
 class Baseline:
+    """Set of accepted finding fingerprints.
+
+    Loaded baselines stay in their sorted binary form (memory-mapped) and are
+    searched by bisection; fingerprints added since loading live in a small
+    set until ``save`` merges them in. Paths ending in ``.json`` are written in
+    the old JSON format, and JSON baselines are still read from any path.
+    """
+
     def __init__(self, fingerprints: Set[str] | None = None) -> None:
-        self.fingerprints: Set[str] = fingerprints or set()
+        self._sorted: Any = b""
+        self._count = 0
+        self._added: Set[bytes] = set()
+        self._map: Optional[mmap.mmap] = None
+        for fp in fingerprints or ():
+            self.add(fp)
 
     def add(self, fingerprint: str) -> None:
-        self.fingerprints.add(fingerprint)
+        digest = _digest(fingerprint)
+        if digest is not None and not self._find(digest):
+            self._added.add(digest)
 
     def contains(self, fingerprint: str) -> bool:
-        return fingerprint in self.fingerprints
+        digest = _digest(fingerprint)
+        if digest is None:
+            return False
+        return digest in self._added or self._find(digest)
+
+    def _find(self, digest: bytes) -> bool:
+        lo, hi = 0, self._count
+        data = self._sorted
+        base = len(MAGIC)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off = base + mid * DIGEST_SIZE
+            probe = data[off:off + DIGEST_SIZE]
+            if probe < digest:
+                lo = mid + 1
+            elif probe > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return self._count + len(self._added)
+
+    @property
+    def fingerprints(self) -> Set[str]:
+        return set(self._iter_hex())
+
+    def _iter_hex(self):
+        base = len(MAGIC)
+        for i in range(self._count):
+            off = base + i * DIGEST_SIZE
+            yield bytes(self._sorted[off:off + DIGEST_SIZE]).hex()
+        for digest in self._added:
+            yield digest.hex()
 
     def to_dict(self) -> Dict[str, Any]:
-        return {"fingerprints": sorted(self.fingerprints)}
+        return {"fingerprints": sorted(self._iter_hex())}
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "Baseline":
         fps = set(data.get("fingerprints", []))
         return Baseline(fps)
 
+    def _merged(self) -> List[bytes]:
+        """Chunks of the sorted binary file with the added digests merged in."""
+        chunks = [MAGIC]
+        base = len(MAGIC)
+        prev = 0
+        for digest in sorted(self._added):
+            # Insertion point in the sorted part; only len(added) bisections
+            lo, hi = prev, self._count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                off = base + mid * DIGEST_SIZE
+                if self._sorted[off:off + DIGEST_SIZE] < digest:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo > prev:
+                chunks.append(self._sorted[base + prev * DIGEST_SIZE:base + lo * DIGEST_SIZE])
+            chunks.append(digest)
+            prev = lo
+        if self._count > prev:
+            chunks.append(self._sorted[base + prev * DIGEST_SIZE:base + self._count * DIGEST_SIZE])
+        return chunks
+
     def save(self, path: str) -> None:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+            return
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            for chunk in self._merged():
+                f.write(chunk)
+        os.replace(tmp, path)
+        self._close()
+        self._attach(path)
+
+    def _attach(self, path: str) -> None:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size > len(MAGIC) else None
+        self._sorted = self._map if self._map is not None else MAGIC
+        self._count = (size - len(MAGIC)) // DIGEST_SIZE
+        self._added = set()
+
+    def _close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._sorted, self._count = b"", 0
 
     @staticmethod
     def load(path: str) -> "Baseline":
         if os.path.exists(path):
             try:
+                with open(path, "rb") as f:
+                    head = f.read(len(MAGIC))
+                if head == MAGIC:
+                    base = Baseline()
+                    base._attach(path)
+                    return base
                 with open(path, "r", encoding="utf-8") as f:
                     data = json.load(f)
                     return Baseline.from_dict(data)
@@ -37,11 +155,18 @@ class Baseline:
         return Baseline()
 
 
+def _digest(fingerprint: str) -> Optional[bytes]:
+    try:
+        digest = bytes.fromhex(fingerprint)
+    except (TypeError, ValueError):
+        return None
+    return digest if len(digest) == DIGEST_SIZE else None
+
+
 def fingerprint(rule_id: str, file_path: str, match: str) -> str:
     h = hashlib.sha256()
     key = f"{rule_id}|{file_path}|{match.strip()}".encode("utf-8", errors="ignore")
     h.update(key)
     return h.hexdigest()
 
-__all__ = ["Baseline", "fingerprint"]
-
+__all__ = ["Baseline", "fingerprint", "default_path"]
@@ -5,8 +5,9 @@ import click
 from typing import List, Optional
 
 from . import scanner
+from . import incremental
 from . import config as cfg
-from .baseline import Baseline
+from .baseline import Baseline, default_path
 
 
 def exit_code_for_findings(findings, fail_on: str) -> int:
@@ -26,14 +27,17 @@ def cli():
 @click.argument("paths", nargs=-1)
 @click.option("--staged", is_flag=True, help="Scan staged files from git index")
 @click.option("--config", "config_path", default=".secretscan.yml", help="Config path")
-@click.option("--baseline", "baseline_path", default=".secrets.baseline.json", help="Baseline file path")
+@click.option("--since", "since_ref", default=None, help="Only scan files changed since this git ref (e.g. origin/main)")
+@click.option("--cache/--no-cache", "use_cache", default=True, help="Reuse per-blob results with --since")
+@click.option("--baseline", "baseline_path", default=None, help="Baseline file path (binary; .json for the legacy format). Default: .secretscan.baseline, or .secrets.baseline.json if only that exists")
 @click.option("--fail-on", "fail_on", default="medium", help="Fail if at or above severity (low, medium, high, critical)")
 @click.option("--json-out/--no-json-out", default=True, help="Output results as JSON")
 @click.option("--update-baseline", is_flag=True, help="Add current findings to baseline and write file")
 @click.option("--verbose", is_flag=True, help="Verbose output")
-def scan(paths: List[str], staged: bool, config_path: str, baseline_path: str, fail_on: str, json_out: bool, update_baseline: bool, verbose: bool):
+def scan(paths: List[str], staged: bool, since_ref: Optional[str], use_cache: bool, config_path: str, baseline_path: str, fail_on: str, json_out: bool, update_baseline: bool, verbose: bool):
     """Scan files or staged changes for secrets."""
     conf = cfg.load_config(config_path)
+    baseline_path = baseline_path or default_path()
     base = Baseline.load(baseline_path)
 
     all_findings = []
@@ -49,6 +53,14 @@ def scan(paths: List[str], staged: bool, config_path: str, baseline_path: str, f
             content = scanner.read_staged_file(p)
             staged_map[p] = content
 
+    if since_ref:
+        cache = incremental.BlobCache(incremental.default_cache_path()) if use_cache else None
+        result = incremental.scan_since(since_ref, conf, base, cache)
+        if verbose:
+            click.echo(f"{result['files']} changed files, {result['blobs_scanned']} of {result['blobs']} blobs scanned")
+        all_findings.extend(result["findings"])
+        targets = []
+
     for p in targets:
         if staged:
             content = staged_map.get(p)
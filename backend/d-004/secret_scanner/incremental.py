@@ -0,0 +1,206 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .patterns import RAW_RULES
+from .scanner import content_matches, findings_for_path, is_binary_string, is_path_ignored, matches_allowlist
+from .baseline import Baseline
+
+# Tree entries that are not regular files (symlinks, submodules) are skipped
+FILE_MODES = {"100644", "100755"}
+# Blobs asked of `git cat-file --batch` per round trip
+CAT_FILE_BATCH = 256
+
+
+class BlobCache:
+    """Per-blob scan results, keyed by git blob SHA and a digest of the rules/config.
+
+    A blob's content never changes, so once scanned it is never scanned again
+    under the same rules and config, whichever commit or path it shows up at.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blob_matches ("
+            " blob TEXT NOT NULL, config TEXT NOT NULL, matches TEXT NOT NULL,"
+            " PRIMARY KEY (blob, config)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get_many(self, blobs: List[str], config_key: str) -> Dict[str, List[Dict[str, Any]]]:
+        found: Dict[str, List[Dict[str, Any]]] = {}
+        for i in range(0, len(blobs), 500):
+            chunk = blobs[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT blob, matches FROM blob_matches WHERE config = ? AND blob IN ({marks})",
+                [config_key, *chunk],
+            )
+            for blob, matches in rows:
+                found[blob] = json.loads(matches)
+        return found
+
+    def put_many(self, entries: List[Tuple[str, List[Dict[str, Any]]]], config_key: str) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO blob_matches (blob, config, matches) VALUES (?, ?, ?)",
+                [(blob, config_key, json.dumps(matches, separators=(",", ":"))) for blob, matches in entries],
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def config_key(config: Dict[str, Any]) -> str:
+    """Digest of everything content_matches depends on besides the content."""
+    relevant = {
+        "rules": RAW_RULES,
+        "allow_patterns": config.get("allow_patterns", []) or [],
+        "excluded_rules": sorted(config.get("excluded_rules", []) or []),
+        "enable_high_entropy": bool(config.get("enable_high_entropy", True)),
+        "entropy_threshold": float(config.get("entropy_threshold", 4.5)),
+    }
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _git(args: List[str], repo: str) -> bytes:
+    return subprocess.run(["git", "-C", repo, *args], check=True, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE).stdout
+
+
+def default_cache_path(repo: str = ".") -> str:
+    path = os.environ.get("SECRETSCAN_CACHE")
+    if path:
+        return path
+    git_dir = _git(["rev-parse", "--git-dir"], repo).decode().strip()
+    if not os.path.isabs(git_dir):
+        git_dir = os.path.join(repo, git_dir)
+    return os.path.join(git_dir, "secretscan-cache.sqlite")
+
+
+def changed_blobs(base_ref: str, head_ref: str = "HEAD", repo: str = ".") -> List[Tuple[str, str]]:
+    """(path, blob sha) of files added or modified between the merge base of base_ref and head_ref."""
+    out = _git(["diff", "--raw", "-z", "--no-abbrev", "--diff-filter=ACMRT", "--find-renames",
+                f"{base_ref}...{head_ref}"], repo)
+    fields = out.split(b"\0")
+    blobs: List[Tuple[str, str]] = []
+    i = 0
+    while i < len(fields) - 1:
+        meta = fields[i].decode()
+        if not meta.startswith(":"):
+            i += 1
+            continue
+        _, new_mode, _, new_sha, status = meta[1:].split(" ")
+        # Renames and copies carry the source path before the destination
+        i += 3 if status[0] in "RC" else 2
+        path = fields[i - 1].decode("utf-8", errors="surrogateescape")
+        if new_mode in FILE_MODES:
+            blobs.append((path, new_sha))
+    return blobs
+
+
+def tree_blobs(ref: str = "HEAD", repo: str = ".") -> List[Tuple[str, str]]:
+    """(path, blob sha) of every file in ``ref``."""
+    out = _git(["ls-tree", "-r", "-z", "--full-tree", ref], repo)
+    blobs: List[Tuple[str, str]] = []
+    for entry in out.split(b"\0"):
+        if not entry:
+            continue
+        meta, path = entry.split(b"\t", 1)
+        mode, kind, sha = meta.decode().split(" ")
+        if kind == "blob" and mode in FILE_MODES:
+            blobs.append((path.decode("utf-8", errors="surrogateescape"), sha))
+    return blobs
+
+
+def read_blobs(shas: List[str], repo: str = ".") -> Iterator[Tuple[str, bytes]]:
+    """(sha, content) for each blob, read through one `git cat-file --batch` process."""
+    if not shas:
+        return
+    proc = subprocess.Popen(["git", "-C", repo, "cat-file", "--batch"], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        for i in range(0, len(shas), CAT_FILE_BATCH):
+            chunk = shas[i:i + CAT_FILE_BATCH]
+            proc.stdin.write(("\n".join(chunk) + "\n").encode())
+            proc.stdin.flush()
+            for sha in chunk:
+                header = proc.stdout.readline().decode().split()
+                if len(header) < 3 or header[1] == "missing":
+                    continue
+                size = int(header[2])
+                data = proc.stdout.read(size)
+                proc.stdout.read(1)  # trailing newline
+                yield sha, data
+    finally:
+        proc.stdin.close()
+        proc.stdout.close()
+        proc.wait()
+
+
+def scan_blobs(blobs: List[Tuple[str, str]], config: Dict[str, Any], baseline: Optional[Baseline] = None,
+               cache: Optional[BlobCache] = None, repo: str = ".") -> Dict[str, Any]:
+    """Scan (path, blob sha) pairs, reading and scanning only blobs not in ``cache``."""
+    key = config_key(config)
+    # Path-level filters first, so ignored files are never read
+    wanted = [(path, sha) for path, sha in blobs
+              if not is_path_ignored(path, config) and not matches_allowlist(path, config)]
+    shas = sorted({sha for _, sha in wanted})
+    known = cache.get_many(shas, key) if cache else {}
+    missing = [sha for sha in shas if sha not in known]
+
+    fresh: List[Tuple[str, List[Dict[str, Any]]]] = []
+    for sha, data in read_blobs(missing, repo):
+        # Same text scan_file would see reading the checked-out file
+        content = data.decode("utf-8", errors="ignore").replace("\r\n", "\n").replace("\r", "\n")
+        matches = [] if is_binary_string(content) else content_matches(content, config)
+        known[sha] = matches
+        fresh.append((sha, matches))
+        if cache and len(fresh) >= 500:
+            cache.put_many(fresh, key)
+            fresh = []
+    if cache and fresh:
+        cache.put_many(fresh, key)
+
+    findings: List[Dict[str, Any]] = []
+    for path, sha in wanted:
+        findings.extend(findings_for_path(known.get(sha, []), path, baseline))
+    return {
+        "findings": findings,
+        "blobs": len(shas),
+        "blobs_scanned": len(missing),
+        "files": len(wanted),
+    }
+
+
+def scan_since(base_ref: str, config: Dict[str, Any], baseline: Optional[Baseline] = None,
+               cache: Optional[BlobCache] = None, head_ref: str = "HEAD", repo: str = ".") -> Dict[str, Any]:
+    """Scan only the files changed on head_ref since it forked from base_ref (a PR's diff)."""
+    return scan_blobs(changed_blobs(base_ref, head_ref, repo), config, baseline, cache, repo)
+
+
+def scan_tree(ref: str, config: Dict[str, Any], baseline: Optional[Baseline] = None,
+              cache: Optional[BlobCache] = None, repo: str = ".") -> Dict[str, Any]:
+    """Scan every file committed at ``ref``; unchanged blobs come from the cache."""
+    return scan_blobs(tree_blobs(ref, repo), config, baseline, cache, repo)
+
+
+__all__ = [
+    "BlobCache",
+    "changed_blobs",
+    "tree_blobs",
+    "scan_blobs",
+    "scan_since",
+    "scan_tree",
+    "default_cache_path",
+]
@@ -71,77 +71,58 @@ def is_binary_string(data: str) -> bool:
 
 
 def scan_content(content: str, path: str, config: Dict[str, Any], baseline: Optional[Baseline] = None) -> List[Dict[str, Any]]:
-    findings: List[Dict[str, Any]] = []
-
     if is_path_ignored(path, config):
-        return findings
+        return []
 
     if is_binary_string(content):
-        return findings
+        return []
+
+    # Pre-scan allow patterns at file level
+    if matches_allowlist(path, config):
+        return []
+
+    return findings_for_path(content_matches(content, config), path, baseline)
+
+
+def content_matches(content: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Everything scan_content reports that depends only on the content.
+
+    The result is the same wherever the content lives, which is what lets
+    the incremental scanner cache it per git blob. ``findings_for_path``
+    turns it into findings for one path.
+    """
+    matches: List[Dict[str, Any]] = []
 
     excluded_rules = set(config.get("excluded_rules", []) or [])
 
     # Inline ignore support
     lines = content.splitlines()
 
-    # Pre-scan allow patterns at file level
-    if matches_allowlist(path, config):
-        return findings
-
-    # Rule-based scanning
+    # Rule-based scanning (multiline rules are compiled with DOTALL)
     for rule in COMPILED_RULES:
         if rule["id"] in excluded_rules:
             continue
         pattern = rule["pattern"]
-        if rule.get("multiline"):
-            for m in pattern.finditer(content):
-                matched = m.group(0)
-                start = m.start()
-                line, col = compute_line_col(content, start)
-                # Inline ignore check
-                if line - 1 < len(lines) and IGNORE_INLINE_TOKEN in lines[line - 1]:
-                    continue
-                if matches_allowlist(matched, config):
-                    continue
-                fp = make_fingerprint(rule["id"], path, matched)
-                if baseline and baseline.contains(fp):
-                    continue
-                findings.append({
-                    "file": path,
-                    "line": line,
-                    "column": col,
-                    "match": matched[:2000],
-                    "rule_id": rule["id"],
-                    "rule_name": rule["name"],
-                    "message": rule["description"],
-                    "severity": rule["severity"],
-                    "fingerprint": fp,
-                    "tags": rule.get("tags", []),
-                })
-        else:
-            for m in pattern.finditer(content):
-                matched = m.group(0)
-                start = m.start()
-                line, col = compute_line_col(content, start)
-                if line - 1 < len(lines) and IGNORE_INLINE_TOKEN in lines[line - 1]:
-                    continue
-                if matches_allowlist(matched, config):
-                    continue
-                fp = make_fingerprint(rule["id"], path, matched)
-                if baseline and baseline.contains(fp):
-                    continue
-                findings.append({
-                    "file": path,
-                    "line": line,
-                    "column": col,
-                    "match": matched[:2000],
-                    "rule_id": rule["id"],
-                    "rule_name": rule["name"],
-                    "message": rule["description"],
-                    "severity": rule["severity"],
-                    "fingerprint": fp,
-                    "tags": rule.get("tags", []),
-                })
+        for m in pattern.finditer(content):
+            matched = m.group(0)
+            start = m.start()
+            line, col = compute_line_col(content, start)
+            # Inline ignore check
+            if line - 1 < len(lines) and IGNORE_INLINE_TOKEN in lines[line - 1]:
+                continue
+            if matches_allowlist(matched, config):
+                continue
+            matches.append({
+                "line": line,
+                "column": col,
+                "match": matched[:2000],
+                "rule_id": rule["id"],
+                "rule_name": rule["name"],
+                "message": rule["description"],
+                "severity": rule["severity"],
+                "tags": rule.get("tags", []),
+                "key": matched.strip(),
+            })
 
     # High-entropy scanning
     if config.get("enable_high_entropy", True):
@@ -159,24 +140,39 @@ def scan_content(content: str, path: str, config: Dict[str, Any], baseline: Opti
                     continue
                 if matches_allowlist(token, config):
                     continue
-                rule_id = "HIGH_ENTROPY_STRING"
-                rule_name = "High-entropy string"
-                fp = make_fingerprint(rule_id, path, token)
-                if baseline and baseline.contains(fp):
-                    continue
-                findings.append({
-                    "file": path,
+                matches.append({
                     "line": line,
                     "column": col,
                     "match": token[:2000],
-                    "rule_id": rule_id,
-                    "rule_name": rule_name,
+                    "rule_id": "HIGH_ENTROPY_STRING",
+                    "rule_name": "High-entropy string",
                     "message": f"High-entropy string (H={e:.2f}) exceeds threshold {threshold}",
                     "severity": "medium",
-                    "fingerprint": fp,
                     "tags": ["entropy"],
+                    "key": token.strip(),
                 })
 
+    return matches
+
+
+def findings_for_path(matches: List[Dict[str, Any]], path: str, baseline: Optional[Baseline] = None) -> List[Dict[str, Any]]:
+    findings: List[Dict[str, Any]] = []
+    for m in matches:
+        fp = make_fingerprint(m["rule_id"], path, m["key"])
+        if baseline and baseline.contains(fp):
+            continue
+        findings.append({
+            "file": path,
+            "line": m["line"],
+            "column": m["column"],
+            "match": m["match"],
+            "rule_id": m["rule_id"],
+            "rule_name": m["rule_name"],
+            "message": m["message"],
+            "severity": m["severity"],
+            "fingerprint": fp,
+            "tags": m["tags"],
+        })
     return findings
 
 
@@ -224,6 +220,8 @@ def severity_to_level(sev: str) -> int:
 
 __all__ = [
     "scan_content",
+    "content_matches",
+    "findings_for_path",
     "scan_file",
     "list_staged_files",
     "read_staged_file",
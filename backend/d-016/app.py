@@ -2,11 +2,29 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 import os
+import threading
+from collections import OrderedDict
+
+from shard_planner import WorkQueue
 
 app = Flask(__name__)
 
+# Work-stealing queues for dynamic CI sharding, keyed by CI run id
+_queues = {}
+_queues_lock = threading.Lock()
+# Deleted (finished) runs -> shards that took part, so a reused run id is refused
+_finished = OrderedDict()
+MAX_FINISHED_RUNS = 1024
+
+
+def _shard_arg(body):
+    shard = body.get("shard", 0)
+    if isinstance(shard, bool) or not isinstance(shard, int) or shard < 0:
+        raise ValueError("shard must be a non-negative integer")
+    return shard
+
 @app.route('/')
 def home():
     return jsonify({"message": "Hello, World!"})
@@ -33,6 +51,87 @@ def split_tests(total, index):
         "count": len(split)
     })
 
+@app.route('/queues/<run_id>', methods=['PUT'])
+def create_queue(run_id):
+    """Create the queue for a CI run; shards racing to create it all get the first one"""
+    body = request.get_json(silent=True) or {}
+    nodes = body.get("nodes") or {}
+    if not isinstance(nodes, dict) or not nodes:
+        return jsonify({"error": "nodes must be a non-empty object of node id -> estimated seconds"}), 400
+    try:
+        weights = {str(k): float(v) for k, v in nodes.items()}
+        shards = int(body.get("shards", 1))
+        min_batch = float(body.get("min_batch_seconds", 5.0))
+        shard = _shard_arg(body) if "shard" in body else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid estimates, shard or shard count"}), 400
+    with _queues_lock:
+        queue = _queues.get(run_id)
+        if queue is not None and queue.status()["done"]:
+            participants = queue.shards_seen
+        else:
+            participants = _finished.get(run_id)
+        if participants is not None:
+            # A shard that never pulled arrived after its siblings drained the
+            # queue: nothing left for it. Anything else is a re-run of the same id.
+            if shard is None or shard in participants:
+                return jsonify({"error": f"run {run_id} already finished; use a new run id to run the tests again"}), 409
+            return jsonify({"run_id": run_id, "created": False, "done": True}), 200
+        created = queue is None
+        if created:
+            queue = _queues[run_id] = WorkQueue(weights, shards, min_batch_seconds=min_batch)
+    return jsonify({"run_id": run_id, "created": created, **queue.status()}), 201 if created else 200
+
+
+@app.route('/queues/<run_id>', methods=['GET'])
+def queue_status(run_id):
+    queue = _queues.get(run_id)
+    if queue is None:
+        return jsonify({"error": "unknown run"}), 404
+    return jsonify({"run_id": run_id, **queue.status(), "durations": queue.durations})
+
+
+@app.route('/queues/<run_id>', methods=['DELETE'])
+def delete_queue(run_id):
+    with _queues_lock:
+        queue = _queues.pop(run_id, None)
+        if queue is not None:
+            _finished[run_id] = set(queue.shards_seen)
+            while len(_finished) > MAX_FINISHED_RUNS:
+                _finished.popitem(last=False)
+    if queue is None:
+        return jsonify({"error": "unknown run"}), 404
+    return jsonify({"run_id": run_id, "deleted": True})
+
+
+@app.route('/queues/<run_id>/take', methods=['POST'])
+def take_batch(run_id):
+    queue = _queues.get(run_id)
+    if queue is None:
+        return jsonify({"error": "unknown run"}), 404
+    body = request.get_json(silent=True) or {}
+    try:
+        shard = _shard_arg(body)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    batch_id, nodes = queue.take(shard)
+    return jsonify({"batch_id": batch_id, "nodes": nodes, "count": len(nodes)})
+
+
+@app.route('/queues/<run_id>/complete', methods=['POST'])
+def complete_batch(run_id):
+    queue = _queues.get(run_id)
+    if queue is None:
+        return jsonify({"error": "unknown run"}), 404
+    body = request.get_json(silent=True) or {}
+    durations = body.get("durations") or {}
+    try:
+        durations = {str(k): float(v) for k, v in durations.items()}
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({"error": "durations must be an object of node id -> seconds"}), 400
+    accepted = queue.complete(str(body.get("batch_id", "")), durations)
+    return jsonify({"accepted": accepted, **queue.status()})
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -0,0 +1,200 @@
+"""
+CI shard simulator: wall-clock makespan of each splitting strategy.
+
+Replays --runs CI runs of a test suite over --shards shards. Before each
+run every strategy plans from the history of the runs before it; the run's
+actual per-test durations (recorded base duration with --noise jitter) then
+decide each shard's wall clock, and feed the history for the next run.
+Strategies:
+
+  greedy_files   the previous splitter: whole files, ci_update_durations'
+                 per-file EWMA, median estimate for unknown files
+  lpt_files      whole files, LPT plus local search on the same estimates
+  lpt_nodes      test nodes, LPT on per-node EWMA / file-size estimates
+  lpt_ls_nodes   lpt_nodes plus local search rebalancing
+  dynamic        shards pull shrinking batches from a WorkQueue, paying
+                 --startup (pytest start-up) and --pull-latency per batch
+
+Every static shard pays --startup once. Between runs --churn of the suite
+changes: tests get slower or faster, and new tests and new files appear
+(with no history). The report gives the mean makespan, its ratio to the
+lower bound (startup + max(total / shards, slowest test)), and the speedup
+over greedy_files.
+
+Without --durations a suite is generated (heavy-tailed, a few slow
+integration files); --durations replays a recorded node durations file
+(tests/.test_node_durations.json, or a flat {node id: seconds} map).
+
+    python bench_sharding.py --shards 8 --runs 30
+    python bench_sharding.py --durations tests/.test_node_durations.json --churn 0
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "tests_d-016"))
+
+from ci_split_tests import balance  # noqa: E402
+from ci_update_durations import ewma_update  # noqa: E402
+from shard_planner import DurationHistory, WorkQueue, node_file, plan_shards  # noqa: E402
+
+STRATEGIES = ["greedy_files", "lpt_files", "lpt_nodes", "lpt_ls_nodes", "dynamic"]
+
+
+def new_file(rng, suite, sizes, name, slow=False):
+    count = rng.randint(20, 40) if slow else max(1, min(200, int(rng.lognormvariate(2.0, 1.0))))
+    scale = rng.uniform(2.0, 6.0) if slow else rng.lognormvariate(-3.0, 1.2)
+    size = 400
+    for i in range(count):
+        suite[f"{name}::test_{i}"] = scale * rng.lognormvariate(0.0, 0.8)
+        size += rng.randint(300, 900)
+    sizes[name] = size
+
+
+def generate_suite(rng, files):
+    suite, sizes = {}, {}
+    for i in range(files):
+        new_file(rng, suite, sizes, f"tests/test_mod{i}.py", slow=i % 50 == 0)
+    return suite, sizes
+
+
+def load_suite(path):
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    nodes = data["nodes"] if isinstance(data.get("nodes"), dict) else data
+    suite = {k: float(v) for k, v in nodes.items()}
+    recorded = {k: int(v) for k, v in data.get("sizes", {}).items()} if nodes is not data else {}
+    sizes = {}
+    for nodeid in suite:
+        f = node_file(nodeid)
+        # Files without a recorded size: about 600 bytes per test
+        sizes[f] = recorded[f] if f in recorded else sizes.get(f, 0) + 600
+    return suite, sizes
+
+
+def churn(rng, suite, sizes, fraction, run):
+    if fraction <= 0:
+        return
+    for nodeid in rng.sample(sorted(suite), max(1, int(len(suite) * fraction))):
+        suite[nodeid] *= rng.uniform(0.3, 4.0)
+    files = sorted(sizes)
+    for i in range(max(1, int(len(suite) * fraction))):
+        f = rng.choice(files)
+        suite[f"{f}::test_new_{run}_{i}"] = statistics.median(v for k, v in suite.items() if node_file(k) == f)
+        sizes[f] += rng.randint(300, 900)
+    for i in range(max(1, int(len(files) * fraction))):
+        new_file(rng, suite, sizes, f"tests/test_new{run}_{i}.py", slow=rng.random() < 0.05)
+
+
+def static_makespan(shards, actual, startup):
+    return startup + max(sum(actual[x] for x in shard) for shard in shards)
+
+
+def file_actuals(actual):
+    per_file = {}
+    for nodeid, t in actual.items():
+        per_file[node_file(nodeid)] = per_file.get(node_file(nodeid), 0.0) + t
+    return per_file
+
+
+def dynamic_makespan(estimates, actual, shard_total, startup, pull_latency):
+    queue = WorkQueue(estimates, shard_total)
+    free_at = [0.0] * shard_total
+    finished = [False] * shard_total
+    while not all(finished):
+        shard = min((i for i in range(shard_total) if not finished[i]), key=lambda i: free_at[i])
+        free_at[shard] += pull_latency
+        batch_id, nodes = queue.take(shard)
+        if not nodes:
+            finished[shard] = True
+            continue
+        free_at[shard] += startup + sum(actual[n] for n in nodes)
+        queue.complete(batch_id, {n: actual[n] for n in nodes})
+    return max(free_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--files", type=int, default=150, help="files in the generated suite")
+    parser.add_argument("--durations", type=str, help="recorded node durations to replay instead")
+    parser.add_argument("--noise", type=float, default=0.15, help="lognormal sigma of run-to-run jitter")
+    parser.add_argument("--churn", type=float, default=0.01, help="fraction of tests changed/added per run")
+    parser.add_argument("--startup", type=float, default=2.0, help="seconds per pytest invocation")
+    parser.add_argument("--pull-latency", type=float, default=0.05, help="seconds per queue request")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    suite, sizes = load_suite(args.durations) if args.durations else generate_suite(rng, args.files)
+
+    history = DurationHistory()
+    file_history = {}
+    results = {s: {"makespan": [], "ratio": [], "plan_ms": []} for s in STRATEGIES}
+    for run in range(args.runs + 1):
+        actual = {n: t * rng.lognormvariate(0.0, args.noise) for n, t in suite.items()}
+        if run > 0:
+            bound = args.startup + max(sum(actual.values()) / args.shards, max(actual.values()))
+            files = sorted(sizes)
+            timings = {}
+
+            t0 = time.perf_counter()
+            plan = balance(files, file_history, args.shards)
+            timings["greedy_files"] = (time.perf_counter() - t0, static_makespan(plan, file_actuals(actual), args.startup))
+
+            t0 = time.perf_counter()
+            file_estimates = {}
+            if file_history:
+                known = sorted(file_history.values())
+                unknown = statistics.median(known)
+                file_estimates = {f: file_history.get(f, unknown) for f in files}
+            plan = plan_shards(file_estimates, args.shards)
+            timings["lpt_files"] = (time.perf_counter() - t0, static_makespan(plan, file_actuals(actual), args.startup))
+
+            t0 = time.perf_counter()
+            estimates = history.estimate(suite, sizes)
+            estimate_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            plan = plan_shards(estimates, args.shards, refine=False)
+            timings["lpt_nodes"] = (estimate_s + time.perf_counter() - t0, static_makespan(plan, actual, args.startup))
+            t0 = time.perf_counter()
+            plan = plan_shards(estimates, args.shards)
+            timings["lpt_ls_nodes"] = (estimate_s + time.perf_counter() - t0, static_makespan(plan, actual, args.startup))
+
+            t0 = time.perf_counter()
+            makespan = dynamic_makespan(estimates, actual, args.shards, args.startup, args.pull_latency)
+            timings["dynamic"] = (estimate_s + time.perf_counter() - t0, makespan)
+
+            for name, (plan_s, makespan) in timings.items():
+                results[name]["makespan"].append(makespan)
+                results[name]["ratio"].append(makespan / bound)
+                results[name]["plan_ms"].append(plan_s * 1000)
+
+        history.record(actual, sizes=sizes)
+        for f, t in file_actuals(actual).items():
+            file_history[f] = ewma_update(file_history.get(f), t)
+        churn(rng, suite, sizes, args.churn, run)
+
+    baseline = statistics.mean(results["greedy_files"]["makespan"])
+    report = {"tests": len(suite), "files": len(sizes), "shards": args.shards, "runs": args.runs}
+    for name in STRATEGIES:
+        r = results[name]
+        mean = statistics.mean(r["makespan"])
+        report[name] = {
+            "mean_makespan_s": round(mean, 1),
+            "max_makespan_s": round(max(r["makespan"]), 1),
+            "mean_ratio_to_bound": round(statistics.mean(r["ratio"]), 3),
+            "speedup_vs_greedy": round(baseline / mean, 2),
+            "mean_plan_ms": round(statistics.mean(r["plan_ms"]), 1),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
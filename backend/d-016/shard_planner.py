@@ -0,0 +1,236 @@
+import bisect
+import heapq
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+NODE_DURATIONS_PATH = Path("tests/.test_node_durations.json")
+DEFAULT_ESTIMATE = 1.0
+EWMA_ALPHA = 0.7  # weight recent measurements higher
+EPSILON = 1e-9
+
+
+def node_file(nodeid: str) -> str:
+    return nodeid.split("::", 1)[0]
+
+
+class DurationHistory:
+    """EWMA duration per test node, plus the last known size of each test file."""
+
+    def __init__(self, nodes: Optional[Dict[str, float]] = None, sizes: Optional[Dict[str, int]] = None):
+        self.nodes: Dict[str, float] = nodes or {}
+        self.sizes: Dict[str, int] = sizes or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "DurationHistory":
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return cls({k: float(v) for k, v in data.get("nodes", {}).items()},
+                       {k: int(v) for k, v in data.get("sizes", {}).items()})
+        except Exception:
+            return cls()
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps({"nodes": self.nodes, "sizes": self.sizes}, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def record(self, durations: Dict[str, float], alpha: float = EWMA_ALPHA,
+               sizes: Optional[Dict[str, int]] = None) -> None:
+        for nodeid, t in durations.items():
+            old = self.nodes.get(nodeid)
+            self.nodes[nodeid] = t if old is None else alpha * t + (1.0 - alpha) * old
+        if sizes:
+            self.sizes.update(sizes)
+
+    def estimate(self, nodeids: Iterable[str], sizes: Optional[Dict[str, int]] = None) -> Dict[str, float]:
+        """Expected seconds for each node id.
+
+        Nodes with history use their EWMA. A new node in a file with history
+        gets the median of that file's nodes. A file with no history is
+        estimated from its size at the suite's seconds-per-byte rate, split
+        evenly over its nodes; without sizes or history every such node gets
+        the median node duration (DEFAULT_ESTIMATE when nothing is known).
+        """
+        sizes = {**self.sizes, **(sizes or {})}
+        history: Dict[str, List[float]] = {}
+        for nodeid, t in self.nodes.items():
+            history.setdefault(node_file(nodeid), []).append(t)
+        sized = [f for f in history if sizes.get(f)]
+        total_bytes = sum(sizes[f] for f in sized)
+        rate = sum(sum(history[f]) for f in sized) / total_bytes if total_bytes else None
+        fallback = statistics.median(self.nodes.values()) if self.nodes else DEFAULT_ESTIMATE
+
+        requested: Dict[str, List[str]] = {}
+        for nodeid in nodeids:
+            requested.setdefault(node_file(nodeid), []).append(nodeid)
+
+        estimates: Dict[str, float] = {}
+        for f, nodes in requested.items():
+            if f in history:
+                file_median = statistics.median(history[f])
+                for nodeid in nodes:
+                    estimates[nodeid] = self.nodes.get(nodeid, file_median)
+            elif rate is not None and sizes.get(f):
+                per_node = sizes[f] * rate / len(nodes)
+                for nodeid in nodes:
+                    estimates[nodeid] = per_node
+            else:
+                for nodeid in nodes:
+                    estimates[nodeid] = fallback
+        return estimates
+
+
+def lpt(weights: Dict[str, float], shard_total: int) -> List[List[str]]:
+    """Longest processing time first: each item goes to the least loaded shard."""
+    heap = [(0.0, i) for i in range(shard_total)]
+    shards: List[List[str]] = [[] for _ in range(shard_total)]
+    for item in sorted(weights, key=lambda k: (-weights[k], k)):
+        load, i = heapq.heappop(heap)
+        shards[i].append(item)
+        heapq.heappush(heap, (load + weights[item], i))
+    return shards
+
+
+def local_search(shards: List[List[str]], weights: Dict[str, float], max_rounds: int = 200) -> List[List[str]]:
+    """Lower the largest shard by moving or swapping items with another shard.
+
+    Each round takes the single move (one item from the largest shard) or
+    swap (one item each way) that leaves the pair's larger load smallest,
+    and stops once nothing brings the largest shard down.
+    """
+    items = [sorted((weights[x], x) for x in s) for s in shards]
+    loads = [sum(w for w, _ in s) for s in items]
+    n = len(items)
+    for _ in range(max_rounds):
+        m = max(range(n), key=lambda i: (loads[i], -i))
+        best: Optional[Tuple[float, int, int, Optional[int]]] = None
+        for j in range(n):
+            gap = loads[m] - loads[j]
+            if j == m or gap <= EPSILON:
+                continue
+            # Moving weight w gives max(loads[m] - w, loads[j] + w): best near gap / 2
+            k = bisect.bisect_left(items[m], (gap / 2,))
+            for xi in (k - 1, k):
+                if 0 <= xi < len(items[m]) and 0 < items[m][xi][0] < gap:
+                    worst = max(loads[m] - items[m][xi][0], loads[j] + items[m][xi][0])
+                    if best is None or worst < best[0]:
+                        best = (worst, j, xi, None)
+            # A swap moves the difference of the two weights
+            for xi, (wx, _) in enumerate(items[m]):
+                k = bisect.bisect_left(items[j], (wx - gap / 2,))
+                for yi in (k - 1, k):
+                    if 0 <= yi < len(items[j]):
+                        d = wx - items[j][yi][0]
+                        if 0 < d < gap:
+                            worst = max(loads[m] - d, loads[j] + d)
+                            if best is None or worst < best[0]:
+                                best = (worst, j, xi, yi)
+        if best is None or best[0] >= loads[m] - EPSILON:
+            break
+        _, j, xi, yi = best
+        x = items[m].pop(xi)
+        loads[m] -= x[0]
+        loads[j] += x[0]
+        if yi is not None:
+            y = items[j].pop(yi)
+            bisect.insort(items[m], y)
+            loads[j] -= y[0]
+            loads[m] += y[0]
+        bisect.insort(items[j], x)
+    return [[x for _, x in reversed(s)] for s in items]
+
+
+def plan_shards(weights: Dict[str, float], shard_total: int, refine: bool = True) -> List[List[str]]:
+    """Split items over shards, LPT then (with ``refine``) local search.
+
+    Ties are broken by name, so every shard computing the plan from the
+    same estimates gets the same split.
+    """
+    shards = lpt(weights, shard_total)
+    return local_search(shards, weights) if refine else shards
+
+
+class WorkQueue:
+    """Test nodes handed out to shards in shrinking batches, largest first.
+
+    Each batch aims at the remaining estimate / (2 * shards) seconds, never
+    less than ``min_batch_seconds``: early batches amortize the pytest
+    start-up of each pull, and the last ones are small enough for shards to
+    finish close together. A batch not completed within ``lease_seconds``
+    (its shard died) goes back on the queue.
+    """
+
+    def __init__(self, weights: Dict[str, float], shard_total: int,
+                 min_batch_seconds: float = 5.0, lease_seconds: float = 1800.0):
+        self.weights = dict(weights)
+        self.shard_total = max(1, shard_total)
+        self.min_batch_seconds = min_batch_seconds
+        self.lease_seconds = lease_seconds
+        self._pending = deque(sorted(self.weights, key=lambda k: (-self.weights[k], k)))
+        self._remaining = sum(self.weights.values())
+        self._leases: Dict[str, Tuple[float, int, List[str]]] = {}
+        self.durations: Dict[str, float] = {}
+        # Shards that have pulled from this queue, to tell a late shard from a re-run
+        self.shards_seen: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def take(self, shard: int) -> Tuple[Optional[str], List[str]]:
+        with self._lock:
+            self.shards_seen.add(shard)
+            self._requeue_expired()
+            if not self._pending:
+                return None, []
+            target = max(self.min_batch_seconds, self._remaining / (2 * self.shard_total))
+            batch: List[str] = []
+            seconds = 0.0
+            while self._pending and (not batch or seconds < target):
+                nodeid = self._pending.popleft()
+                batch.append(nodeid)
+                seconds += self.weights[nodeid]
+            self._remaining -= seconds
+            batch_id = uuid.uuid4().hex
+            self._leases[batch_id] = (time.monotonic() + self.lease_seconds, shard, batch)
+            return batch_id, batch
+
+    def complete(self, batch_id: str, durations: Optional[Dict[str, float]] = None) -> bool:
+        with self._lock:
+            lease = self._leases.pop(batch_id, None)
+            if lease is None:
+                return False
+            self.durations.update(durations or {})
+            return True
+
+    def _requeue_expired(self):
+        now = time.monotonic()
+        expired = [b for b, (deadline, _, _) in self._leases.items() if deadline < now]
+        if not expired:
+            return
+        for batch_id in expired:
+            _, _, batch = self._leases.pop(batch_id)
+            self._pending.extend(batch)
+            self._remaining += sum(self.weights[n] for n in batch)
+        self._pending = deque(sorted(self._pending, key=lambda k: (-self.weights[k], k)))
+
+    def status(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "shards": self.shard_total,
+                "total": len(self.weights),
+                "pending": len(self._pending),
+                "in_flight": sum(len(b) for _, _, b in self._leases.values()),
+                "completed": len(self.durations),
+                "remaining_estimate_seconds": round(self._remaining, 3),
+                "done": not self._pending and not self._leases,
+            }
@@ -3,10 +3,20 @@ import argparse
 import glob
 import json
 import os
+import subprocess
 import sys
+import tempfile
+import urllib.error
+import urllib.request
+import uuid
 from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shard_planner import NODE_DURATIONS_PATH, DurationHistory, plan_shards  # noqa: E402
+from ci_update_durations import file_sizes, parse_junit_nodes  # noqa: E402
 
 DEFAULT_GLOB = "tests/test_*.py"
 DURATIONS_PATH = Path("tests/.test_durations.json")
@@ -82,13 +92,95 @@ def balance(files: List[str], durations: Dict[str, float], shard_total: int) ->
     return buckets
 
 
+def collect_nodes(files: List[str]) -> Optional[List[str]]:
+    """Test node ids pytest collects from ``files``; None if collection fails"""
+    try:
+        res = subprocess.run([sys.executable, "-m", "pytest", "--collect-only", "-q", *files],
+                             capture_output=True, text=True, timeout=600)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if res.returncode not in (0, 5):
+        return None
+    return sorted(line.strip() for line in res.stdout.splitlines() if "::" in line and not line.startswith(" "))
+
+
+def read_run_id() -> str:
+    """Queue id for this run; a CI re-run of the same run id gets a new one.
+
+    GITHUB_RUN_ID survives "re-run jobs", so GITHUB_RUN_ATTEMPT is appended.
+    Without any CI id the run is local and gets a fresh id (several local
+    shards must share one through --run-id or SHARD_RUN_ID).
+    """
+    if os.getenv("SHARD_RUN_ID"):
+        return os.environ["SHARD_RUN_ID"]
+    if os.getenv("GITHUB_RUN_ID"):
+        return f"{os.environ['GITHUB_RUN_ID']}-{os.getenv('GITHUB_RUN_ATTEMPT', '1')}"
+    return os.getenv("CI_PIPELINE_ID") or os.getenv("CIRCLE_WORKFLOW_ID") or f"local-{uuid.uuid4().hex}"
+
+
+def _call(url: str, method: str, payload: Optional[dict] = None) -> dict:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def run_dynamic(queue_url: str, run_id: str, estimates: Dict[str, float], shard_index: int, shard_total: int,
+                pytest_args: List[str]) -> int:
+    """Pull batches from the shared queue and run them until it is empty.
+
+    Returns the worst pytest exit code seen (5, nothing collected, counts as 0).
+    The shard whose completion drains the queue deletes it. A run id whose
+    queue already finished with this shard in it is refused (exit code 2)
+    rather than passing with zero tests.
+    """
+    base = f"{queue_url.rstrip('/')}/queues/{run_id}"
+    try:
+        created = _call(base, "PUT", {"nodes": estimates, "shards": shard_total, "shard": shard_index})
+    except urllib.error.HTTPError as e:
+        if e.code != 409:
+            raise
+        print(json.loads(e.read().decode("utf-8")).get("error", "run already finished"), file=sys.stderr)
+        return 2
+    if created.get("done"):
+        # The other shards ran everything before this one started
+        return 0
+    worst = 0
+    done = False
+    with tempfile.TemporaryDirectory() as tmp:
+        junit = Path(tmp) / "batch.xml"
+        while True:
+            batch = _call(f"{base}/take", "POST", {"shard": shard_index})
+            if not batch["nodes"]:
+                break
+            code = subprocess.call([sys.executable, "-m", "pytest", f"--junitxml={junit}", *pytest_args, *batch["nodes"]])
+            worst = max(worst, 0 if code == 5 else code)
+            status = _call(f"{base}/complete", "POST", {"batch_id": batch["batch_id"], "durations": parse_junit_nodes(junit)})
+            done = bool(status.get("done"))
+    if done:
+        try:
+            _call(base, "DELETE")
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                raise
+    return worst
+
+
 def main():
     parser = argparse.ArgumentParser(description="Auto-split pytest test files into shards based on historic durations.")
     parser.add_argument("--shard-index", type=int, help="Index of the current shard (0-based).", default=None)
     parser.add_argument("--shard-total", type=int, help="Total number of shards.", default=None)
     parser.add_argument("--test-glob", type=str, help="Glob to discover test files.", default=DEFAULT_GLOB)
     parser.add_argument("--durations-file", type=str, help="Path to durations JSON file.", default=str(DURATIONS_PATH))
+    parser.add_argument("--node-durations-file", type=str, help="Path to per-test-node durations JSON file.", default=str(NODE_DURATIONS_PATH))
+    parser.add_argument("--granularity", choices=["node", "file"], default="node",
+                        help="Split individual tests (collected with pytest) or whole files. Falls back to files if collection fails.")
+    parser.add_argument("--planner", choices=["lpt", "greedy"], default="lpt",
+                        help="lpt: longest-first plus local search rebalancing; greedy: the previous file-level split.")
+    parser.add_argument("--queue-url", type=str, help="Run tests pulled from the work-stealing queue served at this URL instead of a static split.")
+    parser.add_argument("--run-id", type=str, help="Queue id shared by all shards of one CI run (default: from CI env).")
     parser.add_argument("--output", type=str, help="Write assigned test files (newline-separated) to this file. If omitted, prints to stdout.")
+    parser.add_argument("pytest_args", nargs="*", help="Extra pytest arguments for --queue-url mode (after --).")
 
     args = parser.parse_args()
 
@@ -103,11 +195,26 @@ def main():
     durations = load_durations(Path(args.durations_file))
     files = discover_tests(args.test_glob)
 
+    split_nodes = args.queue_url or (args.granularity == "node" and args.planner == "lpt")
+    nodes = collect_nodes(files) if files and split_nodes else None
+    if nodes:
+        estimates = DurationHistory.load(Path(args.node_durations_file)).estimate(nodes, file_sizes(files))
+    else:
+        estimates = {f: estimate_duration(f, durations) for f in files}
+
+    if args.queue_url:
+        if not estimates:
+            return
+        sys.exit(run_dynamic(args.queue_url, args.run_id or read_run_id(), estimates,
+                             shard_index, shard_total, args.pytest_args))
+
     if not files:
         assigned: List[str] = []
-    else:
+    elif args.planner == "greedy":
         shards = balance(files, durations, shard_total)
         assigned = shards[shard_index]
+    else:
+        assigned = sorted(plan_shards(estimates, shard_total)[shard_index])
 
     output_text = "\n".join(assigned)
     if args.output:
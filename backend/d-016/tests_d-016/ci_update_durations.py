@@ -2,10 +2,15 @@
 import argparse
 import json
 import os
+import sys
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 import xml.etree.ElementTree as ET
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shard_planner import NODE_DURATIONS_PATH, DurationHistory, node_file  # noqa: E402
+
 DURATIONS_PATH = Path("tests/.test_durations.json")
 EWMA_ALPHA = 0.7  # weight recent measurements higher
 
@@ -53,6 +58,52 @@ def parse_junit(junit_path: Path) -> Dict[str, float]:
     return per_file
 
 
+def junit_nodeid(tc: ET.Element) -> Optional[str]:
+    """Rebuild the pytest node id (path::Class::name) of a JUnit testcase"""
+    name = tc.attrib.get('name')
+    classname = tc.attrib.get('classname', '')
+    if not name or not classname:
+        return None
+    parts = classname.split('.')
+    file_attr = tc.attrib.get('file')
+    if file_attr:
+        path = normalize_path(file_attr)
+        cut = len(path[:-3].split('/')) if path.endswith('.py') else len(parts)
+    else:
+        # The longest dotted prefix that is a module file; the rest are classes
+        for cut in range(len(parts), 0, -1):
+            if os.path.isfile('/'.join(parts[:cut]) + '.py'):
+                break
+        else:
+            cut = len(parts)
+        path = '/'.join(parts[:cut]) + '.py'
+    return '::'.join([path, *parts[cut:], name])
+
+
+def parse_junit_nodes(junit_path: Path) -> Dict[str, float]:
+    if not junit_path.exists():
+        return {}
+    try:
+        root = ET.parse(junit_path).getroot()
+    except ET.ParseError:
+        return {}
+    per_node: Dict[str, float] = {}
+    for tc in root.iter('testcase'):
+        nodeid = junit_nodeid(tc)
+        if not nodeid:
+            continue
+        try:
+            t = float(tc.attrib.get('time', '0'))
+        except ValueError:
+            t = 0.0
+        per_node[nodeid] = per_node.get(nodeid, 0.0) + t
+    return per_node
+
+
+def file_sizes(files) -> Dict[str, int]:
+    return {f: os.path.getsize(f) for f in files if os.path.isfile(f)}
+
+
 def load_durations(path: Path) -> Dict[str, float]:
     if path.exists():
         try:
@@ -77,12 +128,19 @@ def main():
     parser = argparse.ArgumentParser(description='Update test durations store from a JUnit XML report.')
     parser.add_argument('--junit', type=str, default='junit.xml', help='Path to JUnit XML file produced by pytest.')
     parser.add_argument('--durations-file', type=str, default=str(DURATIONS_PATH), help='Path to durations JSON file to update.')
+    parser.add_argument('--node-durations-file', type=str, default=str(NODE_DURATIONS_PATH), help='Path to the per-test-node durations JSON file to update.')
     parser.add_argument('--alpha', type=float, default=EWMA_ALPHA, help='EWMA alpha for smoothing (0..1).')
     args = parser.parse_args()
 
     junit_path = Path(args.junit)
     durations_file = Path(args.durations_file)
 
+    new_per_node = parse_junit_nodes(junit_path)
+    if new_per_node:
+        history = DurationHistory.load(Path(args.node_durations_file))
+        history.record(new_per_node, args.alpha, file_sizes({node_file(n) for n in new_per_node}))
+        history.save(Path(args.node_durations_file))
+
     new_per_file = parse_junit(junit_path)
     if not new_per_file:
         # Nothing to update
@@ -5,12 +5,20 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import os
 from flask import Flask, request, jsonify, abort
 from job_queue import JobQueue, Worker
+from worker_pool import WorkerPool
 
 app = Flask(__name__)
 
 queue = JobQueue()
-worker = Worker(queue)
-worker.start()
+# "pool" (default): pre-forked processes reused across attempts; "process": one new process per attempt
+if os.environ.get("JOB_EXECUTOR", "pool") == "process":
+    pool = None
+    workers = [Worker(queue)]
+else:
+    pool = WorkerPool()
+    workers = [Worker(queue, pool) for _ in range(pool.size)]
+for worker in workers:
+    worker.start()
 
 
 def _validate_policy(data):
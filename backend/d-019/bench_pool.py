@@ -0,0 +1,67 @@
+"""
+Job throughput: a new process per attempt vs the pre-forked WorkerPool.
+
+Submits --jobs jobs of the "sleep" task (--task-ms each) to a JobQueue and
+measures jobs/sec until every job has finished, for:
+
+  process   Worker threads forking a process and an mp.Queue per attempt
+  pool      Worker threads sharing a WorkerPool of the same size
+
+Both run --workers Worker threads. With --timeout-every N, every Nth job
+sleeps past its timeout, which exercises killing and replacing a pooled
+process; the report includes how many were replaced.
+
+    python bench_pool.py --jobs 2000 --task-ms 10 --workers 4
+"""
+
+import argparse
+import json
+import time
+
+from job_queue import JobQueue, Worker
+from worker_pool import WorkerPool
+
+
+def run(args, pool):
+    queue = JobQueue()
+    workers = [Worker(queue, pool) for _ in range(args.workers)]
+    for w in workers:
+        w.start()
+    t0 = time.perf_counter()
+    jobs = []
+    for i in range(args.jobs):
+        slow = args.timeout_every and i % args.timeout_every == args.timeout_every - 1
+        seconds = args.task_ms / 1000.0 * (20 if slow else 1)
+        policy = {"timeout_seconds": args.task_ms / 1000.0 * 10, "max_attempts": 1}
+        jobs.append(queue.submit("sleep", {"seconds": seconds}, policy))
+    while any(j.status in ("queued", "running") for j in jobs):
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - t0
+    for w in workers:
+        w.stop()
+    statuses = {}
+    for j in jobs:
+        statuses[j.status] = statuses.get(j.status, 0) + 1
+    return {"seconds": round(elapsed, 2), "jobs_per_sec": round(args.jobs / elapsed, 1), "statuses": statuses}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--task-ms", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout-every", type=int, default=0)
+    args = parser.parse_args()
+
+    report = {"process": run(args, None)}
+    pool = WorkerPool(args.workers)
+    try:
+        report["pool"] = run(args, pool)
+        report["pool"]["replaced_processes"] = pool.replaced
+    finally:
+        pool.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
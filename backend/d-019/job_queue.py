@@ -9,6 +9,8 @@ from dataclasses import dataclass, field, asdict
 from typing import Any, Dict, Optional, List, Tuple
 from datetime import datetime, timezone
 
+from worker_pool import WorkerPool, outcome_to_attempt
+
 # Ensure a start method compatible with process-per-attempt timeout control
 try:
     mp.set_start_method("fork")
@@ -194,18 +196,26 @@ class JobQueue:
 
 
 class Worker(threading.Thread):
-    def __init__(self, queue: JobQueue):
+    """Runs ready jobs one attempt at a time.
+
+    With a WorkerPool, attempts go to its pre-forked processes; start one
+    Worker per pool process to keep them all busy. Without one, every
+    attempt forks its own process.
+    """
+
+    def __init__(self, queue: JobQueue, pool: Optional[WorkerPool] = None):
         super().__init__(daemon=True)
         self.queue = queue
-        self._stop = threading.Event()
+        self.pool = pool
+        self._stop_event = threading.Event()
 
     def stop(self):
-        self._stop.set()
+        self._stop_event.set()
         with self.queue._cv:
             self.queue._cv.notify_all()
 
     def run(self):
-        while not self._stop.is_set():
+        while not self._stop_event.is_set():
             with self.queue._cv:
                 job, wait_time = self.queue._pop_ready_job()
                 if not job:
@@ -242,6 +252,8 @@ class Worker(threading.Thread):
     def _execute_attempt(self, job: Job):
         # Returns (success, result, error, traceback, timed_out)
         timeout = float(job.policy.timeout_seconds) if job.policy.timeout_seconds else None
+        if self.pool is not None:
+            return self.pool.run(job.task_name, job.params, timeout)
         result_queue = mp.Queue()
         proc = mp.Process(target=_run_task, args=(job.task_name, job.params, result_queue), daemon=True)
         started = time.time()
@@ -270,20 +282,7 @@ class Worker(threading.Thread):
             outcome = result_queue.get(timeout=1.0)
         except Exception:
             outcome = None
-        if not outcome:
-            success = False
-            error = "Task finished but no result reported"
-            tb = None
-            return success, result, error, tb, timed_out
-        if outcome.get("ok"):
-            success = True
-            result = outcome.get("result")
-            return success, result, None, None, timed_out
-        else:
-            success = False
-            error = outcome.get("error")
-            tb = outcome.get("traceback")
-            return success, result, error, tb, timed_out
+        return outcome_to_attempt(outcome)
 
 
 def _run_task(task_name: str, params: Dict[str, Any], result_queue: mp.Queue):
@@ -0,0 +1,123 @@
+import os
+import queue
+import threading
+import traceback
+import multiprocessing as mp
+from typing import Any, Dict, Optional, Tuple
+
+# (success, result, error, traceback, timed_out), as Worker._execute_attempt returns
+AttemptOutcome = Tuple[bool, Any, Optional[str], Optional[str], bool]
+
+
+def outcome_to_attempt(outcome: Optional[Dict[str, Any]]) -> AttemptOutcome:
+    if not outcome:
+        return False, None, "Task finished but no result reported", None, False
+    if outcome.get("ok"):
+        return True, outcome.get("result"), None, None, False
+    return False, None, outcome.get("error"), outcome.get("traceback"), False
+
+
+class _PoolProcess:
+    def __init__(self):
+        self.conn, child_conn = mp.Pipe()
+        self.proc = mp.Process(target=_serve, args=(child_conn,), daemon=True)
+        self.proc.start()
+        child_conn.close()
+
+    def kill(self):
+        try:
+            self.proc.kill()
+        except Exception:
+            pass
+        finally:
+            self.proc.join()
+            self.conn.close()
+
+
+class WorkerPool:
+    """Pre-forked task processes reused across attempts.
+
+    Each process imports the task registry once and then serves attempts
+    one at a time over its own pipe. ``run`` checks out an idle process,
+    waits up to the attempt timeout for the result, and puts the process
+    back. Only a process whose attempt timed out (or that died) is killed
+    and replaced by a fresh one.
+    """
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size or int(os.environ.get("JOB_POOL_SIZE", "0")) or os.cpu_count() or 1
+        self._idle: "queue.Queue[_PoolProcess]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.replaced = 0
+        for _ in range(self.size):
+            self._idle.put(_PoolProcess())
+
+    def run(self, task_name: str, params: Dict[str, Any], timeout: Optional[float]) -> AttemptOutcome:
+        worker = self._idle.get()
+        try:
+            worker.conn.send((task_name, params))
+        except (OSError, ValueError):
+            # Died while idle; retry once on a fresh process
+            worker = self._replace(worker)
+            worker.conn.send((task_name, params))
+        if not worker.conn.poll(timeout):
+            self._release(self._replace(worker))
+            return False, None, f"Attempt timed out after {timeout} seconds", None, True
+        try:
+            outcome = worker.conn.recv()
+        except (EOFError, OSError):
+            self._release(self._replace(worker))
+            return False, None, "Worker process exited without reporting a result", None, False
+        self._release(worker)
+        return outcome_to_attempt(outcome)
+
+    def _replace(self, worker: _PoolProcess) -> _PoolProcess:
+        worker.kill()
+        with self._lock:
+            self.replaced += 1
+        return _PoolProcess()
+
+    def _release(self, worker: _PoolProcess):
+        if self._closed:
+            worker.kill()
+        else:
+            self._idle.put(worker)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.proc.join(timeout=1.0)
+            worker.kill()
+
+
+def _serve(conn):
+    from jobs import TASKS
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        task_name, params = message
+        try:
+            func = TASKS.get(task_name)
+            if not func:
+                raise ValueError(f"Unknown task '{task_name}'")
+            outcome = {"ok": True, "result": func(**(params or {}))}
+        except Exception as e:
+            outcome = {"ok": False, "error": str(e), "traceback": traceback.format_exc()}
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            # Result could not be pickled; report that instead
+            conn.send({"ok": False, "error": f"Could not return result: {e}", "traceback": traceback.format_exc()})
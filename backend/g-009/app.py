@@ -107,6 +107,7 @@ def infer():
                 inc("cache_hits")
                 # Allow followers to return without waiting if leader already completed
                 try:
+                    handle.result = cached
                     handle.done()
                 except Exception:
                     pass
@@ -146,7 +147,8 @@ def infer():
                 },
             }
             cache.set_json(cache_key, payload, ttl=Config.CACHE_TTL_SECONDS)
-            # Signal completion
+            # Signal completion (Redis followers receive the payload directly)
+            handle.result = payload
             handle.done()
 
             return jsonify({
@@ -194,10 +196,15 @@ def metrics():
     status = {
         "backend": cache.backend,
         "redis": cache.is_redis,
+        "dedup_wait_mode": (
+            "local" if not cache.is_redis
+            else "notify" if deduper.notifier and deduper.notifier.healthy
+            else "poll"
+        ),
     }
     with _metrics_lock:
         m = dict(_metrics)
-    return jsonify({"metrics": m, "status": status})
+    return jsonify({"metrics": m, "status": status, "cache": cache.stats()})
 
 
 @app.route("/healthz", methods=["GET"])
@@ -257,5 +264,5 @@ def _auto_stub_inference():
 
 
 @app.route('/cache/stats', methods=['GET'])
-def _auto_stub_cache_stats():
-    return 'Auto-generated stub for /cache/stats', 200
+def cache_stats():
+    return jsonify(cache.stats())
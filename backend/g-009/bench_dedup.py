@@ -0,0 +1,120 @@
+"""
+Load test for cross-process single-flight: GET polling vs pub/sub notify.
+
+Uses fakeredis (one shared fake server, one client per simulated process)
+and drives the Deduper directly: N identical requests arrive together, one
+becomes leader and calls a slow provider, the rest wait. Reports Redis
+commands per coalesced request and how long followers lag behind the
+leader's completion.
+
+    pip install fakeredis
+    python bench_dedup.py --concurrency 1 10 100 --provider-ms 1500
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+
+import fakeredis
+
+from cache import Cache
+from config import Config
+from dedup import Deduper
+from utils import hash_request, utc_ts
+
+
+class BenchConfig(Config):
+    REDIS_URL = None
+
+
+def counting(client, counter):
+    execute = client.execute_command
+
+    def execute_command(*args, **kwargs):
+        with counter["lock"]:
+            counter["ops"] += 1
+        return execute(*args, **kwargs)
+
+    client.execute_command = execute_command
+    return client
+
+
+def make_cache(server, counter):
+    cache = Cache(BenchConfig)
+    cache.client = counting(fakeredis.FakeRedis(server=server, decode_responses=True), counter)
+    cache.backend = "redis"
+    cache.is_redis = True
+    return cache
+
+
+def run(mode, concurrency, provider_ms, poll_interval, processes):
+    server = fakeredis.FakeServer()
+    counter = {"ops": 0, "lock": threading.Lock()}
+
+    BenchConfig.INFLIGHT_WAIT_MODE = mode
+    BenchConfig.INFLIGHT_POLL_INTERVAL_SECONDS = poll_interval
+    # Each simulated process gets its own client and Deduper (and notifier)
+    dedupers = [Deduper(make_cache(server, counter), BenchConfig) for _ in range(processes)]
+
+    key = hash_request({"model": "bench", "input": f"{mode}-{concurrency}", "params": {}})
+    cache_key = f"result:{key}"
+    barrier = threading.Barrier(concurrency)
+    leader_done = {}
+    follower_done = []
+    lock = threading.Lock()
+
+    def request(i):
+        deduper = dedupers[i % processes]
+        barrier.wait()
+        handle = deduper.begin(key)
+        if handle.is_leader:
+            time.sleep(provider_ms / 1000.0)
+            payload = {"created_at": utc_ts(), "result": {"output": "x" * 256}, "meta": {}}
+            deduper.cache.set_json(cache_key, payload, ttl=60)
+            handle.result = payload
+            leader_done["t"] = time.perf_counter()
+            handle.done()
+        else:
+            data = handle.wait_for_result(cache_key, timeout=30, poll_interval=poll_interval)
+            assert data is not None
+            with lock:
+                follower_done.append(time.perf_counter())
+
+    with counter["lock"]:
+        counter["ops"] = 0
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    lags = sorted((t - leader_done["t"]) * 1000 for t in follower_done) or [0.0]
+    return {
+        "redis_ops": counter["ops"],
+        "ops_per_request": round(counter["ops"] / concurrency, 2),
+        "follower_lag_p50_ms": round(statistics.median(lags), 2),
+        "follower_lag_max_ms": round(lags[-1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--provider-ms", type=float, default=1500)  # InferenceProvider default latency
+    parser.add_argument("--poll-interval", type=float, default=Config.INFLIGHT_POLL_INTERVAL_SECONDS)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    results = {}
+    for n in args.concurrency:
+        results[n] = {
+            mode: run(mode, n, args.provider_ms, args.poll_interval, args.processes)
+            for mode in ("poll", "notify")
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
+import heapq
 import json
 import os
+import sys
 import threading
 import time
+from collections import OrderedDict
 
 try:
     import redis  # type: ignore
@@ -9,6 +12,145 @@ except Exception:  # pragma: no cover
     redis = None
 
 
+class MemoryStore:
+    """Size-bounded LRU store with heap-driven expiry.
+
+    Entries are kept in an OrderedDict in recency order and evicted from the
+    cold end once the byte budget is exceeded. Expiry times live in a min-heap,
+    so reaping touches only entries that are actually due (O(expired log n))
+    instead of scanning the store. Heap items are (expires_at, seq, key); an
+    item whose seq no longer matches the entry was superseded and is skipped.
+    """
+
+    ENTRY_OVERHEAD = 64  # rough per-entry bookkeeping cost in bytes
+
+    def __init__(self, max_bytes=0, max_items=0):
+        self.max_bytes = int(max_bytes or 0)
+        self.max_items = int(max_items or 0)
+        self._data = OrderedDict()  # key -> (value, expires_at, size, seq)
+        self._heap = []
+        self._seq = 0
+        self._lock = threading.RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+
+    @classmethod
+    def _sizeof(cls, key, value):
+        if isinstance(value, (str, bytes)):
+            size = len(value)
+        else:
+            size = sys.getsizeof(value)
+        return len(key) + size + cls.ENTRY_OVERHEAD
+
+    def _reap(self, now):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, seq, key = heapq.heappop(heap)
+            entry = self._data.get(key)
+            if entry is not None and entry[3] == seq:
+                self._drop(key)
+                self.expirations += 1
+        # Overwrites leave superseded heap items behind; rebuild when they dominate
+        if len(heap) > 2 * len(self._data) + 1024:
+            self._heap = [
+                (entry[1], entry[3], key)
+                for key, entry in self._data.items()
+                if entry[1] is not None
+            ]
+            heapq.heapify(self._heap)
+
+    def _drop(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+        return entry
+
+    def _evict(self):
+        while self._data and (
+            (self.max_bytes and self.bytes > self.max_bytes)
+            or (self.max_items and len(self._data) > self.max_items)
+        ):
+            key = next(iter(self._data))
+            self._drop(key)
+            self.evictions += 1
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and now >= entry[1]:
+            self._drop(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            self._reap(now)
+            entry = self._live(key, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None, nx=False):
+        now = time.time()
+        exp = None if ttl is None else now + int(ttl)
+        size = self._sizeof(key, value)
+        with self._lock:
+            self._reap(now)
+            if nx and self._live(key, now) is not None:
+                return False
+            if self.max_bytes and size > self.max_bytes:
+                self.rejected += 1
+                return False
+            self._drop(key)
+            self._seq += 1
+            self._data[key] = (value, exp, size, self._seq)
+            self.bytes += size
+            if exp is not None:
+                heapq.heappush(self._heap, (exp, self._seq, key))
+            self._evict()
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            return 1 if self._drop(key) is not None else 0
+
+    def contains(self, key):
+        with self._lock:
+            return self._live(key, time.time()) is not None
+
+    def expires_at(self, key):
+        with self._lock:
+            entry = self._live(key, time.time())
+            return None if entry is None else entry[1]
+
+    def stats(self):
+        with self._lock:
+            self._reap(time.time())
+            lookups = self.hits + self.misses
+            return {
+                "items": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "max_items": self.max_items,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "rejected_oversize": self.rejected,
+            }
+
+
 class Cache:
     def __init__(self, config):
         self.config = config
@@ -31,23 +173,16 @@ class Cache:
                 self.is_redis = False
 
         if not self.client:
-            self._store = {}
-            self._lock = threading.RLock()
+            self._store = MemoryStore(
+                max_bytes=getattr(config, "CACHE_MAX_BYTES", 0),
+                max_items=getattr(config, "CACHE_MAX_ITEMS", 0),
+            )
 
     # General KV operations
     def get(self, key):
         if self.is_redis:
             return self.client.get(key)
-        now = time.time()
-        with self._lock:
-            entry = self._store.get(key)
-            if not entry:
-                return None
-            value, exp = entry
-            if exp is not None and now >= exp:
-                self._store.pop(key, None)
-                return None
-            return value
+        return self._store.get(key)
 
     def set(self, key, value, ttl=None):
         if self.is_redis:
@@ -55,52 +190,51 @@ class Cache:
                 return self.client.set(key, value, ex=int(ttl))
             else:
                 return self.client.set(key, value)
-        exp = None if ttl is None else time.time() + int(ttl)
-        with self._lock:
-            self._store[key] = (value, exp)
-            return True
+        return self._store.set(key, value, ttl=ttl)
 
     def setnx(self, key, value, ttl=None):
         if self.is_redis:
             # SET with NX and expiration
             return bool(self.client.set(key, value, nx=True, ex=int(ttl) if ttl else None))
-        exp = None if ttl is None else time.time() + int(ttl)
-        with self._lock:
-            if key in self._store:
-                # Check expiry
-                val, ex = self._store[key]
-                if ex is not None and time.time() >= ex:
-                    # expired, replace
-                    self._store[key] = (value, exp)
-                    return True
-                return False
-            self._store[key] = (value, exp)
-            return True
+        return self._store.set(key, value, ttl=ttl, nx=True)
 
     def delete(self, key):
         if self.is_redis:
             return self.client.delete(key)
-        with self._lock:
-            return 1 if self._store.pop(key, None) is not None else 0
+        return self._store.delete(key)
 
     def exists(self, key):
         if self.is_redis:
             return bool(self.client.exists(key))
-        return self.get(key) is not None
+        return self._store.contains(key)
 
     def ttl(self, key):
         if self.is_redis:
             t = self.client.ttl(key)
             return int(t) if t is not None and t >= 0 else None
-        with self._lock:
-            entry = self._store.get(key)
-            if not entry:
-                return None
-            _, exp = entry
-            if exp is None:
-                return None
-            remaining = int(exp - time.time())
-            return max(remaining, 0)
+        exp = self._store.expires_at(key)
+        if exp is None:
+            return None
+        remaining = int(exp - time.time())
+        return max(remaining, 0)
+
+    def stats(self):
+        if not self.is_redis:
+            return dict(self._store.stats(), backend=self.backend)
+        info = {}
+        try:
+            server = self.client.info("stats")
+            memory = self.client.info("memory")
+            info = {
+                "hits": server.get("keyspace_hits"),
+                "misses": server.get("keyspace_misses"),
+                "evictions": server.get("evicted_keys"),
+                "expirations": server.get("expired_keys"),
+                "bytes": memory.get("used_memory"),
+            }
+        except Exception:
+            pass
+        return dict(info, backend=self.backend)
 
     # JSON helpers
     def get_json(self, key):
@@ -9,11 +9,18 @@ class Config:
     # Cache settings
     REDIS_URL = os.getenv("REDIS_URL")
     CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "86400"))  # 1 day default
+    # In-memory backend bounds (used when Redis is absent); 0 disables a bound
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    CACHE_MAX_ITEMS = int(os.getenv("CACHE_MAX_ITEMS", "0"))
 
     # In-flight de-duplication
     INFLIGHT_TTL_SECONDS = int(os.getenv("INFLIGHT_TTL_SECONDS", "60"))
     INFLIGHT_WAIT_TIMEOUT_SECONDS = int(os.getenv("INFLIGHT_WAIT_TIMEOUT_SECONDS", "30"))
     INFLIGHT_POLL_INTERVAL_SECONDS = float(os.getenv("INFLIGHT_POLL_INTERVAL_SECONDS", "0.2"))
+    # "notify" wakes Redis followers over pub/sub; "poll" keeps GET polling
+    INFLIGHT_WAIT_MODE = os.getenv("INFLIGHT_WAIT_MODE", "notify")
+    # Safety-net cache re-check while waiting for a notification
+    INFLIGHT_RECHECK_INTERVAL_SECONDS = float(os.getenv("INFLIGHT_RECHECK_INTERVAL_SECONDS", "1.0"))
 
     # Request size limit (1 MiB)
     MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", "1048576"))
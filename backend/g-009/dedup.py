@@ -1,3 +1,4 @@
+import json
 import time
 import uuid
 import threading
@@ -37,13 +38,107 @@ class DedupHandle:
         raise NotImplementedError
 
 
+class RedisNotifier:
+    """Wakes followers in this process when a leader in any process finishes.
+
+    One pub/sub connection per process, pattern-subscribed to
+    ``<prefix>*``. Leaders publish the cached payload on
+    ``<prefix><inflight_key>``; followers register a local Event for the key
+    and receive the payload without touching Redis again. Pub/sub is
+    at-most-once, so followers still re-check the cache at a slow interval.
+    """
+
+    def __init__(self, client, prefix="dedup:done:"):
+        self.client = client
+        self.prefix = prefix
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._subscribed = threading.Event()
+        self.healthy = False
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="dedup-notifier", daemon=True
+                )
+                self._thread.start()
+        return self._subscribed.wait(5.0)
+
+    def _run(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + "*")
+                self.healthy = True
+                self._subscribed.set()
+                while True:
+                    msg = pubsub.get_message(timeout=1.0)
+                    if msg and msg.get("type") == "pmessage":
+                        self._deliver(msg["channel"], msg["data"])
+            except Exception:
+                self.healthy = False
+                self._subscribed.clear()
+                time.sleep(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _deliver(self, channel, data):
+        if isinstance(channel, bytes):
+            channel = channel.decode("utf-8")
+        key = channel[len(self.prefix):]
+        with self._lock:
+            waiters = self._waiters.pop(key, None)
+        if not waiters:
+            return
+        try:
+            payload = json.loads(data) if data else None
+        except Exception:
+            payload = None
+        for slot in waiters:
+            slot["payload"] = payload
+            slot["event"].set()
+
+    def register(self, key):
+        slot = {"event": threading.Event(), "payload": None}
+        with self._lock:
+            self._waiters.setdefault(key, []).append(slot)
+        return slot
+
+    def unregister(self, key, slot):
+        with self._lock:
+            waiters = self._waiters.get(key)
+            if waiters and slot in waiters:
+                waiters.remove(slot)
+                if not waiters:
+                    self._waiters.pop(key, None)
+
+    def publish(self, key, payload):
+        raw = json.dumps(payload, separators=(",", ":")) if payload is not None else ""
+        return self.client.publish(self.prefix + key, raw)
+
+
 class RedisDedupHandle(DedupHandle):
-    def __init__(self, cache, inflight_key, is_leader):
+    def __init__(self, cache, inflight_key, is_leader, notifier=None, recheck_interval=1.0):
         super().__init__(is_leader)
         self.cache = cache
         self.inflight_key = inflight_key
+        self.notifier = notifier
+        self.recheck_interval = recheck_interval
+        self.result = None
 
     def wait_for_result(self, cache_key, timeout, poll_interval):
+        if self.notifier is not None and self.notifier.healthy:
+            return self._wait_notified(cache_key, timeout)
+        return self._wait_polling(cache_key, timeout, poll_interval)
+
+    def _wait_polling(self, cache_key, timeout, poll_interval):
         # Poll cache for the result until timeout
         end = time.time() + float(timeout)
         while time.time() < end:
@@ -53,8 +148,36 @@ class RedisDedupHandle(DedupHandle):
             time.sleep(poll_interval)
         return None
 
+    def _wait_notified(self, cache_key, timeout):
+        # Register before checking the cache so a publish between the check
+        # and the wait is not lost
+        slot = self.notifier.register(self.inflight_key)
+        try:
+            end = time.time() + float(timeout)
+            data = self.cache.get_json(cache_key)
+            while data is None:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    return None
+                if slot["event"].wait(min(remaining, self.recheck_interval)):
+                    if slot["payload"] is not None:
+                        return slot["payload"]
+                    # _deliver removed this slot and its event stays set:
+                    # listen on a fresh one, or every later wait returns at once
+                    slot = self.notifier.register(self.inflight_key)
+                # Lost message, leader without a payload, or notifier down
+                data = self.cache.get_json(cache_key)
+            return data
+        finally:
+            self.notifier.unregister(self.inflight_key, slot)
+
     def done(self):
-        # Remove inflight lock
+        # Wake followers first, then remove inflight lock
+        if self.is_leader and self.notifier is not None:
+            try:
+                self.notifier.publish(self.inflight_key, self.result)
+            except Exception:
+                pass
         try:
             self.cache.delete(self.inflight_key)
         except Exception:
@@ -87,6 +210,10 @@ class Deduper:
         self.cache = cache
         self.config = config
         self.local = LocalInFlight()
+        self.notifier = None
+        if cache.is_redis and getattr(config, "INFLIGHT_WAIT_MODE", "notify") == "notify":
+            self.notifier = RedisNotifier(cache.client)
+            self.notifier.start()
 
     def begin(self, key):
         inflight_key = f"inflight:{key}"
@@ -95,10 +222,8 @@ class Deduper:
         if self.cache.is_redis:
             rid = str(uuid.uuid4())
             ok = self.cache.setnx(inflight_key, rid, ttl=ttl)
-            if ok:
-                return RedisDedupHandle(self.cache, inflight_key, True)
-            else:
-                return RedisDedupHandle(self.cache, inflight_key, False)
+            recheck = getattr(self.config, "INFLIGHT_RECHECK_INTERVAL_SECONDS", 1.0)
+            return RedisDedupHandle(self.cache, inflight_key, bool(ok), self.notifier, recheck)
         else:
             is_leader, event = self.local.begin(key)
             handle = LocalDedupHandle(self.local, key, is_leader, event)
@@ -3,14 +3,19 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import os
-import uuid
 from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 
 from config import AppConfig
 from services.embedding import EmbeddingService
+from services.ingest import IngestPipeline
 from stores.chroma_store import ChromaVectorStore
-from stores.pgvector_store import PGVectorStore
+from stores.flat_store import FlatIVFVectorStore
+
+try:
+    from stores.pgvector_store import PGVectorStore
+except ImportError:
+    PGVectorStore = None
 
 load_dotenv()
 
@@ -22,11 +27,15 @@ embedding_service = EmbeddingService(
     model_name=config.EMBEDDING_MODEL_NAME,
     device=config.EMBEDDING_DEVICE,
     normalize_default=True,
+    batch_size=config.EMBEDDING_BATCH_SIZE,
+    cache_size=config.EMBEDDING_CACHE_SIZE,
 )
+ingest_pipeline = IngestPipeline(embedding_service, batch_size=config.INGEST_BATCH_SIZE)
 
 # Initialize vector stores lazily; create on demand
 chroma_store = None
 pg_store = None
+flat_store = None
 
 if "chroma" in config.AVAILABLE_STORES:
     try:
@@ -37,7 +46,7 @@ if "chroma" in config.AVAILABLE_STORES:
     except Exception as e:
         app.logger.warning(f"Chroma init failed: {e}")
 
-if "pgvector" in config.AVAILABLE_STORES:
+if "pgvector" in config.AVAILABLE_STORES and PGVectorStore is not None:
     try:
         pg_store = PGVectorStore(
             host=config.PG_HOST,
@@ -54,6 +63,13 @@ if "pgvector" in config.AVAILABLE_STORES:
     except Exception as e:
         app.logger.warning(f"pgvector init failed: {e}")
 
+if "flat" in config.AVAILABLE_STORES:
+    flat_store = FlatIVFVectorStore(
+        ivf_min_vectors=config.FLAT_IVF_MIN_VECTORS,
+        nlist=config.FLAT_IVF_NLIST,
+        nprobe=config.FLAT_IVF_NPROBE,
+    )
+
 
 def _get_store(store_name: str):
     name = (store_name or config.DEFAULT_STORE).lower()
@@ -65,6 +81,10 @@ def _get_store(store_name: str):
         if pg_store is None:
             raise RuntimeError("pgvector store is not available")
         return pg_store, "pgvector"
+    if name == "flat":
+        if flat_store is None:
+            raise RuntimeError("flat store is not available")
+        return flat_store, "flat"
     raise ValueError(f"Unsupported store: {store_name}")
 
 
@@ -76,6 +96,7 @@ def health():
         "dim": embedding_service.dimension,
         "default_store": config.DEFAULT_STORE,
         "available_stores": config.AVAILABLE_STORES,
+        "embedding_cache": dict(embedding_service.stats),
     })
 
 
@@ -115,40 +136,27 @@ def upsert():
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
-    # Prepare payload
-    ids = []
-    texts = []
-    metadatas = []
     for doc in documents:
         if not isinstance(doc, dict) or "text" not in doc:
             return jsonify({"error": "Each document must be an object with at least 'text' field"}), 400
-        did = doc.get("id") or str(uuid.uuid4())
-        ids.append(did)
-        texts.append(doc["text"])
         md = doc.get("metadata")
         if md is not None and not isinstance(md, dict):
             return jsonify({"error": "'metadata' must be an object if provided"}), 400
-        metadatas.append(md or {})
-
-    # Embed locally
-    embeddings = embedding_service.embed(texts, normalize=True)
 
+    # Embed locally and upsert batch by batch
     try:
-        upserted = store.upsert(
-            collection=collection,
-            ids=ids,
-            texts=texts,
-            metadatas=metadatas,
-            embeddings=embeddings,
-            embedding_dim=embedding_service.dimension,
-        )
+        result = ingest_pipeline.ingest(store, collection, documents, batch_size=int(data.get("batch_size") or 0))
     except Exception as e:
         return jsonify({"error": f"Upsert failed: {e}"}), 500
+    upserted = result["upserted"]
 
     return jsonify({
         "store": store_name,
         "collection": collection,
         "upserted": upserted,
+        "batches": result["batches"],
+        "embed_ms": result["embed_ms"],
+        "store_ms": result["store_ms"],
     })
 
 
@@ -169,7 +177,7 @@ def query():
         return jsonify({"error": str(e)}), 400
 
     # Embed query
-    q_emb = embedding_service.embed([query_text], normalize=True)[0]
+    q_emb = embedding_service.embed_array([query_text], normalize=True)[0]
 
     try:
         results = store.query(collection=collection, query_embedding=q_emb, top_k=top_k)
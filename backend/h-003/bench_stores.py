@@ -0,0 +1,182 @@
+"""
+Ingestion and query benchmark across the vector stores.
+
+Streams a synthetic corpus through IngestPipeline into each available
+store (flat, chroma, pgvector) and reports ingest docs/sec plus query
+latency p50/p99 for top-k search. Query embeddings are computed up front
+so the latency is the store's alone. For the flat store recall@k against
+an exact scan is reported too, since IVF search is approximate.
+
+By default texts are embedded with a deterministic hashing model so the
+numbers isolate pipeline and store cost; --real-model uses
+EMBEDDING_MODEL_NAME instead. --dup-rate controls how many documents
+repeat an earlier text, which the embedding cache skips.
+
+    python bench_stores.py --docs 50000 --queries 500 --stores flat chroma
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from config import AppConfig
+from services.embedding import EmbeddingService
+from services.ingest import IngestPipeline
+from stores.flat_store import FlatIVFVectorStore
+
+
+class HashingModel:
+    """Stands in for SentenceTransformer: topic centroid plus text noise."""
+
+    def __init__(self, dim: int, topics: int = 256):
+        self.dim = dim
+        self.centroids = np.random.default_rng(0).standard_normal((topics, dim)).astype(np.float32)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, batch_size=64, **kwargs):
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            topic = int(text.split(" ", 2)[1]) % self.centroids.shape[0]
+            out[i] = self.centroids[topic] + 0.7 * np.random.default_rng(seed).standard_normal(self.dim)
+        return out
+
+
+class HashingEmbeddingService(EmbeddingService):
+    def __init__(self, dim: int, **kwargs):
+        self._hashing_model = HashingModel(dim)
+        super().__init__(model_name=f"hashing-{dim}", **kwargs)
+
+    @property
+    def model(self):
+        return self._hashing_model
+
+
+def corpus(n: int, dup_rate: float, seed: int = 1):
+    rng = random.Random(seed)
+    seen = []
+    for i in range(n):
+        if seen and rng.random() < dup_rate:
+            text = rng.choice(seen)
+        else:
+            text = f"topic {rng.randrange(1 << 16)} document {i} " + " ".join(
+                rng.choice(("alpha", "beta", "gamma", "delta", "omega")) for _ in range(20)
+            )
+            seen.append(text)
+        yield {"id": f"doc-{i}", "text": text, "metadata": {"i": i}}
+
+
+def make_store(name: str, config: AppConfig, dim: int, tmpdir: str):
+    if name == "flat":
+        return FlatIVFVectorStore(
+            ivf_min_vectors=config.FLAT_IVF_MIN_VECTORS,
+            nlist=config.FLAT_IVF_NLIST,
+            nprobe=config.FLAT_IVF_NPROBE,
+        )
+    if name == "chroma":
+        from stores.chroma_store import ChromaVectorStore
+        return ChromaVectorStore(persist_directory=tmpdir, metric="cosine")
+    if name == "pgvector":
+        from stores.pgvector_store import PGVectorStore
+        return PGVectorStore(
+            host=config.PG_HOST,
+            port=config.PG_PORT,
+            database=config.PG_DATABASE,
+            user=config.PG_USER,
+            password=config.PG_PASSWORD,
+            schema=config.PG_SCHEMA,
+            default_index_lists=config.PG_INDEX_LISTS,
+            use_extension=config.PG_CREATE_EXTENSION,
+            distance_metric="cosine",
+            embedding_dim=dim,
+        )
+    raise ValueError(name)
+
+
+def run(name, args, config, embedding_service, queries):
+    collection = f"bench_{int(time.time())}"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            store = make_store(name, config, embedding_service.dimension, tmpdir)
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+        pipeline = IngestPipeline(embedding_service, batch_size=args.batch_size)
+
+        start = time.perf_counter()
+        result = pipeline.ingest(store, collection, corpus(args.docs, args.dup_rate))
+        ingest_s = time.perf_counter() - start
+
+        latencies = []
+        hits = []
+        for q in queries:
+            t0 = time.perf_counter()
+            found = store.query(collection=collection, query_embedding=q, top_k=args.top_k)
+            latencies.append(time.perf_counter() - t0)
+            hits.append([r["id"] for r in found])
+        store.reset_collection(collection)
+
+    report = {
+        "docs_per_sec": round(args.docs / ingest_s, 1),
+        "embed_ms": result["embed_ms"],
+        "store_ms": result["store_ms"],
+        "query_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "query_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+    }
+    if name == "flat":
+        report["hits"] = hits
+    return report
+
+
+def exact_recall(hits, queries, embedding_service, args):
+    docs = list(corpus(args.docs, args.dup_rate))
+    vectors = embedding_service.embed_array([d["text"] for d in docs])
+    ids = np.array([d["id"] for d in docs])
+    total = 0.0
+    for q, found in zip(queries, hits):
+        exact = ids[np.argsort(-(vectors @ q))[: args.top_k]]
+        total += len(set(found) & set(exact)) / args.top_k
+    return round(total / max(1, len(queries)), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=AppConfig.INGEST_BATCH_SIZE)
+    parser.add_argument("--dup-rate", type=float, default=0.1)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--stores", nargs="+", default=["flat", "chroma", "pgvector"])
+    parser.add_argument("--real-model", action="store_true")
+    args = parser.parse_args()
+
+    config = AppConfig()
+    if args.real_model:
+        embedding_service = EmbeddingService(config.EMBEDDING_MODEL_NAME, device=config.EMBEDDING_DEVICE)
+    else:
+        embedding_service = HashingEmbeddingService(args.dim)
+
+    rng = random.Random(7)
+    query_texts = [f"topic {rng.randrange(1 << 16)} query {i} alpha beta" for i in range(args.queries)]
+    queries = embedding_service.embed_array(query_texts)
+
+    results = {}
+    for name in args.stores:
+        # Fresh cache per store so every store pays the same encoding cost
+        embedding_service.clear_cache()
+        results[name] = run(name, args, config, embedding_service, queries)
+    if "hits" in results.get("flat", {}):
+        results["flat"]["recall_at_k"] = exact_recall(results["flat"].pop("hits"), queries, embedding_service, args)
+    results["embedding_cache"] = dict(embedding_service.stats)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
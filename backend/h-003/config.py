@@ -7,10 +7,22 @@ class AppConfig:
     EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
 
     DEFAULT_STORE = os.getenv("VECTOR_STORE", "chroma").lower()
-    AVAILABLE_STORES = [s.strip() for s in os.getenv("AVAILABLE_STORES", "chroma,pgvector").split(",") if s.strip()]
+    AVAILABLE_STORES = [s.strip() for s in os.getenv("AVAILABLE_STORES", "chroma,pgvector,flat").split(",") if s.strip()]
 
     DEFAULT_COLLECTION = os.getenv("DEFAULT_COLLECTION", "default")
 
+    # Ingestion: documents per upsert batch, encoder batch size and the
+    # content-hash embedding cache (entries)
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+
+    # In-process flat/IVF store; IVF kicks in at FLAT_IVF_MIN_VECTORS,
+    # FLAT_IVF_NLIST=0 means sqrt(n) lists
+    FLAT_IVF_MIN_VECTORS = int(os.getenv("FLAT_IVF_MIN_VECTORS", "4096"))
+    FLAT_IVF_NLIST = int(os.getenv("FLAT_IVF_NLIST", "0"))
+    FLAT_IVF_NPROBE = int(os.getenv("FLAT_IVF_NPROBE", "8"))
+
     # Chroma
     CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", str(Path("data/chroma").absolute()))
 
@@ -1,4 +1,6 @@
+import hashlib
 import threading
+from collections import OrderedDict
 from typing import List, Optional
 
 import numpy as np
@@ -6,15 +8,27 @@ from sentence_transformers import SentenceTransformer
 
 
 class EmbeddingService:
-    def __init__(self, model_name: str, device: str = "cpu", normalize_default: bool = True):
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        normalize_default: bool = True,
+        batch_size: int = 64,
+        cache_size: int = 10000,
+    ):
         self.model_name = model_name
         self.device = device
         self.normalize_default = normalize_default
+        self.batch_size = batch_size
+        # content hash -> float32 vector, LRU-bounded
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.stats = {"texts": 0, "encoded": 0, "cache_hits": 0, "duplicates": 0}
         self._model_lock = threading.Lock()
         self._model: Optional[SentenceTransformer] = None
         # Eager load to get dimension
-        _ = self.model
-        self._dimension = self._model.get_sentence_embedding_dimension()
+        self._dimension = self.model.get_sentence_embedding_dimension()
 
     @property
     def model(self) -> SentenceTransformer:
@@ -29,16 +43,71 @@ class EmbeddingService:
         return self._dimension
 
     def embed(self, texts: List[str], normalize: Optional[bool] = None) -> List[List[float]]:
+        # JSON-facing; stores take embed_array() output directly
+        return self.embed_array(texts, normalize=normalize).tolist()
+
+    def embed_array(self, texts: List[str], normalize: Optional[bool] = None) -> np.ndarray:
+        """Embed ``texts`` into a float32 (len(texts), dim) array.
+
+        Texts are keyed by content hash: repeats within the call and texts
+        seen recently are taken from the cache, so only new content reaches
+        the model.
+        """
         if normalize is None:
             normalize = self.normalize_default
-        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=False)
-        if normalize:
-            embeddings = self._l2_normalize(embeddings)
-        return embeddings.astype(float).tolist()
+        out = np.empty((len(texts), self._dimension), dtype=np.float32)
+        keys = [self._key(t, normalize) for t in texts]
+
+        missing = {}
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                vec = self._cache.get(key)
+                if vec is not None:
+                    self._cache.move_to_end(key)
+                    out[i] = vec
+                    self.stats["cache_hits"] += 1
+                elif key in missing:
+                    missing[key].append(i)
+                    self.stats["duplicates"] += 1
+                else:
+                    missing[key] = [i]
+            self.stats["texts"] += len(texts)
+            self.stats["encoded"] += len(missing)
+
+        if missing:
+            unique = [texts[rows[0]] for rows in missing.values()]
+            encoded = self.model.encode(
+                unique,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                normalize_embeddings=False,
+            ).astype(np.float32, copy=False)
+            if normalize:
+                encoded = self._l2_normalize(encoded)
+            with self._cache_lock:
+                for (key, rows), vec in zip(missing.items(), encoded):
+                    out[rows] = vec
+                    if self.cache_size > 0:
+                        self._cache[key] = vec.copy()
+                        self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return out
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _key(text: str, normalize: bool) -> bytes:
+        h = hashlib.blake2b(text.encode("utf-8"), digest_size=16)
+        h.update(b"\x01" if normalize else b"\x00")
+        return h.digest()
 
     @staticmethod
     def _l2_normalize(x: np.ndarray, eps: float = 1e-12) -> np.ndarray:
         norms = np.linalg.norm(x, axis=1, keepdims=True)
         norms = np.maximum(norms, eps)
-        return x / norms
+        return (x / norms).astype(np.float32, copy=False)
 
@@ -0,0 +1,66 @@
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List
+
+from services.embedding import EmbeddingService
+
+
+def _batches(documents: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for doc in documents:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class IngestPipeline:
+    """Streams documents into a vector store in fixed-size batches.
+
+    Each batch is embedded once into a float32 array and handed to the
+    store as-is; only one batch of documents and vectors is held at a
+    time, so arbitrarily large iterables can be ingested.
+    """
+
+    def __init__(self, embedding_service: EmbeddingService, batch_size: int = 256):
+        self.embedding_service = embedding_service
+        self.batch_size = batch_size
+
+    def ingest(self, store, collection: str, documents: Iterable[Dict[str, Any]], batch_size: int = 0) -> Dict[str, Any]:
+        """Embed and upsert ``documents`` ({id?, text, metadata?} dicts).
+
+        Returns counts and timings. Documents are expected to be validated
+        by the caller.
+        """
+        batch_size = batch_size or self.batch_size
+        upserted = 0
+        batches = 0
+        embed_s = 0.0
+        store_s = 0.0
+        for batch in _batches(documents, batch_size):
+            ids = [doc.get("id") or str(uuid.uuid4()) for doc in batch]
+            texts = [doc["text"] for doc in batch]
+            metadatas = [doc.get("metadata") or {} for doc in batch]
+
+            t0 = time.perf_counter()
+            embeddings = self.embedding_service.embed_array(texts, normalize=True)
+            t1 = time.perf_counter()
+            upserted += store.upsert(
+                collection=collection,
+                ids=ids,
+                texts=texts,
+                metadatas=metadatas,
+                embeddings=embeddings,
+                embedding_dim=self.embedding_service.dimension,
+            )
+            store_s += time.perf_counter() - t1
+            embed_s += t1 - t0
+            batches += 1
+        return {
+            "upserted": upserted,
+            "batches": batches,
+            "embed_ms": round(embed_s * 1000, 1),
+            "store_ms": round(store_s * 1000, 1),
+        }
@@ -1,15 +1,28 @@
+import threading
 from typing import List, Dict, Any
+
 import chromadb
+import numpy as np
 
 
 class ChromaVectorStore:
     def __init__(self, persist_directory: str, metric: str = "cosine"):
         self.client = chromadb.PersistentClient(path=persist_directory)
         self.metric = metric
+        # get_or_create_collection is a round trip to the sqlite catalog
+        self._collections: Dict[str, Any] = {}
+        self._lock = threading.Lock()
 
     def _collection(self, name: str):
-        metadata = {"hnsw:space": self.metric}
-        return self.client.get_or_create_collection(name=name, metadata=metadata)
+        col = self._collections.get(name)
+        if col is None:
+            with self._lock:
+                col = self._collections.get(name)
+                if col is None:
+                    metadata = {"hnsw:space": self.metric}
+                    col = self.client.get_or_create_collection(name=name, metadata=metadata)
+                    self._collections[name] = col
+        return col
 
     def upsert(
         self,
@@ -17,16 +30,16 @@ class ChromaVectorStore:
         ids: List[str],
         texts: List[str],
         metadatas: List[Dict[str, Any]],
-        embeddings: List[List[float]],
+        embeddings: np.ndarray,
         embedding_dim: int,
     ) -> int:
         col = self._collection(collection)
         col.upsert(ids=ids, documents=texts, metadatas=metadatas, embeddings=embeddings)
         return len(ids)
 
-    def query(self, collection: str, query_embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+    def query(self, collection: str, query_embedding: np.ndarray, top_k: int = 5) -> List[Dict[str, Any]]:
         col = self._collection(collection)
-        res = col.query(query_embeddings=[query_embedding], n_results=top_k)
+        res = col.query(query_embeddings=np.asarray(query_embedding, dtype=np.float32).reshape(1, -1), n_results=top_k)
         results = []
         ids = res.get("ids", [[]])[0]
         docs = res.get("documents", [[]])[0]
@@ -42,6 +55,8 @@ class ChromaVectorStore:
         return results
 
     def reset_collection(self, collection: str) -> None:
+        with self._lock:
+            self._collections.pop(collection, None)
         try:
             self.client.delete_collection(name=collection)
         except Exception:
@@ -0,0 +1,187 @@
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+
+class _Collection:
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.size = 0
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        # IVF state; None until the collection is large enough
+        self.centroids: Optional[np.ndarray] = None
+        self.assign: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        self.trained_size = 0
+
+    def reserve(self, n: int) -> None:
+        if n <= self.vectors.shape[0]:
+            return
+        capacity = max(n, 2 * self.vectors.shape[0], 1024)
+        grown = np.empty((capacity, self.dim), dtype=np.float32)
+        grown[: self.size] = self.vectors[: self.size]
+        self.vectors = grown
+
+
+class FlatIVFVectorStore:
+    """In-process vector store over float32 numpy matrices.
+
+    Vectors are expected to be L2-normalized (the embedding service does
+    that), so cosine similarity is a dot product. Small collections are
+    searched exactly. Once a collection reaches ``ivf_min_vectors`` a
+    k-means coarse quantizer is trained and queries only scan the
+    ``nprobe`` closest lists (faiss IndexIVFFlat style). Vectors added
+    after training are assigned to their nearest list; the quantizer is
+    retrained when the collection has doubled since the last training.
+
+    Scores are cosine distances (1 - similarity), matching Chroma.
+    Data lives in process memory only.
+    """
+
+    def __init__(self, ivf_min_vectors: int = 4096, nlist: int = 0, nprobe: int = 8, train_iters: int = 10, seed: int = 0):
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iters = train_iters
+        self.seed = seed
+        self._collections: Dict[str, _Collection] = {}
+        self._lock = threading.RLock()
+
+    def _collection(self, name: str, dim: int) -> _Collection:
+        col = self._collections.get(name)
+        if col is None:
+            col = self._collections[name] = _Collection(dim)
+        elif col.dim != dim:
+            raise ValueError(f"Collection '{name}' has dimension {col.dim}, got {dim}")
+        return col
+
+    def upsert(
+        self,
+        collection: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        embedding_dim: int,
+    ) -> int:
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), embedding_dim)
+        with self._lock:
+            col = self._collection(collection, embedding_dim)
+            col.reserve(col.size + len(ids))
+            new_rows = []
+            for i, did in enumerate(ids):
+                row = col.rows.get(did)
+                if row is None:
+                    row = col.size
+                    col.size += 1
+                    col.rows[did] = row
+                    col.ids.append(did)
+                    col.texts.append(texts[i])
+                    col.metadatas.append(metadatas[i])
+                    new_rows.append(row)
+                else:
+                    col.texts[row] = texts[i]
+                    col.metadatas[row] = metadatas[i]
+                    if col.centroids is not None:
+                        new_rows.append(row)
+                col.vectors[row] = embeddings[i]
+            self._index(col, np.asarray(new_rows, dtype=np.int64))
+        return len(ids)
+
+    def _index(self, col: _Collection, rows: np.ndarray) -> None:
+        if col.size < self.ivf_min_vectors:
+            return
+        if col.centroids is None or col.size >= 2 * col.trained_size:
+            self._train(col)
+            return
+        if rows.size == 0:
+            return
+        if col.assign.shape[0] < col.size:
+            assign = np.full(col.size, -1, dtype=np.int64)
+            assign[: col.assign.shape[0]] = col.assign
+            col.assign = assign
+        lists = np.argmax(col.vectors[rows] @ col.centroids.T, axis=1)
+        old = col.assign[rows]
+        moved = (old >= 0) & (old != lists)
+        for c in np.unique(old[moved]):
+            col.lists[c] = np.setdiff1d(col.lists[c], rows[moved & (old == c)], assume_unique=True)
+        col.assign[rows] = lists
+        fresh = old != lists
+        for c in np.unique(lists[fresh]):
+            col.lists[c] = np.concatenate([col.lists[c], rows[fresh & (lists == c)]])
+
+    def _train(self, col: _Collection) -> None:
+        data = col.vectors[: col.size]
+        nlist = self.nlist or max(1, int(np.sqrt(col.size)))
+        nlist = min(nlist, col.size)
+        rng = np.random.default_rng(self.seed)
+        # Train on a sample; assignment of the full set is one matmul
+        sample = data[rng.choice(col.size, size=min(col.size, nlist * 64), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(self.train_iters):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            # Spherical k-means: re-normalize; reseed empty lists
+            sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]
+            norms = np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+            centroids = (sums / norms).astype(np.float32)
+        assign = np.argmax(data @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        col.centroids = centroids
+        col.assign = assign
+        col.lists = [order[bounds[c]: bounds[c + 1]] for c in range(nlist)]
+        col.trained_size = col.size
+
+    def query(self, collection: str, query_embedding: np.ndarray, top_k: int = 5) -> List[Dict[str, Any]]:
+        q = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        with self._lock:
+            col = self._collections.get(collection)
+            if col is None or col.size == 0:
+                return []
+            if col.centroids is None:
+                candidates = None
+                sims = col.vectors[: col.size] @ q
+            else:
+                nprobe = min(self.nprobe, col.centroids.shape[0])
+                probe = np.argpartition(-(col.centroids @ q), nprobe - 1)[:nprobe]
+                candidates = np.concatenate([col.lists[c] for c in probe])
+                sims = col.vectors[candidates] @ q
+            k = min(top_k, sims.shape[0])
+            if k <= 0:
+                return []
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            rows = top if candidates is None else candidates[top]
+            return [
+                {
+                    "id": col.ids[r],
+                    "text": col.texts[r],
+                    "metadata": col.metadatas[r],
+                    "score": float(1.0 - sims[t]),
+                }
+                for t, r in zip(top, rows)
+            ]
+
+    def reset_collection(self, collection: str) -> None:
+        with self._lock:
+            self._collections.pop(collection, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: {
+                    "vectors": col.size,
+                    "ivf_lists": 0 if col.centroids is None else col.centroids.shape[0],
+                    "trained_size": col.trained_size,
+                }
+                for name, col in self._collections.items()
+            }
@@ -30,11 +30,18 @@ retriever = None
 
 def ensure_index_loaded():
     global retriever
+    # Loading only maps files, but skip it unless another process rebuilt
+    if retriever is not None and not corpus_index.is_stale():
+        return
     if not corpus_index.has_index():
         # Build index if missing
         corpus_index.build_index()
     else:
-        corpus_index.load_index()
+        try:
+            corpus_index.load_index()
+        except FileNotFoundError:
+            # Index from an older format
+            corpus_index.build_index(full=True)
     retriever = Retriever(corpus_index)
 
 
@@ -59,12 +66,14 @@ def reindex():
     corpus_index.chunk_size = chunk_size
     corpus_index.chunk_overlap = chunk_overlap
 
-    corpus_index.build_index()
+    # Only changed files are re-chunked unless "full" is set or the chunking changed
+    build = corpus_index.build_index(full=bool(payload.get("full", False)))
     ensure_index_loaded()
 
     return jsonify({
         "status": "ok",
-        "message": "Index rebuilt",
+        "message": "Index rebuilt" if build["added_files"] or build["removed_files"] else "Index up to date",
+        "build": build,
         "config": {
             "chunk_size": chunk_size,
             "chunk_overlap": chunk_overlap
@@ -1,10 +1,25 @@
 import os
 import glob
-import pickle
-from typing import List, Dict, Any
+import json
+import shutil
+import hashlib
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
-from sklearn.feature_extraction.text import TfidfVectorizer
-from scipy import sparse
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+
+# Feature space of the hashing vectorizer; fixed so shards built at
+# different times share columns
+N_FEATURES = 2 ** 20
+# Terms in more than this fraction of chunks get no weight (as max_df)
+MAX_DF = 0.95
+# Rebuild from source when shards pile up or most rows are dead
+MAX_SHARDS = 16
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 2
 
 
 def _read_text_file(path: str) -> str:
@@ -33,6 +48,34 @@ def chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
     return chunks
 
 
+def make_vectorizer() -> HashingVectorizer:
+    # Raw term counts; IDF and L2 normalization are applied at query time
+    # from the index-wide document frequencies
+    return HashingVectorizer(
+        ngram_range=(1, 2),
+        stop_words='english',
+        n_features=N_FEATURES,
+        alternate_sign=False,
+        norm=None,
+        dtype=np.float32,
+    )
+
+
+def _save_npy(path: str, arr: np.ndarray):
+    # Never truncate a file that may be memory-mapped by a reader
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def _write_json(path: str, obj: Any):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
 @dataclass
 class Chunk:
     id: str
@@ -41,31 +84,134 @@ class Chunk:
     text: str
 
 
+class _Shard:
+    """One immutable slice of the index, memory-mapped from disk.
+
+    The term matrix is stored term-major (CSR of features x chunks), so a
+    query reads only the posting lists of its own terms. Chunk texts live
+    in text.bin and are decoded on access.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.indptr = np.load(os.path.join(path, "indptr.npy"), mmap_mode="r")
+        self.indices = np.load(os.path.join(path, "indices.npy"), mmap_mode="r")
+        self.data = np.load(os.path.join(path, "data.npy"), mmap_mode="r")
+        self.source = np.load(os.path.join(path, "source.npy"), mmap_mode="r")
+        self.position = np.load(os.path.join(path, "position.npy"), mmap_mode="r")
+        self.text_offsets = np.load(os.path.join(path, "text_offsets.npy"), mmap_mode="r")
+        with open(os.path.join(path, "sources.json"), "r", encoding="utf-8") as f:
+            self.sources: List[str] = json.load(f)
+        text_path = os.path.join(path, "text.bin")
+        self.text = np.memmap(text_path, dtype=np.uint8, mode="r") if os.path.getsize(text_path) else np.zeros(0, np.uint8)
+        self.rows = int(self.position.shape[0])
+
+    @staticmethod
+    def write(path: str, matrix, sources: List[str], source: List[int], position: List[int], texts: List[str]):
+        os.makedirs(path, exist_ok=True)
+        by_term = matrix.T.tocsr()
+        by_term.sum_duplicates()
+        _save_npy(os.path.join(path, "indptr.npy"), by_term.indptr.astype(np.int64))
+        _save_npy(os.path.join(path, "indices.npy"), by_term.indices.astype(np.int32))
+        _save_npy(os.path.join(path, "data.npy"), by_term.data.astype(np.float32))
+        _save_npy(os.path.join(path, "source.npy"), np.asarray(source, dtype=np.int32))
+        _save_npy(os.path.join(path, "position.npy"), np.asarray(position, dtype=np.int32))
+        encoded = [t.encode("utf-8") for t in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        _save_npy(os.path.join(path, "text_offsets.npy"), offsets)
+        with open(os.path.join(path, "text.bin"), "wb") as f:
+            for b in encoded:
+                f.write(b)
+        _write_json(os.path.join(path, "sources.json"), sources)
+
+    def term_of_nnz(self) -> np.ndarray:
+        return np.repeat(np.arange(self.indptr.shape[0] - 1, dtype=np.int32), np.diff(self.indptr))
+
+    def chunk(self, row: int) -> Chunk:
+        start, end = int(self.text_offsets[row]), int(self.text_offsets[row + 1])
+        source = self.sources[int(self.source[row])]
+        position = int(self.position[row])
+        return Chunk(
+            id=f"{os.path.basename(source)}::chunk_{position}",
+            source=source,
+            position=position,
+            text=bytes(self.text[start:end]).decode("utf-8"),
+        )
+
+
+class _Snapshot:
+    """A loaded generation: shards plus index-wide df/idf/norms/live arrays."""
+
+    def __init__(self, storage_dir: str, manifest: Dict[str, Any]):
+        self.manifest = manifest
+        self.generation = manifest["generation"]
+        self.shards = [_Shard(os.path.join(storage_dir, "shards", s)) for s in manifest["shards"]]
+        self.offsets = np.zeros(len(self.shards) + 1, dtype=np.int64)
+        self.offsets[1:] = np.cumsum([s.rows for s in self.shards])
+        gen_dir = os.path.join(storage_dir, manifest["arrays"])
+        self.df = np.load(os.path.join(gen_dir, "df.npy"), mmap_mode="r")
+        self.idf = np.load(os.path.join(gen_dir, "idf.npy"), mmap_mode="r")
+        self.norms = np.load(os.path.join(gen_dir, "norms.npy"), mmap_mode="r")
+        self.live = np.load(os.path.join(gen_dir, "live.npy"), mmap_mode="r")
+        self.num_chunks = int(manifest["num_chunks"])
+
+    def locate(self, row: int) -> Tuple[_Shard, int]:
+        i = int(np.searchsorted(self.offsets, row, side="right")) - 1
+        return self.shards[i], row - int(self.offsets[i])
+
+
 class CorpusIndex:
+    """Incremental TF-IDF index over the .txt files in ``data_dir``.
+
+    Layout under ``storage_dir``:
+    - manifest.json: per-file mtime/size/sha1 and row range, shard list,
+      current generation.
+    - shards/<name>/: one immutable shard per build that added chunks,
+      with the term matrix and chunk texts as .npy/.bin files.
+    - gen-<n>/: index-wide document frequencies, idf, chunk norms and the
+      live-row mask for generation n.
+
+    ``build_index`` re-chunks only files whose size/mtime changed and whose
+    content hash differs; their old rows are marked dead. Everything is
+    memory-mapped on load, so startup cost does not grow with the corpus.
+    """
+
     def __init__(self, data_dir: str = "data", storage_dir: str = "storage", chunk_size: int = 180, chunk_overlap: int = 40):
         self.data_dir = data_dir
         self.storage_dir = storage_dir
-        self.index_path = os.path.join(self.storage_dir, "index.pkl")
+        self.index_path = os.path.join(self.storage_dir, MANIFEST_NAME)
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
 
-        self.vectorizer: TfidfVectorizer = None
-        self.matrix: sparse.spmatrix = None
-        self.chunks: List[Chunk] = []
+        self.vectorizer = make_vectorizer()
+        self.snapshot: Optional[_Snapshot] = None
         self.files_indexed: List[str] = []
+        self.last_build: Dict[str, Any] = {}
+        self._loaded_stamp = None
+        self._lock = threading.Lock()
 
     def has_index(self) -> bool:
         return os.path.exists(self.index_path)
 
-    def load_documents(self) -> List[Dict[str, Any]]:
+    def is_stale(self) -> bool:
+        """True if the on-disk manifest changed since it was loaded."""
+        try:
+            return os.stat(self.index_path).st_mtime_ns != self._loaded_stamp
+        except OSError:
+            return True
+
+    def _scan_files(self) -> Dict[str, str]:
         patterns = [os.path.join(self.data_dir, "**/*.txt"), os.path.join(self.data_dir, "*.txt")]
-        files = []
+        files = set()
         for p in patterns:
-            files.extend(glob.glob(p, recursive=True))
-        files = sorted(list(set(files)))
+            files.update(glob.glob(p, recursive=True))
+        return {os.path.relpath(fp, self.data_dir): fp for fp in sorted(files)}
 
+    def load_documents(self) -> List[Dict[str, Any]]:
         documents = []
-        for fp in files:
+        for fp in self._scan_files().values():
             try:
                 text = _read_text_file(fp)
                 documents.append({"path": fp, "text": text})
@@ -73,65 +219,273 @@ class CorpusIndex:
                 continue
         return documents
 
-    def build_index(self):
-        os.makedirs(self.storage_dir, exist_ok=True)
-        documents = self.load_documents()
-        chunks: List[Chunk] = []
-        for doc in documents:
-            raw_text = doc["text"]
-            norm = _normalize_whitespace(raw_text)
-            parts = chunk_text(norm, self.chunk_size, self.chunk_overlap)
-            for i, p in enumerate(parts):
-                chunk_id = f"{os.path.basename(doc['path'])}::chunk_{i}"
-                chunks.append(Chunk(id=chunk_id, source=os.path.relpath(doc["path"], self.data_dir), position=i, text=p))
-        self.chunks = chunks
-        self.files_indexed = [d["path"] for d in documents]
-
-        # Build TF-IDF index
-        texts = [c.text for c in self.chunks]
-        if not texts:
-            # Create an empty placeholder index
-            self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), stop_words='english', norm='l2')
-            self.matrix = sparse.csr_matrix((0, 0))
-        else:
-            self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), stop_words='english', norm='l2', max_df=0.95)
-            self.matrix = self.vectorizer.fit_transform(texts)
-
-        payload = {
-            "vectorizer": self.vectorizer,
-            "matrix": self.matrix,
-            "chunks": self.chunks,
-            "meta": {
+    def _read_manifest(self, any_version: bool = False) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != FORMAT_VERSION and not any_version:
+            return None
+        return manifest
+
+    def build_index(self, full: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            os.makedirs(os.path.join(self.storage_dir, "shards"), exist_ok=True)
+            manifest = self._read_manifest(any_version=True)
+            generation = (manifest or {}).get("generation", 0) + 1
+            if (
+                full
+                or manifest is None
+                or manifest.get("version") != FORMAT_VERSION
+                or manifest["chunk_size"] != self.chunk_size
+                or manifest["chunk_overlap"] != self.chunk_overlap
+                or manifest["n_features"] != N_FEATURES
+            ):
+                manifest = None
+            result = self._build(manifest, generation)
+            if manifest is not None and (
+                len(self.snapshot.shards) > MAX_SHARDS
+                or result["dead_chunks"] > result["num_chunks"]
+            ):
+                result = self._build(None, generation + 1)
+                result["compacted"] = True
+            self.last_build = result
+            return result
+
+    def _build(self, manifest: Optional[Dict[str, Any]], generation: int) -> Dict[str, Any]:
+        if manifest is None:
+            manifest = {
+                "version": FORMAT_VERSION,
                 "chunk_size": self.chunk_size,
                 "chunk_overlap": self.chunk_overlap,
-                "files_indexed": self.files_indexed,
-                "num_chunks": len(self.chunks),
+                "n_features": N_FEATURES,
+                "files": {},
+                "shards": [],
+            }
+        old_shards = list(manifest["shards"])
+
+        snapshot = None
+        if old_shards:
+            snapshot = _Snapshot(self.storage_dir, manifest)
+            df = np.array(snapshot.df, dtype=np.int64)
+            live = np.array(snapshot.live, dtype=bool)
+        else:
+            df = np.zeros(N_FEATURES, dtype=np.int64)
+            live = np.zeros(0, dtype=bool)
+
+        current = self._scan_files()
+        files = manifest["files"]
+        changed: List[Tuple[str, str, Dict[str, Any]]] = []
+        unchanged = 0
+        for rel, fp in current.items():
+            try:
+                st = os.stat(fp)
+            except OSError:
+                continue
+            rec = files.get(rel)
+            if rec and rec["mtime_ns"] == st.st_mtime_ns and rec["size"] == st.st_size:
+                unchanged += 1
+                continue
+            try:
+                text = _read_text_file(fp)
+            except Exception:
+                continue
+            sha1 = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            if rec and rec["sha1"] == sha1:
+                rec["mtime_ns"], rec["size"] = st.st_mtime_ns, st.st_size
+                unchanged += 1
+                continue
+            changed.append((rel, text, {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": sha1}))
+        removed = [rel for rel in files if rel not in current]
+        if old_shards and not changed and not removed:
+            # Nothing to re-index; keep the generation, persist refreshed mtimes
+            _write_json(self.index_path, manifest)
+            self._install(manifest)
+            return {
+                "generation": manifest["generation"],
+                "added_files": 0,
+                "removed_files": 0,
+                "unchanged_files": unchanged,
+                "new_chunks": 0,
+                "num_chunks": manifest["num_chunks"],
+                "dead_chunks": int(snapshot.live.shape[0] - manifest["num_chunks"]),
             }
+
+        # Retire rows of removed and changed files
+        dead_by_shard: Dict[str, List[Tuple[int, int]]] = {}
+        for rel in removed + [c[0] for c in changed]:
+            rec = files.pop(rel, None)
+            if rec and rec["end"] > rec["start"]:
+                dead_by_shard.setdefault(rec["shard"], []).append((rec["start"], rec["end"]))
+        if snapshot is not None:
+            for i, shard in enumerate(snapshot.shards):
+                spans = dead_by_shard.get(shard.name)
+                if not spans:
+                    continue
+                dead = np.zeros(shard.rows, dtype=bool)
+                for start, end in spans:
+                    dead[start:end] = True
+                dead &= live[snapshot.offsets[i]:snapshot.offsets[i + 1]]
+                terms = shard.term_of_nnz()
+                df -= np.bincount(terms[dead[shard.indices]], minlength=N_FEATURES)
+                live[snapshot.offsets[i]:snapshot.offsets[i + 1]] &= ~dead
+
+        # Chunk and vectorize changed files into one new shard
+        shards = list(old_shards)
+        new_rows = 0
+        if changed:
+            sources, source, position, texts = [], [], [], []
+            for rel, text, rec in changed:
+                parts = chunk_text(_normalize_whitespace(text), self.chunk_size, self.chunk_overlap)
+                rec.update({"start": len(texts), "end": len(texts) + len(parts)})
+                sources.append(rel)
+                for i, part in enumerate(parts):
+                    source.append(len(sources) - 1)
+                    position.append(i)
+                    texts.append(part)
+            name = f"{generation:06d}"
+            if texts:
+                matrix = self.vectorizer.transform(texts)
+                _Shard.write(os.path.join(self.storage_dir, "shards", name), matrix, sources, source, position, texts)
+                df += np.diff(matrix.tocsc().indptr)
+                shards.append(name)
+                live = np.concatenate([live, np.ones(len(texts), dtype=bool)])
+                new_rows = len(texts)
+            for rel, _, rec in changed:
+                rec["shard"] = name
+                files[rel] = rec
+
+        arrays = f"gen-{generation:06d}"
+        manifest.update({
+            "generation": generation,
+            "shards": shards,
+            "arrays": arrays,
+            "num_chunks": int(live.sum()),
+        })
+        self._write_arrays(manifest, df, live)
+        _write_json(self.index_path, manifest)
+        self._remove_unreferenced(manifest)
+        self._install(manifest)
+
+        return {
+            "generation": generation,
+            "added_files": len(changed),
+            "removed_files": len(removed),
+            "unchanged_files": unchanged,
+            "new_chunks": new_rows,
+            "num_chunks": manifest["num_chunks"],
+            "dead_chunks": int(live.shape[0] - manifest["num_chunks"]),
         }
-        with open(self.index_path, "wb") as f:
-            pickle.dump(payload, f)
+
+    def _write_arrays(self, manifest: Dict[str, Any], df: np.ndarray, live: np.ndarray):
+        gen_dir = os.path.join(self.storage_dir, manifest["arrays"])
+        os.makedirs(gen_dir, exist_ok=True)
+        n = int(live.sum())
+        idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+        idf[df <= 0] = 0.0
+        if n > 1:
+            idf[df > MAX_DF * n] = 0.0
+        # Chunk norms of the idf-weighted vectors, so scores are cosines
+        sq = np.zeros(live.shape[0], dtype=np.float64)
+        offset = 0
+        for name in manifest["shards"]:
+            shard = _Shard(os.path.join(self.storage_dir, "shards", name))
+            terms = shard.term_of_nnz()
+            weights = np.asarray(shard.data, dtype=np.float64) * idf[terms]
+            sq[offset:offset + shard.rows] = np.bincount(shard.indices, weights=weights * weights, minlength=shard.rows)
+            offset += shard.rows
+        _save_npy(os.path.join(gen_dir, "df.npy"), df.astype(np.int32))
+        _save_npy(os.path.join(gen_dir, "idf.npy"), idf)
+        _save_npy(os.path.join(gen_dir, "norms.npy"), np.sqrt(sq).astype(np.float32))
+        _save_npy(os.path.join(gen_dir, "live.npy"), live)
+
+    def _remove_unreferenced(self, manifest: Dict[str, Any]):
+        # Readers that still map old files keep them alive until unmapped
+        keep = set(manifest["shards"])
+        shard_root = os.path.join(self.storage_dir, "shards")
+        for name in os.listdir(shard_root):
+            if name not in keep:
+                shutil.rmtree(os.path.join(shard_root, name), ignore_errors=True)
+        for name in os.listdir(self.storage_dir):
+            if name.startswith("gen-") and name != manifest["arrays"]:
+                shutil.rmtree(os.path.join(self.storage_dir, name), ignore_errors=True)
+        legacy = os.path.join(self.storage_dir, "index.pkl")
+        if os.path.exists(legacy):
+            os.remove(legacy)
+
+    def _install(self, manifest: Dict[str, Any]):
+        self.snapshot = _Snapshot(self.storage_dir, manifest)
+        self.chunk_size = manifest["chunk_size"]
+        self.chunk_overlap = manifest["chunk_overlap"]
+        self.files_indexed = [os.path.join(self.data_dir, rel) for rel in sorted(manifest["files"])]
+        self._loaded_stamp = os.stat(self.index_path).st_mtime_ns
 
     def load_index(self):
         if not self.has_index():
             raise FileNotFoundError("Index file not found. Build it first.")
-        with open(self.index_path, "rb") as f:
-            payload = pickle.load(f)
-        self.vectorizer = payload.get("vectorizer")
-        self.matrix = payload.get("matrix")
-        self.chunks = payload.get("chunks", [])
-        meta = payload.get("meta", {})
-        self.chunk_size = meta.get("chunk_size", self.chunk_size)
-        self.chunk_overlap = meta.get("chunk_overlap", self.chunk_overlap)
-        self.files_indexed = meta.get("files_indexed", [])
+        manifest = self._read_manifest()
+        if manifest is None:
+            raise FileNotFoundError("Index format is outdated. Rebuild it.")
+        with self._lock:
+            self._install(manifest)
+
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Cosine scores of ``query`` against live chunks sharing a term.
+
+        Returns (rows, scores) for matching chunks only.
+        """
+        snap = self.snapshot
+        if snap is None or snap.num_chunks == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        q = self.vectorizer.transform([query])
+        terms = q.indices
+        weights = q.data * snap.idf[terms]
+        q_norm = float(np.sqrt(np.dot(weights, weights)))
+        if q_norm == 0.0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        # Each posting contributes tf * idf^2 * q_tf; divided by both norms below
+        weights = weights * snap.idf[terms]
+
+        rows_parts, vals_parts = [], []
+        for shard, offset in zip(snap.shards, snap.offsets[:-1]):
+            for term, w in zip(terms, weights):
+                if w == 0.0:
+                    continue
+                start, end = shard.indptr[term], shard.indptr[term + 1]
+                if start == end:
+                    continue
+                rows_parts.append(shard.indices[start:end] + offset)
+                vals_parts.append(shard.data[start:end] * w)
+        if not rows_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        rows, inverse = np.unique(np.concatenate(rows_parts), return_inverse=True)
+        sums = np.bincount(inverse, weights=np.concatenate(vals_parts))
+        norms = snap.norms[rows]
+        keep = snap.live[rows] & (norms > 0)
+        rows, sums, norms = rows[keep], sums[keep], norms[keep]
+        return rows, (sums / (norms * q_norm)).astype(np.float32)
+
+    def chunk(self, row: int) -> Chunk:
+        shard, local = self.snapshot.locate(int(row))
+        return shard.chunk(local)
+
+    @property
+    def num_chunks(self) -> int:
+        return self.snapshot.num_chunks if self.snapshot else 0
 
     def index_info(self) -> Dict[str, Any]:
+        snap = self.snapshot
         return {
             "data_dir": self.data_dir,
             "storage_dir": self.storage_dir,
             "index_path": self.index_path,
             "files_indexed": [os.path.relpath(f, self.data_dir) for f in self.files_indexed],
-            "num_chunks": len(self.chunks),
+            "num_chunks": self.num_chunks,
             "chunk_size": self.chunk_size,
             "chunk_overlap": self.chunk_overlap,
+            "generation": snap.generation if snap else 0,
+            "shards": len(snap.shards) if snap else 0,
+            "dead_chunks": int(snap.live.shape[0] - snap.num_chunks) if snap else 0,
+            "last_build": self.last_build,
         }
-
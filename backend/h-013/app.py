@@ -8,10 +8,20 @@ import json
 import traceback
 from datetime import datetime
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 import pandas as pd
-
-from exporters.serializer import serialize_dataframe
+import pyarrow as pa
+
+from exporters.serializer import (
+    CONTENT_TYPES,
+    serialize_dataframe,
+    serialize_batches,
+    iter_record_batches,
+    record_columns,
+    infer_schema,
+    parse_schema,
+)
+from exporters.streaming import export_batches, DEFAULT_MAX_OPEN_FILES
 from connectors.local import LocalConnector
 from connectors.s3 import S3Connector
 from connectors.gcs import GCSConnector
@@ -63,6 +73,14 @@ def _validate_request(payload):
     if not isinstance(options, dict):
         raise ValueError("Field 'options' must be an object if provided")
 
+    partition_by = options.get("partition_by")
+    if isinstance(partition_by, str):
+        options["partition_by"] = [partition_by]
+    elif partition_by is not None and not (isinstance(partition_by, list) and all(isinstance(c, str) for c in partition_by)):
+        raise ValueError("options.partition_by must be a column name or a list of column names")
+    if options.get("partition_by") and dest_type == "download":
+        raise ValueError("options.partition_by needs a storage destination, not download")
+
     return data, fmt, destination, options
 
 
@@ -135,6 +153,9 @@ def export_data():
 
         data, fmt, destination, options = _validate_request(payload)
 
+        if options.get("stream") or options.get("partition_by"):
+            return _export_streaming(data, fmt, destination, options)
+
         # Convert data to DataFrame
         try:
             df = pd.DataFrame(data)
@@ -182,6 +203,75 @@ def export_data():
         return _error("Internal server error", 500)
 
 
+def _export_schema(data, columns, batch_rows, explicit):
+    """
+    Parquet schema for the whole export: types from options.schema, the
+    rest inferred over all records (one batch at a time) so a column that
+    is null or integral early on still gets its widest type. Records that
+    do not fit options.schema fail here, before a download's 200 is sent.
+    """
+    explicit = explicit or pa.schema([])
+    inferred = infer_schema(iter_record_batches(data, batch_rows, columns=columns), explicit)
+    return explicit if inferred is None else inferred
+
+
+def _export_streaming(data, fmt, destination, options):
+    """
+    Streaming export: records are serialized batch_rows at a time (CSV
+    chunks / Parquet row groups) straight into a chunked download or a
+    connector upload, so no full DataFrame or output blob is built.
+    """
+    batch_rows = int(options.get("batch_rows") or 100_000)
+    # Fixed up front, so every CSV chunk and Parquet row group has the same layout
+    columns = record_columns(data)
+    schema = None
+    if fmt == "parquet":
+        schema = _export_schema(data, columns, batch_rows, parse_schema(options.get("schema")))
+    batches = iter_record_batches(data, batch_rows, columns=columns)
+    content_type, extension = CONTENT_TYPES[fmt]
+    partition_by = options.get("partition_by")
+    dest_type = destination.get("type").lower()
+
+    if dest_type == "download":
+        filename = destination.get("filename") or _build_filename(base_name=destination.get("base_name"), extension=extension)
+        return Response(
+            stream_with_context(serialize_batches(batches, fmt=fmt, options=options, columns=columns, schema=schema)),
+            mimetype=content_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    connector = _get_connector(destination)
+    if connector is None:
+        return _error("Connector resolution failed", 400)
+
+    if partition_by:
+        # A directory of col=value/part-NNNNN files
+        path = destination.get("path") or f"{destination.get('base_name') or settings.DEFAULT_BASENAME}-{_now_str()}"
+    else:
+        path = destination.get("path") or destination.get("filename") or _build_filename(base_name=destination.get("base_name"), extension=extension)
+
+    result = export_batches(
+        batches,
+        connector,
+        path,
+        fmt=fmt,
+        options=options,
+        partition_by=partition_by,
+        max_open_files=int(options.get("max_open_files") or DEFAULT_MAX_OPEN_FILES),
+        columns=columns,
+        schema=schema,
+    )
+    return jsonify({
+        "status": "success",
+        "location": result["location"],
+        "locations": result["locations"],
+        "files": result["files"],
+        "rows": result["rows"],
+        "content_type": content_type,
+        "bytes": result["bytes"],
+    })
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', '8080'))) 
 
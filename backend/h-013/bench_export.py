@@ -0,0 +1,140 @@
+"""
+Peak memory and throughput of a large local export: whole-frame vs streaming.
+
+Generates --batch-rows row batches of synthetic orders (id, ts, region,
+amount, customer, note) until about --size-gb of CSV would be written,
+and exports them to a LocalConnector in --format with:
+
+  legacy       what /export did before: one DataFrame of every row,
+               serialize_dataframe() into a single bytes object, then
+               connector.write()
+  stream       export_batches(): each batch is encoded as a CSV chunk /
+               Parquet row group and appended to one upload
+  partitioned  export_batches(partition_by=["region"]): hive-style
+               region=<value>/part-NNNNN files
+
+Each variant runs in its own process; reported are seconds, MB/s of
+output, rows/sec and peak RSS. legacy needs roughly three copies of the
+data in memory (about 15 GB for the default 5 GB), so pick variants to
+fit the machine:
+
+    python bench_export.py --size-gb 5 --variants stream,partitioned
+    python bench_export.py --size-gb 1
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from connectors.local import LocalConnector  # noqa: E402
+from exporters.serializer import serialize_dataframe  # noqa: E402
+from exporters.streaming import export_batches  # noqa: E402
+
+
+REGIONS = np.array(["us-east", "us-west", "eu-central", "eu-west", "ap-south", "ap-northeast", "sa-east", "af-south"], dtype=object)
+WORDS = np.array(["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet"], dtype=object)
+
+
+def make_batch(start, n):
+    rng = np.random.default_rng(start)
+    return pd.DataFrame({
+        "id": np.arange(start, start + n, dtype=np.int64),
+        "ts": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, n), unit="s"),
+        "region": REGIONS[rng.integers(0, len(REGIONS), n)],
+        "amount": np.round(rng.random(n) * 1000, 2),
+        "customer": np.char.add("cust-", rng.integers(0, 1_000_000, n).astype(str)).astype(object),
+        "note": WORDS[rng.integers(0, len(WORDS), n)] + " " + WORDS[rng.integers(0, len(WORDS), n)] + " " + WORDS[rng.integers(0, len(WORDS), n)],
+    })
+
+
+def batches(rows, batch_rows):
+    for start in range(0, rows, batch_rows):
+        yield make_batch(start, min(batch_rows, rows - start))
+
+
+def rows_for_size(size_gb):
+    probe = make_batch(0, 20000)
+    per_row = len(probe.to_csv(index=False).encode()) / len(probe)
+    return int(size_gb * 1e9 / per_row)
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def child(args):
+    out_dir = tempfile.mkdtemp(prefix="export-out-", dir=args.out_dir)
+    connector = LocalConnector(base_dir=out_dir)
+    t0 = time.perf_counter()
+    try:
+        if args.variant == "legacy":
+            df = pd.concat(batches(args.rows, args.batch_rows), ignore_index=True)
+            content, content_type, ext = serialize_dataframe(df, fmt=args.format)
+            connector.write(content, f"export.{ext}", content_type=content_type)
+            res = {"rows": len(df), "bytes": len(content), "files": 1}
+        else:
+            partition_by = ["region"] if args.variant == "partitioned" else None
+            path = "export" if partition_by else f"export.{args.format}"
+            res = export_batches(batches(args.rows, args.batch_rows), connector, path, fmt=args.format,
+                                 partition_by=partition_by)
+            res = {k: res[k] for k in ("rows", "bytes", "files")}
+    finally:
+        elapsed = time.perf_counter() - t0
+        shutil.rmtree(out_dir, ignore_errors=True)
+    res.update(seconds=round(elapsed, 1), mb_per_sec=round(res["bytes"] / 1e6 / elapsed, 1),
+               rows_per_sec=round(res["rows"] / elapsed), peak_rss_mb=peak_rss_mb())
+    print(json.dumps(res))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-gb", type=float, default=5.0)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--batch-rows", type=int, default=100_000)
+    parser.add_argument("--variants", default="legacy,stream,partitioned")
+    parser.add_argument("--out-dir", default=None, help="where exports are written (default: system temp)")
+    parser.add_argument("--variant", choices=["legacy", "stream", "partitioned"], help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.variant:
+        child(args)
+        return
+
+    rows = rows_for_size(args.size_gb)
+    print(f"{rows} rows (~{args.size_gb:g} GB as CSV), format={args.format}", flush=True)
+    report = {}
+    for variant in [v.strip() for v in args.variants.split(",") if v.strip()]:
+        cmd = [sys.executable, __file__, "--variant", variant, "--rows", str(rows), "--format", args.format,
+               "--batch-rows", str(args.batch_rows)]
+        if args.out_dir:
+            cmd += ["--out-dir", args.out_dir]
+        out = subprocess.run(cmd, capture_output=True, text=True)
+        if out.returncode != 0:
+            report[variant] = {"error": (out.stderr.strip().splitlines() or [f"exit {out.returncode}"])[-1]}
+            continue
+        report[variant] = json.loads(out.stdout.strip().splitlines()[-1])
+        print(variant, json.dumps(report[variant]), flush=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
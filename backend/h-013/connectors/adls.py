@@ -1,8 +1,60 @@
-from typing import Optional
+import base64
+from typing import List, Optional
 
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobBlock, BlobServiceClient
 
-from .base import BaseConnector
+from .base import BaseConnector, UploadStream
+
+
+DEFAULT_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def _content_settings(content_type: Optional[str]):
+    if not content_type:
+        return None
+    from azure.storage.blob import ContentSettings
+    return ContentSettings(content_type=content_type)
+
+
+class _ADLSBlockUpload(UploadStream):
+    """Stages one block per ``block_size`` bytes; commit_block_list() publishes the blob."""
+
+    def __init__(self, blob_client, location: str, content_type: Optional[str], block_size: int):
+        self._blob_client = blob_client
+        self._location = location
+        self._content_type = content_type
+        self._block_size = block_size
+        self._buf = bytearray()
+        self._blocks: List[BlobBlock] = []
+
+    def write(self, data: bytes) -> None:
+        self._buf += data
+        self.bytes_written += len(data)
+        while len(self._buf) >= self._block_size:
+            self._stage(bytes(self._buf[:self._block_size]))
+            del self._buf[:self._block_size]
+
+    def _stage(self, data: bytes):
+        # Block ids must all have the same length within a blob
+        block_id = base64.b64encode(f"{len(self._blocks):08d}".encode()).decode()
+        self._blob_client.stage_block(block_id, data)
+        self._blocks.append(BlobBlock(block_id=block_id))
+
+    def close(self) -> str:
+        content_settings = _content_settings(self._content_type)
+        if not self._blocks:
+            self._blob_client.upload_blob(bytes(self._buf), overwrite=True, content_settings=content_settings)
+        else:
+            if self._buf:
+                self._stage(bytes(self._buf))
+            self._blob_client.commit_block_list(self._blocks, content_settings=content_settings)
+        self._buf = bytearray()
+        return self._location
+
+    def abort(self) -> None:
+        # Uncommitted blocks are discarded by the service
+        self._buf = bytearray()
+        self._blocks = []
 
 
 class ADLSConnector(BaseConnector):
@@ -13,9 +65,11 @@ class ADLSConnector(BaseConnector):
         connection_string: Optional[str] = None,
         account_name: Optional[str] = None,
         account_key: Optional[str] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
     ):
         self.container_name = container
         self.prefix = (prefix or '').strip('/')
+        self.block_size = block_size
         if connection_string:
             self.service_client = BlobServiceClient.from_connection_string(connection_string)
         elif account_name and account_key:
@@ -26,15 +80,22 @@ class ADLSConnector(BaseConnector):
             self.service_client = BlobServiceClient.from_connection_string("")
         self.container_client = self.service_client.get_container_client(self.container_name)
 
-    def write(self, content: bytes, path: str, content_type: Optional[str] = None) -> str:
+    def _blob_name(self, path: str) -> str:
         blob_name = path.strip('/')
         if self.prefix:
             blob_name = f"{self.prefix}/{blob_name}"
-        blob_client = self.container_client.get_blob_client(blob_name)
-        content_settings = None
-        if content_type:
-            from azure.storage.blob import ContentSettings
-            content_settings = ContentSettings(content_type=content_type)
-        blob_client.upload_blob(content, overwrite=True, content_settings=content_settings)
+        return blob_name
+
+    def _location(self, blob_name: str) -> str:
         return f"https://{self.container_client.account_name}.blob.core.windows.net/{self.container_name}/{blob_name}"
 
+    def write(self, content: bytes, path: str, content_type: Optional[str] = None) -> str:
+        blob_name = self._blob_name(path)
+        blob_client = self.container_client.get_blob_client(blob_name)
+        blob_client.upload_blob(content, overwrite=True, content_settings=_content_settings(content_type))
+        return self._location(blob_name)
+
+    def open_stream(self, path: str, content_type: Optional[str] = None) -> UploadStream:
+        blob_name = self._blob_name(path)
+        blob_client = self.container_client.get_blob_client(blob_name)
+        return _ADLSBlockUpload(blob_client, self._location(blob_name), content_type, self.block_size)
@@ -1,7 +1,50 @@
+import tempfile
 from abc import ABC, abstractmethod
 from typing import Optional
 
 
+class UploadStream(ABC):
+    """An object being written piece by piece; see BaseConnector.open_stream."""
+
+    bytes_written = 0
+
+    @abstractmethod
+    def write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self) -> str:
+        """Finish the upload and return its location."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def abort(self) -> None:
+        """Drop whatever was uploaded; the destination is left untouched."""
+        raise NotImplementedError
+
+
+class _SpooledUpload(UploadStream):
+    def __init__(self, connector: 'BaseConnector', path: str, content_type: Optional[str]):
+        self._connector = connector
+        self._path = path
+        self._content_type = content_type
+        self._buf = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+
+    def write(self, data: bytes) -> None:
+        self._buf.write(data)
+        self.bytes_written += len(data)
+
+    def close(self) -> str:
+        try:
+            self._buf.seek(0)
+            return self._connector.write(self._buf.read(), self._path, content_type=self._content_type)
+        finally:
+            self._buf.close()
+
+    def abort(self) -> None:
+        self._buf.close()
+
+
 class BaseConnector(ABC):
     @abstractmethod
     def write(self, content: bytes, path: str, content_type: Optional[str] = None) -> str:
@@ -11,3 +54,10 @@ class BaseConnector(ABC):
         """
         raise NotImplementedError
 
+    def open_stream(self, path: str, content_type: Optional[str] = None) -> UploadStream:
+        """
+        Start an upload that is written in chunks and finished by close().
+        Connectors override this with their multipart/resumable API; this
+        fallback spools to a temporary file and calls write() at the end.
+        """
+        return _SpooledUpload(self, path, content_type)
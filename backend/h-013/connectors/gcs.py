@@ -4,7 +4,11 @@ from typing import Optional, Any
 from google.cloud import storage
 from google.oauth2 import service_account
 
-from .base import BaseConnector
+from .base import BaseConnector, UploadStream
+
+
+# Resumable uploads send data in multiples of 256 KiB
+DEFAULT_CHUNK_SIZE = 32 * 256 * 1024
 
 
 def _credentials_from_any(creds_any: Any):
@@ -27,8 +31,30 @@ def _credentials_from_any(creds_any: Any):
     return None
 
 
+class _GCSResumableUpload(UploadStream):
+    """Resumable upload: the object only appears once close() finalizes it."""
+
+    def __init__(self, blob, content_type: Optional[str], chunk_size: int):
+        self._location = f"gs://{blob.bucket.name}/{blob.name}"
+        self._writer = blob.open('wb', content_type=content_type or 'application/octet-stream',
+                                 chunk_size=chunk_size, ignore_flush=True)
+
+    def write(self, data: bytes) -> None:
+        self._writer.write(data)
+        self.bytes_written += len(data)
+
+    def close(self) -> str:
+        self._writer.close()
+        return self._location
+
+    def abort(self) -> None:
+        # An unfinalized resumable session creates no object and expires on its own
+        self._writer = None
+
+
 class GCSConnector(BaseConnector):
-    def __init__(self, bucket: str, prefix: Optional[str] = None, project: Optional[str] = None, credentials: Optional[Any] = None):
+    def __init__(self, bucket: str, prefix: Optional[str] = None, project: Optional[str] = None, credentials: Optional[Any] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
         creds = _credentials_from_any(credentials)
         if creds is not None:
             self.client = storage.Client(project=project, credentials=creds)
@@ -36,13 +62,19 @@ class GCSConnector(BaseConnector):
             self.client = storage.Client(project=project)
         self.bucket_name = bucket
         self.prefix = (prefix or '').strip('/')
+        self.chunk_size = chunk_size
 
-    def write(self, content: bytes, path: str, content_type: Optional[str] = None) -> str:
+    def _blob(self, path: str):
         bucket = self.client.bucket(self.bucket_name)
         blob_name = path.strip('/')
         if self.prefix:
             blob_name = f"{self.prefix}/{blob_name}"
-        blob = bucket.blob(blob_name)
+        return bucket.blob(blob_name)
+
+    def write(self, content: bytes, path: str, content_type: Optional[str] = None) -> str:
+        blob = self._blob(path)
         blob.upload_from_string(content, content_type=content_type or 'application/octet-stream')
-        return f"gs://{self.bucket_name}/{blob_name}"
+        return f"gs://{self.bucket_name}/{blob.name}"
 
+    def open_stream(self, path: str, content_type: Optional[str] = None) -> UploadStream:
+        return _GCSResumableUpload(self._blob(path), content_type, self.chunk_size)
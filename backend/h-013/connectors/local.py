@@ -1,7 +1,29 @@
 import os
 from typing import Optional
 
-from .base import BaseConnector
+from .base import BaseConnector, UploadStream
+
+
+class _LocalUpload(UploadStream):
+    def __init__(self, path: str):
+        self._path = path
+        self._tmp = f"{path}.part"
+        self._f = open(self._tmp, 'wb')
+
+    def write(self, data: bytes) -> None:
+        self._f.write(data)
+        self.bytes_written += len(data)
+
+    def close(self) -> str:
+        self._f.close()
+        # Readers never see a half-written file
+        os.replace(self._tmp, self._path)
+        return f"file://{os.path.abspath(self._path)}"
+
+    def abort(self) -> None:
+        self._f.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
 
 
 class LocalConnector(BaseConnector):
@@ -9,13 +31,19 @@ class LocalConnector(BaseConnector):
         self.base_dir = base_dir or '.'
         os.makedirs(self.base_dir, exist_ok=True)
 
-    def write(self, content: bytes, path: str, content_type: Optional[str] = None) -> str:
+    def _resolve(self, path: str) -> str:
         safe_path = os.path.normpath(path)
         if not os.path.isabs(safe_path):
             safe_path = os.path.join(self.base_dir, safe_path)
         # Ensure directory exists
         os.makedirs(os.path.dirname(safe_path), exist_ok=True)
+        return safe_path
+
+    def write(self, content: bytes, path: str, content_type: Optional[str] = None) -> str:
+        safe_path = self._resolve(path)
         with open(safe_path, 'wb') as f:
             f.write(content)
         return f"file://{os.path.abspath(safe_path)}"
 
+    def open_stream(self, path: str, content_type: Optional[str] = None) -> UploadStream:
+        return _LocalUpload(self._resolve(path))
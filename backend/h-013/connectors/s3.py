@@ -1,8 +1,69 @@
-from typing import Optional
+from typing import List, Optional
 
 import boto3
 
-from .base import BaseConnector
+from .base import BaseConnector, UploadStream
+
+
+# S3 rejects multipart parts under 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+class _S3MultipartUpload(UploadStream):
+    """Buffers one part at a time; an object smaller than a part is a plain put_object."""
+
+    def __init__(self, client, bucket: str, key: str, content_type: Optional[str], part_size: int):
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._content_type = content_type
+        self._part_size = max(MIN_PART_SIZE, part_size)
+        self._buf = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: List[dict] = []
+
+    def write(self, data: bytes) -> None:
+        self._buf += data
+        self.bytes_written += len(data)
+        while len(self._buf) >= self._part_size:
+            self._upload_part(bytes(self._buf[:self._part_size]))
+            del self._buf[:self._part_size]
+
+    def _upload_part(self, body: bytes):
+        if self._upload_id is None:
+            args = {'Bucket': self._bucket, 'Key': self._key}
+            if self._content_type:
+                args['ContentType'] = self._content_type
+            self._upload_id = self._client.create_multipart_upload(**args)['UploadId']
+        number = len(self._parts) + 1
+        resp = self._client.upload_part(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+                                        PartNumber=number, Body=body)
+        self._parts.append({'ETag': resp['ETag'], 'PartNumber': number})
+
+    def close(self) -> str:
+        try:
+            if self._upload_id is None:
+                put_args = {'Bucket': self._bucket, 'Key': self._key, 'Body': bytes(self._buf)}
+                if self._content_type:
+                    put_args['ContentType'] = self._content_type
+                self._client.put_object(**put_args)
+            else:
+                if self._buf:
+                    self._upload_part(bytes(self._buf))
+                self._client.complete_multipart_upload(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+                                                       MultipartUpload={'Parts': self._parts})
+        except Exception:
+            self.abort()
+            raise
+        self._buf = bytearray()
+        return f"s3://{self._bucket}/{self._key}"
+
+    def abort(self) -> None:
+        self._buf = bytearray()
+        if self._upload_id is not None:
+            self._client.abort_multipart_upload(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id)
+            self._upload_id = None
 
 
 class S3Connector(BaseConnector):
@@ -14,9 +75,11 @@ class S3Connector(BaseConnector):
         aws_access_key_id: Optional[str] = None,
         aws_secret_access_key: Optional[str] = None,
         aws_session_token: Optional[str] = None,
+        part_size: int = DEFAULT_PART_SIZE,
     ):
         self.bucket = bucket
         self.prefix = (prefix or '').strip('/')
+        self.part_size = part_size
         session_kwargs = {
             'region_name': region_name,
             'aws_access_key_id': aws_access_key_id,
@@ -27,10 +90,14 @@ class S3Connector(BaseConnector):
         session_kwargs = {k: v for k, v in session_kwargs.items() if v}
         self.client = boto3.client('s3', **session_kwargs)
 
-    def write(self, content: bytes, path: str, content_type: Optional[str] = None) -> str:
+    def _key(self, path: str) -> str:
         key = path.strip('/')
         if self.prefix:
             key = f"{self.prefix}/{key}"
+        return key
+
+    def write(self, content: bytes, path: str, content_type: Optional[str] = None) -> str:
+        key = self._key(path)
         put_args = {
             'Bucket': self.bucket,
             'Key': key,
@@ -41,3 +108,5 @@ class S3Connector(BaseConnector):
         self.client.put_object(**put_args)
         return f"s3://{self.bucket}/{key}"
 
+    def open_stream(self, path: str, content_type: Optional[str] = None) -> UploadStream:
+        return _S3MultipartUpload(self.client, self.bucket, self._key(path), content_type, self.part_size)
@@ -1,7 +1,17 @@
 import io
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Iterable, Iterator, List, Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+CONTENT_TYPES = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+DEFAULT_ROW_GROUP_ROWS = 128 * 1024
 
 
 def serialize_dataframe(df: pd.DataFrame, fmt: str = 'csv', options: Dict[str, Any] | None = None) -> Tuple[bytes, str, str]:
@@ -24,3 +34,249 @@ def serialize_dataframe(df: pd.DataFrame, fmt: str = 'csv', options: Dict[str, A
 
     raise ValueError(f"Unsupported format: {fmt}")
 
+
+class _ByteSink:
+    """Write-only file for ParquetWriter; bytes are handed on by drain()."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def parse_schema(spec: Any) -> Optional[pa.Schema]:
+    """``{"column": "int64", ...}`` (pyarrow type aliases) as a pyarrow schema."""
+    if spec is None or isinstance(spec, pa.Schema):
+        return spec
+    if not isinstance(spec, dict):
+        raise ValueError("schema must be an object of column -> type name")
+    fields = []
+    for name, type_name in spec.items():
+        try:
+            fields.append(pa.field(str(name), pa.type_for_alias(str(type_name))))
+        except (KeyError, ValueError):
+            raise ValueError(f"Unknown type for column {name}: {type_name}")
+    return pa.schema(fields)
+
+
+def _to_arrow(batch) -> pa.Table:
+    if isinstance(batch, pd.DataFrame):
+        table = pa.Table.from_pandas(batch, preserve_index=False)
+        # A key no record of this batch has comes out as NaN doubles: make
+        # it null-typed, so it takes its type from the batches that have it
+        for i, column in enumerate(table.columns):
+            if column.null_count == len(column) and not pa.types.is_null(column.type):
+                table = table.set_column(i, table.field(i).name, pa.nulls(len(column)))
+    elif isinstance(batch, pa.RecordBatch):
+        table = pa.Table.from_batches([batch])
+    else:
+        table = batch
+    return table.replace_schema_metadata(None)
+
+
+def unify_schemas(schemas: Iterable[pa.Schema]) -> Optional[pa.Schema]:
+    """One schema for all of ``schemas``: null columns take the other batches'
+    type and numbers widen (int64 + double -> double)."""
+    schemas = list(schemas)
+    if not schemas:
+        return None
+    try:
+        return pa.unify_schemas(schemas, promote_options='permissive')
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise ValueError(f"Batches have incompatible column types: {e}")
+
+
+def infer_schema(batches: Iterable, explicit: Optional[pa.Schema] = None) -> Optional[pa.Schema]:
+    """Schema covering every batch; a pass over the data that keeps one batch in memory.
+
+    Columns in ``explicit`` take its types instead of being inferred, and
+    each batch is checked against them here: a value that does not cast
+    raises ValueError now rather than once output has started.
+    """
+    explicit = explicit or pa.schema([])
+    schema = None
+    for batch in batches:
+        table = _to_arrow(batch)
+        fixed = [name for name in table.column_names if explicit.get_field_index(name) >= 0]
+        if fixed:
+            conform_table(table.select(fixed), pa.schema([explicit.field(name) for name in fixed]))
+        batch_schema = pa.schema([explicit.field(name) if name in fixed else table.schema.field(name)
+                                  for name in table.column_names])
+        schema = batch_schema if schema is None else unify_schemas([schema, batch_schema])
+    return schema
+
+
+def conform_table(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """``table`` with the columns of ``schema``, in its order and types; absent columns are null."""
+    extra = [name for name in table.column_names if schema.get_field_index(name) < 0]
+    if extra:
+        raise ValueError(f"Columns not in the export schema: {', '.join(extra)} (pass them in options.schema)")
+    columns = []
+    for field in schema:
+        if field.name in table.column_names:
+            column = table.column(field.name)
+            if not column.type.equals(field.type):
+                try:
+                    column = column.cast(field.type)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:
+                    raise ValueError(f"Column {field.name} does not fit the export schema ({field.type}): {e}")
+            columns.append(column)
+        else:
+            columns.append(pa.nulls(table.num_rows, field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+class StreamSerializer:
+    """Encodes one output file incrementally from a series of batches.
+
+    write() takes a DataFrame or pyarrow RecordBatch/Table and returns the
+    bytes that became ready (possibly b''); finish() returns the rest.
+
+    CSV emits one chunk per batch under a single header. The columns are
+    ``columns`` if given, else those of the first batch; every batch is
+    reindexed to them, so a later batch with its keys in another order (or
+    some missing) still lines up.
+
+    Parquet collects batches into row groups of ``row_group_rows`` rows
+    (option) and emits each row group as soon as it is written, so at most
+    one row group is held in memory. The file schema is ``schema`` (or the
+    ``schema`` option) if given; otherwise the batches of the first row
+    group are unified, widening null-typed and integer columns. Every batch
+    is conformed to it, missing columns becoming nulls.
+    """
+
+    def __init__(self, fmt: str = 'csv', options: Dict[str, Any] | None = None,
+                 columns: Optional[List[str]] = None, schema: Optional[pa.Schema] = None):
+        options = options or {}
+        self.fmt = fmt.lower()
+        if self.fmt not in CONTENT_TYPES:
+            raise ValueError(f"Unsupported format: {fmt}")
+        self.content_type, self.extension = CONTENT_TYPES[self.fmt]
+        self.rows = 0
+
+        if self.fmt == 'csv':
+            csv_opts = {k: v for k, v in options.items() if k in {'sep', 'encoding', 'header', 'index', 'quoting'} }
+            csv_opts.setdefault('index', False)
+            self._encoding = csv_opts.pop('encoding', 'utf-8')
+            self._header = csv_opts.pop('header', True)
+            self._csv_opts = csv_opts
+            self._columns: Optional[List[str]] = list(columns) if columns is not None else None
+            self._header_written = False
+        else:
+            self._compression = options.get('compression', 'snappy')
+            self._row_group_rows = int(options.get('row_group_rows') or DEFAULT_ROW_GROUP_ROWS)
+            self._sink = _ByteSink()
+            self._writer: Optional[pq.ParquetWriter] = None
+            self._schema: Optional[pa.Schema] = schema if schema is not None else parse_schema(options.get('schema'))
+            self._pending: List[pa.Table] = []
+            self._pending_rows = 0
+
+    def write(self, batch) -> bytes:
+        if self.fmt == 'csv':
+            if isinstance(batch, (pa.RecordBatch, pa.Table)):
+                batch = batch.to_pandas()
+            if self._columns is None:
+                self._columns = list(batch.columns)
+            extra = [c for c in batch.columns if c not in self._columns]
+            if extra:
+                raise ValueError(f"Columns not in the CSV header: {', '.join(map(str, extra))}")
+            if list(batch.columns) != self._columns:
+                batch = batch.reindex(columns=self._columns)
+            if batch.empty and self._header_written:
+                return b''
+            data = batch.to_csv(header=False if self._header_written else self._header, **self._csv_opts).encode(self._encoding)
+            self._header_written = True
+            self.rows += len(batch)
+            return data
+
+        table = _to_arrow(batch)
+        if self._writer is not None:
+            table = conform_table(table, self._schema)
+        if table.num_rows == 0 and self._writer is not None:
+            return b''
+        self.rows += table.num_rows
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+        if self._pending_rows >= self._row_group_rows:
+            self._write_row_groups(final=False)
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        if self.fmt == 'csv':
+            return b''
+        self._write_row_groups(final=True)
+        if self._writer is None:
+            # Nothing written at all: still a valid (empty) Parquet file
+            self._writer = pq.ParquetWriter(self._sink, self._schema or pa.schema([]), compression=self._compression)
+        self._writer.close()
+        return self._sink.drain()
+
+    def _write_row_groups(self, final: bool):
+        if not self._pending:
+            return
+        if self._writer is None:
+            if self._schema is None:
+                self._schema = unify_schemas(t.schema for t in self._pending)
+            self._pending = [conform_table(t, self._schema) for t in self._pending]
+            self._writer = pq.ParquetWriter(self._sink, self._schema, compression=self._compression)
+        table = pa.concat_tables(self._pending)
+        cut = table.num_rows if final else table.num_rows - table.num_rows % self._row_group_rows
+        if cut:
+            self._writer.write_table(table.slice(0, cut), row_group_size=self._row_group_rows)
+        rest = table.slice(cut)
+        self._pending = [rest] if rest.num_rows else []
+        self._pending_rows = rest.num_rows
+
+
+def serialize_batches(batches: Iterable, fmt: str = 'csv', options: Dict[str, Any] | None = None,
+                      columns: Optional[List[str]] = None, schema: Optional[pa.Schema] = None) -> Iterator[bytes]:
+    """Yield the encoded file for ``batches`` chunk by chunk (streamed downloads)."""
+    serializer = StreamSerializer(fmt, options, columns=columns, schema=schema)
+    for batch in batches:
+        data = serializer.write(batch)
+        if data:
+            yield data
+    data = serializer.finish()
+    if data:
+        yield data
+
+
+def record_columns(records: List[Dict[str, Any]]) -> List[str]:
+    """Union of the records' keys in order of first appearance, as pd.DataFrame(records) orders them."""
+    columns: Dict[str, None] = {}
+    for record in records:
+        if isinstance(record, dict):
+            columns.update(dict.fromkeys(record))
+    return list(columns)
+
+
+def iter_record_batches(records: List[Dict[str, Any]], batch_rows: int,
+                        columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """DataFrames of ``batch_rows`` records at a time, so the whole set is never one frame.
+
+    Every batch has the same ``columns`` (default: the union of all keys),
+    whatever keys its own records happen to have.
+    """
+    if columns is None:
+        columns = record_columns(records)
+    batch_rows = max(1, batch_rows)
+    for start in range(0, len(records), batch_rows):
+        yield pd.DataFrame(records[start:start + batch_rows], columns=columns)
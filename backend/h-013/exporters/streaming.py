@@ -0,0 +1,142 @@
+import posixpath
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+
+from connectors.base import BaseConnector, UploadStream
+from .serializer import StreamSerializer
+
+
+HIVE_NULL = '__HIVE_DEFAULT_PARTITION__'
+DEFAULT_MAX_OPEN_FILES = 64
+
+
+def hive_segment(column: str, value: Any) -> str:
+    """``column=value`` directory name, escaped the way Hive/pyarrow read it back."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        text = HIVE_NULL
+    else:
+        text = quote(str(value), safe='')
+    return f"{quote(str(column), safe='')}={text}"
+
+
+class _OpenFile:
+    def __init__(self, serializer: StreamSerializer, upload: UploadStream, suffix: str = ''):
+        self.serializer = serializer
+        self.upload = upload
+        # Part of the location below the export's root directory
+        self.suffix = suffix
+
+    def write(self, batch):
+        data = self.serializer.write(batch)
+        if data:
+            self.upload.write(data)
+
+    def close(self) -> str:
+        data = self.serializer.finish()
+        if data:
+            self.upload.write(data)
+        return self.upload.close()
+
+
+def export_batches(
+    batches: Iterable,
+    connector: BaseConnector,
+    path: str,
+    fmt: str = 'csv',
+    options: Dict[str, Any] | None = None,
+    partition_by: Optional[List[str]] = None,
+    max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+    columns: Optional[List[str]] = None,
+    schema: Optional[pa.Schema] = None,
+) -> Dict[str, Any]:
+    """Serialize ``batches`` straight into connector uploads.
+
+    Without ``partition_by`` everything goes to one object at ``path``.
+    With it, ``path`` is a directory and rows land in
+    ``path/col=value/.../part-NNNNN.<ext>`` (partition columns are dropped
+    from the files, as Hive expects). At most ``max_open_files`` partition
+    uploads are open at once; the least recently written one is finished
+    when another is needed, and a later batch for it starts the next part.
+    On error every open upload is aborted.
+
+    ``columns`` (CSV) and ``schema`` (Parquet) fix the layout of every file
+    up front; see StreamSerializer. Partition columns are left out of both.
+    """
+    options = options or {}
+    partition_by = list(partition_by or [])
+    if columns is not None:
+        columns = [c for c in columns if c not in partition_by]
+    if schema is not None:
+        schema = pa.schema([f for f in schema if f.name not in partition_by])
+    open_files: 'OrderedDict[Tuple, _OpenFile]' = OrderedDict()
+    next_part: Dict[Tuple, int] = {}
+    locations: List[str] = []
+    root: Optional[str] = None
+    rows = 0
+    total_bytes = 0
+
+    def open_file(key: Tuple) -> _OpenFile:
+        serializer = StreamSerializer(fmt, options, columns=columns, schema=schema)
+        if partition_by:
+            part = next_part.get(key, 0)
+            next_part[key] = part + 1
+            segments = [hive_segment(col, value) for col, value in zip(partition_by, key)]
+            suffix = posixpath.join('', *segments, f"part-{part:05d}.{serializer.extension}")
+            target = posixpath.join(path, suffix)
+        else:
+            suffix = target = path
+        return _OpenFile(serializer, connector.open_stream(target, content_type=serializer.content_type), suffix)
+
+    def close_file(key: Tuple):
+        nonlocal total_bytes, root
+        f = open_files.pop(key)
+        location = f.close()
+        locations.append(location)
+        total_bytes += f.upload.bytes_written
+        if root is None:
+            root = location[:-len(f.suffix)] if partition_by else location
+
+    def write(key: Tuple, batch):
+        f = open_files.get(key)
+        if f is None:
+            while len(open_files) >= max(1, max_open_files):
+                close_file(next(iter(open_files)))
+            f = open_files[key] = open_file(key)
+        else:
+            open_files.move_to_end(key)
+        f.write(batch)
+
+    try:
+        for batch in batches:
+            if not partition_by:
+                write((), batch)
+                rows += batch.num_rows if isinstance(batch, (pa.RecordBatch, pa.Table)) else len(batch)
+                continue
+            df = batch.to_pandas() if isinstance(batch, (pa.RecordBatch, pa.Table)) else batch
+            missing = [c for c in partition_by if c not in df.columns]
+            if missing:
+                raise ValueError(f"Partition columns not in data: {', '.join(missing)}")
+            rows += len(df)
+            for key, group in df.groupby(partition_by, dropna=False, sort=False):
+                write(key if isinstance(key, tuple) else (key,), group.drop(columns=partition_by))
+        if not open_files and not locations and not partition_by:
+            # No batches at all: still produce an (empty) object
+            open_files[()] = open_file(())
+        while open_files:
+            close_file(next(iter(open_files)))
+    except BaseException:
+        for f in open_files.values():
+            f.upload.abort()
+        raise
+
+    return {
+        "location": root,
+        "locations": locations,
+        "files": len(locations),
+        "rows": rows,
+        "bytes": total_bytes,
+    }
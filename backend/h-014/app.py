@@ -20,7 +20,7 @@ app = Flask(__name__)
 os.makedirs(config.DATA_DIR, exist_ok=True)
 
 indexer = ProjectIndexer()
-engine = SearchEngine(index_path=config.INDEX_FILE)
+engine = SearchEngine(index_path=config.INDEX_DIR)
 faq_generator = FAQGenerator()
 
 # Try to load existing index
@@ -54,7 +54,7 @@ def index_project():
     project_name = request.form.get('project_name') or (request.json or {}).get('project_name')
 
     extraction_path = None
-    docs = []
+    update_stats = None
 
     # Case 1: File upload
     if 'archive' in request.files:
@@ -76,6 +76,9 @@ def index_project():
         if len(entries) == 1 and os.path.isdir(os.path.join(extraction_path, entries[0])):
             base_path = os.path.join(extraction_path, entries[0])
         docs = indexer.index_path(base_path)
+        if not docs:
+            return jsonify({"error": "No indexable content found in the provided project."}), 400
+        engine.build(docs)
         # Best-effort project name
         if not project_name:
             project_name = os.path.basename(os.path.normpath(base_path))
@@ -87,17 +90,18 @@ def index_project():
             return jsonify({"error": "Provide either a zip archive (form-data: archive) or JSON body with 'path'"}), 400
         if not os.path.exists(path):
             return jsonify({"error": f"Path does not exist: {path}"}), 400
-        docs = indexer.index_path(path)
+        # Re-parses only files changed since the last index of the same path
+        update_stats = engine.update(path, indexer)
+        if not engine.num_documents():
+            return jsonify({"error": "No indexable content found in the provided project."}), 400
         if not project_name:
             project_name = os.path.basename(os.path.normpath(path))
 
-    if not docs:
-        return jsonify({"error": "No indexable content found in the provided project."}), 400
-
-    engine.build(docs)
-    engine.save()
-
-    faq_items = faq_generator.generate(docs, project_name or 'the project')
+    faq_sources = [
+        d for d in engine.iter_documents()
+        if d.get('type') in ('doc-section', 'docstring-function', 'docstring-class')
+    ]
+    faq_items = faq_generator.generate(faq_sources, project_name or 'the project')
     save_faq(faq_items)
 
     # Clean up extracted temp if any
@@ -111,6 +115,7 @@ def index_project():
         "project": project_name,
         "indexed_documents": engine.num_documents(),
         "faq_count": len(faq_items),
+        "files": update_stats,
         "message": "Indexing complete"
     })
 
@@ -138,20 +143,27 @@ def faq():
 
 @app.get('/kb')
 def kb_items():
-    items = engine.get_kb_items()
-    return jsonify({"items": items, "count": len(items)})
+    try:
+        offset = max(0, int(request.args.get('offset', '0')))
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    items = engine.get_kb_items(offset=offset, limit=limit)
+    return jsonify({"items": items, "count": len(items), "total": engine.num_documents()})
 
 
 @app.post('/reset')
 def reset():
     removed = []
-    for fpath in [config.INDEX_FILE, config.FAQ_FILE]:
+    for fpath in [config.FAQ_FILE]:
         if os.path.exists(fpath):
             try:
                 os.remove(fpath)
                 removed.append(os.path.basename(fpath))
             except Exception:
                 pass
+    if os.path.isdir(config.INDEX_DIR):
+        removed.append(os.path.basename(config.INDEX_DIR))
     engine.reset()
     return jsonify({"message": "Reset complete", "removed": removed})
 
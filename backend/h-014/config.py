@@ -3,7 +3,7 @@ import os
 # Directories and files
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(os.path.dirname(BASE_DIR), 'data')
-INDEX_FILE = os.path.join(DATA_DIR, 'index.joblib')
+INDEX_DIR = os.path.join(DATA_DIR, 'index')
 FAQ_FILE = os.path.join(DATA_DIR, 'faq.json')
 
 # Limits
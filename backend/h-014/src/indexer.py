@@ -1,6 +1,6 @@
 import os
 import re
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from .parser_utils import (
     safe_read_text, split_markdown_sections, parse_python_file,
@@ -30,82 +30,83 @@ class ProjectIndexer:
         ext = os.path.splitext(path)[1].lower()
         return ext in self.code_exts
 
-    def index_path(self, root_path: str) -> List[Dict]:
+    def scan(self, root_path: str) -> List[Tuple[str, str, int, int]]:
+        """(rel_path, abs_path, mtime_ns, size) of every indexable file, in walk order."""
         root_path = os.path.abspath(root_path)
-        documents: List[Dict] = []
-        doc_id = 0
-
+        files = []
         for path in self._iter_files(root_path):
-            rel_path = os.path.relpath(path, root_path)
-            if os.path.getsize(path) > config.MAX_FILE_BYTES:
+            if not (self._is_doc(path) or self._is_code(path)):
                 continue
-            if self._is_doc(path):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if st.st_size > config.MAX_FILE_BYTES:
+                continue
+            files.append((os.path.relpath(path, root_path), path, st.st_mtime_ns, st.st_size))
+        return files
+
+    def index_file(self, path: str, rel_path: str) -> List[Dict]:
+        """Documents extracted from one file; ids are left for the caller to assign."""
+        documents: List[Dict] = []
+        if self._is_doc(path):
+            text = safe_read_text(path)
+            if not text:
+                return documents
+            # Try to split into sections (for markdown/rst-like)
+            sections = split_markdown_sections(text)
+            if sections:
+                for sec in sections:
+                    content = sec['text'].strip()
+                    if not content:
+                        continue
+                    documents.append({
+                        'type': 'doc-section',
+                        'title': sec['heading'] or os.path.basename(path),
+                        'section_level': sec['level'],
+                        'source_file': rel_path,
+                        'language': 'text/markdown',
+                        'content': content[:config.MAX_DOC_CHARS]
+                    })
+            else:
+                documents.append({
+                    'type': 'doc',
+                    'title': os.path.basename(path),
+                    'source_file': rel_path,
+                    'language': 'text/plain',
+                    'content': text[:config.MAX_DOC_CHARS]
+                })
+        elif self._is_code(path):
+            ext = os.path.splitext(path)[1].lower()
+            language = guess_language_from_extension(ext)
+            if ext == '.py':
+                parts = parse_python_file(path)
+                for p in parts:
+                    documents.append({
+                        'type': p.get('type', 'code'),
+                        'title': p.get('title') or os.path.basename(path),
+                        'source_file': rel_path,
+                        'language': language,
+                        'content': p.get('content', '')[:config.MAX_DOC_CHARS]
+                    })
+            else:
                 text = safe_read_text(path)
                 if not text:
-                    continue
-                # Try to split into sections (for markdown/rst-like)
-                sections = split_markdown_sections(text)
-                if sections:
-                    for sec in sections:
-                        content = sec['text'].strip()
-                        if not content:
-                            continue
-                        documents.append({
-                            'id': doc_id,
-                            'type': 'doc-section',
-                            'title': sec['heading'] or os.path.basename(path),
-                            'section_level': sec['level'],
-                            'source_file': rel_path,
-                            'language': 'text/markdown',
-                            'content': content[:config.MAX_DOC_CHARS]
-                        })
-                        doc_id += 1
-                else:
+                    return documents
+                comments = parse_code_comments_generic(text)
+                for c in comments:
+                    content = c.strip()
+                    if not content:
+                        continue
                     documents.append({
-                        'id': doc_id,
-                        'type': 'doc',
+                        'type': 'code-comment',
                         'title': os.path.basename(path),
                         'source_file': rel_path,
-                        'language': 'text/plain',
-                        'content': text[:config.MAX_DOC_CHARS]
+                        'language': language,
+                        'content': content[:config.MAX_DOC_CHARS]
                     })
-                    doc_id += 1
-            elif self._is_code(path):
-                ext = os.path.splitext(path)[1].lower()
-                language = guess_language_from_extension(ext)
-                if ext == '.py':
-                    parts = parse_python_file(path)
-                    for p in parts:
-                        documents.append({
-                            'id': doc_id,
-                            'type': p.get('type', 'code'),
-                            'title': p.get('title') or os.path.basename(path),
-                            'source_file': rel_path,
-                            'language': language,
-                            'content': p.get('content', '')[:config.MAX_DOC_CHARS]
-                        })
-                        doc_id += 1
-                else:
-                    text = safe_read_text(path)
-                    if not text:
-                        continue
-                    comments = parse_code_comments_generic(text)
-                    for c in comments:
-                        content = c.strip()
-                        if not content:
-                            continue
-                        documents.append({
-                            'id': doc_id,
-                            'type': 'code-comment',
-                            'title': os.path.basename(path),
-                            'source_file': rel_path,
-                            'language': language,
-                            'content': content[:config.MAX_DOC_CHARS]
-                        })
-                        doc_id += 1
 
         # Optionally, collapse README as high-priority docs
-        prioritized = []
         for d in documents:
             if re.search(r'readme', d.get('source_file', ''), flags=re.I):
                 d['priority'] = 2
@@ -113,7 +114,12 @@ class ProjectIndexer:
                 d['priority'] = 1
             else:
                 d['priority'] = 0
-            prioritized.append(d)
-
-        return prioritized
+        return documents
 
+    def index_path(self, root_path: str) -> List[Dict]:
+        documents: List[Dict] = []
+        for rel_path, path, _, _ in self.scan(root_path):
+            for d in self.index_file(path, rel_path):
+                d['id'] = len(documents)
+                documents.append(d)
+        return documents
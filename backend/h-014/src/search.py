@@ -1,45 +1,258 @@
 import os
-from typing import List, Dict, Any
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import normalize
+import json
+import shutil
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
 import numpy as np
-import joblib
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+
 import config
 
+# Fixed hashed feature space, so generations built at different times share columns
+N_FEATURES = 2 ** 20
+# Terms in more than this fraction of documents get no weight (as max_df)
+MAX_DF = 0.9
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+
+def make_vectorizer() -> HashingVectorizer:
+    # Raw term counts; idf and L2 norms are applied at query time from the
+    # index-wide document frequencies
+    return HashingVectorizer(
+        lowercase=True,
+        stop_words='english',
+        ngram_range=(1, 2),
+        n_features=N_FEATURES,
+        alternate_sign=False,
+        norm=None,
+        dtype=np.float32,
+    )
+
+
+def _save_npy(path: str, arr: np.ndarray):
+    # Never truncate a file that may be memory-mapped by a reader
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def _write_json(path: str, obj: Any):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _idf(df: np.ndarray, n: int) -> np.ndarray:
+    # Smooth idf as in TfidfVectorizer; max_df-pruned and unseen terms get 0
+    idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+    idf[df == 0] = 0.0
+    if n > 1:
+        idf[df > MAX_DF * n] = 0.0
+    return idf
+
 
 class SearchEngine:
+    """TF-IDF search over an on-disk, memory-mapped index.
+
+    Layout under ``index_path`` (a directory):
+    - manifest.json: format version, current generation, root, doc count.
+    - gen-<n>/: a term-major CSR of raw term counts (indptr/indices/data
+      .npy), idf and per-document norms, the document store (docs.bin,
+      one JSON record per document, addressed by doc_offsets.npy) and
+      files.json with each source file's mtime/size and row range.
+
+    Loading only memory-maps these arrays, so startup cost and resident
+    memory do not grow with the corpus; documents are decoded from
+    docs.bin only when a result or KB page needs them. ``update`` re-parses
+    only source files whose size/mtime changed and copies the rows of the
+    rest from the previous generation.
+    """
+
     def __init__(self, index_path: str | None = None):
-        self.vectorizer: TfidfVectorizer | None = None
-        self.matrix = None
-        self.documents: List[Dict[str, Any]] = []
-        self.index_path = index_path or config.INDEX_FILE
+        self.index_path = index_path or config.INDEX_DIR
+        self.vectorizer = make_vectorizer()
+        self.generation = 0
+        self.root: Optional[str] = None
+        self._n = 0
+        self._gen_dir: Optional[str] = None
+        self.indptr = self.indices = self.data = None
+        self.idf = self.norms = None
+        self._offsets = None
+        self._docs = None
+
+    # ---- build -----------------------------------------------------------
 
     def build(self, documents: List[Dict]):
-        self.documents = documents
-        corpus = [d.get('content', '') for d in documents]
-        self.vectorizer = TfidfVectorizer(
-            lowercase=True,
-            stop_words='english',
-            ngram_range=(1, 2),
-            max_df=0.9,
-            min_df=1
+        """Full build from an in-memory document list (e.g. an uploaded archive)."""
+        self._write(
+            documents=documents,
+            reused=None,
+            counts=self._count_rows(documents),
+            files={},
+            root=None,
+        )
+
+    def update(self, root_path: str, indexer) -> Dict[str, int]:
+        """Incrementally index ``root_path``: unchanged files keep their rows."""
+        root_path = os.path.abspath(root_path)
+        previous = self._load_files() if self.root == root_path else {}
+        scanned = indexer.scan(root_path)
+
+        new_docs: List[Dict] = []
+        plan: List[Tuple[str, int, int, str, int, int]] = []  # (rel_path, mtime_ns, size, src, start, count)
+        reindexed = 0
+        for rel_path, path, mtime_ns, size in scanned:
+            old = previous.get(rel_path)
+            if old and old['mtime_ns'] == mtime_ns and old['size'] == size:
+                plan.append((rel_path, mtime_ns, size, 'old', old['start'], old['end'] - old['start']))
+            else:
+                docs = indexer.index_file(path, rel_path)
+                reindexed += 1
+                plan.append((rel_path, mtime_ns, size, 'new', len(new_docs), len(docs)))
+                new_docs.extend(docs)
+
+        if previous and not reindexed and len(plan) == len(previous):
+            return {'files': len(plan), 'reindexed': 0, 'removed': 0, 'documents': self._n}
+
+        # Final row order follows the walk order; map old and new rows into it
+        old_to_final = np.full(self._n, -1, dtype=np.int64)
+        new_to_final = np.empty(len(new_docs), dtype=np.int64)
+        files: Dict[str, Dict[str, int]] = {}
+        final = 0
+        for rel_path, mtime_ns, size, src, start, count in plan:
+            target = old_to_final if src == 'old' else new_to_final
+            target[start:start + count] = np.arange(final, final + count)
+            files[rel_path] = {'mtime_ns': mtime_ns, 'size': size, 'start': final, 'end': final + count}
+            final += count
+        n_old_kept = final - len(new_docs)
+
+        self._write(
+            documents=new_docs,
+            reused=(old_to_final, new_to_final, n_old_kept),
+            counts=self._count_rows(new_docs),
+            files=files,
+            root=root_path,
         )
-        self.matrix = self.vectorizer.fit_transform(corpus)
-        # Ensure L2 normalized (TF-IDF usually is already)
-        self.matrix = normalize(self.matrix, norm='l2', copy=False)
+        removed = len(set(previous) - set(files))
+        return {'files': len(files), 'reindexed': reindexed, 'removed': removed, 'documents': self._n}
+
+    def _count_rows(self, documents: List[Dict]):
+        return self.vectorizer.transform([d.get('content', '') for d in documents]).tocoo()
+
+    def _write(self, documents: List[Dict], reused, counts, files: Dict[str, Dict[str, int]], root: Optional[str]):
+        if reused is None:
+            n = len(documents)
+            new_rows = np.arange(n, dtype=np.int64)
+            terms, rows, values = counts.col, new_rows[counts.row], counts.data
+            doc_source = [('new', i) for i in range(n)]
+        else:
+            old_to_final, new_to_final, n_old_kept = reused
+            n = n_old_kept + len(documents)
+            terms, rows, values = [counts.col], [new_to_final[counts.row]], [counts.data]
+            if self._n and n_old_kept:
+                # Old postings are term-major; keep those whose document survives
+                mapped = old_to_final[np.asarray(self.indices)]
+                keep = mapped >= 0
+                old_terms = np.repeat(np.arange(N_FEATURES, dtype=np.int64), np.diff(np.asarray(self.indptr)))
+                terms.append(old_terms[keep])
+                rows.append(mapped[keep])
+                values.append(np.asarray(self.data)[keep])
+            terms, rows, values = np.concatenate(terms), np.concatenate(rows), np.concatenate(values)
+            doc_source = [None] * n
+            for old_row in np.flatnonzero(old_to_final >= 0):
+                doc_source[old_to_final[old_row]] = ('old', int(old_row))
+            for i, final in enumerate(new_to_final):
+                doc_source[final] = ('new', i)
+
+        by_term = sp.csr_matrix((values.astype(np.float32), (terms, rows)), shape=(N_FEATURES, n))
+        by_term.sum_duplicates()
+        df = np.diff(by_term.indptr)
+        idf = _idf(df, n)
+        term_of_nnz = np.repeat(np.arange(N_FEATURES), df)
+        norms = np.sqrt(np.bincount(by_term.indices, weights=(by_term.data * idf[term_of_nnz]) ** 2, minlength=n))
+
+        generation = self.generation + 1
+        gen_dir = os.path.join(self.index_path, f'gen-{generation}')
+        if os.path.isdir(gen_dir):
+            shutil.rmtree(gen_dir)
+        os.makedirs(gen_dir)
+        _save_npy(os.path.join(gen_dir, 'indptr.npy'), by_term.indptr.astype(np.int64))
+        _save_npy(os.path.join(gen_dir, 'indices.npy'), by_term.indices.astype(np.int32))
+        _save_npy(os.path.join(gen_dir, 'data.npy'), by_term.data.astype(np.float32))
+        _save_npy(os.path.join(gen_dir, 'idf.npy'), idf)
+        _save_npy(os.path.join(gen_dir, 'norms.npy'), norms.astype(np.float32))
+
+        # Document store: records are streamed, old ones copied as raw bytes
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        with open(os.path.join(gen_dir, 'docs.bin'), 'wb') as f:
+            for row, (src, i) in enumerate(doc_source):
+                if src == 'old':
+                    blob = bytes(self._docs[int(self._offsets[i]):int(self._offsets[i + 1])])
+                    record = json.loads(blob)
+                    if record.get('id') != row:
+                        record['id'] = row
+                        blob = json.dumps(record, ensure_ascii=False).encode('utf-8')
+                else:
+                    record = dict(documents[i], id=row)
+                    blob = json.dumps(record, ensure_ascii=False).encode('utf-8')
+                f.write(blob)
+                offsets[row + 1] = offsets[row] + len(blob)
+        _save_npy(os.path.join(gen_dir, 'doc_offsets.npy'), offsets)
+        _write_json(os.path.join(gen_dir, 'files.json'), files)
+
+        _write_json(os.path.join(self.index_path, MANIFEST_NAME), {
+            'version': FORMAT_VERSION,
+            'generation': generation,
+            'root': root,
+            'num_documents': n,
+        })
+        self.load()
+        # Readers of older generations keep their mappings after unlink
+        for name in os.listdir(self.index_path):
+            if name.startswith('gen-') and name != f'gen-{generation}':
+                shutil.rmtree(os.path.join(self.index_path, name), ignore_errors=True)
+
+    def _load_files(self) -> Dict[str, Dict[str, int]]:
+        if not self._gen_dir:
+            return {}
+        try:
+            with open(os.path.join(self._gen_dir, 'files.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    # ---- query -----------------------------------------------------------
 
     def query(self, q: str, top_k: int = 8) -> List[Dict]:
-        if self.vectorizer is None or self.matrix is None or not self.documents:
+        if not self._n:
             return []
         q_vec = self.vectorizer.transform([q])
-        q_vec = normalize(q_vec, norm='l2', copy=False)
-        sims = (self.matrix @ q_vec.T).toarray().ravel()
-        if sims.size == 0:
+        terms = q_vec.indices
+        q_w = q_vec.data * self.idf[terms]
+        live = q_w > 0
+        terms, q_w = terms[live], q_w[live]
+        if terms.size == 0:
             return []
-        idx = np.argsort(-sims)[:max(1, top_k)]
+        q_w = q_w / np.linalg.norm(q_w)
+
+        # Accumulate over the posting lists of the query terms only
+        rows = np.concatenate([self.indices[self.indptr[t]:self.indptr[t + 1]] for t in terms])
+        weights = np.concatenate([
+            self.data[self.indptr[t]:self.indptr[t + 1]] * (self.idf[t] * w) for t, w in zip(terms, q_w)
+        ])
+        rows, inverse = np.unique(rows, return_inverse=True)
+        sims = np.bincount(inverse, weights=weights, minlength=rows.shape[0]) / self.norms[rows]
+
+        k = min(max(1, top_k), rows.shape[0])
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind='stable')]
         results: List[Dict] = []
-        for i in idx:
-            d = self.documents[int(i)]
+        for i in top:
+            d = self.get_document(int(rows[i]))
             results.append({
                 'id': d.get('id'),
                 'score': float(sims[i]),
@@ -51,35 +264,49 @@ class SearchEngine:
             })
         return results
 
-    def save(self):
-        if self.vectorizer is None or self.matrix is None:
-            return
-        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-        payload = {
-            'vectorizer': self.vectorizer,
-            'matrix': self.matrix,
-            'documents': self.documents,
-        }
-        joblib.dump(payload, self.index_path)
+    # ---- persistence -----------------------------------------------------
 
     def load(self) -> bool:
-        if not os.path.exists(self.index_path):
-            return False
         try:
-            payload = joblib.load(self.index_path)
-            self.vectorizer = payload.get('vectorizer')
-            self.matrix = payload.get('matrix')
-            self.documents = payload.get('documents', [])
-            return True
+            with open(os.path.join(self.index_path, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != FORMAT_VERSION:
+                return False
+            gen_dir = os.path.join(self.index_path, f"gen-{manifest['generation']}")
+            self.indptr = np.load(os.path.join(gen_dir, 'indptr.npy'), mmap_mode='r')
+            self.indices = np.load(os.path.join(gen_dir, 'indices.npy'), mmap_mode='r')
+            self.data = np.load(os.path.join(gen_dir, 'data.npy'), mmap_mode='r')
+            self.idf = np.load(os.path.join(gen_dir, 'idf.npy'), mmap_mode='r')
+            self.norms = np.load(os.path.join(gen_dir, 'norms.npy'), mmap_mode='r')
+            self._offsets = np.load(os.path.join(gen_dir, 'doc_offsets.npy'), mmap_mode='r')
+            docs_path = os.path.join(gen_dir, 'docs.bin')
+            self._docs = np.memmap(docs_path, dtype=np.uint8, mode='r') if os.path.getsize(docs_path) else np.zeros(0, np.uint8)
         except Exception:
             return False
+        self.generation = int(manifest['generation'])
+        self.root = manifest.get('root')
+        self._n = int(manifest['num_documents'])
+        self._gen_dir = gen_dir
+        return True
+
+    # ---- documents -------------------------------------------------------
 
     def num_documents(self) -> int:
-        return len(self.documents)
+        return self._n
+
+    def get_document(self, row: int) -> Dict:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return json.loads(bytes(self._docs[start:end]))
 
-    def get_kb_items(self) -> List[Dict]:
+    def iter_documents(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        stop = self._n if stop is None else min(stop, self._n)
+        for row in range(start, stop):
+            yield self.get_document(row)
+
+    def get_kb_items(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        stop = None if limit is None else offset + limit
         items: List[Dict] = []
-        for d in self.documents:
+        for d in self.iter_documents(offset, stop):
             items.append({
                 'id': d.get('id'),
                 'type': d.get('type'),
@@ -91,7 +318,12 @@ class SearchEngine:
         return items
 
     def reset(self):
-        self.vectorizer = None
-        self.matrix = None
-        self.documents = []
-
+        self.indptr = self.indices = self.data = None
+        self.idf = self.norms = None
+        self._offsets = None
+        self._docs = None
+        self._gen_dir = None
+        self.root = None
+        self._n = 0
+        if os.path.isdir(self.index_path):
+            shutil.rmtree(self.index_path, ignore_errors=True)
@@ -7,16 +7,17 @@ import time
 import threading
 from flask import Flask, request, jsonify
 
-from cache_store import InMemoryCache, TTLPolicy, CacheEntry
+from cache_store import InMemoryCache, DiskTier, TTLPolicy, CacheEntry
 from embedding_provider import EmbeddingProvider
+from refresher import BackgroundRefresher
 
 
 class EmbeddingCache:
-    def __init__(self, provider: EmbeddingProvider, store: InMemoryCache):
+    def __init__(self, provider: EmbeddingProvider, store: InMemoryCache, refresher: BackgroundRefresher):
         self.provider = provider
         self.store = store
+        self.refresher = refresher
         self.lock = threading.Lock()
-        self.refreshing_keys = set()
         self.metrics = {
             "hits": 0,
             "misses": 0,
@@ -31,29 +32,35 @@ class EmbeddingCache:
 
     def _start_background_refresh(self, key: str, text: str, model: str, ttl_seconds: int, stale_ttl_seconds: int):
         def _refresh():
-            try:
-                embedding = self.provider.generate_embedding(text=text, model=model)
-                entry = CacheEntry(
-                    value=embedding,
-                    policy=TTLPolicy.STALE_WHILE_REVALIDATE,
-                    created_at=self._now(),
-                    last_access=self._now(),
-                    expires_at=self._now() + ttl_seconds,
-                    ttl_seconds=ttl_seconds,
-                    stale_ttl_seconds=stale_ttl_seconds,
-                )
-                self.store.set_entry(key, entry)
-            finally:
-                with self.lock:
-                    self.refreshing_keys.discard(key)
-
-        with self.lock:
-            if key in self.refreshing_keys:
-                return
-            self.refreshing_keys.add(key)
-            self.metrics["background_refreshes"] += 1
-        t = threading.Thread(target=_refresh, daemon=True)
-        t.start()
+            embedding = self.provider.generate_embedding(text=text, model=model)
+            entry = CacheEntry(
+                value=embedding,
+                policy=TTLPolicy.STALE_WHILE_REVALIDATE,
+                created_at=self._now(),
+                last_access=self._now(),
+                expires_at=self._now() + ttl_seconds,
+                ttl_seconds=ttl_seconds,
+                stale_ttl_seconds=stale_ttl_seconds,
+            )
+            self.store.set_entry(key, entry)
+
+        if self.refresher.submit(key, _refresh):
+            with self.lock:
+                self.metrics["background_refreshes"] += 1
+
+    def summary(self):
+        m = dict(self.metrics)
+        lookups = m["hits"] + m["misses"] + m["stale_served"]
+        served_from_cache = m["hits"] + m["stale_served"]
+        provider_calls = m["recomputes"] + m["background_refreshes"]
+        return {
+            **m,
+            "lookups": lookups,
+            "hit_ratio": round(served_from_cache / lookups, 4) if lookups else None,
+            "provider_calls": provider_calls,
+            # Provider calls a cache-less service would have made, minus ours
+            "recomputes_saved": lookups + m["forced_refreshes"] - provider_calls,
+        }
 
     def embed(self, text: str, model: str, policy: str = "fixed", ttl_seconds: int = 86400, stale_ttl_seconds: int = 43200, force_refresh: bool = False):
         policy_enum = TTLPolicy(policy)
@@ -199,8 +206,14 @@ class EmbeddingCache:
 app = Flask(__name__)
 
 provider = EmbeddingProvider()
-store = InMemoryCache()
-cache = EmbeddingCache(provider, store)
+# Set EMBED_DISK_DIR to keep warm embeddings across restarts
+_disk_dir = os.getenv("EMBED_DISK_DIR")
+store = InMemoryCache(disk=DiskTier(_disk_dir) if _disk_dir else None)
+refresher = BackgroundRefresher(
+    workers=int(os.getenv("EMBED_REFRESH_WORKERS", 4)),
+    max_pending=int(os.getenv("EMBED_REFRESH_MAX_PENDING", 1000)),
+)
+cache = EmbeddingCache(provider, store, refresher)
 
 
 @app.route("/health", methods=["GET"])
@@ -245,8 +258,9 @@ def stats():
     store.purge_expired()
     data = {
         "cache_size": store.size(),
-        "metrics": cache.metrics,
+        "metrics": cache.summary(),
         "store": store.stats(),
+        "refresher": refresher.stats(),
         "time": time.time(),
     }
     return jsonify(data)
@@ -263,5 +277,5 @@ def create_app():
 
 
 @app.route('/cache/stats', methods=['GET'])
-def _auto_stub_cache_stats():
-    return 'Auto-generated stub for /cache/stats', 200
+def cache_stats():
+    return stats()
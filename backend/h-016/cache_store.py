@@ -1,9 +1,14 @@
+import os
+import json
 import time
+import heapq
 import threading
 import hashlib
 from enum import Enum
 from dataclasses import dataclass
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Tuple
+
+import numpy as np
 
 
 class TTLPolicy(str, Enum):
@@ -24,16 +29,193 @@ class CacheEntry:
     stale_ttl_seconds: Optional[int] = 0
 
 
+def removal_time(entry: CacheEntry) -> Optional[float]:
+    """When an entry may be dropped: past expiry, or past the stale window for SWR."""
+    if entry.policy == TTLPolicy.FOREVER:
+        return None
+    if entry.policy == TTLPolicy.STALE_WHILE_REVALIDATE:
+        fresh = entry.ttl_seconds or 0
+        stale = entry.stale_ttl_seconds or 0
+        return entry.created_at + fresh + stale
+    return entry.expires_at
+
+
+class DiskTier:
+    """Persistent tier: float32 vectors in one memory-mapped file plus a key index.
+
+    ``vectors.f32`` is append-only raw float32; ``index.jsonl`` is an
+    append-only log of {"k", "off", "n", ...entry metadata} records (a record
+    with "del" is a tombstone). On open the log is replayed, so warm
+    embeddings survive restarts without reading any vectors; they are paged
+    in from the memory map on first access. The log is compacted when dead
+    records outnumber live ones.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self._lock = threading.RLock()
+        self._index: Dict[str, dict] = {}
+        self._records = 0
+        self._mm = None
+        self._load_index()
+        self._vectors = open(self.vectors_path, "ab")
+        self._log = open(self.index_path, "a", encoding="utf-8")
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn write at the tail
+                self._records += 1
+                if rec.get("del"):
+                    self._index.pop(rec["k"], None)
+                else:
+                    self._index[rec["k"]] = rec
+
+    def keys(self):
+        with self._lock:
+            return list(self._index.keys())
+
+    def __len__(self):
+        return len(self._index)
+
+    def _view(self, end: int):
+        if self._mm is None or len(self._mm) < end:
+            self._vectors.flush()
+            self._mm = np.memmap(self.vectors_path, dtype=np.float32, mode="r")
+        return self._mm
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            rec = self._index.get(key)
+            if rec is None:
+                return None
+            off, n = rec["off"], rec["n"]
+            vec = self._view(off + n)[off:off + n]
+        return CacheEntry(
+            value=vec.tolist(),
+            policy=TTLPolicy(rec["policy"]),
+            created_at=rec["created_at"],
+            last_access=rec["created_at"],
+            expires_at=rec["expires_at"],
+            ttl_seconds=rec["ttl"],
+            stale_ttl_seconds=rec["stale"],
+        )
+
+    def put(self, key: str, entry: CacheEntry):
+        meta = {
+            "k": key,
+            "policy": entry.policy.value,
+            "created_at": entry.created_at,
+            "expires_at": entry.expires_at,
+            "ttl": entry.ttl_seconds,
+            "stale": entry.stale_ttl_seconds,
+        }
+        with self._lock:
+            prev = self._index.get(key)
+            if prev is not None and prev["created_at"] == entry.created_at:
+                # Same vector, only policy metadata may have moved (sliding TTL)
+                rec = dict(prev, **meta)
+                if rec == prev:
+                    return
+            else:
+                vec = np.asarray(entry.value, dtype=np.float32).ravel()
+                off = self._vectors.tell() // 4
+                self._vectors.write(vec.tobytes())
+                # Vector bytes must hit the file before the index points at them
+                self._vectors.flush()
+                rec = dict(meta, off=off, n=int(vec.size))
+            self._index[key] = rec
+            self._append(rec)
+
+    def delete(self, key: str):
+        with self._lock:
+            if self._index.pop(key, None) is not None:
+                self._append({"k": key, "del": True})
+
+    def _append(self, rec: dict):
+        self._log.write(json.dumps(rec, separators=(",", ":")) + "\n")
+        self._log.flush()
+        self._records += 1
+        if self._records > 1024 and self._records > 2 * len(self._index):
+            self._compact()
+
+    def _compact(self):
+        # Rewrites both files with live records only; vectors are copied
+        # through the memory map so this never loads the whole file
+        self._vectors.flush()
+        mm = np.memmap(self.vectors_path, dtype=np.float32, mode="r") if os.path.getsize(self.vectors_path) else None
+        tmp_vec = self.vectors_path + ".tmp"
+        tmp_idx = self.index_path + ".tmp"
+        with open(tmp_vec, "wb") as vf, open(tmp_idx, "w", encoding="utf-8") as lf:
+            off = 0
+            for key, rec in self._index.items():
+                vf.write(np.asarray(mm[rec["off"]:rec["off"] + rec["n"]]).tobytes())
+                rec = dict(rec, off=off)
+                self._index[key] = rec
+                off += rec["n"]
+                lf.write(json.dumps(rec, separators=(",", ":")) + "\n")
+        self._vectors.close()
+        self._log.close()
+        self._mm = None
+        del mm
+        os.replace(tmp_vec, self.vectors_path)
+        os.replace(tmp_idx, self.index_path)
+        self._vectors = open(self.vectors_path, "ab")
+        self._log = open(self.index_path, "a", encoding="utf-8")
+        self._records = len(self._index)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "log_records": self._records,
+                "vector_bytes": self._vectors.tell(),
+            }
+
+
 class InMemoryCache:
-    def __init__(self):
+    """Embedding store with a heap-ordered expiry index and optional disk tier.
+
+    Every write pushes (removal_time, seq, key) onto a min-heap, so
+    purge_expired pops only the entries that are due instead of walking the
+    whole store. Items whose seq is older than the key's current one were
+    superseded by a later write and are skipped; a write that leaves the
+    removal time unchanged pushes nothing, and the heap is compacted once
+    superseded items outnumber live ones, so it stays O(live entries).
+    """
+
+    def __init__(self, disk: Optional[DiskTier] = None):
         self._data: Dict[str, CacheEntry] = {}
         self._lock = threading.RLock()
+        self._heap = []
+        self._seq: Dict[str, int] = {}
+        self._when: Dict[str, Optional[float]] = {}
+        self._counter = 0
+        self.disk = disk
         self._metrics = {
             "set": 0,
             "get": 0,
             "delete": 0,
             "purged": 0,
+            "disk_hits": 0,
         }
+        if disk is not None:
+            # Index disk entries for expiry without paging their vectors in
+            with self._lock:
+                for key in disk.keys():
+                    rec = disk._index[key]
+                    policy = TTLPolicy(rec["policy"])
+                    when = removal_time(CacheEntry(None, policy, rec["created_at"], rec["created_at"],
+                                                   rec["expires_at"], rec["ttl"], rec["stale"]))
+                    self._track(key, when)
 
     def make_key(self, text: str, model: str) -> str:
         h = hashlib.sha256()
@@ -41,53 +223,80 @@ class InMemoryCache:
         h.update(payload)
         return h.hexdigest()
 
+    def _track(self, key: str, when: Optional[float]):
+        if when is not None and key in self._seq and self._when.get(key) == when:
+            # Hit or refresh that keeps the removal time: the item is current
+            return
+        self._counter += 1
+        self._seq[key] = self._counter
+        self._when[key] = when
+        if when is not None:
+            heapq.heappush(self._heap, (when, self._counter, key))
+            if len(self._heap) > 2 * len(self._seq) + 1024:
+                self._compact()
+
+    def _compact(self):
+        self._heap = [item for item in self._heap if self._seq.get(item[2]) == item[1]]
+        heapq.heapify(self._heap)
+
     def get_entry(self, key: str) -> Optional[CacheEntry]:
         with self._lock:
             self._metrics["get"] += 1
-            return self._data.get(key)
+            entry = self._data.get(key)
+            if entry is None and self.disk is not None:
+                entry = self.disk.get(key)
+                if entry is not None:
+                    self._data[key] = entry
+                    self._metrics["disk_hits"] += 1
+            return entry
 
     def set_entry(self, key: str, entry: CacheEntry):
         with self._lock:
             self._data[key] = entry
+            self._track(key, removal_time(entry))
             self._metrics["set"] += 1
+            if self.disk is not None:
+                self.disk.put(key, entry)
 
     def delete(self, key: str):
         with self._lock:
-            if key in self._data:
-                del self._data[key]
+            removed = self._data.pop(key, None) is not None
+            self._seq.pop(key, None)
+            self._when.pop(key, None)
+            if self.disk is not None:
+                self.disk.delete(key)
+            if removed:
                 self._metrics["delete"] += 1
 
     def size(self) -> int:
         with self._lock:
+            if self.disk is not None:
+                return len(self._data.keys() | self.disk._index.keys())
             return len(self._data)
 
-    def _should_remove(self, key: str, entry: CacheEntry, now: float) -> bool:
-        # For purge purposes: remove only when entry is beyond any stale window
-        if entry.policy == TTLPolicy.FOREVER:
-            return False
-        if entry.policy == TTLPolicy.STALE_WHILE_REVALIDATE:
-            fresh = entry.ttl_seconds or 0
-            stale = entry.stale_ttl_seconds or 0
-            horizon = entry.created_at + fresh + stale
-            return now > horizon
-        # For fixed/sliding, remove if expired
-        if entry.expires_at is None:
-            return False
-        return now > entry.expires_at
-
     def purge_expired(self):
         now = time.time()
         removed = 0
         with self._lock:
-            keys = list(self._data.keys())
-            for k in keys:
-                e = self._data.get(k)
-                if e and self._should_remove(k, e, now):
-                    del self._data[k]
-                    removed += 1
-        self._metrics["purged"] += removed
+            heap = self._heap
+            while heap and heap[0][0] < now:
+                _, seq, key = heapq.heappop(heap)
+                if self._seq.get(key) != seq:
+                    continue
+                del self._seq[key]
+                del self._when[key]
+                self._data.pop(key, None)
+                if self.disk is not None:
+                    self.disk.delete(key)
+                removed += 1
+            if len(heap) > 2 * len(self._seq) + 1024:
+                self._compact()
+            self._metrics["purged"] += removed
         return removed
 
     def stats(self):
-        return {**self._metrics}
-
+        with self._lock:
+            data = {**self._metrics, "expiry_index": len(self._heap)}
+            if self.disk is not None:
+                data["disk"] = self.disk.stats()
+            return data
@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundRefresher:
+    """Runs stale-while-revalidate recomputes on a bounded worker pool.
+
+    A key is refreshed at most once at a time: submits for a key that is
+    already queued or running are collapsed. When ``max_pending`` refreshes
+    are outstanding, new ones are dropped; the stale value keeps being
+    served and the next stale read tries again.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 1000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="swr-refresh")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.metrics = {
+            "scheduled": 0,
+            "deduplicated": 0,
+            "dropped": 0,
+            "completed": 0,
+            "failed": 0,
+        }
+
+    def submit(self, key: str, fn) -> bool:
+        with self._lock:
+            if key in self._pending:
+                self.metrics["deduplicated"] += 1
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.metrics["dropped"] += 1
+                return False
+            self._pending.add(key)
+            self.metrics["scheduled"] += 1
+        self._pool.submit(self._run, key, fn)
+        return True
+
+    def _run(self, key: str, fn):
+        try:
+            fn()
+            outcome = "completed"
+        except Exception:
+            outcome = "failed"
+        with self._lock:
+            self._pending.discard(key)
+            self.metrics[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self.metrics, "pending": len(self._pending), "workers": self.workers}
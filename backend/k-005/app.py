@@ -89,5 +89,5 @@ def _auto_stub_batch():
 
 
 @app.route('/stats', methods=['GET'])
-def _auto_stub_stats():
-    return 'Auto-generated stub for /stats', 200
+def stats():
+    return jsonify(batch_manager.stats())
@@ -2,18 +2,30 @@ import threading
 import time
 import uuid
 import re
-from collections import defaultdict
-from typing import Any, Dict, List, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional
 
 from downstream import DownstreamClient
 from token_opt import TokenOptimizer
-from utils import now_s, compute_request_hash, join_messages_as_text
+from utils import compute_request_hash, estimate_tokens, join_messages_as_text
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
 
 class Job:
-    def __init__(self, job_id: str, payload: Dict[str, Any], cache_key: str):
+    def __init__(self, job_id: str, payload: Dict[str, Any], cache_key: str, content: str = "", tokens: int = 0):
         self.id = job_id
         self.payload = payload
         self.cache_key = cache_key
+        self.content = content
+        self.tokens = tokens
+        self.prompt_tokens = estimate_tokens(join_messages_as_text(payload["messages"]))
+        self.enqueued_at = time.monotonic()
         self.response = None
         self.error = None
         self.event = threading.Event()
@@ -34,75 +46,114 @@ class Job:
         return self.response
 
 class BatchQueue:
-    def __init__(self, key: str, config, downstream: DownstreamClient, optimizer: TokenOptimizer, cache):
+    """Pending jobs that share a batch key, plus the adaptive window state.
+
+    Jobs are only added and taken by BatchManager under its condition
+    lock; ``flush`` runs on the manager's downstream pool.
+
+    The batch window adapts in two ways:
+    - arrival rate: an EWMA of inter-arrival time estimates how long the
+      batch needs to fill. A batch is not held longer than that, and a lone
+      request on a quiet key is sent right away.
+    - latency target: ``window`` is an AIMD cap. It shrinks when the
+      observed p95 wait exceeds BATCH_TARGET_P95_MS and grows while batches
+      go out under-filled with wait to spare.
+    """
+
+    def __init__(self, key: str, config, downstream: DownstreamClient, optimizer: TokenOptimizer, cache, manager):
         self.key = key
         self.config = config
         self.downstream = downstream
         self.optimizer = optimizer
         self.cache = cache
-        self.jobs: List[Job] = []
-        self.lock = threading.Lock()
-        self.timer = None
+        self.manager = manager
+        self.jobs: Deque[Job] = deque()
+        self.tokens = 0
+        self.window = config.BATCH_WINDOW_MS / 1000.0
+        self.interarrival = None
+        self.last_arrival = None
+        self.recent_waits: Deque[float] = deque(maxlen=256)
 
-    def enqueue(self, job: Job):
-        with self.lock:
-            self.jobs.append(job)
-            # Schedule flush if not already scheduled
-            if self.timer is None:
-                self.timer = threading.Timer(self.config.BATCH_WINDOW_MS / 1000.0, self.flush)
-                self.timer.daemon = True
-                self.timer.start()
-            # Immediate flush if reached max size
-            if len(self.jobs) >= self.config.MAX_BATCH_SIZE:
-                try:
-                    self.timer.cancel()
-                except Exception:
-                    pass
-                self.timer = None
-                # Flush in a separate thread to avoid blocking enqueue
-                threading.Thread(target=self.flush, daemon=True).start()
-
-    def _gather_jobs(self) -> List[Job]:
-        with self.lock:
-            jobs = self.jobs[: self.config.MAX_BATCH_SIZE]
-            self.jobs = self.jobs[self.config.MAX_BATCH_SIZE :]
-            if not self.jobs:
-                self.timer = None
-            else:
-                # Reschedule another timer for remaining jobs
-                try:
-                    if self.timer:
-                        self.timer.cancel()
-                except Exception:
-                    pass
-                self.timer = threading.Timer(self.config.BATCH_WINDOW_MS / 1000.0, self.flush)
-                self.timer.daemon = True
-                self.timer.start()
-            return jobs
-
-    def flush(self):
-        jobs = self._gather_jobs()
+    def add(self, job: Job):
+        now = job.enqueued_at
+        if self.last_arrival is not None:
+            gap = now - self.last_arrival
+            self.interarrival = gap if self.interarrival is None else 0.8 * self.interarrival + 0.2 * gap
+        self.last_arrival = now
+        self.jobs.append(job)
+        self.tokens += job.tokens
+
+    def full(self) -> bool:
+        return len(self.jobs) >= self.config.MAX_BATCH_SIZE or self.tokens >= self.config.BATCH_TOKEN_BUDGET
+
+    def deadline(self) -> float:
+        oldest = self.jobs[0].enqueued_at
+        if not self.config.BATCH_ADAPTIVE:
+            return oldest + self.config.BATCH_WINDOW_MS / 1000.0
+        if self.interarrival is None or self.interarrival >= self.window:
+            # Next arrival is unlikely inside the window; waiting only adds latency
+            return oldest
+        remaining = self.config.MAX_BATCH_SIZE - len(self.jobs)
+        return oldest + min(self.window, remaining * self.interarrival)
+
+    def take(self, now: float) -> List[Job]:
+        jobs: List[Job] = []
+        tokens = 0
+        while self.jobs and len(jobs) < self.config.MAX_BATCH_SIZE:
+            job = self.jobs[0]
+            if jobs and tokens + job.tokens > self.config.BATCH_TOKEN_BUDGET:
+                break
+            self.jobs.popleft()
+            tokens += job.tokens
+            jobs.append(job)
+        self.tokens -= tokens
+        waits = [now - j.enqueued_at for j in jobs]
+        self.recent_waits.extend(waits)
+        if self.config.BATCH_ADAPTIVE:
+            self._adapt(len(jobs))
+        self.manager.record_dispatch(len(jobs), waits)
+        return jobs
+
+    def _adapt(self, size: int):
+        target = self.config.BATCH_TARGET_P95_MS / 1000.0
+        p95 = percentile(self.recent_waits, 95)
+        lo = self.config.BATCH_MIN_WINDOW_MS / 1000.0
+        hi = self.config.BATCH_MAX_WINDOW_MS / 1000.0
+        if p95 > target:
+            self.window = max(lo, self.window * 0.8)
+        elif size < self.config.MAX_BATCH_SIZE and p95 < 0.5 * target:
+            self.window = min(hi, target, self.window * 1.1 + 0.001)
+
+    def flush(self, jobs: List[Job]):
         if not jobs:
             return
 
         # Build batched request from jobs
         try:
-            messages_list = [j.payload["messages"] for j in jobs]
             first_payload = jobs[0].payload
             model = first_payload["model"]
             temperature = first_payload["temperature"]
             top_p = first_payload["top_p"]
-            max_tokens = first_payload["max_tokens"]
 
-            # We assume batch_key ensures same system prompt signature & model/params
-            system_prompt = self.optimizer.extract_system_prompt(messages_list[0]) or "You are a helpful assistant."
+            if len(jobs) == 1:
+                # Nothing to share; the batching envelope would only cost tokens
+                self._send_single(jobs[0])
+                self.manager.record_tokens(jobs[0].prompt_tokens, jobs[0].prompt_tokens)
+                return
 
-            items = []
-            for j, messages in zip(jobs, messages_list):
-                condensed = self.optimizer.condense_messages_for_batch(messages)
-                items.append({"id": j.id, "content": condensed})
+            # We assume batch_key ensures same system prompt signature & model/params
+            system_prompt = self.optimizer.extract_system_prompt(first_payload["messages"]) or "You are a helpful assistant."
 
+            items = [{"id": j.id, "content": j.content} for j in jobs]
             batched_messages = self._build_batched_messages(system_prompt=system_prompt, items=items)
+            prompt_tokens = estimate_tokens(join_messages_as_text(batched_messages))
+
+            # Room for every item's answer, bounded by the model context
+            context = self.config.MODEL_CONTEXT_TOKENS.get(model, self.config.DEFAULT_CONTEXT_TOKENS)
+            max_tokens = min(
+                sum(j.payload["max_tokens"] for j in jobs),
+                max(context - prompt_tokens - self.config.META_OVERHEAD_TOKENS, first_payload["max_tokens"]),
+            )
 
             response = self.downstream.send_chat_completion(
                 messages=batched_messages,
@@ -115,22 +166,14 @@ class BatchQueue:
             mapping = self._parse_batched_response(response)
 
             # Distribute results; fallback to per-item call if missing
+            sent = prompt_tokens
             for job in jobs:
                 item_text = mapping.get(job.id)
                 if item_text is None:
-                    # Fallback: call downstream individually for this job
-                    try:
-                        single_resp = self.downstream.send_chat_completion(
-                            messages=job.payload["messages"],
-                            model=model,
-                            temperature=temperature,
-                            top_p=top_p,
-                            max_tokens=max_tokens,
-                        )
-                        job.set_result(single_resp)
-                        self.cache.set(job.cache_key, single_resp)
-                    except Exception as e:
-                        job.set_error(e)
+                    # Individual retries run concurrently on the pool
+                    sent += job.prompt_tokens
+                    self.manager.record_fallback()
+                    self.manager.submit(self._send_single, job)
                 else:
                     # Wrap into single-response format
                     single = {
@@ -148,10 +191,26 @@ class BatchQueue:
                     }
                     job.set_result(single)
                     self.cache.set(job.cache_key, single)
+            self.manager.record_tokens(sum(j.prompt_tokens for j in jobs), sent)
         except Exception as e:
             for job in jobs:
                 job.set_error(e)
 
+    def _send_single(self, job: Job):
+        payload = job.payload
+        try:
+            single_resp = self.downstream.send_chat_completion(
+                messages=payload["messages"],
+                model=payload["model"],
+                temperature=payload["temperature"],
+                top_p=payload["top_p"],
+                max_tokens=payload["max_tokens"],
+            )
+            job.set_result(single_resp)
+            self.cache.set(job.cache_key, single_resp)
+        except Exception as e:
+            job.set_error(e)
+
     def _build_batched_messages(self, system_prompt: str, items: List[Dict[str, str]]):
         # Add strict formatting instruction to the system prompt to ensure parseable outputs
         system = (
@@ -177,7 +236,7 @@ class BatchQueue:
             text = ""
         if not text:
             return {}
-        pattern = re.compile(r"<answer\\s+id=\"([^\"]+)\">([\\s\\S]*?)</answer>", re.IGNORECASE)
+        pattern = re.compile(r"<answer\s+id=\"([^\"]+)\">([\s\S]*?)</answer>", re.IGNORECASE)
         mapping: Dict[str, str] = {}
         for m in pattern.finditer(text):
             ans_id = m.group(1).strip()
@@ -186,13 +245,34 @@ class BatchQueue:
         return mapping
 
 class BatchManager:
-    def __init__(self, config, cache):
+    """Owns one dispatcher thread and a bounded downstream pool.
+
+    Request threads only condense and enqueue their job. The dispatcher
+    sleeps until the earliest queue deadline (or a queue fills up), takes
+    ready batches under the lock and hands them to the pool, so no timers
+    or threads are created per batch.
+    """
+
+    def __init__(self, config, cache, downstream: Optional[DownstreamClient] = None):
         self.config = config
         self.cache = cache
-        self.downstream = DownstreamClient(config)
+        self.downstream = downstream or DownstreamClient(config)
         self.optimizer = TokenOptimizer(config=config)
         self.queues: Dict[str, BatchQueue] = {}
-        self.lock = threading.Lock()
+        self.lock = threading.Condition()
+        self.pool = ThreadPoolExecutor(max_workers=config.DOWNSTREAM_WORKERS, thread_name_prefix="batch-downstream")
+        self.stats_lock = threading.Lock()
+        self.waits: Deque[float] = deque(maxlen=4096)
+        self.counters = {
+            "jobs": 0,
+            "batches": 0,
+            "batched_items": 0,
+            "fallbacks": 0,
+            "prompt_tokens_individual": 0,
+            "prompt_tokens_sent": 0,
+        }
+        self.dispatcher = threading.Thread(target=self._dispatch_loop, name="batch-dispatcher", daemon=True)
+        self.dispatcher.start()
 
     def _batch_key_for(self, payload: Dict[str, Any]) -> str:
         messages = payload["messages"]
@@ -209,12 +289,72 @@ class BatchManager:
         return key
 
     def _get_queue(self, key: str) -> BatchQueue:
+        # Caller holds self.lock
+        q = self.queues.get(key)
+        if q is None:
+            q = BatchQueue(key, self.config, self.downstream, self.optimizer, self.cache, self)
+            self.queues[key] = q
+        return q
+
+    def _dispatch_loop(self):
+        while True:
+            with self.lock:
+                while True:
+                    now = time.monotonic()
+                    ready = []
+                    next_deadline = None
+                    for q in self.queues.values():
+                        if not q.jobs:
+                            continue
+                        deadline = q.deadline()
+                        if q.full() or deadline <= now:
+                            ready.append(q)
+                        elif next_deadline is None or deadline < next_deadline:
+                            next_deadline = deadline
+                    if ready:
+                        break
+                    self.lock.wait(None if next_deadline is None else next_deadline - now)
+                batches = [(q, q.take(now)) for q in ready]
+            for q, jobs in batches:
+                self.submit(q.flush, jobs)
+
+    def submit(self, fn, *args):
+        return self.pool.submit(fn, *args)
+
+    def record_dispatch(self, size: int, waits: List[float]):
+        with self.stats_lock:
+            self.counters["batches"] += 1
+            self.counters["batched_items"] += size
+            self.waits.extend(waits)
+
+    def record_tokens(self, individual: int, sent: int):
+        with self.stats_lock:
+            self.counters["prompt_tokens_individual"] += individual
+            self.counters["prompt_tokens_sent"] += sent
+
+    def record_fallback(self):
+        with self.stats_lock:
+            self.counters["fallbacks"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            c = dict(self.counters)
+            waits = list(self.waits)
+        batches = c["batches"] or 1
         with self.lock:
-            q = self.queues.get(key)
-            if q is None:
-                q = BatchQueue(key, self.config, self.downstream, self.optimizer, self.cache)
-                self.queues[key] = q
-            return q
+            windows = {k[:12]: round(q.window * 1000, 2) for k, q in self.queues.items()}
+        return {
+            **c,
+            "tokens_saved": c["prompt_tokens_individual"] - c["prompt_tokens_sent"],
+            "avg_batch_size": round(c["batched_items"] / batches, 2),
+            "batch_fill_ratio": round(c["batched_items"] / (batches * self.config.MAX_BATCH_SIZE), 3),
+            "wait_ms": {
+                "p50": round(percentile(waits, 50) * 1000, 2),
+                "p95": round(percentile(waits, 95) * 1000, 2),
+                "p99": round(percentile(waits, 99) * 1000, 2),
+            },
+            "window_ms": windows,
+        }
 
     def enqueue_and_wait(self, messages: List[Dict[str, str]], model: str, temperature: float, top_p: float, max_tokens: int, cache_key: str, timeout_seconds: float):
         payload = {
@@ -225,9 +365,15 @@ class BatchManager:
             "max_tokens": max_tokens,
         }
         job_id = uuid.uuid4().hex
-        job = Job(job_id, payload, cache_key)
+        # Condense on the request thread so the dispatcher only schedules.
+        # The system prompt is part of the batch key and sent once per batch.
+        content = self.optimizer.condense_messages_for_batch(messages, include_system=False).strip()
+        job = Job(job_id, payload, cache_key, content=content, tokens=estimate_tokens(content))
         batch_key = self._batch_key_for(payload)
-        queue = self._get_queue(batch_key)
-        queue.enqueue(job)
+        with self.lock:
+            queue = self._get_queue(batch_key)
+            queue.add(job)
+            self.lock.notify()
+        with self.stats_lock:
+            self.counters["jobs"] += 1
         return job.wait(timeout_seconds)
-
@@ -0,0 +1,114 @@
+"""
+Batching benchmark: fixed window vs adaptive window.
+
+Drives BatchManager directly against a mock downstream that sleeps for a
+base latency plus a per-token cost and answers every <item> in the XML
+format the batcher expects (optionally dropping some answers to exercise
+the per-item fallback). Requests arrive in bursts separated by quiet
+periods. Reports prompt tokens saved, batch fill ratio and queue wait
+percentiles from BatchManager.stats().
+
+    python bench_batching.py --requests 400 --burst 20 --idle-ms 200
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+
+from batching import BatchManager
+from cache import ResponseCache
+from config import Config
+from utils import estimate_tokens, join_messages_as_text
+
+ITEM_RE = re.compile(r"<item id=\"([^\"]+)\">")
+
+
+class MockDownstream:
+    def __init__(self, base_ms, per_token_us, drop_rate, seed=0):
+        self.base_ms = base_ms
+        self.per_token_us = per_token_us
+        self.drop_rate = drop_rate
+        self.calls = 0
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def send_chat_completion(self, messages, model, temperature, top_p, max_tokens):
+        with self.lock:
+            self.calls += 1
+            drop = [self.rng.random() < self.drop_rate for _ in range(64)]
+        tokens = estimate_tokens(join_messages_as_text(messages))
+        time.sleep(self.base_ms / 1000.0 + tokens * self.per_token_us / 1e6)
+        ids = ITEM_RE.findall(messages[-1]["content"])
+        if ids:
+            content = "\n".join(
+                f"<answer id=\"{item_id}\">ok {item_id[:6]}</answer>"
+                for i, item_id in enumerate(ids) if not drop[i % len(drop)]
+            )
+        else:
+            content = "ok"
+        return {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]}
+
+
+def run(adaptive, args):
+    config = Config()
+    config.BATCH_ADAPTIVE = adaptive
+    config.BATCH_WINDOW_MS = args.window_ms
+    config.MAX_BATCH_SIZE = args.max_batch
+    config.BATCH_TARGET_P95_MS = args.target_p95_ms
+    downstream = MockDownstream(args.base_ms, args.per_token_us, args.drop_rate)
+    manager = BatchManager(config=config, cache=ResponseCache(ttl_seconds=60, max_entries=16), downstream=downstream)
+    system = {"role": "system", "content": "You are a terse assistant. " * 20}
+
+    def one(i):
+        messages = [system, {"role": "user", "content": f"Question {i}: " + "lorem ipsum " * 30}]
+        manager.enqueue_and_wait(messages, "bench", 0.0, 1.0, 64, f"k{i}", timeout_seconds=60)
+
+    threads = []
+    start = time.perf_counter()
+    for i in range(args.requests):
+        t = threading.Thread(target=one, args=(i,))
+        t.start()
+        threads.append(t)
+        if (i + 1) % args.burst == 0:
+            time.sleep(args.idle_ms / 1000.0)
+        else:
+            time.sleep(args.gap_ms / 1000.0)
+    for t in threads:
+        t.join()
+    stats = manager.stats()
+    return {
+        "elapsed_s": round(time.perf_counter() - start, 2),
+        "downstream_calls": downstream.calls,
+        "tokens_saved": stats["tokens_saved"],
+        "tokens_saved_pct": round(100.0 * stats["tokens_saved"] / max(1, stats["prompt_tokens_individual"]), 1),
+        "batch_fill_ratio": stats["batch_fill_ratio"],
+        "avg_batch_size": stats["avg_batch_size"],
+        "fallbacks": stats["fallbacks"],
+        "wait_ms": stats["wait_ms"],
+        "window_ms": stats["window_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--gap-ms", type=float, default=1.0)
+    parser.add_argument("--idle-ms", type=float, default=200.0)
+    parser.add_argument("--window-ms", type=int, default=50)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--target-p95-ms", type=float, default=100.0)
+    parser.add_argument("--base-ms", type=float, default=80.0)
+    parser.add_argument("--per-token-us", type=float, default=20.0)
+    parser.add_argument("--drop-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    results = {mode: run(mode == "adaptive", args) for mode in ("fixed", "adaptive")}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,16 @@ class Config:
         # Batching
         self.BATCH_WINDOW_MS = int(os.getenv("BATCH_WINDOW_MS", "50"))
         self.MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "8"))
+        # Adaptive window: BATCH_WINDOW_MS is the starting cap, adjusted
+        # between MIN/MAX to keep p95 queue wait near BATCH_TARGET_P95_MS
+        self.BATCH_ADAPTIVE = os.getenv("BATCH_ADAPTIVE", "1") == "1"
+        self.BATCH_TARGET_P95_MS = float(os.getenv("BATCH_TARGET_P95_MS", "100"))
+        self.BATCH_MIN_WINDOW_MS = float(os.getenv("BATCH_MIN_WINDOW_MS", "2"))
+        self.BATCH_MAX_WINDOW_MS = float(os.getenv("BATCH_MAX_WINDOW_MS", "250"))
+        # Estimated prompt tokens of condensed items per batch
+        self.BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", "6000"))
+        # Concurrent downstream calls (batches and per-item fallbacks)
+        self.DOWNSTREAM_WORKERS = int(os.getenv("DOWNSTREAM_WORKERS", "8"))
 
         # Cache
         self.CACHE_TTL_SEC = int(os.getenv("CACHE_TTL_SEC", "300"))
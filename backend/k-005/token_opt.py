@@ -105,11 +105,11 @@ class TokenOptimizer:
                     break
         return out if out else messages
 
-    def condense_messages_for_batch(self, messages: List[Dict[str, str]]) -> str:
+    def condense_messages_for_batch(self, messages: List[Dict[str, str]], include_system: bool = True) -> str:
         # Build a compact representation suitable for single-turn processing
         # Prefer the last user message and include brief context lines
         lines = []
-        sys = self.extract_system_prompt(messages)
+        sys = self.extract_system_prompt(messages) if include_system else None
         if sys:
             lines.append(f"[System]\n{sys.strip()}")
         # Include up to last 4 messages excluding system
@@ -0,0 +1,176 @@
+"""
+Step throughput and checkpoint size for long flows: legacy vs delta storage.
+
+Runs a --steps step flow whose steps each add a --payload byte record under
+a new key (so state grows with the flow) and update a shared counter.
+Engines compared:
+
+  legacy   what Engine/Storage did before: a new sqlite connection per
+           operation, deepcopy of state per step, full state_json written
+           to flows and checkpoints after every step
+  delta    the current Engine: one WAL connection per thread, one
+           transaction per advance, checkpoints as JSON patches against a
+           full snapshot every ORCH_SNAPSHOT_INTERVAL steps
+
+Each engine runs the flow twice: one advance(max_steps=steps) call
+("batched") and one advance per step ("stepwise", as the HTTP API does).
+Reported: steps/sec, DB size after a WAL checkpoint, and the time to
+rebuild the last checkpoint's state.
+
+    python bench_engine.py --steps 1000 --payload 200
+"""
+
+import argparse
+import copy
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from orchestrator.engine import Engine, Flow, Step, StepResult  # noqa: E402
+from orchestrator.storage import now_iso  # noqa: E402
+
+
+class RecordStep(Step):
+    def __init__(self, index, payload):
+        super().__init__(f"record_{index}")
+        self.index = index
+        self.payload = payload
+
+    def execute(self, context):
+        return StepResult(status="done", state_delta={
+            f"record_{self.index}": {"index": self.index, "data": "x" * self.payload},
+            "processed": context.state.get("processed", 0) + 1,
+        })
+
+
+class LongFlow(Flow):
+    def __init__(self, steps, payload):
+        super().__init__("long")
+        self.steps = [RecordStep(i, payload) for i in range(steps)]
+
+
+class LegacyEngine:
+    """The previous storage and advance loop, reduced to the done-step path."""
+
+    def __init__(self, db_path, flow):
+        self.db_path = db_path
+        self.flow = flow
+        self._exec("CREATE TABLE IF NOT EXISTS flows (id TEXT PRIMARY KEY, name TEXT, status TEXT, current_step_index INTEGER, state_json TEXT, created_at TEXT, updated_at TEXT)")
+        self._exec("CREATE TABLE IF NOT EXISTS checkpoints (id TEXT PRIMARY KEY, flow_id TEXT, step_index INTEGER, step_name TEXT, state_json TEXT, created_at TEXT)")
+        self._exec("CREATE TABLE IF NOT EXISTS executions (id TEXT PRIMARY KEY, flow_id TEXT, step_index INTEGER, step_name TEXT, status TEXT, message TEXT, details_json TEXT, created_at TEXT)")
+
+    def _exec(self, sql, params=(), fetch=False):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows if fetch else None
+        finally:
+            conn.close()
+
+    def start(self, state):
+        flow_id = str(uuid.uuid4())
+        self._exec("INSERT INTO flows VALUES (?, ?, ?, ?, ?, ?, ?)", (flow_id, "long", "running", 0, json.dumps(state), now_iso(), now_iso()))
+        self._exec("INSERT INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)", (str(uuid.uuid4()), flow_id, -1, "START", json.dumps(state), now_iso()))
+        return flow_id
+
+    def _get(self, flow_id):
+        index, state_json = self._exec("SELECT current_step_index, state_json FROM flows WHERE id = ?", (flow_id,), fetch=True)[0]
+        return index, json.loads(state_json)
+
+    def advance(self, flow_id, max_steps):
+        index, state = self._get(flow_id)
+        executed = 0
+        while executed < max_steps and index < len(self.flow.steps):
+            step = self.flow.steps[index]
+            result = step.execute(type("Ctx", (), {"state": copy.deepcopy(state)})())
+            state.update(result.state_delta)
+            self._exec("UPDATE flows SET state_json = ?, current_step_index = ?, status = ?, updated_at = ? WHERE id = ?",
+                       (json.dumps(state), index + 1, "running", now_iso(), flow_id))
+            self._exec("INSERT INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)", (str(uuid.uuid4()), flow_id, index, step.name, json.dumps(state), now_iso()))
+            self._exec("INSERT INTO executions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (str(uuid.uuid4()), flow_id, index, step.name, "done", "Step completed", "{}", now_iso()))
+            executed += 1
+            index, state = self._get(flow_id)
+
+    def last_state(self, flow_id):
+        row = self._exec("SELECT state_json FROM checkpoints WHERE flow_id = ? ORDER BY created_at DESC LIMIT 1", (flow_id,), fetch=True)[0]
+        return json.loads(row[0])
+
+
+def db_size(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+
+def run_legacy(work, flow, steps, stepwise):
+    path = os.path.join(work, f"legacy-{stepwise}.db")
+    engine = LegacyEngine(path, flow)
+    flow_id = engine.start({"input": {}})
+    t0 = time.perf_counter()
+    if stepwise:
+        for _ in range(steps):
+            engine.advance(flow_id, 1)
+    else:
+        engine.advance(flow_id, steps)
+    elapsed = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    state = engine.last_state(flow_id)
+    return state, {"steps_per_sec": round(steps / elapsed, 1), "db_mb": round(db_size(path) / 1e6, 2),
+                   "rebuild_ms": round((time.perf_counter() - t1) * 1000, 2)}
+
+
+def run_delta(work, flow, steps, stepwise):
+    path = os.path.join(work, f"delta-{stepwise}.db")
+    engine = Engine(path)
+    engine.register_flow("long", flow)
+    flow_id, _ = engine.start_flow("long", {})
+    t0 = time.perf_counter()
+    if stepwise:
+        for _ in range(steps):
+            engine.advance(flow_id, 1)
+    else:
+        engine.advance(flow_id, steps)
+    elapsed = time.perf_counter() - t0
+    engine.storage.close()
+    t1 = time.perf_counter()
+    state = engine.storage.load_checkpoint_ref(engine.storage.get_flow_head(flow_id)).state
+    return state, {"steps_per_sec": round(steps / elapsed, 1), "db_mb": round(db_size(path) / 1e6, 2),
+                   "rebuild_ms": round((time.perf_counter() - t1) * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--payload", type=int, default=200, help="bytes added to the state per step")
+    args = parser.parse_args()
+
+    flow = LongFlow(args.steps, args.payload)
+    work = tempfile.mkdtemp(prefix="k010-bench-")
+    try:
+        report = {}
+        for stepwise in (False, True):
+            mode = "stepwise" if stepwise else "batched"
+            legacy_state, report[f"legacy_{mode}"] = run_legacy(work, flow, args.steps, stepwise)
+            delta_state, report[f"delta_{mode}"] = run_delta(work, flow, args.steps, stepwise)
+            legacy_state.pop("meta", None)
+            legacy_state.pop("signals", None)
+            delta_state.pop("meta", None)
+            delta_state.pop("signals", None)
+            report[f"{mode}_final_state_matches"] = legacy_state == delta_state
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 from __future__ import annotations
-import copy
+import json
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
-from orchestrator.storage import Storage, now_iso
+from orchestrator.storage import CheckpointRef, Storage, now_iso
 
 
 @dataclass
@@ -45,6 +45,57 @@ class ExecutionContext:
     state: Dict[str, Any]
 
 
+class _EncodedState:
+    """Flow state with every top-level value also kept JSON-encoded.
+
+    A step delta only re-encodes the keys it sets, the copy handed to each
+    step is decoded from the cached encodings (cheaper than a deepcopy), and
+    the full state_json is joined from them rather than re-serialized.
+    The per-key encodings are only built once a second step runs; a single
+    step round-trips the whole state in one call instead. Values pass
+    through JSON, as they did when state was re-read from the database
+    after every step.
+    """
+
+    def __init__(self, state: Dict[str, Any]):
+        self.values = state
+        self._encoded: Optional[Dict[str, str]] = None
+        self._copied = False
+        self.changed = False
+
+    def update(self, delta: Dict[str, Any]):
+        if not delta:
+            return
+        normalized = json.loads(json.dumps(delta))
+        if self._encoded is not None:
+            self._encoded.update((k, json.dumps(v)) for k, v in normalized.items())
+        # A new dict, so checkpoints already written keep sharing the old one
+        self.values = {**self.values, **normalized}
+        self.changed = True
+
+    def share(self, base: Dict[str, Any]):
+        """Reuse ``base``'s objects for the keys whose values are equal to it.
+
+        The state is re-read from the flow row while the previous checkpoint
+        comes from its own rows; sharing lets the checkpoint diff skip every
+        key a step did not touch without comparing it again.
+        """
+        self.values = {k: base[k] if k in base and base[k] == v else v for k, v in self.values.items()}
+
+    def copy(self) -> Dict[str, Any]:
+        if self._encoded is None:
+            if not self._copied:
+                self._copied = True
+                return json.loads(json.dumps(self.values))
+            self._encoded = {k: json.dumps(v) for k, v in self.values.items()}
+        return {k: json.loads(v) for k, v in self._encoded.items()}
+
+    def to_json(self) -> str:
+        if self._encoded is None:
+            return json.dumps(self.values)
+        return "{" + ", ".join(f"{json.dumps(k)}: {v}" for k, v in self._encoded.items()) + "}"
+
+
 class Engine:
     def __init__(self, storage_path: str):
         self.storage = Storage(storage_path)
@@ -59,10 +110,12 @@ class Engine:
             raise ValueError(f"Unknown flow: {flow_name}")
         flow_def = self._flows[flow_name]
         state = flow_def.initial_state(input_state)
-        flow_id = self.storage.create_flow(flow_name, state=state, status="running", current_step_index=0)
-        # Create an initial checkpoint at step -1 (START)
-        self.storage.add_execution_log(flow_id, step_index=-1, step_name="START", status="started", message="Flow started", details={"input": input_state})
-        self.storage.add_checkpoint(flow_id, step_index=-1, step_name="START", state=state)
+        with self.storage.batch():
+            flow_id = self.storage.create_flow(flow_name, state=state, status="running", current_step_index=0)
+            # Create an initial checkpoint at step -1 (START)
+            self.storage.add_execution_log(flow_id, step_index=-1, step_name="START", status="started", message="Flow started", details={"input": input_state})
+            start_id = self.storage.add_checkpoint(flow_id, step_index=-1, step_name="START", state=state)
+            self.storage.update_flow(flow_id, head_checkpoint_id=start_id)
         flow = self.storage.get_flow(flow_id)
         if auto_advance:
             self.advance(flow_id, max_steps=100)
@@ -75,6 +128,11 @@ class Engine:
         return self._flows[flow_name]
 
     def advance(self, flow_id: str, max_steps: int = 10) -> Dict[str, Any]:
+        # Every write of this call (checkpoints, logs, the flow row) is one transaction
+        with self.storage.batch():
+            return self._advance(flow_id, max_steps)
+
+    def _advance(self, flow_id: str, max_steps: int) -> Dict[str, Any]:
         flow = self.storage.get_flow(flow_id)
         if not flow:
             raise ValueError("Flow not found")
@@ -84,12 +142,16 @@ class Engine:
         flow_def = self.get_flow_def(flow["name"])
         executed = 0
         last_result = None
+        state = _EncodedState(flow["state"] or {})
+        current_index = flow["current_step_index"]
+        status = flow["status"]
+        head: Optional[CheckpointRef] = None
+        head_loaded = False
 
         while executed < max_steps:
-            current_index = flow["current_step_index"]
             if current_index >= len(flow_def.steps):
                 # Completed
-                self.storage.update_flow(flow_id, status="completed")
+                status = "completed"
                 self.storage.add_execution_log(flow_id, step_index=current_index, step_name="END", status="completed", message="Flow completed", details={})
                 break
 
@@ -99,7 +161,7 @@ class Engine:
                 flow_name=flow["name"],
                 step_index=current_index,
                 step_name=step.name,
-                state=copy.deepcopy(flow["state"])  # pass a copy to the step
+                state=state.copy()  # pass a copy to the step
             )
 
             try:
@@ -108,39 +170,51 @@ class Engine:
                     raise ValueError(f"Step {step.name} must return StepResult")
             except Exception as e:
                 self.storage.add_execution_log(flow_id, step_index=current_index, step_name=step.name, status="error", message=str(e), details={})
-                self.storage.update_flow(flow_id, status="failed")
+                self._save_flow(flow_id, state, current_index, "failed", head)
                 return {"executed": executed, "status": "failed", "error": str(e)}
 
             # Merge delta into state
-            new_state = flow["state"] or {}
-            new_state.update(result.state_delta or {})
-            flow["state"] = new_state
+            state.update(result.state_delta or {})
 
             if result.status == "waiting":
-                self.storage.update_flow(flow_id, state=new_state, status="waiting")
+                status = "waiting"
                 self.storage.add_execution_log(flow_id, step_index=current_index, step_name=step.name, status="waiting", message=result.message or f"Waiting for {result.wait_for}", details={"wait_for": result.wait_for})
                 last_result = {"status": "waiting", "step_index": current_index, "wait_for": result.wait_for}
                 break
             elif result.status == "done":
-                # Checkpoint post step completion
-                self.storage.update_flow(flow_id, state=new_state, current_step_index=current_index + 1, status="running")
-                self.storage.add_checkpoint(flow_id, step_index=current_index, step_name=step.name, state=new_state)
+                # Checkpoint post step completion, as a delta against the previous checkpoint
+                if not head_loaded:
+                    head_id = self.storage.get_flow_head(flow_id)
+                    head = self.storage.load_checkpoint_ref(head_id) if head_id else None
+                    head_loaded = True
+                    if head is not None:
+                        state.share(head.state)
+                head = self.storage.write_checkpoint(flow_id, step_index=current_index, step_name=step.name,
+                                                     state=state.values, base=head, encode_state=state.to_json)
                 self.storage.add_execution_log(flow_id, step_index=current_index, step_name=step.name, status="done", message=result.message or "Step completed", details={})
+                current_index += 1
+                status = "running"
                 executed += 1
-                last_result = {"status": "done", "step_index": current_index}
-                # Refresh flow for next loop
-                flow = self.storage.get_flow(flow_id)
+                last_result = {"status": "done", "step_index": current_index - 1}
                 continue
             else:
                 raise ValueError(f"Invalid step result status: {result.status}")
 
         # If after the loop the step index equals steps length, finalize
-        flow = self.storage.get_flow(flow_id)
-        if flow["current_step_index"] >= len(self.get_flow_def(flow["name"]).steps) and flow["status"] != "completed":
-            self.storage.update_flow(flow_id, status="completed")
-            self.storage.add_execution_log(flow_id, step_index=flow["current_step_index"], step_name="END", status="completed", message="Flow completed", details={})
-        flow = self.storage.get_flow(flow_id)
-        return {"executed": executed, "status": flow["status"], "last_result": last_result}
+        if current_index >= len(flow_def.steps) and status != "completed":
+            status = "completed"
+            self.storage.add_execution_log(flow_id, step_index=current_index, step_name="END", status="completed", message="Flow completed", details={})
+        self._save_flow(flow_id, state, current_index, status, head)
+        return {"executed": executed, "status": status, "last_result": last_result}
+
+    def _save_flow(self, flow_id: str, state: "_EncodedState", current_index: int, status: str,
+                   head: Optional[CheckpointRef]):
+        fields: Dict[str, Any] = {"current_step_index": current_index, "status": status}
+        if state.changed:
+            fields["state_json"] = state.to_json()
+        if head is not None:
+            fields["head_checkpoint_id"] = head.id
+        self.storage.update_flow(flow_id, **fields)
 
     def replay(self, flow_id: str, from_checkpoint_id: Optional[str] = None, from_step_index: Optional[int] = None, auto_advance: bool = True) -> Dict[str, Any]:
         flow = self.storage.get_flow(flow_id)
@@ -152,25 +226,27 @@ class Engine:
                 raise ValueError("Invalid checkpoint")
             base_state = ck["state"]
             start_index = ck["step_index"] + 1
+            head_id = ck["id"]
         else:
             # from_step_index is treated as if we had checkpointed after completing from_step_index - 1
             if from_step_index is None:
                 raise ValueError("Provide from_checkpoint_id or from_step_index")
-            checkpoints = self.storage.get_checkpoints(flow_id)
             # If we have a checkpoint matching the step, use it; else use the nearest before
             base_state = None
             start_index = max(0, int(from_step_index))
-            for c in reversed(checkpoints):
-                if c["step_index"] <= (start_index - 1):
-                    base_state = c["state"]
-                    break
-            if base_state is None:
+            head_id = self.storage.find_checkpoint_before(flow_id, start_index - 1)
+            ref = self.storage.load_checkpoint_ref(head_id) if head_id else None
+            if ref is not None:
+                base_state = ref.state
+            else:
                 # Use initial state from flows table (which is effectively START checkpoint)
                 base_state = flow["state"]
                 start_index = 0
+                head_id = None
 
         # Reset the flow to replay point
-        self.storage.update_flow(flow_id, state=base_state, current_step_index=start_index, status="running")
+        self.storage.update_flow(flow_id, state=base_state, current_step_index=start_index, status="running",
+                                 head_checkpoint_id=head_id)
         self.storage.add_execution_log(flow_id, step_index=start_index, step_name="REPLAY", status="replay", message="Flow replay requested", details={"from_checkpoint_id": from_checkpoint_id, "from_step_index": from_step_index})
 
         executed_summary = {"start_index": start_index, "auto_advanced": False, "executed": 0}
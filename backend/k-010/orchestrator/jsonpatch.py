@@ -0,0 +1,68 @@
+"""Minimal JSON Patch (RFC 6902) diff/apply for checkpoint deltas.
+
+Only ``add``, ``replace`` and ``remove`` are produced. Objects are diffed
+key by key; lists and scalars that differ are replaced whole.
+"""
+from typing import Any, Dict, List
+
+
+def _escape(key: str) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """Operations turning ``old`` into ``new``.
+
+    Values that are the same object are skipped without comparing them, so a
+    dict built as ``{**old, **changes}`` is diffed in time proportional to
+    its keys plus the changed values.
+    """
+    if old is new:
+        return []
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return [] if old == new else [{"op": "replace", "path": path, "value": new}]
+    ops: List[Dict[str, Any]] = []
+    for key in old:
+        if key not in new:
+            ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+    for key, value in new.items():
+        if key not in old:
+            ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+        elif old[key] is not value:
+            ops.extend(make_patch(old[key], value, f"{path}/{_escape(key)}"))
+    return ops
+
+
+def apply_patch(doc: Any, patch: List[Dict[str, Any]]) -> Any:
+    """``doc`` with ``patch`` applied; ``doc`` itself is not modified.
+
+    Objects along each patched path are copied, everything else is shared
+    with ``doc``.
+    """
+    root = dict(doc) if isinstance(doc, dict) else doc
+    copied = {id(root)}
+    for op in patch:
+        if op["path"] == "":
+            root = op.get("value")
+            copied = {id(root)}
+            continue
+        tokens = [_unescape(t) for t in op["path"].split("/")[1:]]
+        parent = root
+        for token in tokens[:-1]:
+            child = parent[token]
+            if id(child) not in copied:
+                child = dict(child)
+                parent[token] = child
+                copied.add(id(child))
+            parent = child
+        if op["op"] == "remove":
+            del parent[tokens[-1]]
+        elif op["op"] in ("add", "replace"):
+            parent[tokens[-1]] = op["value"]
+        else:
+            raise ValueError(f"Unsupported patch op: {op['op']}")
+    return root
@@ -1,35 +1,82 @@
 import os
 import json
 import sqlite3
+import threading
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
 from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from orchestrator.jsonpatch import apply_patch, make_patch
+
+# A checkpoint is stored in full after this many consecutive deltas
+SNAPSHOT_INTERVAL = int(os.environ.get("ORCH_SNAPSHOT_INTERVAL", "50"))
 
 
 def now_iso():
     return datetime.utcnow().isoformat() + "Z"
 
 
+@dataclass
+class CheckpointRef:
+    """A written checkpoint and its state, to diff the next checkpoint against."""
+    id: str
+    depth: int  # deltas since the last full snapshot
+    state: Dict[str, Any]
+
+
 class Storage:
     def __init__(self, db_path: str):
         self.db_path = db_path
         os.makedirs(os.path.dirname(db_path), exist_ok=True) if os.path.dirname(db_path) else None
+        self._local = threading.local()
         self._init_db()
 
     def _connect(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        # One connection per thread, kept open for the thread's lifetime
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+            self._local.batch_depth = 0
         return conn
 
     @contextmanager
     def _cursor(self):
         conn = self._connect()
+        cur = conn.cursor()
         try:
-            cur = conn.cursor()
             yield cur
-            conn.commit()
+            if not self._local.batch_depth:
+                conn.commit()
         finally:
+            cur.close()
+
+    @contextmanager
+    def batch(self):
+        """Group the writes made inside into one transaction (nesting is allowed)."""
+        conn = self._connect()
+        self._local.batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._local.batch_depth -= 1
+            if not self._local.batch_depth:
+                conn.rollback()
+            raise
+        self._local.batch_depth -= 1
+        if not self._local.batch_depth:
+            conn.commit()
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
             conn.close()
+            self._local.conn = None
 
     def _init_db(self):
         with self._cursor() as cur:
@@ -74,6 +121,25 @@ class Storage:
                 );
                 """
             )
+            # Delta checkpoints: state_json is empty and patch_json holds a JSON
+            # patch against base_id; depth counts deltas since the last snapshot
+            self._add_columns(cur, "checkpoints", {
+                "kind": "TEXT NOT NULL DEFAULT 'snapshot'",
+                "base_id": "TEXT",
+                "patch_json": "TEXT",
+                "depth": "INTEGER NOT NULL DEFAULT 0",
+            })
+            self._add_columns(cur, "flows", {"head_checkpoint_id": "TEXT"})
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_checkpoints_flow ON checkpoints(flow_id)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_executions_flow ON executions(flow_id)")
+
+    @staticmethod
+    def _add_columns(cur, table: str, columns: Dict[str, str]):
+        cur.execute(f"PRAGMA table_info({table})")
+        existing = {row["name"] for row in cur.fetchall()}
+        for name, decl in columns.items():
+            if name not in existing:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
 
     def create_flow(self, name: str, state: dict, status: str = "running", current_step_index: int = 0):
         flow_id = str(uuid.uuid4())
@@ -88,7 +154,7 @@ class Storage:
     def update_flow(self, flow_id: str, **fields):
         if not fields:
             return
-        allowed = {"name", "status", "current_step_index", "state"}
+        allowed = {"name", "status", "current_step_index", "state", "state_json", "head_checkpoint_id"}
         updates = []
         params = []
         for k, v in fields.items():
@@ -97,6 +163,9 @@ class Storage:
             if k == "state":
                 updates.append("state_json = ?")
                 params.append(json.dumps(v))
+            elif k == "state_json":
+                updates.append("state_json = ?")
+                params.append(v)
             else:
                 updates.append(f"{k} = ?")
                 params.append(v)
@@ -114,6 +183,13 @@ class Storage:
             return None
         return self._row_to_flow(row)
 
+    def get_flow_head(self, flow_id: str) -> Optional[str]:
+        """Id of the checkpoint the flow's current position was reached from."""
+        with self._cursor() as cur:
+            cur.execute("SELECT head_checkpoint_id FROM flows WHERE id = ?", (flow_id,))
+            row = cur.fetchone()
+        return row["head_checkpoint_id"] if row else None
+
     def list_flows(self, name=None, status=None, limit=100, offset=0):
         query = "SELECT * FROM flows"
         conditions = []
@@ -134,19 +210,73 @@ class Storage:
         return [self._row_to_flow(r) for r in rows]
 
     def add_checkpoint(self, flow_id: str, step_index: int, step_name: str, state: dict):
+        return self.write_checkpoint(flow_id, step_index, step_name, state).id
+
+    def write_checkpoint(self, flow_id: str, step_index: int, step_name: str, state: dict,
+                         base: Optional[CheckpointRef] = None,
+                         encode_state: Optional[Callable[[], str]] = None) -> CheckpointRef:
+        """Store ``state`` as a JSON patch against ``base``, or in full.
+
+        A full snapshot is written when there is no base or the base is
+        already SNAPSHOT_INTERVAL - 1 deltas away from one, so rebuilding any
+        checkpoint applies at most that many patches. ``encode_state`` may
+        produce the JSON more cheaply than ``json.dumps(state)``; it is only
+        called for snapshots.
+        """
         ck_id = str(uuid.uuid4())
+        if base is not None and base.depth + 1 < SNAPSHOT_INTERVAL:
+            depth = base.depth + 1
+            row = (ck_id, flow_id, step_index, step_name, "", now_iso(), "delta", base.id,
+                   json.dumps(make_patch(base.state, state)), depth)
+        else:
+            depth = 0
+            row = (ck_id, flow_id, step_index, step_name, encode_state() if encode_state else json.dumps(state),
+                   now_iso(), "snapshot", None, None, 0)
+        with self._cursor() as cur:
+            cur.execute(
+                "INSERT INTO checkpoints (id, flow_id, step_index, step_name, state_json, created_at, kind, base_id, patch_json, depth)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+        return CheckpointRef(ck_id, depth, state)
+
+    def load_checkpoint_ref(self, checkpoint_id: str) -> Optional[CheckpointRef]:
+        """Rebuild a checkpoint's state from its nearest snapshot."""
+        chain = []
+        with self._cursor() as cur:
+            next_id = checkpoint_id
+            while next_id:
+                cur.execute("SELECT id, kind, base_id, state_json, patch_json, depth FROM checkpoints WHERE id = ?", (next_id,))
+                row = cur.fetchone()
+                if not row:
+                    return None
+                chain.append(row)
+                next_id = row["base_id"] if row["kind"] == "delta" else None
+        state = json.loads(chain[-1]["state_json"]) if chain[-1]["state_json"] else {}
+        for row in reversed(chain[:-1]):
+            state = apply_patch(state, json.loads(row["patch_json"]))
+        return CheckpointRef(chain[0]["id"], chain[0]["depth"], state)
+
+    def find_checkpoint_before(self, flow_id: str, step_index: int) -> Optional[str]:
+        """Id of the latest checkpoint at or before ``step_index``."""
         with self._cursor() as cur:
             cur.execute(
-                "INSERT INTO checkpoints (id, flow_id, step_index, step_name, state_json, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-                (ck_id, flow_id, step_index, step_name, json.dumps(state), now_iso()),
+                "SELECT id FROM checkpoints WHERE flow_id = ? AND step_index <= ? ORDER BY created_at DESC, rowid DESC LIMIT 1",
+                (flow_id, step_index),
             )
-        return ck_id
+            row = cur.fetchone()
+        return row["id"] if row else None
 
     def get_checkpoints(self, flow_id: str):
         with self._cursor() as cur:
-            cur.execute("SELECT * FROM checkpoints WHERE flow_id = ? ORDER BY created_at ASC", (flow_id,))
+            cur.execute("SELECT rowid AS seq, * FROM checkpoints WHERE flow_id = ? ORDER BY rowid ASC", (flow_id,))
             rows = cur.fetchall()
-        return [self._row_to_checkpoint(r) for r in rows]
+        # Bases are always written before their deltas, so one pass in rowid order rebuilds every state
+        states: Dict[str, Any] = {}
+        for row in rows:
+            states[row["id"]] = self._row_state(row, states)
+        rows.sort(key=lambda r: (r["created_at"], r["seq"]))
+        return [self._row_to_checkpoint(r, states[r["id"]]) for r in rows]
 
     def get_checkpoint(self, checkpoint_id: str):
         with self._cursor() as cur:
@@ -154,7 +284,17 @@ class Storage:
             row = cur.fetchone()
         if not row:
             return None
-        return self._row_to_checkpoint(row)
+        ref = self.load_checkpoint_ref(checkpoint_id)
+        return self._row_to_checkpoint(row, ref.state if ref else {})
+
+    def _row_state(self, row: sqlite3.Row, states: Dict[str, Any]):
+        if row["kind"] != "delta":
+            return json.loads(row["state_json"]) if row["state_json"] else {}
+        base = states.get(row["base_id"])
+        if base is None:
+            ref = self.load_checkpoint_ref(row["base_id"])
+            base = ref.state if ref else {}
+        return apply_patch(base, json.loads(row["patch_json"]))
 
     def add_execution_log(self, flow_id: str, step_index: int | None, step_name: str | None, status: str, message: str | None, details: dict | None):
         exec_id = str(uuid.uuid4())
@@ -167,7 +307,7 @@ class Storage:
 
     def get_executions(self, flow_id: str):
         with self._cursor() as cur:
-            cur.execute("SELECT * FROM executions WHERE flow_id = ? ORDER BY created_at ASC", (flow_id,))
+            cur.execute("SELECT * FROM executions WHERE flow_id = ? ORDER BY created_at ASC, rowid ASC", (flow_id,))
             rows = cur.fetchall()
         return [self._row_to_execution(r) for r in rows]
 
@@ -182,13 +322,14 @@ class Storage:
             "updated_at": row["updated_at"],
         }
 
-    def _row_to_checkpoint(self, row: sqlite3.Row):
+    def _row_to_checkpoint(self, row: sqlite3.Row, state: dict):
         return {
             "id": row["id"],
             "flow_id": row["flow_id"],
             "step_index": row["step_index"],
             "step_name": row["step_name"],
-            "state": json.loads(row["state_json"]) if row["state_json"] else {},
+            "state": state,
+            "kind": row["kind"],
             "created_at": row["created_at"],
         }
 
@@ -81,7 +81,9 @@ def search():
     if source_types:
         source_types = [t.strip() for t in source_types.split(",") if t.strip()]
 
-    res = indexer.search(q, top_k=top_k, mode=mode, w_lex=w_lex, w_sem=w_sem, source_types=source_types)
+    fusion = request.args.get("fusion")  # score | rrf
+
+    res = indexer.search(q, top_k=top_k, mode=mode, w_lex=w_lex, w_sem=w_sem, source_types=source_types, fusion=fusion)
     return jsonify(res)
 
 if __name__ == "__main__":
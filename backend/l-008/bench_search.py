@@ -0,0 +1,172 @@
+"""
+Query latency benchmark: brute-force hybrid scoring vs candidate fusion.
+
+For each corpus size a synthetic corpus is indexed into a temporary
+DATA_DIR (TF-IDF plus float32 embeddings, saved and reloaded so the
+embeddings are memory-mapped) and the same queries are run through
+
+  brute   the previous path: cosine over the full TF-IDF matrix, a full
+          embedding dot product and min-max fusion of both N-length arrays
+  hybrid  Indexer.search: posting-list candidates + ANN candidates, fused
+          over their union only
+
+Embeddings come from a deterministic topic model standing in for the
+sentence-transformers encoder, so the numbers are retrieval cost only.
+Reports p50/p95 latency per size, ANN recall@k against an exact scan and
+the overlap of the hybrid top-k with the brute top-k.
+
+    python bench_search.py --sizes 10000 100000 1000000 --queries 200
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+DATA_DIR = tempfile.mkdtemp(prefix="l008-bench-")
+os.environ["DATA_DIR"] = DATA_DIR
+os.environ.setdefault("DISABLE_EMBEDDINGS", "1")
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from search.indexer import Indexer
+from search.ranking import combine_scores
+
+TOPICS = 512
+
+
+class TopicModel:
+    """Stands in for SentenceTransformer: topic centroid plus per-text noise."""
+
+    def __init__(self, dim: int):
+        self.centroids = np.random.default_rng(0).standard_normal((TOPICS, dim)).astype(np.float32)
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        out = np.stack([self._vector(int(t.split(" ", 2)[1]), hash(t) & 0xFFFFFFFF) for t in texts])
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+    def _vector(self, topic, seed):
+        noise = np.random.default_rng(seed).standard_normal(self.centroids.shape[1]).astype(np.float32)
+        return self.centroids[topic % TOPICS] + 0.8 * noise
+
+    def corpus_matrix(self, topics: np.ndarray, seed: int = 1, chunk: int = 65536) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        out = np.empty((topics.shape[0], self.centroids.shape[1]), dtype=np.float32)
+        for lo in range(0, topics.shape[0], chunk):
+            hi = min(topics.shape[0], lo + chunk)
+            block = self.centroids[topics[lo:hi] % TOPICS] + 0.8 * rng.standard_normal(
+                (hi - lo, self.centroids.shape[1]), dtype=np.float32)
+            out[lo:hi] = block / np.linalg.norm(block, axis=1, keepdims=True)
+        return out
+
+
+def make_docs(n: int, vocab: int, seed: int = 0):
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    topics = np.empty(n, dtype=np.int64)
+    docs = []
+    for i in range(n):
+        topic = rng.randrange(TOPICS)
+        topics[i] = topic
+        body = " ".join(words[min(vocab - 1, int(rng.paretovariate(0.8)) - 1 + topic)] for _ in range(12))
+        docs.append({"id": f"d{i}", "title": f"doc {i}", "content": f"topic {topic} {body}",
+                     "source_type": rng.choice(("code", "doc", "idea"))})
+    return docs, topics
+
+
+def brute_search(indexer: Indexer, query: str, top_k: int) -> np.ndarray:
+    qv = indexer.vectorizer.transform([query])
+    lex = cosine_similarity(qv, indexer.tfidf_matrix)[0]
+    qe = indexer.emb_model.encode([query])[0]
+    sem = np.dot(indexer.embeddings, qe)
+    combo, _, _ = combine_scores(lex, sem)
+    return np.argsort(-combo)[:top_k]
+
+
+def percentiles(samples):
+    return {
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 2),
+        "p95_ms": round(float(np.percentile(samples, 95)) * 1000, 2),
+    }
+
+
+def run(n: int, args, model: TopicModel):
+    docs, topics = make_docs(n, args.vocab)
+    indexer = Indexer()
+    indexer.clear()
+    t0 = time.perf_counter()
+    indexer.add_documents(docs)
+    indexer.rebuild_lexical()
+    indexer.emb_model = model
+    indexer.embeddings = model.corpus_matrix(topics)
+    indexer.emb_dirty = True
+    indexer.emb_ready = True
+    indexer.ann.sync(indexer.embeddings)
+    indexer.save()
+    build_s = time.perf_counter() - t0
+    del docs
+
+    # Reload from disk: embeddings come back as a memmap, the IVF quantizer from ann_ivf.npz
+    indexer = Indexer()
+    indexer.load()
+    indexer.emb_model = model
+    indexer.emb_ready = True
+    assert isinstance(indexer.embeddings, np.memmap)
+
+    rng = random.Random(42)
+    queries = [f"topic {rng.randrange(TOPICS)} w{rng.randrange(50)} w{rng.randrange(200)}" for _ in range(args.queries)]
+
+    hybrid, brute, recall, overlap = [], [], [], []
+    for q in queries:
+        t = time.perf_counter()
+        res = indexer.search(q, top_k=args.top_k)
+        hybrid.append(time.perf_counter() - t)
+        ids = {r["id"] for r in res["results"]}
+
+        if n <= args.brute_max:
+            t = time.perf_counter()
+            exact = brute_search(indexer, q, args.top_k)
+            brute.append(time.perf_counter() - t)
+            overlap.append(len(ids & {indexer.docs[i].id for i in exact}) / args.top_k)
+
+        qe = model.encode([q])[0]
+        approx = set(indexer.ann.search(indexer.embeddings, qe, args.top_k)[0].tolist())
+        exact_sem = np.argpartition(-(indexer.embeddings @ qe), args.top_k - 1)[: args.top_k]
+        recall.append(len(approx & set(exact_sem.tolist())) / args.top_k)
+
+    report = {
+        "build_s": round(build_s, 1),
+        "hybrid": percentiles(hybrid),
+        "ann": indexer.ann.stats(),
+        "ann_recall_at_k": round(float(np.mean(recall)), 4),
+    }
+    if brute:
+        report["brute"] = percentiles(brute)
+        report["hybrid_vs_brute_overlap_at_k"] = round(float(np.mean(overlap)), 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--vocab", type=int, default=20000)
+    parser.add_argument("--brute-max", type=int, default=1000000, help="skip the brute path above this size")
+    args = parser.parse_args()
+
+    model = TopicModel(args.dim)
+    try:
+        results = {str(n): run(n, args, model) for n in args.sizes}
+    finally:
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ DOCS_PATH = os.path.join(DATA_DIR, "docs.jsonl")
 TFIDF_PATH = os.path.join(DATA_DIR, "tfidf.pkl")
 EMB_PATH = os.path.join(DATA_DIR, "embeddings.npy")
 META_PATH = os.path.join(DATA_DIR, "meta.json")
+ANN_PATH = os.path.join(DATA_DIR, "ann_ivf.npz")
 
 EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
 DISABLE_EMBEDDINGS = os.getenv("DISABLE_EMBEDDINGS", "0") in ("1", "true", "True")
@@ -18,3 +19,14 @@ MIN_DF = 1
 MAX_FEATURES = None
 STOP_WORDS = None
 
+
+# Hybrid retrieval: each side contributes its top SEARCH_CANDIDATES rows and
+# only their union is fused. FUSION is "score" (min-max over the union) or "rrf".
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "100"))
+FUSION = os.getenv("FUSION", "score")
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Vector index: exact scan below ANN_IVF_MIN_VECTORS, IVF above (ANN_NLIST=0 -> sqrt(n))
+ANN_IVF_MIN_VECTORS = int(os.getenv("ANN_IVF_MIN_VECTORS", "50000"))
+ANN_NLIST = int(os.getenv("ANN_NLIST", "0"))
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "16"))
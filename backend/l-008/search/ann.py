@@ -0,0 +1,162 @@
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+ASSIGN_CHUNK = 65536
+
+
+class VectorIndex:
+    """Flat / IVF nearest-neighbour index over an append-only embedding matrix.
+
+    The matrix itself is owned by the Indexer (usually a read-only memmap of
+    embeddings.npy); this class only keeps the coarse quantizer. Embeddings
+    are L2-normalized, so inner product is cosine similarity. Below
+    ``ivf_min_vectors`` rows every query is an exact scan. Above it a
+    spherical k-means quantizer is trained on a sample and queries only scan
+    the ``nprobe`` closest lists. Rows appended later are assigned to their
+    nearest list; the quantizer is retrained once the matrix has doubled
+    since the last training.
+    """
+
+    def __init__(self, path: str, ivf_min_vectors: int = 50000, nlist: int = 0, nprobe: int = 16,
+                 train_iters: int = 10, seed: int = 0):
+        self.path = path
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iters = train_iters
+        self.seed = seed
+        self.size = 0
+        self.trained_size = 0
+        self.centroids: Optional[np.ndarray] = None
+        self.assign = np.empty(0, dtype=np.int32)
+        self._order = np.empty(0, dtype=np.int64)
+        self._bounds = np.zeros(1, dtype=np.int64)
+
+    def load(self, embeddings: Optional[np.ndarray]) -> None:
+        self.reset()
+        if embeddings is None or not os.path.exists(self.path):
+            self.sync(embeddings)
+            return
+        try:
+            with np.load(self.path) as z:
+                centroids = z["centroids"]
+                assign = z["assign"]
+                trained_size = int(z["trained_size"])
+        except Exception:
+            centroids = None
+        if centroids is None or centroids.shape[1] != embeddings.shape[1] or assign.shape[0] > embeddings.shape[0]:
+            self.sync(embeddings)
+            return
+        self.centroids = centroids
+        self.assign = assign
+        self.size = assign.shape[0]
+        self.trained_size = trained_size
+        self._rebuild_lists()
+        self.sync(embeddings)
+
+    def save(self) -> None:
+        if self.centroids is None:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, centroids=self.centroids, assign=self.assign, trained_size=np.int64(self.trained_size))
+        os.replace(tmp, self.path)
+
+    def reset(self) -> None:
+        self.size = 0
+        self.trained_size = 0
+        self.centroids = None
+        self.assign = np.empty(0, dtype=np.int32)
+        self._order = np.empty(0, dtype=np.int64)
+        self._bounds = np.zeros(1, dtype=np.int64)
+
+    def sync(self, embeddings: Optional[np.ndarray]) -> None:
+        """Bring the quantizer up to date with ``embeddings`` (rows only ever get appended)."""
+        n = 0 if embeddings is None else embeddings.shape[0]
+        if n < self.size:
+            self.reset()
+        if n < self.ivf_min_vectors:
+            self.reset()
+            self.size = n
+            return
+        if self.centroids is None or n >= 2 * self.trained_size:
+            self._train(embeddings)
+            return
+        if n == self.size:
+            return
+        new = self._nearest(embeddings, self.size, n)
+        self.assign = np.concatenate([self.assign, new])
+        self.size = n
+        self._rebuild_lists()
+
+    def _nearest(self, embeddings: np.ndarray, start: int, stop: int) -> np.ndarray:
+        out = np.empty(stop - start, dtype=np.int32)
+        # Chunked so the (rows x nlist) score block stays small at 1M rows
+        for lo in range(start, stop, ASSIGN_CHUNK):
+            hi = min(stop, lo + ASSIGN_CHUNK)
+            block = np.asarray(embeddings[lo:hi], dtype=np.float32)
+            out[lo - start: hi - start] = np.argmax(block @ self.centroids.T, axis=1)
+        return out
+
+    def _train(self, embeddings: np.ndarray) -> None:
+        n = embeddings.shape[0]
+        nlist = min(self.nlist or max(1, int(np.sqrt(n))), n)
+        rng = np.random.default_rng(self.seed)
+        pick = np.sort(rng.choice(n, size=min(n, nlist * 32), replace=False))
+        sample = np.asarray(embeddings[pick], dtype=np.float32)
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(self.train_iters):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            # Spherical k-means: re-normalize; reseed empty lists
+            sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]
+            norms = np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+            centroids = (sums / norms).astype(np.float32)
+        self.centroids = centroids
+        self.assign = self._nearest(embeddings, 0, n)
+        self.size = n
+        self.trained_size = n
+        self._rebuild_lists()
+
+    def _rebuild_lists(self) -> None:
+        self._order = np.argsort(self.assign, kind="stable")
+        self._bounds = np.searchsorted(self.assign[self._order], np.arange(self.centroids.shape[0] + 1))
+
+    def search(self, embeddings: np.ndarray, q: np.ndarray, k: int,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (rows, similarities) of the approximate top ``k``, best first."""
+        n = min(self.size, embeddings.shape[0])
+        if n == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        q = np.asarray(q, dtype=np.float32).reshape(-1)
+        if self.centroids is None:
+            rows = None if allowed is None else np.flatnonzero(allowed[:n])
+            sims = embeddings[:n] @ q if rows is None else embeddings[rows] @ q
+        else:
+            nprobe = min(self.nprobe, self.centroids.shape[0])
+            probe = np.argpartition(-(self.centroids @ q), nprobe - 1)[:nprobe]
+            # Sorted rows keep the gather from the memmap roughly sequential
+            rows = np.sort(np.concatenate([self._order[self._bounds[c]: self._bounds[c + 1]] for c in probe]))
+            if allowed is not None:
+                rows = rows[allowed[rows]]
+            sims = embeddings[rows] @ q
+        k = min(k, sims.shape[0])
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return (top if rows is None else rows[top]), sims[top]
+
+    def stats(self):
+        return {
+            "vectors": self.size,
+            "ivf_lists": 0 if self.centroids is None else int(self.centroids.shape[0]),
+            "trained_size": self.trained_size,
+            "nprobe": self.nprobe,
+        }
@@ -1,24 +1,31 @@
 import os
 import json
 import numpy as np
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from joblib import dump, load
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from .models import Document
-from .ranking import combine_scores
+from .ranking import combine_scores, reciprocal_rank_fusion
+from .ann import VectorIndex
 from config import (
     DATA_DIR,
     DOCS_PATH,
     TFIDF_PATH,
     EMB_PATH,
     META_PATH,
+    ANN_PATH,
     EMBEDDING_MODEL_NAME,
     DISABLE_EMBEDDINGS,
     NGRAM_RANGE,
     MIN_DF,
     MAX_FEATURES,
     STOP_WORDS,
+    SEARCH_CANDIDATES,
+    FUSION,
+    RRF_K,
+    ANN_IVF_MIN_VECTORS,
+    ANN_NLIST,
+    ANN_NPROBE,
 )
 
 class Indexer:
@@ -28,9 +35,14 @@ class Indexer:
         self.id_to_idx: Dict[str, int] = {}
         self.vectorizer: Optional[TfidfVectorizer] = None
         self.tfidf_matrix = None  # scipy sparse
+        self.postings = None  # CSC copy of tfidf_matrix: one column per term
+        self.doc_types = np.empty(0, dtype=object)
         self.emb_model = None
+        # float32, a read-only memmap of EMB_PATH unless emb_dirty
         self.embeddings: Optional[np.ndarray] = None
+        self.emb_dirty = False
         self.emb_ready = False
+        self.ann = VectorIndex(ANN_PATH, ivf_min_vectors=ANN_IVF_MIN_VECTORS, nlist=ANN_NLIST, nprobe=ANN_NPROBE)
         self.meta: Dict[str, Any] = {}
 
     def load(self):
@@ -45,13 +57,19 @@ class Indexer:
                 obj = load(TFIDF_PATH)
                 self.vectorizer = obj["vectorizer"]
                 self.tfidf_matrix = obj["matrix"]
+                self.postings = self.tfidf_matrix.tocsc()
             except Exception:
                 self.vectorizer = None
                 self.tfidf_matrix = None
-        # Load embeddings
+                self.postings = None
+        # Load embeddings (memory-mapped; pages are read on demand by the ANN index)
+        self.emb_dirty = False
         if os.path.exists(EMB_PATH):
             try:
-                self.embeddings = np.load(EMB_PATH)
+                self.embeddings = np.load(EMB_PATH, mmap_mode="r")
+                if self.embeddings.dtype != np.float32:
+                    self.embeddings = self.embeddings.astype(np.float32)
+                    self.emb_dirty = True
             except Exception:
                 self.embeddings = None
         # Load meta
@@ -69,6 +87,7 @@ class Indexer:
             self.emb_ready = False
         else:
             self.emb_ready = self.embeddings is not None
+        self.ann.load(self.embeddings)
 
     def save(self):
         # Save docs
@@ -78,15 +97,21 @@ class Indexer:
         # Save TF-IDF
         if self.vectorizer is not None and self.tfidf_matrix is not None:
             dump({"vectorizer": self.vectorizer, "matrix": self.tfidf_matrix}, TFIDF_PATH)
-        # Save embeddings
-        if self.embeddings is not None:
-            np.save(EMB_PATH, self.embeddings)
+        # Save embeddings; an unchanged memmap is already on disk
+        if self.embeddings is not None and self.emb_dirty:
+            tmp = EMB_PATH + ".tmp.npy"
+            np.save(tmp, self.embeddings)
+            os.replace(tmp, EMB_PATH)
+            self.embeddings = np.load(EMB_PATH, mmap_mode="r")
+            self.emb_dirty = False
+        self.ann.save()
         # Save meta
         with open(META_PATH, "w", encoding="utf-8") as f:
             json.dump(self.meta, f)
 
     def _rebuild_id_index(self):
         self.id_to_idx = {d.id: i for i, d in enumerate(self.docs)}
+        self.doc_types = np.array([d.source_type for d in self.docs], dtype=object)
 
     def _maybe_load_embedding_model(self):
         if DISABLE_EMBEDDINGS:
@@ -106,10 +131,13 @@ class Indexer:
         self._rebuild_id_index()
         self.vectorizer = None
         self.tfidf_matrix = None
+        self.postings = None
         self.embeddings = None
+        self.emb_dirty = False
         self.emb_ready = False
+        self.ann.reset()
         self.meta = {}
-        for p in [DOCS_PATH, TFIDF_PATH, EMB_PATH, META_PATH]:
+        for p in [DOCS_PATH, TFIDF_PATH, EMB_PATH, META_PATH, ANN_PATH]:
             try:
                 if os.path.exists(p):
                     os.remove(p)
@@ -132,6 +160,7 @@ class Indexer:
         if not self.docs:
             self.vectorizer = None
             self.tfidf_matrix = None
+            self.postings = None
             return
         texts = [d.content for d in self.docs]
         vec = TfidfVectorizer(
@@ -142,6 +171,7 @@ class Indexer:
             stop_words=STOP_WORDS,
         )
         self.tfidf_matrix = vec.fit_transform(texts)
+        self.postings = self.tfidf_matrix.tocsc()
         self.vectorizer = vec
 
     def ensure_embeddings(self, new_only: bool = False):
@@ -153,47 +183,76 @@ class Indexer:
         if not self.docs:
             self.embeddings = None
             self.emb_ready = False
+            self.ann.reset()
             return
         if self.embeddings is None or not new_only:
             texts = [d.content for d in self.docs]
             mat = self.emb_model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
-            self.embeddings = mat
+            self.embeddings = np.asarray(mat, dtype=np.float32)
+            self.emb_dirty = True
             self.emb_ready = True
+            self.ann.reset()
         else:
             # Append only for new docs
             cur_n = self.embeddings.shape[0]
             if cur_n < len(self.docs):
                 new_texts = [d.content for d in self.docs[cur_n:]]
                 mat = self.emb_model.encode(new_texts, convert_to_numpy=True, normalize_embeddings=True)
-                self.embeddings = np.vstack([self.embeddings, mat])
+                self.embeddings = np.vstack([self.embeddings, np.asarray(mat, dtype=np.float32)])
+                self.emb_dirty = True
                 self.emb_ready = True
+        self.ann.sync(self.embeddings)
 
-    def _lexical_scores(self, query: str, mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
-        if self.vectorizer is None or self.tfidf_matrix is None or not self.docs:
+    def _lexical_candidates(self, query: str, allowed: Optional[np.ndarray]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Cosine scores for every doc sharing a term with the query, as sorted (rows, scores).
+
+        Only the postings of the query's terms are touched, so the cost
+        follows their document frequency rather than the corpus size.
+        """
+        if self.vectorizer is None or self.postings is None or not self.docs:
             return None
         qv = self.vectorizer.transform([query])
-        sims = cosine_similarity(qv, self.tfidf_matrix)[0]
-        if mask is not None:
-            sims = sims * mask
-        return sims
+        if qv.nnz == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # TfidfVectorizer rows are L2-normalized, so the dot product is the cosine
+        indptr, indices, data = self.postings.indptr, self.postings.indices, self.postings.data
+        rows = np.concatenate([indices[indptr[t]: indptr[t + 1]] for t in qv.indices])
+        weights = np.concatenate([data[indptr[t]: indptr[t + 1]] * w for t, w in zip(qv.indices, qv.data)])
+        if rows.shape[0] * 8 > len(self.docs):
+            # Common terms touch a large share of the corpus; a dense accumulator beats sorting
+            dense = np.bincount(rows, weights=weights, minlength=len(self.docs))
+            rows = np.flatnonzero(dense)
+            scores = dense[rows]
+        else:
+            rows, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights, minlength=rows.shape[0])
+        if allowed is not None:
+            keep = allowed[rows]
+            rows, scores = rows[keep], scores[keep]
+        return rows, scores
 
-    def _semantic_scores(self, query: str, mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    def _query_embedding(self, query: str) -> Optional[np.ndarray]:
         if not self.emb_ready or self.embeddings is None or self.embeddings.shape[0] == 0:
             return None
         if self.emb_model is None:
             return None
         qv = self.emb_model.encode([query], convert_to_numpy=True, normalize_embeddings=True)[0]
-        sims = np.dot(self.embeddings, qv)
-        if mask is not None:
-            sims = sims * mask
-        return sims
+        return np.asarray(qv, dtype=np.float32)
 
-    def _make_mask(self, source_types: Optional[List[str]]) -> Optional[np.ndarray]:
+    def _allowed(self, source_types: Optional[List[str]]) -> Optional[np.ndarray]:
         if not source_types:
             return None
-        stypes = set([s.lower() for s in source_types])
-        mask = np.array([1.0 if (d.source_type in stypes) else 0.0 for d in self.docs], dtype=float)
-        return mask
+        stypes = [s.lower() for s in source_types]
+        return np.isin(self.doc_types, stypes)
+
+    @staticmethod
+    def _top(rows: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+        """Rows of the ``k`` best scores, best first."""
+        k = min(k, rows.shape[0])
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return rows[top[np.argsort(-scores[top], kind="stable")]]
 
     def search(
         self,
@@ -203,37 +262,65 @@ class Indexer:
         w_lex: float = 0.5,
         w_sem: float = 0.5,
         source_types: Optional[List[str]] = None,
+        fusion: Optional[str] = None,
     ) -> Dict[str, Any]:
         if not self.docs:
             return {"query": query, "total": 0, "results": []}
 
         mode = (mode or "hybrid").lower()
-        mask = self._make_mask(source_types)
+        fusion = (fusion or FUSION).lower()
+        allowed = self._allowed(source_types)
 
-        lex_scores = self._lexical_scores(query, mask) if mode in ("lexical", "hybrid") else None
-        sem_scores = self._semantic_scores(query, mask) if mode in ("semantic", "hybrid") else None
+        lex = self._lexical_candidates(query, allowed) if mode in ("lexical", "hybrid") else None
+        qv = self._query_embedding(query) if mode in ("semantic", "hybrid") else None
 
-        if mode == "lexical" and lex_scores is None:
+        if mode == "lexical" and lex is None:
             # Fall back to semantic
-            lex_scores = None
-            sem_scores = self._semantic_scores(query, mask)
-        if mode == "semantic" and sem_scores is None:
+            qv = self._query_embedding(query)
+        if mode == "semantic" and qv is None:
             # Fall back to lexical
-            sem_scores = None
-            lex_scores = self._lexical_scores(query, mask)
+            lex = self._lexical_candidates(query, allowed)
 
-        combo, lex_scaled, sem_scaled = combine_scores(lex_scores, sem_scores, w_lex=w_lex, w_sem=w_sem)
-        if combo.size == 0:
+        if lex is None and qv is None:
             # No scoring available
             return {"query": query, "total": 0, "results": []}
 
-        order = np.argsort(-combo)
+        # Each side nominates its own top candidates; only their union is scored
         top_k = max(1, min(top_k, len(self.docs)))
-        top_idx = order[:top_k]
+        n_cand = max(top_k, SEARCH_CANDIDATES)
+        lex_top = self._top(*lex, n_cand) if lex is not None else np.empty(0, dtype=np.int64)
+        sem_top = self.ann.search(self.embeddings, qv, n_cand, allowed)[0] if qv is not None else np.empty(0, dtype=np.int64)
+        union = np.union1d(lex_top, sem_top)
+        if union.size == 0:
+            return {"query": query, "total": len(self.docs), "mode": mode, "results": []}
+
+        lex_scores = sem_scores = None
+        if lex is not None:
+            lex_scores = np.zeros(union.shape[0])
+            if lex[0].size:
+                pos = np.minimum(np.searchsorted(lex[0], union), lex[0].shape[0] - 1)
+                hit = lex[0][pos] == union
+                lex_scores[hit] = lex[1][pos[hit]]
+        if qv is not None:
+            sem_scores = np.asarray(self.embeddings[union] @ qv, dtype=np.float64)
+
+        combo, lex_scaled, sem_scaled = combine_scores(lex_scores, sem_scores, w_lex=w_lex, w_sem=w_sem)
+        if fusion == "rrf":
+            ranks = []
+            for top in (lex_top if lex is not None else None, sem_top if qv is not None else None):
+                if top is None:
+                    ranks.append(None)
+                    continue
+                r = np.full(union.shape[0], -1)
+                r[np.searchsorted(union, top)] = np.arange(top.shape[0])
+                ranks.append(r)
+            combo = reciprocal_rank_fusion(ranks, (w_lex, w_sem), union.shape[0], k=RRF_K)
+
+        order = np.argsort(-combo, kind="stable")[:top_k]
 
         results = []
-        for i in top_idx:
-            d = self.docs[int(i)]
+        for i in order:
+            d = self.docs[int(union[i])]
             results.append({
                 "id": d.id,
                 "title": d.title,
@@ -253,6 +340,7 @@ class Indexer:
             "total": len(self.docs),
             "mode": mode,
             "weights": {"lexical": w_lex, "semantic": w_sem},
+            "fusion": fusion,
             "filtered_types": source_types or [],
             "results": results,
         }
@@ -295,5 +383,6 @@ class Indexer:
             "embeddings_ready": self.emb_ready,
             "embedding_model": EMBEDDING_MODEL_NAME if self.emb_model is not None else None,
             "lexical_ready": self.vectorizer is not None and self.tfidf_matrix is not None,
+            "ann": self.ann.stats(),
         }
 
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple
 
 
 def _min_max_scale(x: np.ndarray) -> np.ndarray:
@@ -37,3 +37,23 @@ def combine_scores(
     combo = wl * lex_s + ws * sem_s
     return combo, lex_s, sem_s
 
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Optional[np.ndarray]],
+    weights: Sequence[float],
+    n: int,
+    k: int = 60,
+) -> np.ndarray:
+    """Weighted RRF over candidate lists.
+
+    ``rankings`` holds, per retriever, the 0-based rank of each of the ``n``
+    fused candidates in that retriever's list (-1 when it did not return it).
+    """
+    total_w = max(sum(weights), 1e-9)
+    combo = np.zeros(n)
+    for ranks, w in zip(rankings, weights):
+        if ranks is None:
+            continue
+        hit = ranks >= 0
+        combo[hit] += (w / total_w) / (k + ranks[hit] + 1)
+    return combo
@@ -6,8 +6,8 @@ import os
 import json
 from datetime import datetime
 from flask import Flask, request, jsonify
-from db import get_db, close_db, init_db, row_to_dict
-from search import search_snippets
+from db import get_db, close_db, init_db, row_to_dict, set_snippet_tags
+from search import search_snippets, search_page
 
 
 def create_app():
@@ -128,6 +128,7 @@ def create_app():
             )
         )
         snippet_id = cur.lastrowid
+        set_snippet_tags(cur, snippet_id, data.get('tags', []))
         # Update FTS
         cur.execute(
             'INSERT INTO snippets_fts(rowid, title, content, tags, language, framework, file_path, symbol, project) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
@@ -170,7 +171,7 @@ def create_app():
             where.append('framework = ?')
             params.append(framework)
         if tag:
-            where.append("EXISTS (SELECT 1 FROM json_each(snippets.tags) je WHERE je.value = ?)")
+            where.append('id IN (SELECT snippet_id FROM snippet_tags WHERE tag = ?)')
             params.append(tag)
         if pinned is not None:
             if pinned.lower() in ('1','true','yes'):
@@ -251,6 +252,8 @@ def create_app():
         params.append(snippet_id)
         sql = f"UPDATE snippets SET {', '.join(updates)} WHERE id=?"
         cur.execute(sql, tuple(params))
+        if 'tags' in data:
+            set_snippet_tags(cur, snippet_id, data['tags'])
 
         # Sync FTS row
         cur.execute('SELECT * FROM snippets WHERE id=?', (snippet_id,))
@@ -318,6 +321,7 @@ def create_app():
                 )
             )
             sid = cur.lastrowid
+            set_snippet_tags(cur, sid, data.get('tags', []))
             cur.execute(
                 'INSERT INTO snippets_fts(rowid, title, content, tags, language, framework, file_path, symbol, project) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
                 (
@@ -348,17 +352,31 @@ def create_app():
         tag = args.get('tag')
         file_path = args.get('file_path')
         symbol = args.get('symbol')
+        filters = {
+            'language': language,
+            'project': project,
+            'framework': framework,
+            'tag': tag,
+            'file_path': file_path,
+            'symbol': symbol,
+        }
+        if 'cursor' in args:
+            # Keyset pagination: ?cursor= for the first page, then next_cursor
+            try:
+                page = search_page(
+                    db_path=app.config['SNIPPETS_DB'],
+                    q=q,
+                    filters=filters,
+                    limit=limit,
+                    cursor=args.get('cursor') or None,
+                )
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            return jsonify(page)
         results = search_snippets(
             db_path=app.config['SNIPPETS_DB'],
             q=q,
-            filters={
-                'language': language,
-                'project': project,
-                'framework': framework,
-                'tag': tag,
-                'file_path': file_path,
-                'symbol': symbol,
-            },
+            filters=filters,
             limit=limit,
             offset=offset
         )
@@ -418,17 +436,8 @@ def create_app():
     def list_tags():
         db = get_db(app.config['SNIPPETS_DB'])
         cur = db.cursor()
-        cur.execute('SELECT tags FROM snippets WHERE tags IS NOT NULL')
-        tags_map = {}
-        for (tags_json,) in cur.fetchall():
-            try:
-                tags = json.loads(tags_json) if tags_json else []
-                for t in tags:
-                    tags_map[t] = tags_map.get(t, 0) + 1
-            except Exception:
-                pass
-        items = [{"tag": k, "count": v} for k, v in sorted(tags_map.items(), key=lambda x: (-x[1], x[0]))]
-        return jsonify(items)
+        cur.execute('SELECT tag, COUNT(*) AS count FROM snippet_tags GROUP BY tag ORDER BY count DESC, tag ASC')
+        return jsonify(cur.fetchall())
 
     return app
 
@@ -0,0 +1,197 @@
+"""
+Concurrent read/write load test for snippet search.
+
+Builds (or reuses) a SQLite database with --snippets synthetic snippets,
+then for a fixed duration runs --readers search threads against it while
+--writers threads keep re-tagging and touching snippets through their
+own WAL connections. Two read paths are compared:
+
+  legacy  what search_snippets did before: a fresh sqlite3.connect per
+          search, a Python row factory, json_each tag filters and
+          LIMIT/OFFSET paging
+  pooled  search.search_snippets / search.search_page: pooled read-only
+          connections, cached statements, snippet_tags and keyset pages
+
+The query mix is full-text queries, tag-filtered listings and deep page
+walks (pages 1-20 by offset vs by cursor). Reports read QPS, read p50/p95
+and write ops/s per path.
+
+    python bench_load.py --snippets 1000000 --readers 8 --writers 2 --duration 20
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from db import init_db, set_snippet_tags
+from search import search_page, search_snippets
+
+WORDS = [
+    "flask", "django", "route", "query", "index", "async", "cache", "token", "session", "config",
+    "logging", "docker", "deploy", "pytest", "fixture", "migration", "schema", "pandas", "numpy",
+    "thread", "pool", "retry", "timeout", "socket", "stream", "parser", "render", "template",
+]
+TAGS = [f"tag{i}" for i in range(200)]
+LANGS = ["python", "javascript", "go", "rust", "java"]
+IDENTS = 20000
+
+
+def populate(path, n, seed=0):
+    init_db(path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    have = conn.execute("SELECT COUNT(*) FROM snippets").fetchone()[0]
+    batch = 20000
+    for lo in range(have, n, batch):
+        rows, fts, tags = [], [], []
+        for i in range(lo, min(n, lo + batch)):
+            words = " ".join([rng.choice(WORDS) for _ in range(8)] + [f"sym{rng.randrange(IDENTS)}" for _ in range(4)])
+            t = rng.sample(TAGS[: 20 + (i % 180)], 3)
+            lang = rng.choice(LANGS)
+            ts = f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T00:00:{i % 60:02d}Z"
+            rows.append((i + 1, f"snippet {i}", words, json.dumps(t), lang, None, None, f"src/m{i % 500}.py",
+                         None, f"p{i % 50}", int(i % 97 == 0), ts, ts))
+            fts.append((i + 1, f"snippet {i}", words, " ".join(t), lang, "", f"src/m{i % 500}.py", "", f"p{i % 50}"))
+            tags.extend((tag, i + 1) for tag in t)
+        conn.executemany("INSERT INTO snippets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO snippets_fts(rowid, title, content, tags, language, framework, file_path, symbol, project)"
+                         " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", fts)
+        conn.executemany("INSERT OR IGNORE INTO snippet_tags (tag, snippet_id) VALUES (?, ?)", tags)
+        conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+def _dict_factory(cursor, row):
+    d = {}
+    for idx, col in enumerate(cursor.description):
+        d[col[0]] = row[idx]
+    return d
+
+
+def legacy_search(db_path, q, filters, limit, offset):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = _dict_factory
+    params = []
+    if q:
+        sql = "SELECT s.*, bm25(snippets_fts) as rank FROM snippets_fts JOIN snippets s ON s.id = snippets_fts.rowid"
+        where = ["snippets_fts MATCH ?"]
+        params.append(" AND ".join('"%s"' % t for t in q.split()))
+    else:
+        sql = "SELECT s.*, 0.0 as rank FROM snippets s"
+        where = []
+    if filters.get("language"):
+        where.append("s.language = ?")
+        params.append(filters["language"])
+    if filters.get("tag"):
+        where.append("EXISTS (SELECT 1 FROM json_each(s.tags) je WHERE je.value = ?)")
+        params.append(filters["tag"])
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY rank ASC, s.pinned DESC, s.updated_at DESC" if q else " ORDER BY s.pinned DESC, s.updated_at DESC"
+    sql += " LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    for r in rows:
+        r["tags"] = json.loads(r["tags"] or "[]")
+        r["pinned"] = bool(r["pinned"])
+    return rows
+
+
+def workload(rng):
+    kind = rng.random()
+    if kind < 0.5:
+        return "fts", f"{rng.choice(WORDS)} sym{rng.randrange(IDENTS)}", {"language": rng.choice(LANGS)}
+    if kind < 0.85:
+        return "tag", "", {"tag": rng.choice(TAGS[100:])}
+    return "deep", "", {"tag": rng.choice(TAGS[:20])}
+
+
+def reader(path_name, db_path, stop, latencies, seed, limit=20, deep_pages=20):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        kind, q, filters = workload(rng)
+        t0 = time.perf_counter()
+        if kind != "deep":
+            if path_name == "legacy":
+                legacy_search(db_path, q, filters, limit, 0)
+            else:
+                search_snippets(db_path, q, filters, limit, 0)
+        elif path_name == "legacy":
+            for page in range(deep_pages):
+                if len(legacy_search(db_path, q, filters, limit, page * limit)) < limit:
+                    break
+        else:
+            cursor = None
+            for _ in range(deep_pages):
+                cursor = search_page(db_path, q, filters, limit, cursor)["next_cursor"]
+                if cursor is None:
+                    break
+        latencies.append(time.perf_counter() - t0)
+
+
+def writer(db_path, stop, counter, seed, max_id):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA foreign_keys = ON")
+    while not stop.is_set():
+        cur = conn.cursor()
+        sid = rng.randrange(1, max_id)
+        tags = rng.sample(TAGS, 3)
+        ts = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        cur.execute("UPDATE snippets SET tags=?, updated_at=? WHERE id=?", (json.dumps(tags), ts, sid))
+        set_snippet_tags(cur, sid, tags)
+        conn.commit()
+        counter.append(1)
+    conn.close()
+
+
+def run(path_name, args):
+    stop = threading.Event()
+    latencies, writes = [], []
+    threads = [threading.Thread(target=reader, args=(path_name, args.db, stop, latencies, i)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(args.db, stop, writes, 1000 + i, args.snippets)) for i in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return {
+        "read_qps": round(len(latencies) / args.duration, 1),
+        "read_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "read_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+        "write_ops_per_sec": round(len(writes) / args.duration, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench_snippets.db")
+    parser.add_argument("--snippets", type=int, default=1000000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--paths", nargs="+", default=["legacy", "pooled"])
+    args = parser.parse_args()
+    os.environ.setdefault("SNIPPETS_READ_POOL_SIZE", str(args.readers))
+
+    t0 = time.perf_counter()
+    populate(args.db, args.snippets)
+    print(f"database ready in {time.perf_counter() - t0:.1f}s", flush=True)
+    print(json.dumps({name: run(name, args) for name in args.paths}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
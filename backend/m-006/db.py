@@ -1,10 +1,14 @@
 import os
+import queue
 import sqlite3
 import threading
 import json
+from contextlib import contextmanager
 from flask import g
 
 _db_lock = threading.Lock()
+_pools = {}
+_pools_lock = threading.Lock()
 
 
 def dict_factory(cursor, row):
@@ -68,10 +72,124 @@ def init_db(db_path):
         conn.execute('CREATE INDEX IF NOT EXISTS idx_snippets_project ON snippets(project)')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_snippets_framework ON snippets(framework)')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_snippets_pinned ON snippets(pinned)')
+        # Default listing order; lets keyset pages seek instead of sort
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_snippets_order ON snippets(pinned DESC, updated_at DESC, id DESC)')
+        # Normalized tags replace json_each scans over snippets.tags
+        has_tags = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='snippet_tags'"
+        ).fetchone()
+        conn.execute(
+            '''CREATE TABLE IF NOT EXISTS snippet_tags (
+                   tag TEXT NOT NULL,
+                   snippet_id INTEGER NOT NULL REFERENCES snippets(id) ON DELETE CASCADE,
+                   PRIMARY KEY (tag, snippet_id)
+               ) WITHOUT ROWID'''
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_snippet_tags_snippet ON snippet_tags(snippet_id)')
+        if not has_tags:
+            # Backfill from the JSON column of an existing database
+            conn.execute(
+                '''INSERT OR IGNORE INTO snippet_tags (tag, snippet_id)
+                   SELECT CAST(je.value AS TEXT), s.id FROM snippets s, json_each(s.tags) je
+                   WHERE json_valid(s.tags)'''
+            )
         conn.commit()
         conn.close()
 
 
+def set_snippet_tags(cur, snippet_id, tags):
+    cur.execute('DELETE FROM snippet_tags WHERE snippet_id=?', (snippet_id,))
+    cur.executemany(
+        'INSERT OR IGNORE INTO snippet_tags (tag, snippet_id) VALUES (?, ?)',
+        [(str(t), snippet_id) for t in (tags or [])],
+    )
+
+
+class ReadPool:
+    """Bounded pool of read-only connections for search traffic.
+
+    Connections are opened lazily up to ``size``; callers block when all are
+    checked out. Each connection keeps sqlite3's own LRU of prepared
+    statements (``cached_statements``), so reusing the same SQL text for a
+    filter combination skips re-compilation.
+    """
+
+    def __init__(self, db_path, size=8, cached_statements=128, timeout=30.0):
+        self.db_path = db_path
+        self.size = size
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            timeout=self.timeout,
+        )
+        conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        return self._idle.get(timeout=self.timeout)
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        healthy = True
+        try:
+            yield conn
+        except (sqlite3.ProgrammingError, sqlite3.InterfaceError):
+            # Don't hand a possibly broken connection to the next caller
+            healthy = False
+            raise
+        finally:
+            if healthy:
+                self._idle.put(conn)
+            else:
+                conn.close()
+                with self._lock:
+                    self._opened -= 1
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._opened -= 1
+
+
+def get_read_pool(db_path, size=None, cached_statements=None):
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db_path)
+            if pool is None:
+                pool = _pools[db_path] = ReadPool(
+                    db_path,
+                    size=size or int(os.environ.get('SNIPPETS_READ_POOL_SIZE', 8)),
+                    cached_statements=cached_statements or int(os.environ.get('SNIPPETS_STATEMENT_CACHE', 128)),
+                )
+    return pool
+
+
 def row_to_dict(row):
     if row is None:
         return None
@@ -1,91 +1,143 @@
-import sqlite3
+import base64
 import json
-from typing import Dict, List
-
-
-def _dict_factory(cursor, row):
-    d = {}
-    for idx, col in enumerate(cursor.description):
-        d[col[0]] = row[idx]
-    return d
-
-
-def search_snippets(db_path: str, q: str, filters: Dict, limit: int, offset: int) -> List[dict]:
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = _dict_factory
-    cur = conn.cursor()
-
-    # If no query provided, fall back to filtering only
-    base_select = 'SELECT s.*, 0.0 as rank FROM snippets s'
-    params = []
-
-    if q:
-        # Use FTS5 search with bm25 ranking
-        select = 'SELECT s.*, bm25(f) as rank FROM snippets_fts f JOIN snippets s ON s.id = f.rowid'
-        where = ['f MATCH ?']
-        # Build FTS query: escape quotes
-        fts_q = _build_fts_query(q)
-        params.append(fts_q)
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from db import get_read_pool
+
+COLUMNS = (
+    'id', 'title', 'content', 'tags', 'language', 'framework', 'source',
+    'file_path', 'symbol', 'project', 'pinned', 'created_at', 'updated_at',
+)
+
+# filter name -> (SQL predicate, param transform)
+FILTERS = {
+    'language': ('s.language = ?', None),
+    'project': ('s.project = ?', None),
+    'framework': ('s.framework = ?', None),
+    # partial match helpful
+    'file_path': ('s.file_path LIKE ?', lambda v: f"%{v}%"),
+    'symbol': ('s.symbol = ?', None),
+    'tag': ('s.id IN (SELECT snippet_id FROM snippet_tags WHERE tag = ?)', None),
+}
+
+# For common tags it is cheaper to walk idx_snippets_order and probe
+# snippet_tags per row than to collect and sort every tagged row.
+TAG_PROBE = 'EXISTS (SELECT 1 FROM snippet_tags t WHERE t.tag = ? AND t.snippet_id = s.id)'
+COMMON_TAG_ROWS = 1000
+_TAG_COUNT = 'SELECT COUNT(*) FROM (SELECT 1 FROM snippet_tags WHERE tag = ? LIMIT ?)'
+
+
+@lru_cache(maxsize=256)
+def _compile(has_q: bool, filter_keys: Tuple[str, ...], keyset: bool, tag_probe: bool = False) -> str:
+    """SQL text for one filter combination.
+
+    The text is cached so every request with the same shape sends identical
+    SQL, which is what lets each pooled connection's statement cache reuse
+    the prepared statement.
+    """
+    cols = ', '.join('s.' + c for c in COLUMNS)
+    if has_q:
+        # FTS5 search with bm25 ranking
+        # (an aliased FTS5 table can't be the left side of MATCH, so no alias here)
+        sql = f'SELECT {cols}, bm25(snippets_fts) AS rank FROM snippets_fts JOIN snippets s ON s.id = snippets_fts.rowid'
+        where = ['snippets_fts MATCH ?']
+        # rank ASC then the rest DESC, i.e. the tuple below in descending order
+        key = '(-bm25(snippets_fts), s.pinned, s.updated_at, s.id) < (?, ?, ?, ?)'
+        order = ' ORDER BY rank ASC, s.pinned DESC, s.updated_at DESC, s.id DESC'
     else:
-        select = base_select
+        # If no query provided, fall back to filtering only
+        sql = f'SELECT {cols}, 0.0 AS rank FROM snippets s'
         where = []
-
-    # Apply filters (on real table s)
-    if filters:
-        if filters.get('language'):
-            where.append('s.language = ?')
-            params.append(filters['language'])
-        if filters.get('project'):
-            where.append('s.project = ?')
-            params.append(filters['project'])
-        if filters.get('framework'):
-            where.append('s.framework = ?')
-            params.append(filters['framework'])
-        if filters.get('file_path'):
-            # partial match helpful
-            where.append('s.file_path LIKE ?')
-            params.append(f"%{filters['file_path']}%")
-        if filters.get('symbol'):
-            where.append('s.symbol = ?')
-            params.append(filters['symbol'])
-        if filters.get('tag'):
-            where.append("EXISTS (SELECT 1 FROM json_each(s.tags) je WHERE je.value = ?)")
-            params.append(filters['tag'])
-
-    sql = select
+        key = '(s.pinned, s.updated_at, s.id) < (?, ?, ?)'
+        order = ' ORDER BY s.pinned DESC, s.updated_at DESC, s.id DESC'
+    where.extend(TAG_PROBE if k == 'tag' and tag_probe else FILTERS[k][0] for k in filter_keys)
+    if keyset:
+        where.append(key)
     if where:
         sql += ' WHERE ' + ' AND '.join(where)
-
-    if q:
-        sql += ' ORDER BY rank ASC, s.pinned DESC, s.updated_at DESC'
+    sql += order
+    sql += ' LIMIT ?' if keyset else ' LIMIT ? OFFSET ?'
+    return sql
+
+
+def _query(db_path: str, q: str, filters: Optional[Dict], limit: int,
+           offset: int = 0, after: Optional[list] = None) -> List[dict]:
+    fts_q = _build_fts_query(q) if q else ''
+    params = [fts_q] if fts_q else []
+    keys = []
+    for k, (_, transform) in FILTERS.items():
+        value = (filters or {}).get(k)
+        if value:
+            keys.append(k)
+            params.append(transform(value) if transform else value)
+    if after is not None:
+        params.extend(after)
+        params.append(limit)
     else:
-        sql += ' ORDER BY s.pinned DESC, s.updated_at DESC'
-
-    sql += ' LIMIT ? OFFSET ?'
-    params.extend([limit, offset])
+        params.extend([limit, offset])
 
-    cur.execute(sql, tuple(params))
-    rows = cur.fetchall()
-    conn.close()
+    with get_read_pool(db_path).connection() as conn:
+        tag_probe = False
+        if 'tag' in keys and not fts_q:
+            tagged = conn.execute(_TAG_COUNT, (filters['tag'], COMMON_TAG_ROWS)).fetchone()[0]
+            tag_probe = tagged >= COMMON_TAG_ROWS
+        sql = _compile(bool(fts_q), tuple(keys), after is not None, tag_probe)
+        rows = conn.execute(sql, params).fetchall()
 
     # Normalize tags to list and pinned to bool
     results = []
     for r in rows:
-        item = dict(r)
+        item = dict(zip(COLUMNS, r))
         try:
-            item['tags'] = json.loads(item.get('tags') or '[]')
+            item['tags'] = json.loads(item['tags'] or '[]')
         except Exception:
             item['tags'] = []
-        item['pinned'] = bool(item.get('pinned', 0))
+        item['pinned'] = bool(item['pinned'])
         # rank may be None; ensure float
-        try:
-            item['rank'] = float(item.get('rank', 0.0))
-        except Exception:
-            item['rank'] = 0.0
+        item['rank'] = float(r[-1] or 0.0)
         results.append(item)
     return results
 
 
+def search_snippets(db_path: str, q: str, filters: Dict, limit: int, offset: int) -> List[dict]:
+    return _query(db_path, q, filters, limit, offset=offset)
+
+
+def search_page(db_path: str, q: str, filters: Dict, limit: int, cursor: Optional[str] = None) -> Dict:
+    """One keyset-paginated page: ``{"results": [...], "next_cursor": str | None}``.
+
+    The cursor encodes the sort key of the last row, so deep pages cost the
+    same as the first instead of skipping ``offset`` rows. Raises ValueError
+    for a malformed cursor.
+    """
+    has_q = bool(_build_fts_query(q)) if q else False
+    after = _decode_cursor(cursor, 4 if has_q else 3) if cursor else None
+    results = _query(db_path, q, filters, limit, after=after)
+    next_cursor = None
+    if len(results) == limit:
+        last = results[-1]
+        key = [int(last['pinned']), last['updated_at'], last['id']]
+        if has_q:
+            key.insert(0, -last['rank'])
+        next_cursor = _encode_cursor(key)
+    return {"results": results, "next_cursor": next_cursor}
+
+
+def _encode_cursor(key: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str, width: int) -> list:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError('invalid cursor')
+    if not isinstance(key, list) or len(key) != width:
+        raise ValueError('invalid cursor')
+    return key
+
+
 def _sanitize_token(token: str) -> str:
     # Remove characters problematic for FTS query
     t = token.strip().replace('"', ' ').replace("'", ' ')
@@ -101,4 +153,3 @@ def _build_fts_query(q: str) -> str:
     # Quote tokens and use AND operator to improve precision
     quoted = ['"%s"' % t for t in tokens if t]
     return ' AND '.join(quoted)
-
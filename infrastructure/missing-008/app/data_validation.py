@@ -1,7 +1,18 @@
 import re
-from typing import Dict, Tuple, Set, Any
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - regex checks fall back to Python's re
+    pa = None
+    pc = None
+
+from app.unique_index import HashedUniqueSet, hash_values
+
 
 DTYPE_CASTERS = {
     "int": lambda s: pd.to_numeric(s, errors="coerce").astype("Int64"),
@@ -28,8 +39,50 @@ def coerce_dtypes(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
     return df
 
 
-def validate_chunk(df: pd.DataFrame, schema: Dict[str, Any], unique_state: Dict[str, Set[Any]]) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Set[Any]]]:
-    required = set(schema.get("required_columns", []))
+def _mask(values) -> np.ndarray:
+    # Comparisons on nullable columns leave <NA> where the value is missing: not an error
+    if isinstance(values, pd.Series):
+        values = values.fillna(False) if values.hasnans else values
+        return values.to_numpy(dtype=bool)
+    return np.asarray(values, dtype=bool)
+
+
+def regex_mismatch(series: pd.Series, pattern: str) -> np.ndarray:
+    """Non-null values that do not ``re.match`` ``pattern``.
+
+    ASCII values without newlines are matched by pyarrow's RE2 in one
+    vectorized call; the rest, and patterns RE2 cannot compile, go through
+    Python's ``re`` (whose \\d, \\w and $ differ from RE2's on such values).
+    """
+    compiled = re.compile(pattern)
+    notna = series.notna().to_numpy(dtype=bool)
+    text = series.astype(str)
+    matched = np.ones(len(series), dtype=bool)
+    slow = notna.copy()
+    if pa is not None and notna.any():
+        try:
+            arr = pa.array(text.to_numpy(dtype=object)[notna], type=pa.large_string())
+            fast = pc.and_(pc.string_is_ascii(arr), pc.invert(pc.match_substring(arr, "\n")))
+            hit = pc.match_substring_regex(arr, f"^(?:{pattern})")
+            fast_np = fast.to_numpy(zero_copy_only=False)
+            idx = np.flatnonzero(notna)
+            matched[idx[fast_np]] = hit.to_numpy(zero_copy_only=False)[fast_np]
+            slow[idx[fast_np]] = False
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+    if slow.any():
+        matched[slow] = text[slow].str.match(compiled).to_numpy(dtype=bool)
+    return notna & ~matched
+
+
+def validate_chunk(df: pd.DataFrame, schema: Dict[str, Any], unique_state: Dict[str, HashedUniqueSet]) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, HashedUniqueSet]]:
+    """Split ``df`` into clean rows and rows with an ``__errors`` column.
+
+    Every check produces one boolean mask; messages are only assembled for
+    the rows that failed. ``unique_state`` maps each unique column to the
+    HashedUniqueSet of values seen in earlier chunks (created on first use).
+    """
+    required = list(dict.fromkeys(schema.get("required_columns", [])))
     dtypes = schema.get("dtypes", {})
     constraints = schema.get("constraints", {})
     unique_cols = schema.get("unique", [])
@@ -38,8 +91,6 @@ def validate_chunk(df: pd.DataFrame, schema: Dict[str, Any], unique_state: Dict[
     if dtypes:
         df = coerce_dtypes(df, dtypes)
 
-    errors = []
-
     # Missing required columns (file-level)
     missing_cols = [c for c in required if c not in df.columns]
     if missing_cols:
@@ -48,14 +99,11 @@ def validate_chunk(df: pd.DataFrame, schema: Dict[str, Any], unique_state: Dict[
         err_df["__errors"] = f"Missing required columns: {','.join(missing_cols)}"
         return pd.DataFrame(columns=df.columns), err_df, unique_state
 
-    # Row-level validation
-    error_messages = pd.Series(["" for _ in range(len(df))], index=df.index, dtype="object")
+    checks: List[Tuple[np.ndarray, str]] = []
 
     # Required not-null
     for col in required:
-        mask = df[col].isna()
-        if mask.any():
-            error_messages.loc[mask] = (error_messages.loc[mask] + ("; " if error_messages.loc[mask].astype(bool).any() else "") + f"{col} is required")
+        checks.append((_mask(df[col].isna()), f"{col} is required"))
 
     # Numeric min/max and regex
     for col, rules in constraints.items():
@@ -64,20 +112,12 @@ def validate_chunk(df: pd.DataFrame, schema: Dict[str, Any], unique_state: Dict[
         series = df[col]
         if series.dtype.kind in {"i", "u", "f", "M"} or (str(series.dtype).startswith("Int") or str(series.dtype).startswith("Float")):
             if "min" in rules:
-                mask = series < rules["min"]
-                if mask.any():
-                    error_messages.loc[mask] = (error_messages.loc[mask] + ("; " if error_messages.loc[mask].astype(bool).any() else "") + f"{col} < {rules['min']}")
+                checks.append((_mask(series < rules["min"]), f"{col} < {rules['min']}"))
             if "max" in rules:
-                mask = series > rules["max"]
-                if mask.any():
-                    error_messages.loc[mask] = (error_messages.loc[mask] + ("; " if error_messages.loc[mask].astype(bool).any() else "") + f"{col} > {rules['max']}")
+                checks.append((_mask(series > rules["max"]), f"{col} > {rules['max']}"))
         if "regex" in rules:
             try:
-                pattern = re.compile(rules["regex"])  # type: ignore
-                mask = ~df[col].astype(str).str.match(pattern)
-                mask = mask & df[col].notna()
-                if mask.any():
-                    error_messages.loc[mask] = (error_messages.loc[mask] + ("; " if error_messages.loc[mask].astype(bool).any() else "") + f"{col} regex mismatch")
+                checks.append((regex_mismatch(series, rules["regex"]), f"{col} regex mismatch"))
             except re.error:
                 pass
 
@@ -85,27 +125,27 @@ def validate_chunk(df: pd.DataFrame, schema: Dict[str, Any], unique_state: Dict[
     for col in unique_cols:
         if col not in df.columns:
             continue
-        seen = unique_state.setdefault(col, set())
-        duplicated_within = df[col].duplicated(keep=False)
-        if duplicated_within.any():
-            mask = duplicated_within
-            error_messages.loc[mask] = (error_messages.loc[mask] + ("; " if error_messages.loc[mask].astype(bool).any() else "") + f"{col} duplicate in chunk")
-        # across chunks
-        mask_dup_across = df[col].isin(seen)
-        if mask_dup_across.any():
-            error_messages.loc[mask_dup_across] = (error_messages.loc[mask_dup_across] + ("; " if error_messages.loc[mask_dup_across].astype(bool).any() else "") + f"{col} duplicate across chunks")
-        # update seen with non-null values
-        new_values = df.loc[df[col].notna(), col].tolist()
-        for v in new_values:
-            seen.add(v)
-        unique_state[col] = seen
-
-    invalid_mask = error_messages.astype(bool)
+        seen = unique_state.get(col)
+        if seen is None:
+            seen = unique_state[col] = HashedUniqueSet()
+        checks.append((_mask(df[col].duplicated(keep=False)), f"{col} duplicate in chunk"))
+        # across chunks; every non-null value is remembered, valid row or not
+        notna = _mask(df[col].notna())
+        across = np.zeros(len(df), dtype=bool)
+        across[notna] = seen.add(hash_values(df[col][notna]))
+        checks.append((across, f"{col} duplicate across chunks"))
+
+    checks = [(mask, message) for mask, message in checks if mask.any()]
+    invalid_mask = np.zeros(len(df), dtype=bool)
+    for mask, _ in checks:
+        invalid_mask |= mask
+
     errors_df = df.loc[invalid_mask].copy()
     if not errors_df.empty:
-        errors_df["__errors"] = error_messages.loc[invalid_mask].values
+        failed = np.column_stack([mask[invalid_mask] for mask, _ in checks])
+        messages = [message for _, message in checks]
+        errors_df["__errors"] = ["; ".join(m for m, hit in zip(messages, row) if hit) for row in failed]
 
     clean_df = df.loc[~invalid_mask].copy()
 
     return clean_df, errors_df, unique_state
-
@@ -0,0 +1,199 @@
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from app.data_validation import validate_chunk
+from app.io_utils import (
+    detect_format,
+    get_writer,
+    normalize_output_path,
+    ensure_dir,
+    read_chunks_with_position,
+)
+from app.unique_index import HashedUniqueSet
+
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def _put(q: "queue.Queue", item, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def prefetch(items: Iterable, depth: int) -> Iterator:
+    """Iterate ``items`` in a background thread, at most ``depth`` ahead."""
+    q: "queue.Queue" = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                if not _put(q, item, stop):
+                    return
+            _put(q, _DONE, stop)
+        except BaseException as e:
+            _put(q, _Failed(e), stop)
+        finally:
+            # Release the source (open file) from the thread that iterated it
+            close = getattr(items, "close", None)
+            if close:
+                close()
+
+    thread = threading.Thread(target=produce, name="import-reader", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class _WriterThread(threading.Thread):
+    """Runs submitted writes in order, at most ``depth`` behind the caller."""
+
+    def __init__(self, depth: int):
+        super().__init__(name="import-writer", daemon=True)
+        self._q: "queue.Queue" = queue.Queue(maxsize=max(1, depth))
+        self._stop_event = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.start()
+
+    def submit(self, fn: Callable, *args):
+        if self.error is not None:
+            raise self.error
+        _put(self._q, (fn, args), self._stop_event)
+
+    def run(self):
+        while True:
+            item = self._q.get()
+            if item is _DONE:
+                return
+            if self.error is not None:
+                continue
+            fn, args = item
+            try:
+                fn(*args)
+            except BaseException as e:
+                self.error = e
+
+    def close(self, abort: bool = False):
+        if abort:
+            self._stop_event.set()
+            self.error = self.error or RuntimeError("import aborted")
+        self._q.put(_DONE)
+        self.join()
+        if self.error is not None and not abort:
+            raise self.error
+
+
+def run_import(file_path: str, dest_dir: Optional[str] = None, schema: Optional[Dict[str, Any]] = None,
+               options: Optional[Dict[str, Any]] = None,
+               progress: Optional[Callable[..., Any]] = None) -> Dict[str, Any]:
+    """Validate ``file_path`` into clean and error outputs under ``dest_dir``.
+
+    Reading/parsing, validation and writing run as overlapping stages:
+    a reader thread parses up to ``pipeline_depth`` chunks ahead, the
+    caller's thread validates, and a writer thread appends the results.
+    ``progress(current, total, message=..., extra=...)`` is called per
+    chunk; total is estimated from the bytes read so far.
+    """
+    options = options or {}
+    schema = schema or {}
+    chunk_size = int(options.get("chunk_size", os.getenv("CHUNK_SIZE", 50000)))
+    depth = int(options.get("pipeline_depth", os.getenv("IMPORT_PIPELINE_DEPTH", 2)))
+    output_format = options.get("output_format", "csv")
+    json_array_pointer = options.get("json_array_pointer", "item")
+    progress = progress or (lambda *a, **k: None)
+
+    input_format = detect_format(file_path)
+
+    if dest_dir is None:
+        dest_dir = os.getenv("TASK_OUTPUT_DIR", "./output")
+    ensure_dir(os.path.join(dest_dir, "_"))
+
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    clean_output = normalize_output_path(os.path.join(dest_dir, f"{base_name}_clean"), output_format)
+    error_output_csv = os.path.join(dest_dir, f"{base_name}_errors.csv")
+
+    processed = 0
+    valid_rows = 0
+    invalid_rows = 0
+    header_written_clean = False
+    header_written_errors = False
+    sample_errors = []
+
+    # Hashes of unique columns spill to a temporary directory here past unique_memory_mb each
+    spill_dir = options.get("spill_dir") or dest_dir
+    unique_state = {col: HashedUniqueSet(options.get("unique_memory_mb"), spill_dir) for col in schema.get("unique", [])}
+
+    progress(0, 0, message="Starting import")
+
+    # Prepare writers
+    clean_writer = get_writer(output_format if output_format in {"csv", "jsonl", "xlsx"} else "csv")
+    error_writer = get_writer("csv")
+
+    writer = _WriterThread(depth)
+    chunks = prefetch(read_chunks_with_position(file_path, input_format, chunk_size, json_array_pointer=json_array_pointer), depth)
+    try:
+        for df, position, end in chunks:
+            clean_df, errors_df, unique_state = validate_chunk(df, schema, unique_state)
+
+            if not clean_df.empty:
+                writer.submit(clean_writer, clean_output, clean_df, header_written_clean)
+                header_written_clean = True
+                valid_rows += len(clean_df)
+
+            if not errors_df.empty:
+                # ensure error column present
+                if "__errors" not in errors_df.columns:
+                    errors_df["__errors"] = "validation error"
+                writer.submit(error_writer, error_output_csv, errors_df, header_written_errors)
+                header_written_errors = True
+                invalid_rows += len(errors_df)
+                if len(sample_errors) < 20:
+                    sample_errors.extend(errors_df.head(20 - len(sample_errors)).to_dict(orient="records"))
+
+            processed += len(df)
+            estimated = max(processed, int(processed * end / position)) if position else processed
+            progress(processed, estimated, message="Importing/validating",
+                     extra={"valid_rows": valid_rows, "invalid_rows": invalid_rows, "position": position, "end": end})
+    except BaseException:
+        chunks.close()
+        writer.close(abort=True)
+        raise
+    finally:
+        for index in unique_state.values():
+            index.close()
+    writer.close()
+
+    result = {
+        "status": "completed",
+        "file": file_path,
+        "total_rows": processed,
+        "processed": processed,
+        "valid_rows": valid_rows,
+        "invalid_rows": invalid_rows,
+        "clean_output": clean_output,
+        "errors_output": error_output_csv,
+        "sample_errors": sample_errors,
+    }
+    progress(processed, processed, message="Import completed", extra=result)
+    return result
@@ -60,6 +60,71 @@ def count_rows(path: str, fmt: Optional[str] = None, json_array_pointer: str = "
         raise ValueError(f"Unsupported format for counting: {fmt}")
 
 
+class CountingReader(io.RawIOBase):
+    """Binary file that counts the bytes its reader has pulled so far."""
+
+    def __init__(self, path: str):
+        self._f = open(path, "rb", buffering=0)
+        self.consumed = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = self._f.readinto(b) or 0
+        self.consumed += n
+        return n
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+def read_chunks_with_position(path: str, fmt: Optional[str], chunksize: int, json_array_pointer: str = "item") -> Iterator[Tuple[pd.DataFrame, int, int]]:
+    """Chunks like get_reader, each with (position, end) for progress.
+
+    For text formats these are bytes read so far (ahead of the chunk by at
+    most the parser's buffer) and the file size, so progress needs no
+    counting pre-pass. For xlsx they are rows read and the sheet's rows.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == "xlsx":
+        wb = load_workbook(path, read_only=True)
+        total = max((wb.active.max_row or 0) - 1, 0)
+        wb.close()
+        read = 0
+        for df in read_excel_chunks(path, chunksize):
+            read += len(df)
+            yield df, read, total
+        return
+    size = os.path.getsize(path)
+    raw = CountingReader(path)
+    try:
+        if fmt == "csv":
+            chunks = pd.read_csv(io.BufferedReader(raw, 1024 * 1024), chunksize=chunksize, low_memory=False)
+        elif fmt == "jsonl":
+            chunks = pd.read_json(io.TextIOWrapper(io.BufferedReader(raw), encoding="utf-8"), orient="records", lines=True, chunksize=chunksize)
+        elif fmt == "json":
+            chunks = _json_array_batches(io.BufferedReader(raw), chunksize, json_array_pointer)
+        else:
+            raise ValueError(f"Unsupported input format: {fmt}")
+        for df in chunks:
+            yield df, min(raw.consumed, size), size
+    finally:
+        raw.close()
+
+
+def _json_array_batches(f, chunksize: int, pointer: str) -> Iterator[pd.DataFrame]:
+    batch: List[Dict] = []
+    for obj in ijson.items(f, pointer):
+        batch.append(obj)
+        if len(batch) >= chunksize:
+            yield pd.DataFrame(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch)
+
+
 def read_csv_chunks(path: str, chunksize: int, **kwargs) -> Iterator[pd.DataFrame]:
     kwargs = {"low_memory": False, **kwargs}
     for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs):
@@ -73,15 +138,8 @@ def read_jsonl_chunks(path: str, chunksize: int, **kwargs) -> Iterator[pd.DataFr
 
 def read_json_array_chunks(path: str, chunksize: int, pointer: str = "item") -> Iterator[pd.DataFrame]:
     # Stream array elements into batches
-    batch: List[Dict] = []
     with open(path, "rb") as f:
-        for obj in ijson.items(f, pointer):
-            batch.append(obj)
-            if len(batch) >= chunksize:
-                yield pd.DataFrame(batch)
-                batch = []
-    if batch:
-        yield pd.DataFrame(batch)
+        yield from _json_array_batches(f, chunksize, pointer)
 
 
 def read_excel_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
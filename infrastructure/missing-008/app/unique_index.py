@@ -0,0 +1,219 @@
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_MEMORY_MB = float(os.getenv("UNIQUE_INDEX_MEMORY_MB", "64"))
+MAX_RUNS = 4
+MERGE_BLOCK = 1 << 20
+
+# Values of different kinds never compare equal, so their hashes are salted apart
+_SALT_FLOAT = np.uint64(0x9E3779B97F4A7C15)
+_SALT_DATETIME = np.uint64(0xC2B2AE3D27D4EB4F)
+_SALT_TEXT = np.uint64(0x165667B19E3779F9)
+# Integers outside int64 hash as their decimal text, under their own salt
+_SALT_BIGINT = np.uint64(0x27D4EB2F165667C5)
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+
+
+def hash_values(series: pd.Series) -> np.ndarray:
+    """64-bit hashes of non-null values, equal for values Python considers equal.
+
+    Chunks of one column may be read with different dtypes (an int column
+    turns float once a chunk has a gap, a JSON id may not fit int64), so
+    integral floats hash as the integers they equal, and integers outside
+    int64 hash by their exact value rather than through int64 or float64.
+    """
+    if series.empty:
+        return np.empty(0, dtype=np.uint64)
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return pd.util.hash_array(series.to_numpy(dtype=np.int64))
+    if pd.api.types.is_unsigned_integer_dtype(dtype):
+        values = series.to_numpy(dtype=np.uint64)
+        big = values > np.uint64(_INT64_MAX)
+        hashes = np.empty(len(values), dtype=np.uint64)
+        hashes[~big] = pd.util.hash_array(values[~big].astype(np.int64))
+        if big.any():
+            hashes[big] = _hash_bigints(values[big].astype(object))
+        return hashes
+    if pd.api.types.is_integer_dtype(dtype):
+        return pd.util.hash_array(series.to_numpy(dtype=np.int64))
+    if pd.api.types.is_float_dtype(dtype):
+        return _hash_floats(series.to_numpy(dtype=np.float64))
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+        dtype = series.dtype
+    if pd.api.types.is_datetime64_dtype(dtype):
+        return pd.util.hash_array(series.to_numpy(dtype="datetime64[ns]").view(np.int64)) ^ _SALT_DATETIME
+    if dtype == object:
+        inferred = pd.api.types.infer_dtype(series, skipna=True)
+        if inferred == "integer":
+            return _hash_int_objects(series.to_numpy(dtype=object))
+        if inferred == "floating":
+            return _hash_floats(series.to_numpy(dtype=np.float64))
+        if inferred not in ("string", "empty"):
+            # Mixed: numbers hash as numbers, the rest as text, so 1 and "1" stay apart
+            values = series.to_numpy(dtype=object)
+            ints = np.fromiter((isinstance(v, (int, np.integer)) and not isinstance(v, (bool, np.bool_)) for v in values),
+                               dtype=bool, count=len(values))
+            floats = np.fromiter((isinstance(v, (float, np.floating)) for v in values), dtype=bool, count=len(values))
+            rest = ~(ints | floats)
+            hashes = np.empty(len(values), dtype=np.uint64)
+            if ints.any():
+                hashes[ints] = _hash_int_objects(values[ints])
+            if floats.any():
+                hashes[floats] = _hash_floats(values[floats].astype(np.float64))
+            if rest.any():
+                hashes[rest] = _hash_text(pd.Series(values[rest]))
+            return hashes
+    return _hash_text(series)
+
+
+def _hash_bigints(values: np.ndarray) -> np.ndarray:
+    return pd.util.hash_array(np.array([str(int(v)) for v in values], dtype=object), categorize=False) ^ _SALT_BIGINT
+
+
+def _hash_int_objects(values: np.ndarray) -> np.ndarray:
+    """Python ints of any size (object array)."""
+    try:
+        return pd.util.hash_array(values.astype(np.int64))
+    except OverflowError:
+        pass
+    in_range = np.fromiter((_INT64_MIN <= v <= _INT64_MAX for v in values), dtype=bool, count=len(values))
+    hashes = np.empty(len(values), dtype=np.uint64)
+    hashes[in_range] = pd.util.hash_array(values[in_range].astype(np.int64))
+    hashes[~in_range] = _hash_bigints(values[~in_range])
+    return hashes
+
+
+def _hash_floats(values: np.ndarray) -> np.ndarray:
+    integral = np.isfinite(values) & (np.floor(values) == values)
+    small = integral & (values >= float(_INT64_MIN)) & (values < 2.0 ** 63)
+    hashes = pd.util.hash_array(values) ^ _SALT_FLOAT
+    if small.any():
+        hashes[small] = pd.util.hash_array(values[small].astype(np.int64))
+    big = integral & ~small
+    if big.any():
+        hashes[big] = _hash_bigints(values[big])
+    return hashes
+
+
+def _hash_text(series: pd.Series) -> np.ndarray:
+    return pd.util.hash_array(series.astype(str).to_numpy(dtype=object), categorize=False) ^ _SALT_TEXT
+
+
+def _isin_sorted(sorted_values: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    if len(sorted_values) == 0 or len(queries) == 0:
+        return np.zeros(len(queries), dtype=bool)
+    idx = np.searchsorted(sorted_values, queries)
+    found = idx < len(sorted_values)
+    found[found] = sorted_values[idx[found]] == queries[found]
+    return found
+
+
+def _merge_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    merged = np.concatenate([a, b])
+    # Two sorted runs: the stable sort only merges them
+    merged.sort(kind="stable")
+    return merged
+
+
+class HashedUniqueSet:
+    """Set of value hashes that spills sorted runs to disk past a memory budget.
+
+    New hashes collect in a small sorted buffer, which is merged into the
+    main in-memory array when full; that array is written out as a sorted
+    run once it reaches ``memory_mb``. Lookups binary-search the buffer,
+    the array and every run (memory-mapped). More than MAX_RUNS runs are
+    merged pairwise, block by block, so memory stays bounded however many
+    values are added. 64-bit hashes make a false duplicate unlikely
+    (about n^2 / 2^65 for n distinct values).
+    """
+
+    def __init__(self, memory_mb: Optional[float] = None, spill_dir: Optional[str] = None):
+        self.limit = max(1024, int((memory_mb if memory_mb is not None else DEFAULT_MEMORY_MB) * 1024 * 1024 // 8))
+        self.spill_dir = spill_dir
+        self._buffer = np.empty(0, dtype=np.uint64)
+        self._main = np.empty(0, dtype=np.uint64)
+        self._runs: List[np.memmap] = []
+        self._tmp: Optional[str] = None
+        self._run_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer) + len(self._main) + sum(len(r) for r in self._runs)
+
+    @property
+    def spilled_runs(self) -> int:
+        return len(self._runs)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        found = _isin_sorted(self._buffer, hashes) | _isin_sorted(self._main, hashes)
+        if self._runs and not found.all():
+            order = np.argsort(hashes, kind="stable")
+            queries = hashes[order]
+            hit = np.zeros(len(queries), dtype=bool)
+            for run in self._runs:
+                hit |= _isin_sorted(run, queries)
+            found[order] |= hit
+        return found
+
+    def add(self, hashes: np.ndarray) -> np.ndarray:
+        """Add ``hashes``; returns which of them were already present."""
+        found = self.contains(hashes)
+        new = np.sort(hashes[~found])
+        if len(new) == 0:
+            return found
+        new = new[np.concatenate(([True], new[1:] != new[:-1]))]
+        self._buffer = _merge_sorted(self._buffer, new)
+        if len(self._buffer) >= self.limit // 8:
+            self._main = _merge_sorted(self._main, self._buffer)
+            self._buffer = np.empty(0, dtype=np.uint64)
+            if len(self._main) >= self.limit:
+                self._spill()
+        return found
+
+    def _run_path(self) -> str:
+        if self._tmp is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            self._tmp = tempfile.mkdtemp(prefix="unique-", dir=self.spill_dir)
+        self._run_seq += 1
+        return os.path.join(self._tmp, f"run-{self._run_seq}.u64")
+
+    def _spill(self):
+        path = self._run_path()
+        self._main.tofile(path)
+        self._runs.append(np.memmap(path, dtype=np.uint64, mode="r"))
+        self._main = np.empty(0, dtype=np.uint64)
+        while len(self._runs) > MAX_RUNS:
+            self._runs.sort(key=len)
+            a, b = self._runs.pop(0), self._runs.pop(0)
+            self._runs.append(self._merge_runs(a, b))
+
+    def _merge_runs(self, a: np.memmap, b: np.memmap) -> np.memmap:
+        path = self._run_path()
+        i = j = 0
+        with open(path, "wb") as out:
+            while i < len(a) or j < len(b):
+                # Everything up to the smaller of the two block ends can be merged now
+                cut = min(a[min(i + MERGE_BLOCK, len(a)) - 1] if i < len(a) else np.iinfo(np.uint64).max,
+                          b[min(j + MERGE_BLOCK, len(b)) - 1] if j < len(b) else np.iinfo(np.uint64).max)
+                i2 = i + int(np.searchsorted(a[i:i + MERGE_BLOCK], cut, side="right"))
+                j2 = j + int(np.searchsorted(b[j:j + MERGE_BLOCK], cut, side="right"))
+                _merge_sorted(np.asarray(a[i:i2]), np.asarray(b[j:j2])).tofile(out)
+                i, j = i2, j2
+        os.remove(a.filename)
+        os.remove(b.filename)
+        return np.memmap(path, dtype=np.uint64, mode="r")
+
+    def close(self):
+        self._runs = []
+        if self._tmp:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+            self._tmp = None
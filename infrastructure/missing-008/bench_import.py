@@ -0,0 +1,182 @@
+"""
+Import throughput and peak memory: the previous import loop vs the pipeline.
+
+Generates a --rows row CSV (id and email unique, age within 0..120, name
+required, code matching a regex; about --bad-pct percent of rows break
+one rule, including duplicates far apart) and imports it with:
+
+  legacy    what import_task did before: a count_rows pre-pass, then read,
+            validate and write each chunk in turn, uniqueness in Python sets
+  pipeline  app.import_pipeline.run_import: overlapping read / validate /
+            write stages, vectorized checks, HashedUniqueSet per column
+
+Each variant runs in its own process; the report gives rows/sec, peak RSS
+and the valid/invalid row counts (which must agree).
+
+    python bench_import.py --rows 10000000
+"""
+
+import argparse
+import json
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+SCHEMA = {
+    "required_columns": ["id", "name"],
+    "dtypes": {"id": "int", "age": "int"},
+    "constraints": {"age": {"min": 0, "max": 120}, "code": {"regex": r"[A-Z]{2}-\d{4}$"}},
+    "unique": ["id", "email"],
+}
+
+
+def generate(path, rows, bad_pct, block=1_000_000):
+    rng = np.random.default_rng(0)
+    for start in range(0, rows, block):
+        n = min(block, rows - start)
+        ids = np.arange(start, start + n)
+        bad = rng.random(n) < bad_pct / 100.0
+        kind = rng.integers(0, 5, n)
+        # Duplicates point far back, across many chunks
+        ids = np.where(bad & (kind == 0), rng.integers(0, start + 1, n), ids)
+        ages = rng.integers(0, 121, n).astype(object)
+        ages[bad & (kind == 1)] = 150
+        names = np.array(["alice", "bob", "carol", "dave"], dtype=object)[rng.integers(0, 4, n)]
+        names[bad & (kind == 2)] = None
+        codes = np.char.add(np.array(["AB-", "XY-", "QZ-"])[rng.integers(0, 3, n)], rng.integers(1000, 10000, n).astype(str)).astype(object)
+        codes[bad & (kind == 3)] = "bad"
+        emails = np.char.add(np.char.add("user", ids.astype(str)), "@example.com").astype(object)
+        emails[bad & (kind == 4)] = "user0@example.com"
+        pd.DataFrame({"id": ids, "email": emails, "age": ages, "name": names, "code": codes}).to_csv(
+            path, mode="a" if start else "w", header=start == 0, index=False)
+
+
+def legacy_validate(df, schema, unique_state):
+    """The previous validate_chunk, minus the dtype table it shares with the current one."""
+    from app.data_validation import coerce_dtypes
+    df = coerce_dtypes(df, schema.get("dtypes", {}))
+    msgs = pd.Series(["" for _ in range(len(df))], index=df.index, dtype="object")
+
+    def flag(mask, text):
+        if mask.any():
+            msgs.loc[mask] = msgs.loc[mask] + ("; " if msgs.loc[mask].astype(bool).any() else "") + text
+
+    for col in set(schema.get("required_columns", [])):
+        flag(df[col].isna(), f"{col} is required")
+    for col, rules in schema.get("constraints", {}).items():
+        series = df[col]
+        if series.dtype.kind in {"i", "u", "f"} or str(series.dtype).startswith("Int"):
+            if "min" in rules:
+                flag(series < rules["min"], f"{col} < {rules['min']}")
+            if "max" in rules:
+                flag(series > rules["max"], f"{col} > {rules['max']}")
+        if "regex" in rules:
+            flag(~df[col].astype(str).str.match(re.compile(rules["regex"])) & df[col].notna(), f"{col} regex mismatch")
+    for col in schema.get("unique", []):
+        seen = unique_state.setdefault(col, set())
+        flag(df[col].duplicated(keep=False), f"{col} duplicate in chunk")
+        flag(df[col].isin(seen), f"{col} duplicate across chunks")
+        for v in df.loc[df[col].notna(), col].tolist():
+            seen.add(v)
+    invalid = msgs.astype(bool)
+    errors = df.loc[invalid].copy()
+    errors["__errors"] = msgs.loc[invalid].values
+    return df.loc[~invalid].copy(), errors, unique_state
+
+
+def run_legacy(csv_path, out_dir, chunk_size):
+    from app.io_utils import count_rows, get_reader, writer_csv
+    total = count_rows(csv_path, fmt="csv")
+    state, valid, invalid, clean_hdr, err_hdr = {}, 0, 0, False, False
+    for df in get_reader(csv_path, "csv", chunk_size):
+        clean, errors, state = legacy_validate(df, SCHEMA, state)
+        if not clean.empty:
+            writer_csv(os.path.join(out_dir, "clean.csv"), clean, clean_hdr)
+            clean_hdr = True
+            valid += len(clean)
+        if not errors.empty:
+            writer_csv(os.path.join(out_dir, "errors.csv"), errors, err_hdr)
+            err_hdr = True
+            invalid += len(errors)
+    return {"total_rows": total, "valid_rows": valid, "invalid_rows": invalid}
+
+
+def run_pipeline(csv_path, out_dir, chunk_size, unique_memory_mb):
+    from app.import_pipeline import run_import
+    res = run_import(csv_path, out_dir, SCHEMA, {"chunk_size": chunk_size, "unique_memory_mb": unique_memory_mb})
+    return {k: res[k] for k in ("total_rows", "valid_rows", "invalid_rows")}
+
+
+def peak_rss_mb():
+    # ru_maxrss survives exec, so it would include the parent that generated the CSV
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def child(args):
+    out_dir = tempfile.mkdtemp(prefix="import-out-", dir=os.path.dirname(args.csv))
+    t0 = time.perf_counter()
+    try:
+        if args.variant == "legacy":
+            res = run_legacy(args.csv, out_dir, args.chunk_size)
+        else:
+            res = run_pipeline(args.csv, out_dir, args.chunk_size, args.unique_memory_mb)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - t0
+    res.update(seconds=round(elapsed, 1), rows_per_sec=round(res["total_rows"] / elapsed),
+               peak_rss_mb=peak_rss_mb())
+    print(json.dumps(res))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--bad-pct", type=float, default=2.0)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--unique-memory-mb", type=float, default=16.0)
+    parser.add_argument("--variant", choices=["legacy", "pipeline"], help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.variant:
+        child(args)
+        return
+
+    work = tempfile.mkdtemp(prefix="import-bench-")
+    try:
+        csv_path = os.path.join(work, "input.csv")
+        t0 = time.perf_counter()
+        generate(csv_path, args.rows, args.bad_pct)
+        print(f"{args.rows} rows, {os.path.getsize(csv_path) / 1e6:.0f} MB in {time.perf_counter() - t0:.0f}s", flush=True)
+        report = {}
+        for variant in ("legacy", "pipeline"):
+            out = subprocess.run([sys.executable, __file__, "--variant", variant, "--csv", csv_path,
+                                  "--chunk-size", str(args.chunk_size), "--unique-memory-mb", str(args.unique_memory_mb)],
+                                 capture_output=True, text=True, check=True)
+            report[variant] = json.loads(out.stdout.strip().splitlines()[-1])
+        report["counts_match"] = all(report["legacy"][k] == report["pipeline"][k]
+                                     for k in ("total_rows", "valid_rows", "invalid_rows"))
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,12 @@ Routes requests to appropriate microservices
 
 import os
 import json
-import requests
 from pathlib import Path
-from flask import Flask, request, jsonify, Response
+from flask import Flask, jsonify
 from flask_cors import CORS
 
+from proxy import ProxyEngine
+
 app = Flask(__name__)
 CORS(app)
 
@@ -18,6 +19,8 @@ REGISTRY_PATH = Path(__file__).parent.parent / "service_registry.json"
 with open(REGISTRY_PATH) as f:
     REGISTRY = json.load(f)
 
+PROXY = ProxyEngine(REGISTRY)
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
@@ -37,37 +40,15 @@ def list_services():
             })
     return jsonify({"services": all_services, "total": len(all_services)})
 
-@app.route('/api/<category>/<module>/<path:endpoint>', methods=['GET', 'POST', 'PUT', 'DELETE'])
+@app.route('/api/proxy/stats')
+def proxy_stats():
+    """Per-module pool and concurrency stats"""
+    return jsonify(PROXY.stats())
+
+@app.route('/api/<category>/<module>/<path:endpoint>', methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS'])
 def proxy_request(category, module, endpoint):
     """Proxy requests to specific module"""
-
-    # Find module in registry
-    if category not in REGISTRY or module not in REGISTRY[category]:
-        return jsonify({"error": "Module not found"}), 404
-
-    module_info = REGISTRY[category][module]
-    port = module_info["port"]
-
-    # Build target URL
-    target_url = f"http://{module}:{5000}/{endpoint}"
-
-    # Forward request
-    try:
-        if request.method == 'GET':
-            resp = requests.get(target_url, params=request.args, timeout=30)
-        elif request.method == 'POST':
-            resp = requests.post(target_url, json=request.get_json(), timeout=30)
-        elif request.method == 'PUT':
-            resp = requests.put(target_url, json=request.get_json(), timeout=30)
-        elif request.method == 'DELETE':
-            resp = requests.delete(target_url, timeout=30)
-
-        return Response(resp.content, status=resp.status_code, content_type=resp.headers.get('Content-Type'))
-
-    except requests.exceptions.ConnectionError:
-        return jsonify({"error": f"Module {module} is not reachable"}), 503
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return PROXY.forward(category, module, endpoint)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8000, debug=True)
@@ -0,0 +1,154 @@
+"""
+Proxy benchmark: per-call requests (old proxy_request) vs pooled ProxyEngine.
+
+Starts a keep-alive upstream and two orchestrator front-ends on localhost,
+then drives both with the same concurrent load and reports req/s and
+p50/p99 latency.
+
+    python bench_proxy.py --requests 2000 --concurrency 16 --payload 16384
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from flask import Flask, request, Response
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from proxy import ProxyEngine
+
+
+def start_upstream(payload_size: int):
+    payload = b"x" * payload_size
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = _reply
+        do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def legacy_app(upstream: str) -> Flask:
+    """The pre-pool proxy_request: new connection and full buffering per call."""
+    app = Flask("legacy")
+
+    @app.route("/api/<category>/<module>/<path:endpoint>", methods=["GET", "POST"])
+    def proxy_request(category, module, endpoint):
+        target_url = f"{upstream}/{endpoint}"
+        if request.method == "GET":
+            resp = requests.get(target_url, params=request.args, timeout=30)
+        else:
+            resp = requests.post(target_url, json=request.get_json(silent=True), timeout=30)
+        return Response(resp.content, status=resp.status_code,
+                        content_type=resp.headers.get("Content-Type"))
+
+    return app
+
+
+def pooled_app(upstream: str, concurrency: int) -> Flask:
+    app = Flask("pooled")
+    registry = {"backend": {"bench": {"proxy": {
+        "upstream": upstream,
+        "max_concurrency": concurrency * 2,
+    }}}}
+    engine = ProxyEngine(registry)
+
+    @app.route("/api/<category>/<module>/<path:endpoint>", methods=["GET", "POST"])
+    def proxy_request(category, module, endpoint):
+        return engine.forward(category, module, endpoint)
+
+    return app
+
+
+class _NoDelayHandler(WSGIRequestHandler):
+    # gunicorn sets TCP_NODELAY too; without it keep-alive hops stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+
+def serve(app: Flask):
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_NoDelayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def drive(base: str, total: int, concurrency: int, method: str) -> dict:
+    local = threading.local()
+    url = f"{base}/api/backend/bench/echo"
+
+    def one(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        if method == "POST":
+            r = session.post(url, json={"q": "bench"})
+        else:
+            r = session.get(url, params={"q": "bench"})
+        r.content
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(min(50, total))))  # warm-up
+        start = time.perf_counter()
+        latencies = sorted(pool.map(one, range(total)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "req_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--payload", type=int, default=16 * 1024)
+    parser.add_argument("--method", choices=["GET", "POST"], default="GET")
+    args = parser.parse_args()
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    upstream, upstream_url = start_upstream(args.payload)
+    servers = []
+    results = {}
+    for name, app in (
+        ("legacy", legacy_app(upstream_url)),
+        ("pooled", pooled_app(upstream_url, args.concurrency)),
+    ):
+        server, base = serve(app)
+        servers.append(server)
+        results[name] = drive(base, args.requests, args.concurrency, args.method)
+
+    for server in servers + [upstream]:
+        server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
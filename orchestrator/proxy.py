@@ -0,0 +1,240 @@
+"""
+Reverse proxy engine for the orchestrator.
+
+Keeps one keep-alive connection pool per module, streams request and
+response bodies through without buffering them, and enforces per-route
+timeouts and a per-module concurrency limit. Routes come from
+service_registry.json; any module entry may carry an optional "proxy"
+object overriding the defaults below, e.g.
+
+    "a-001": {..., "proxy": {"read_timeout": 120, "max_concurrency": 8}}
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import request, jsonify, Response
+
+
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+DEFAULT_ROUTE = {
+    "upstream": None,  # defaults to http://<module>:5000
+    "connect_timeout": _env_float("PROXY_CONNECT_TIMEOUT", 3.05),
+    "read_timeout": _env_float("PROXY_READ_TIMEOUT", 30.0),
+    "max_concurrency": _env_int("PROXY_MAX_CONCURRENCY", 32),
+    "queue_timeout": _env_float("PROXY_QUEUE_TIMEOUT", 5.0),
+    # Kept connections; 0 (default) or anything smaller means max_concurrency,
+    # so every concurrent request can return its connection to the pool
+    "pool_size": _env_int("PROXY_POOL_SIZE", 0),
+}
+
+
+def filter_headers(headers: Iterable) -> Dict[str, str]:
+    """Drop hop-by-hop headers and Host before forwarding."""
+    return {
+        k: v
+        for k, v in headers
+        if k.lower() not in HOP_BY_HOP_HEADERS and k.lower() != "host"
+    }
+
+
+class _RequestBody:
+    """Iterates the incoming WSGI stream in chunks.
+
+    Exposes ``__len__`` when the client sent a Content-Length so requests
+    forwards it as-is; otherwise the body goes upstream chunked.
+    """
+
+    def __init__(self, stream, length: Optional[int]):
+        self.stream = stream
+        self.length = length
+
+    def __len__(self):
+        return self.length or 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            chunk = self.stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+class _UpstreamBody:
+    """Streams the upstream response and releases the route on close."""
+
+    def __init__(self, upstream: requests.Response, release):
+        self.upstream = upstream
+        self.release = release
+        self.closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        # decode_content=False keeps Content-Encoding/Content-Length valid
+        for chunk in self.upstream.raw.stream(CHUNK_SIZE, decode_content=False):
+            yield chunk
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.upstream.close()
+        finally:
+            self.release()
+
+
+class Route:
+    """Connection pool, limits and timeouts for a single module."""
+
+    def __init__(self, module: str, config: dict):
+        self.module = module
+        self.upstream = (config.get("upstream") or f"http://{module}:5000").rstrip("/")
+        self.timeout = (float(config["connect_timeout"]), float(config["read_timeout"]))
+        self.queue_timeout = float(config["queue_timeout"])
+        self.max_concurrency = int(config["max_concurrency"])
+        self.slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+        self.pool_size = max(int(config.get("pool_size") or 0), self.max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=0,
+            pool_block=False,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def acquire(self) -> bool:
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "upstream": self.upstream,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "pool_size": self.pool_size,
+            "rejected": self.rejected,
+            "timeout": list(self.timeout),
+        }
+
+
+class ProxyEngine:
+    """Registry-driven streaming reverse proxy."""
+
+    def __init__(self, registry: dict, defaults: Optional[dict] = None):
+        self.registry = registry
+        self.defaults = dict(DEFAULT_ROUTE, **(defaults or {}))
+        self.routes: Dict[str, Route] = {}
+        self._lock = threading.Lock()
+
+    def route(self, category: str, module: str) -> Optional[Route]:
+        key = f"{category}/{module}"
+        route = self.routes.get(key)
+        if route is not None:
+            return route
+        if category not in self.registry or module not in self.registry[category]:
+            return None
+        with self._lock:
+            route = self.routes.get(key)
+            if route is None:
+                overrides = self.registry[category][module].get("proxy") or {}
+                route = Route(module, dict(self.defaults, **overrides))
+                self.routes[key] = route
+        return route
+
+    def forward(self, category: str, module: str, endpoint: str):
+        """Forward the current Flask request to ``module`` and stream the reply."""
+        route = self.route(category, module)
+        if route is None:
+            return jsonify({"error": "Module not found"}), 404
+
+        if not route.acquire():
+            return jsonify({"error": f"Module {module} is at capacity"}), 503
+
+        try:
+            body = None
+            if request.method not in ("GET", "HEAD", "OPTIONS") or request.content_length:
+                body = _RequestBody(request.stream, request.content_length)
+
+            upstream = route.session.request(
+                method=request.method,
+                url=f"{route.upstream}/{endpoint}",
+                params=request.args.to_dict(flat=False),
+                data=body,
+                headers=filter_headers(request.headers.items()),
+                allow_redirects=False,
+                timeout=route.timeout,
+                stream=True,
+            )
+        except requests.exceptions.ConnectTimeout:
+            route.release()
+            return jsonify({"error": f"Module {module} timed out"}), 504
+        except requests.exceptions.ReadTimeout:
+            route.release()
+            return jsonify({"error": f"Module {module} timed out"}), 504
+        except requests.exceptions.ConnectionError:
+            route.release()
+            return jsonify({"error": f"Module {module} is not reachable"}), 503
+        except Exception as e:
+            route.release()
+            return jsonify({"error": str(e)}), 500
+
+        headers = [
+            (k, v) for k, v in upstream.raw.headers.items()
+            if k.lower() not in HOP_BY_HOP_HEADERS
+        ]
+        return Response(
+            _UpstreamBody(upstream, route.release),
+            status=upstream.status_code,
+            headers=headers,
+            direct_passthrough=True,
+        )
+
+    def stats(self) -> dict:
+        return {key: route.stats() for key, route in list(self.routes.items())}
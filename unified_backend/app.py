@@ -6,14 +6,21 @@ Save as: D:/Assemblyline/unified_app/unified_backend/app.py
 import os
 import sys
 import json
-import importlib.util
 from pathlib import Path
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 
+from dispatch import ModuleDispatcher
+from loader import ModuleLoader
+from residency import ResidencyManager
+
 app = Flask(__name__)
 CORS(app)
 
+# "wsgi" mounts module apps directly (see dispatch.py); "test_client"
+# keeps the old proxy_request path that replays each call through a client
+DISPATCH_MODE = os.environ.get("UNIFIED_DISPATCH_MODE", "wsgi")
+
 # Load service registry
 REGISTRY_PATH = Path(__file__).parent.parent / "service_registry.json"
 SERVICE_REGISTRY = {}
@@ -31,38 +38,68 @@ except Exception as e:
 MODULE_CACHE = {}
 
 
+LOADER = ModuleLoader(
+    Path(__file__).parent.parent,
+    cache=MODULE_CACHE,
+    backoff_base=float(os.environ.get("UNIFIED_LOAD_BACKOFF", "5")),
+    backoff_max=float(os.environ.get("UNIFIED_LOAD_BACKOFF_MAX", "300")),
+)
+
+RESIDENCY = ResidencyManager(
+    LOADER,
+    budget_mb=float(os.environ.get("UNIFIED_RSS_BUDGET_MB", "0")),
+    max_resident=int(os.environ.get("UNIFIED_MAX_RESIDENT", "0")),
+    pinned=[m for m in os.environ.get("UNIFIED_PINNED", "").split(",") if m],
+    drop_dependencies=os.environ.get("UNIFIED_EVICT_DEPENDENCIES", "0") == "1",
+)
+
+# Warm-up at startup: "off", "priority" (only UNIFIED_WARMUP_PRIORITY) or "all"
+WARMUP_MODE = os.environ.get("UNIFIED_WARMUP", "off")
+WARMUP_WORKERS = int(os.environ.get("UNIFIED_WARMUP_WORKERS", "4"))
+WARMUP_PRIORITY = [m for m in os.environ.get("UNIFIED_WARMUP_PRIORITY", "").split(",") if m]
+
+
 def load_module(module_id, module_path):
     """Dynamically load a Python module"""
-    if module_id in MODULE_CACHE:
-        return MODULE_CACHE[module_id]
+    return RESIDENCY.load(module_id, module_path)
 
-    try:
-        # Convert relative path to absolute
-        full_path = Path(__file__).parent.parent / module_path / "app.py"
 
-        if not full_path.exists():
-            print(f"⚠ Module {module_id} not found at {full_path}")
-            return None
+def registry_entries():
+    """(module_id, path) for every module in the registry"""
+    for category, modules in SERVICE_REGISTRY.items():
+        if not isinstance(modules, dict):
+            continue
+        for module_id, info in modules.items():
+            if isinstance(info, dict) and info.get("path"):
+                yield module_id, info["path"]
 
-        # Load module
-        spec = importlib.util.spec_from_file_location(f"module_{module_id}", full_path)
-        if not spec or not spec.loader:
-            return None
 
-        module = importlib.util.module_from_spec(spec)
-        sys.modules[f"module_{module_id}"] = module
-        spec.loader.exec_module(module)
+def find_module(category, module_id):
+    """Registry entry for a module; the registry is keyed by category"""
+    modules = SERVICE_REGISTRY.get(category)
+    if isinstance(modules, dict) and isinstance(modules.get(module_id), dict):
+        return modules[module_id]
+    return SERVICE_REGISTRY.get(module_id)
 
-        # Cache the Flask app
-        if hasattr(module, 'app'):
-            MODULE_CACHE[module_id] = module.app
-            print(f"✓ Loaded module {module_id}")
-            return module.app
 
+def resolve_module_app(category, module_id):
+    """Loaded Flask app for a module, or None if it is unknown or broken"""
+    module_info = find_module(category, module_id)
+    if not module_info or not module_info.get("path"):
         return None
-    except Exception as e:
-        print(f"✗ Error loading module {module_id}: {e}")
-        return None
+    return load_module(module_id, module_info["path"])
+
+
+if DISPATCH_MODE == "wsgi":
+    app.wsgi_app = ModuleDispatcher(app.wsgi_app, resolve_module_app)
+
+if WARMUP_MODE in ("all", "priority"):
+    _entries = list(registry_entries())
+    if WARMUP_MODE == "priority":
+        _entries = [e for e in _entries if e[0] in WARMUP_PRIORITY]
+    LOADER.warm_in_background(
+        _entries, workers=WARMUP_WORKERS, priority=WARMUP_PRIORITY, load=RESIDENCY.load
+    )
 
 
 @app.route('/health', methods=['GET'])
@@ -73,7 +110,20 @@ def health():
         "service": "unified_backend",
         "modules_loaded": len(MODULE_CACHE),
         "total_modules": len(SERVICE_REGISTRY),
-        "registry_loaded": len(SERVICE_REGISTRY) > 0
+        "dispatch_mode": DISPATCH_MODE,
+        "registry_loaded": len(SERVICE_REGISTRY) > 0,
+        "loader": LOADER.summary(),
+        "residency": RESIDENCY.stats()
+    })
+
+
+@app.route('/api/loader/stats', methods=['GET'])
+def loader_stats():
+    """Import time and RSS delta for every module loaded so far"""
+    return jsonify({
+        "modules": LOADER.stats,
+        "failed": LOADER.summary()["failed"],
+        "warmup": LOADER.warmup
     })
 
 
@@ -104,10 +154,10 @@ def proxy_request(category, module_id, endpoint):
     Example: /api/backend/a-001/api/github/import
     """
     # Find module in registry
-    if module_id not in SERVICE_REGISTRY:
+    module_info = find_module(category, module_id)
+    if not module_info:
         return jsonify({"error": f"Module {module_id} not found"}), 404
 
-    module_info = SERVICE_REGISTRY[module_id]
     module_path = module_info.get("path")
 
     if not module_path:
@@ -0,0 +1,78 @@
+"""
+Dispatch micro-benchmark: test_client proxy_request vs direct WSGI mount.
+
+For each module, the same GET is issued three ways through a WSGI call
+(no socket): straight into the module app, through the unified app in
+"wsgi" mode, and through the old test_client proxy. The difference to the
+direct call is the per-request overhead each dispatch mode adds.
+
+    python bench_dispatch.py --modules a-002 m-006 h-004 --requests 2000
+"""
+
+import argparse
+import json
+import os
+import time
+
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+os.environ.setdefault("UNIFIED_DISPATCH_MODE", "wsgi")
+
+import app as unified  # noqa: E402
+
+
+def category_of(module_id):
+    for category, modules in unified.SERVICE_REGISTRY.items():
+        if isinstance(modules, dict) and module_id in modules:
+            return category
+    return None
+
+
+def per_request_us(wsgi_app, path, total):
+    environ = EnvironBuilder(path=path, method="GET").get_environ()
+    for _ in range(min(100, total)):
+        run_wsgi_app(wsgi_app, dict(environ), buffered=True)
+    start = time.perf_counter()
+    for _ in range(total):
+        app_iter, status, _headers = run_wsgi_app(wsgi_app, dict(environ), buffered=True)
+    elapsed = time.perf_counter() - start
+    return elapsed / total * 1e6, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modules", nargs="+", default=["a-002", "m-006", "h-004"])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    dispatcher = unified.app.wsgi_app
+    flask_only = getattr(dispatcher, "app", dispatcher)  # outer app without the mount
+
+    results = {}
+    for module_id in args.modules:
+        category = category_of(module_id)
+        module_app = unified.resolve_module_app(category, module_id) if category else None
+        if module_app is None:
+            results[module_id] = {"error": "module could not be loaded"}
+            continue
+
+        info = unified.find_module(category, module_id)
+        endpoint = info.get("health_endpoint") or "/"
+        mounted = f"/api/{category}/{module_id}{endpoint}"
+
+        direct, status = per_request_us(module_app, endpoint, args.requests)
+        wsgi, _ = per_request_us(dispatcher, mounted, args.requests)
+        test_client, _ = per_request_us(flask_only, mounted, args.requests)
+        results[module_id] = {
+            "endpoint": endpoint,
+            "status": status,
+            "direct_us": round(direct, 1),
+            "wsgi_overhead_us": round(wsgi - direct, 1),
+            "test_client_overhead_us": round(test_client - direct, 1),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Direct WSGI dispatch for module apps.
+
+Mounts every module app under /api/<category>/<module_id> and hands the
+incoming environ straight to it: no test_client, no body copy, and the
+module's response iterable is returned to the server as-is so both
+directions stream.
+"""
+
+
+class ModuleDispatcher:
+    """Path-prefix dispatcher in front of the unified Flask app.
+
+    ``resolve(category, module_id)`` returns the module's WSGI app, or None
+    to let the request fall through to ``app`` (which then renders the
+    404/500 JSON errors).
+    """
+
+    def __init__(self, app, resolve, prefix="/api", cors=True):
+        self.app = app
+        self.resolve = resolve
+        self.prefix = prefix.rstrip("/") + "/"
+        self.cors = cors
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if path.startswith(self.prefix):
+            parts = path[len(self.prefix):].split("/", 2)
+            if len(parts) >= 2 and parts[0] and parts[1]:
+                module_app = self.resolve(parts[0], parts[1])
+                if module_app is not None:
+                    mount = self.prefix + parts[0] + "/" + parts[1]
+                    environ["SCRIPT_NAME"] = environ.get("SCRIPT_NAME", "") + mount
+                    environ["PATH_INFO"] = "/" + (parts[2] if len(parts) > 2 else "")
+                    if self.cors and "HTTP_ORIGIN" in environ:
+                        start_response = _with_cors(start_response)
+                    return module_app(environ, start_response)
+        return self.app(environ, start_response)
+
+
+def _with_cors(start_response):
+    """Match flask_cors defaults on the outer app for dispatched responses."""
+
+    def wrapped(status, headers, exc_info=None):
+        if not any(k.lower() == "access-control-allow-origin" for k, _ in headers):
+            headers = list(headers) + [("Access-Control-Allow-Origin", "*")]
+        return start_response(status, headers, exc_info)
+
+    return wrapped
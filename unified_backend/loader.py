@@ -0,0 +1,298 @@
+"""
+Module loader for the unified backend.
+
+- Single import per module: a per-module lock makes concurrent first
+  requests wait for one import instead of executing app.py twice.
+- Negative cache: failed imports are remembered and retried only after an
+  exponential backoff.
+- Parallel warm-up: modules from service_registry.json can be loaded at
+  startup by a worker pool, priority modules first.
+- Per-module import time and RSS delta are recorded for /health. During a
+  parallel warm-up the RSS delta also includes whatever other workers
+  allocated meanwhile, so treat it as an upper bound.
+
+Executing a module's app.py is serialized: module apps import siblings by
+bare name (config, utils, ...), which requires the module directory on
+sys.path and sibling names out of sys.modules, both process-wide. The
+expensive parts run in parallel around it: third-party imports found in
+the module's sources are prefetched first, and create_app() factories run
+after the import lock is released.
+"""
+
+import ast
+import importlib
+import importlib.metadata
+import importlib.util
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def _rss_bytes():
+    """Current resident set size, best effort."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+def _sibling_names(module_dir):
+    """Top-level names a module can import from its own directory."""
+    names = set()
+    try:
+        for entry in os.scandir(module_dir):
+            if entry.is_file() and entry.name.endswith(".py"):
+                names.add(entry.name[:-3])
+            elif entry.is_dir() and not entry.name.startswith((".", "__")):
+                names.add(entry.name)
+    except OSError:
+        pass
+    return names
+
+
+def _import_roots(module_dir, max_depth=2):
+    """Absolute top-level import names used by the module's own sources."""
+    roots = set()
+    base_depth = len(Path(module_dir).parts)
+    for dirpath, dirnames, filenames in os.walk(module_dir):
+        depth = len(Path(dirpath).parts) - base_depth
+        dirnames[:] = [
+            d for d in dirnames
+            if depth < max_depth and not d.startswith((".", "__", "tests_", "venv"))
+        ]
+        for filename in filenames:
+            if not filename.endswith(".py"):
+                continue
+            try:
+                with open(os.path.join(dirpath, filename), "rb") as f:
+                    tree = ast.parse(f.read())
+            except (OSError, SyntaxError, ValueError):
+                continue
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    roots.update(alias.name.split(".")[0] for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    roots.add(node.module.split(".")[0])
+    return roots
+
+
+class ModuleLoader:
+    """Loads module Flask apps once, with negative caching and warm-up."""
+
+    def __init__(self, base_dir, cache=None, backoff_base=5.0, backoff_max=300.0):
+        self.base_dir = Path(base_dir)
+        self.cache = cache if cache is not None else {}
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {}
+        self.failures = {}
+        self.imports = {}
+        self.warmup = {"state": "idle"}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._import_lock = threading.RLock()
+        self._prefetchable = None
+        self._known_siblings = set()
+
+    def _lock_for(self, module_id):
+        with self._locks_guard:
+            lock = self._locks.get(module_id)
+            if lock is None:
+                lock = self._locks[module_id] = threading.Lock()
+            return lock
+
+    def module_dir(self, module_path):
+        # Registry paths use Windows separators
+        return self.base_dir / module_path.replace("\\", "/")
+
+    def load(self, module_id, module_path):
+        """Return the module's Flask app, importing it at most once."""
+        module_app = self.cache.get(module_id)
+        if module_app is not None:
+            return module_app
+
+        with self._lock_for(module_id):
+            module_app = self.cache.get(module_id)
+            if module_app is not None:
+                return module_app
+
+            failure = self.failures.get(module_id)
+            if failure and time.time() < failure["retry_at"]:
+                return None
+
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            try:
+                module_app = self._import(module_id, self.module_dir(module_path))
+                error = None if module_app is not None else "module has no app or create_app"
+            except Exception as e:
+                module_app, error = None, f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - start
+
+            self.stats[module_id] = {
+                "import_ms": round(elapsed * 1000, 1),
+                "rss_delta_kb": (_rss_bytes() - rss_before) // 1024,
+                "loaded_at": time.time(),
+                "ok": module_app is not None,
+            }
+
+            if module_app is None:
+                attempts = (failure or {}).get("attempts", 0) + 1
+                backoff = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+                self.failures[module_id] = {
+                    "error": error,
+                    "attempts": attempts,
+                    "retry_at": time.time() + backoff,
+                }
+                print(f"✗ Error loading module {module_id}: {error}")
+                return None
+
+            self.failures.pop(module_id, None)
+            self.cache[module_id] = module_app
+            print(f"✓ Loaded module {module_id} in {elapsed * 1000:.0f} ms")
+            return module_app
+
+    def _import(self, module_id, module_dir):
+        full_path = module_dir / "app.py"
+        if not full_path.exists():
+            raise FileNotFoundError(f"no app.py at {full_path}")
+
+        roots = _import_roots(module_dir) - _sibling_names(module_dir)
+        top_before = {name for name in sys.modules if "." not in name}
+        self._prefetch(module_dir, roots)
+
+        spec = importlib.util.spec_from_file_location(f"module_{module_id}", full_path)
+        if not spec or not spec.loader:
+            return None
+        module = importlib.util.module_from_spec(spec)
+
+        with self._import_lock:
+            sys.modules[f"module_{module_id}"] = module
+            before = set(sys.modules)
+            sys.path.insert(0, str(module_dir))
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                sys.modules.pop(f"module_{module_id}", None)
+                raise
+            finally:
+                sys.path.remove(str(module_dir))
+                # Forget this module's siblings so the next module's
+                # "import config" resolves to its own file, not ours
+                prefix = str(module_dir) + os.sep
+                for name in set(sys.modules) - before:
+                    origin = getattr(sys.modules.get(name), "__file__", None) or ""
+                    if origin.startswith(prefix):
+                        sys.modules.pop(name, None)
+
+        module_app = getattr(module, "app", None)
+        # Most modules only build their app from a factory
+        if module_app is None and callable(getattr(module, "create_app", None)):
+            module_app = module.create_app()
+
+        # What this module pulled in, so residency can decide what to unload.
+        # With parallel warm-up "introduced" may include a neighbour's imports.
+        self.imports[module_id] = {
+            "roots": roots,
+            "introduced": {
+                name for name in sys.modules
+                if "." not in name and name not in top_before and name != f"module_{module_id}"
+            },
+        }
+        return module_app
+
+    def unload(self, module_id):
+        """Drop a loaded module app; the next load() imports it again.
+
+        Returns the module's import record ({"roots", "introduced"}).
+        """
+        with self._lock_for(module_id):
+            self.cache.pop(module_id, None)
+            sys.modules.pop(f"module_{module_id}", None)
+            return self.imports.pop(module_id, {"roots": set(), "introduced": set()})
+
+    def _prefetch(self, module_dir, roots):
+        """Import the module's third-party dependencies outside the import lock.
+
+        Only names that belong to an installed distribution and are not a
+        sibling of any known module are imported, so this never shadows a
+        module's own config/utils.
+        """
+        if self._prefetchable is None:
+            try:
+                self._prefetchable = set(importlib.metadata.packages_distributions())
+            except Exception:
+                self._prefetchable = set()
+        for name in sorted(roots):
+            if name in sys.modules or name in self._known_siblings:
+                continue
+            if name not in self._prefetchable:
+                continue
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+
+    def warm(self, entries, workers=4, priority=(), load=None):
+        """Load ``entries`` ((module_id, module_path) pairs) with a worker pool.
+
+        Modules named in ``priority`` are submitted first, in that order.
+        ``load`` replaces self.load, e.g. to go through residency accounting.
+        """
+        load = load or self.load
+        entries = list(entries)
+        rank = {module_id: i for i, module_id in enumerate(priority)}
+        entries.sort(key=lambda e: rank.get(e[0], len(rank)))
+        for _, module_path in entries:
+            self._known_siblings |= _sibling_names(self.module_dir(module_path))
+
+        self.warmup = {
+            "state": "running",
+            "workers": workers,
+            "total": len(entries),
+            "done": 0,
+            "started_at": time.time(),
+        }
+        start = time.perf_counter()
+
+        def one(entry):
+            load(*entry)
+            with self._locks_guard:
+                self.warmup["done"] += 1
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="warmup") as pool:
+            list(pool.map(one, entries))
+
+        self.warmup["state"] = "done"
+        self.warmup["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return self.warmup
+
+    def warm_in_background(self, entries, workers=4, priority=(), load=None):
+        thread = threading.Thread(
+            target=self.warm, args=(entries, workers, priority, load),
+            name="module-warmup", daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def summary(self, slowest=20):
+        ranked = sorted(self.stats.items(), key=lambda kv: -kv[1]["import_ms"])
+        return {
+            "warmup": dict(self.warmup),
+            "import_ms_total": round(sum(s["import_ms"] for s in self.stats.values()), 1),
+            "slowest": [dict(module=module_id, **s) for module_id, s in ranked[:slowest]],
+            "failed": {
+                module_id: {"error": f["error"], "attempts": f["attempts"],
+                            "retry_in_s": max(0, round(f["retry_at"] - time.time(), 1))}
+                for module_id, f in list(self.failures.items())
+            },
+        }
@@ -0,0 +1,137 @@
+"""
+Memory-bounded residency for loaded module apps.
+
+Tracks module apps in LRU order and, after each new load, evicts the least
+recently used ones until the process is back under its RSS budget (and
+under the optional resident-count cap). Pinned modules are never evicted.
+
+Evicting a module drops its app from MODULE_CACHE and its module object
+from sys.modules. With ``drop_dependencies`` the third-party packages it
+introduced (sklearn, chromadb, ...) are removed from sys.modules too when
+no resident module imports them. Extension modules cannot truly be
+unloaded and some (numpy) warn when imported twice, so that is opt-in.
+"""
+
+import ctypes
+import gc
+import sys
+import threading
+from collections import OrderedDict
+
+from loader import _rss_bytes
+
+
+def _trim_heap():
+    """Hand freed arenas back to the OS so RSS actually drops (glibc only)."""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class ResidencyManager:
+    """LRU eviction of module apps under an RSS budget."""
+
+    def __init__(self, loader, budget_mb=0, max_resident=0, pinned=(), drop_dependencies=False):
+        self.loader = loader
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.max_resident = max_resident
+        self.pinned = set(pinned)
+        self.drop_dependencies = drop_dependencies
+        self.lru = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted = {}
+        self._lock = threading.Lock()
+
+    def load(self, module_id, module_path):
+        """Loader.load with LRU bookkeeping and eviction after misses."""
+        module_app = self.loader.cache.get(module_id)
+        if module_app is not None:
+            with self._lock:
+                self.hits += 1
+                self.lru[module_id] = True
+                self.lru.move_to_end(module_id)
+            return module_app
+
+        module_app = self.loader.load(module_id, module_path)
+        with self._lock:
+            self.misses += 1
+            if module_app is not None:
+                self.lru[module_id] = True
+                self.lru.move_to_end(module_id)
+        if module_app is not None:
+            self.enforce(keep=module_id)
+        return module_app
+
+    def pin(self, module_id):
+        self.pinned.add(module_id)
+
+    def unpin(self, module_id):
+        self.pinned.discard(module_id)
+
+    def _over_budget(self):
+        if self.max_resident and len(self.lru) > self.max_resident:
+            return True
+        return bool(self.budget_bytes) and _rss_bytes() > self.budget_bytes
+
+    def _victim(self, keep):
+        for module_id in self.lru:
+            if module_id != keep and module_id not in self.pinned:
+                return module_id
+        return None
+
+    def enforce(self, keep=None):
+        """Evict LRU modules until under budget; returns the evicted ids."""
+        evicted = []
+        while True:
+            with self._lock:
+                if not self._over_budget():
+                    break
+                over_count = bool(self.max_resident) and len(self.lru) > self.max_resident
+                victim = self._victim(keep)
+                if victim is None:
+                    break
+                del self.lru[victim]
+            rss_before = _rss_bytes()
+            self._evict(victim)
+            evicted.append(victim)
+            # Without collecting, RSS never reflects the eviction and we
+            # would keep evicting down to the pinned set
+            gc.collect()
+            _trim_heap()
+            if not over_count and _rss_bytes() >= rss_before:
+                # Memory held by shared extension modules; evicting more
+                # apps would only cause reload churn
+                break
+        return evicted
+
+    def _evict(self, module_id):
+        record = self.loader.unload(module_id)
+        with self._lock:
+            self.evictions += 1
+            self.evicted[module_id] = self.evicted.get(module_id, 0) + 1
+            still_used = set()
+            if self.drop_dependencies:
+                for other in self.lru:
+                    still_used |= self.loader.imports.get(other, {}).get("roots", set())
+        if self.drop_dependencies:
+            for root in record["introduced"] - still_used:
+                for name in [n for n in sys.modules if n == root or n.startswith(root + ".")]:
+                    sys.modules.pop(name, None)
+        print(f"↓ Evicted module {module_id}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "resident": len(self.lru),
+                "pinned": sorted(self.pinned),
+                "rss_mb": round(_rss_bytes() / (1024 * 1024), 1),
+                "budget_mb": round(self.budget_bytes / (1024 * 1024), 1),
+                "max_resident": self.max_resident,
+                "most_evicted": sorted(self.evicted.items(), key=lambda kv: -kv[1])[:10],
+            }